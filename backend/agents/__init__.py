@@ -6,6 +6,7 @@ electronic invoices (NF-e) and answering user queries.
 
 Main Components:
 - NFeCrew: Main crew orchestrating the multi-agent system
+- CrewPool: Prebuilt crews lent to concurrent requests
 - Tools: Database and schema query tools
 - Config: Agent and task configurations in YAML
 
@@ -17,9 +18,11 @@ Usage:
 """
 
 from agents.crew import NFeCrew, create_nfe_crew
+from agents.crew_pool import CrewPool
 
 __all__ = [
     "NFeCrew",
+    "CrewPool",
     "create_nfe_crew"
 ]
 
@@ -0,0 +1,248 @@
+"""
+Semantic answer cache for chat messages
+
+Users ask the same question in different words ("quanto faturamos em
+outubro?" / "qual o faturamento de outubro?"). Every answered question is
+embedded locally (the sentence-transformers model of the schema selection
+when installed, else the word and character-trigram vector of the intent
+classifier) and a new question whose nearest stored question is above
+answer_cache_min_similarity gets the stored answer, without a crew run.
+
+Questions that only differ in a literal (October / November, top 5 / top
+10, a CNPJ) or in one domain term (ICMS / IPI, SP / RJ, mais / menos
+vendidos, autorizadas / canceladas) are similar in both vector spaces, so
+an entry also requires the same literals and domain terms. Like the SQL result cache, every entry carries the data
+version read before its run: an import makes all of them stale, and the
+TTL bounds staleness for imports done by other processes.
+
+Answers that depend on the conversation are scoped to their session:
+questions asked with chat history only match entries of the same session.
+Conversation answers (greetings, follow-ups) are never stored.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Dict, FrozenSet, Optional
+import re
+import threading
+import time
+
+import numpy as np
+
+from agents.crew import CrewRun
+from agents.intent_classifier import INTENT_CONVERSATION, sparse_cosine, text_features
+from config import settings
+from database.query_cache import get_data_version
+from database.schema_search import normalize_text
+from database.schema_selection import load_embedding_model
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+UFS = (
+    "ac", "al", "am", "ap", "ba", "ce", "df", "es", "go", "ma", "mg", "ms", "mt", "pa",
+    "pb", "pe", "pi", "pr", "rj", "rn", "ro", "rr", "rs", "sc", "se", "sp", "to"
+)
+
+# Values and domain terms that change the answer however similar the rest of
+# the question is (numbers, dates, CNPJs, months, relative periods, taxes,
+# states, note status, direction and ordering), over the normalized text
+_LITERAL = re.compile(
+    r"\b(?:\d+(?:[./-]\d+)*|janeiro|fevereiro|marco|abril|maio|junho|julho|agosto|setembro|outubro|"
+    r"novembro|dezembro|hoje|ontem|semana|mes|ano|trimestre|semestre|passad[oa]|anterior|atual|ultim[oa]s?|"
+    r"icms|ipi|pis|cofins|iss|issqn|difal|fcp|st|"
+    + "|".join(UFS) + r"|"
+    r"autorizadas?|canceladas?|denegadas?|inutilizadas?|rejeitadas?|pendentes?|"
+    r"entradas?|saidas?|maior(?:es)?|menor(?:es)?|mais|menos)\b"
+)
+
+# Plurals counted as the singular ("notas autorizadas" = "nota autorizada")
+_PLURAL = re.compile(r"^(autorizada|cancelada|denegada|inutilizada|rejeitada|pendente|entrada|saida)s$|^(maior|menor)es$")
+
+
+def _canonical(term: str) -> str:
+    match = _PLURAL.match(term)
+    return (match.group(1) or match.group(2)) if match else term
+
+
+def question_literals(question: str) -> FrozenSet[str]:
+    """Literal values and domain terms of a question (see _LITERAL)"""
+    return frozenset(_canonical(term) for term in _LITERAL.findall(normalize_text(question)))
+
+
+@dataclass
+class _Entry:
+    question: str
+    vector: Any
+    literals: FrozenSet[str]
+    scope: Optional[str]
+    run: CrewRun
+    stored_at: float
+    version: int
+
+
+class AnswerCache:
+    """Thread-safe LRU of crew answers looked up by question similarity"""
+
+    def __init__(
+        self,
+        max_entries: int = 500,
+        ttl_seconds: float = 600,
+        min_similarity: float = 0.92,
+        model=None
+    ):
+        """
+        Args:
+            max_entries: Stored answers (least recently used are evicted)
+            ttl_seconds: Maximum age of an answer
+            min_similarity: Cosine similarity for two questions to be the same
+            model: Object with a sentence-transformers encode() method (None
+                compares word and character-trigram vectors)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_similarity = min_similarity
+        self.model = model
+
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "stores": 0}
+
+    @property
+    def method(self) -> str:
+        return "embedding" if self.model is not None else "sparse"
+
+    def _embed(self, question: str):
+        if self.model is not None:
+            return self.model.encode([question], normalize_embeddings=True)[0]
+        return text_features(question)
+
+    def _similarity(self, a, b) -> float:
+        if self.model is not None:
+            return float(np.dot(a, b))
+        return sparse_cosine(a, b)
+
+    def get(self, question: str, scope: Optional[str] = None) -> Optional[CrewRun]:
+        """
+        Find the answer of a near-duplicate question.
+
+        Args:
+            question: User message
+            scope: Session ID for questions asked with chat history (None
+                for standalone questions)
+
+        Returns:
+            CrewRun: The stored run with the cache details in .cached, or None
+        """
+        vector = self._embed(question)
+        literals = question_literals(question)
+        now = time.monotonic()
+
+        with self._lock:
+            best_id, best_similarity = None, 0.0
+            for entry_id, entry in list(self._entries.items()):
+                if entry.version != get_data_version() or now - entry.stored_at > self.ttl_seconds:
+                    del self._entries[entry_id]
+                    self._stats["stale"] += 1
+                    continue
+                if entry.scope != scope or entry.literals != literals:
+                    continue
+                similarity = self._similarity(vector, entry.vector)
+                if similarity > best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+
+            if best_id is None or best_similarity < self.min_similarity:
+                self._stats["misses"] += 1
+                return None
+
+            entry = self._entries[best_id]
+            self._entries.move_to_end(best_id)
+            self._stats["hits"] += 1
+
+        return replace(entry.run, cached={
+            "hit": True,
+            "similarity": round(best_similarity, 3),
+            "matched_question": entry.question,
+            "age_seconds": round(now - entry.stored_at, 3)
+        })
+
+    def put(self, question: str, run: CrewRun, version: int, scope: Optional[str] = None) -> bool:
+        """
+        Store the answer of a question.
+
+        Args:
+            question: User message
+            run: Crew run that answered it
+            version: Data version read before the run started; answers from a
+                version that is already outdated are not stored
+            scope: Session ID for questions asked with chat history
+
+        Returns:
+            True if the answer was stored
+        """
+        if run.cached or run.route.intent == INTENT_CONVERSATION or not run.response:
+            return False
+
+        entry = _Entry(
+            question=question,
+            vector=self._embed(question),
+            literals=question_literals(question),
+            scope=scope,
+            run=run,
+            stored_at=time.monotonic(),
+            version=version
+        )
+        with self._lock:
+            if version != get_data_version():
+                return False
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+            self._entries[self._next_id] = entry
+            self._next_id += 1
+            self._stats["stores"] += 1
+        return True
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Cache usage and counters for the health endpoint"""
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "method": self.method,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "min_similarity": self.min_similarity,
+            **stats,
+            "hit_ratio": round(stats["hits"] / lookups, 3) if lookups else 0.0
+        }
+
+
+_cache: Optional[AnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """Get the process-wide answer cache (created on first use)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache(
+                max_entries=settings.answer_cache_max_entries,
+                ttl_seconds=settings.answer_cache_ttl_seconds,
+                min_similarity=settings.answer_cache_min_similarity,
+                model=load_embedding_model()
+            )
+            logger.info("answer_cache_created", method=_cache.method, max_entries=_cache.max_entries)
+        return _cache
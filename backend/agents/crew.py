@@ -18,14 +18,60 @@ Architecture:
 
 from crewai import Agent, Crew, Task, Process, LLM
 from crewai.project import CrewBase, agent, crew, task
+from dataclasses import dataclass, field
 from typing import Dict, Any, List, Optional
+import time
 import yaml
 from pathlib import Path
 
 from agents.tools.database_tool import DatabaseQueryTool, DatabaseJoinQueryTool
 from agents.tools.schema_tool import SchemaInfoTool, SchemaSearchTool
+from database.schema import get_schema_summary
+from database.schema_selection import select_schema_tables
 from agents.tools.sql_query_tool import SQLQueryTool
+from agents.tools.catalog_tool import CatalogQueryTool
+from agents.tools.multi_query_tool import MultiSQLQueryTool
+from agents.fast_path import FastPathError, FastSQLPipeline
+from agents.router import (
+    Route, TASK_PATHS, ANSWERING_AGENTS, CREW_INTENTS, INTENT_DATA, INTENT_FAST, INTENT_FULL, MODE_AUTO, MODE_CREW,
+    route_message
+)
 from config import settings
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CrewRun:
+    """Answer of one message with the task path that produced it"""
+    response: str
+    route: Route
+    step_timings_ms: Dict[str, float] = field(default_factory=dict)
+    total_ms: float = 0.0
+    sql: Optional[str] = None  # Query of the fast path
+    cached: Optional[Dict[str, Any]] = None  # Answer cache hit (see agents.answer_cache)
+    
+    @property
+    def agent_used(self) -> str:
+        return ANSWERING_AGENTS[self.route.intent]
+    
+    def metadata(self) -> Dict[str, Any]:
+        """Routing details for ChatResponse.metadata"""
+        metadata = {
+            "intent": self.route.intent,
+            "routing_reason": self.route.reason,
+            "intent_confidence": self.route.confidence,
+            "task_path": list(self.step_timings_ms) or self.route.tasks,
+            "step_timings_ms": self.step_timings_ms,
+            "crew_time_ms": self.total_ms
+        }
+        if self.sql:
+            metadata["sql"] = self.sql
+        if self.cached:
+            metadata["answer_cache"] = self.cached
+        return metadata
 
 
 @CrewBase
@@ -66,10 +112,66 @@ class NFeCrew:
         
         # Initialize tools
         self.sql_tool = SQLQueryTool()  # Direct SQL - most powerful
+        self.catalog_tool = CatalogQueryTool()  # Named queries - no SQL generation
+        self.multi_sql_tool = MultiSQLQueryTool()  # Independent queries in parallel
         self.db_tool = DatabaseQueryTool()  # REST API fallback (not used)
         self.db_join_tool = DatabaseJoinQueryTool()  # REST API with joins (not used)
         self.schema_tool = SchemaInfoTool()
         self.schema_search_tool = SchemaSearchTool()
+        
+        # One crew per task path, built once by build() and reused for every message
+        self._crews: Dict[str, Crew] = {}
+        self._step_marks: List[float] = []
+        self._fast_pipeline: Optional[FastSQLPipeline] = None
+    
+    def build(self, intent: str = INTENT_FULL) -> Crew:
+        """
+        Build the crew of one task path once for this instance.
+        
+        Later messages reuse the same objects, so no Agent, LLM or Task is
+        created per message. A Crew is not thread-safe (kickoff writes the
+        inputs into its tasks); use one NFeCrew per concurrent request
+        (see agents.crew_pool.CrewPool).
+        
+        Args:
+            intent: Task path (see agents.router.TASK_PATHS)
+        
+        Returns:
+            Crew: Crew running only the tasks of that path
+        """
+        if intent not in self._crews:
+            if intent == INTENT_FULL:
+                crew = self.crew()
+            else:
+                tasks = [getattr(self, name)() for name in TASK_PATHS[intent]]
+                agents = list({id(t.agent): t.agent for t in tasks}.values())
+                crew = Crew(
+                    agents=agents,
+                    tasks=tasks,
+                    process=Process.sequential,
+                    verbose=True,
+                    memory=False
+                )
+            crew.task_callback = self._on_task_done
+            self._crews[intent] = crew
+        return self._crews[intent]
+    
+    def build_all(self):
+        """Build the crews of every task path, and the fast pipeline"""
+        for intent in CREW_INTENTS:
+            self.build(intent)
+        self.fast_pipeline
+    
+    @property
+    def fast_pipeline(self) -> FastSQLPipeline:
+        """Single-call text-to-SQL pipeline, sharing this crew's SQL Query Tool"""
+        if self._fast_pipeline is None:
+            self._fast_pipeline = FastSQLPipeline(sql_tool=self.sql_tool)
+        return self._fast_pipeline
+    
+    def _on_task_done(self, output):
+        """Task callback: records when each task of the running path finished"""
+        self._step_marks.append(time.perf_counter())
     
     def _create_llm(self, agent_name: str) -> LLM:
         """
@@ -103,7 +205,9 @@ class NFeCrew:
         - Returning structured results
         
         Tools:
+        - CatalogQueryTool: Run named catalog queries (common questions)
         - SQLQueryTool: Execute SELECT queries directly on PostgreSQL
+        - MultiSQLQueryTool: Run independent SELECT queries concurrently
         - SchemaInfoTool: Get database schema information
         - SchemaSearchTool: Search for relevant tables/columns
         
@@ -121,7 +225,9 @@ class NFeCrew:
             tools=[
                 self.schema_search_tool,
                 self.schema_tool,
-                self.sql_tool  # Primary: Direct SQL queries
+                self.catalog_tool,  # Common questions without writing SQL
+                self.sql_tool,  # Primary: Direct SQL queries
+                self.multi_sql_tool  # Several independent aggregates in one iteration
             ],
             verbose=config.get('verbose', True),
             allow_delegation=config.get('allow_delegation', False),
@@ -462,6 +568,60 @@ class NFeCrew:
                 session_id="user-123"
             )
         """
+        return self.run(message, chat_history=chat_history, session_id=session_id).response
+    
+    def run(
+        self,
+        message: str,
+        chat_history: Optional[List[Dict[str, str]]] = None,
+        session_id: Optional[str] = None,
+        route: Optional[Route] = None,
+        mode: str = MODE_AUTO
+    ) -> CrewRun:
+        """
+        Process a user message running only the tasks its intent needs.
+        
+        The router picks the task path (greeting → direct conversation,
+        data question → SQL then format, tax question → SQL then fiscal
+        analysis, simple aggregate → fast pipeline without the crew, data
+        question of a known template → its stored SQL, no LLM); with
+        CREW_ROUTING_ENABLED=false every task runs, as before. When the fast
+        pipeline cannot answer, the data path of the crew does.
+        
+        Args:
+            message: User's message to process
+            chat_history: Previous conversation history (list of dicts with 'role' and 'content')
+            session_id: Optional session ID for memory persistence
+            route: Task path to use instead of routing the message
+            mode: "auto", "crew" or "fast" (see agents.router.route_message)
+        
+        Returns:
+            CrewRun: Response, chosen path and the time spent in each task
+        """
+        if route is None:
+            route = route_message(message, chat_history, mode) if settings.crew_routing_enabled \
+                else Route(INTENT_FULL, "routing_disabled")
+        
+        # A data question of a known template reruns its stored SQL (no LLM);
+        # only without chat history, since a follow-up means what the conversation says
+        if route.intent in (INTENT_DATA, INTENT_FAST) and mode != MODE_CREW and settings.sql_plan_cache_enabled \
+                and not chat_history:
+            started = time.perf_counter()
+            answer = self.fast_pipeline.run_plan(message)
+            if answer is not None:
+                route = Route(INTENT_FAST, f"sql_plan:{route.reason}", route.confidence)
+                return self._fast_run(answer, route, session_id, started)
+        
+        if route.intent == INTENT_FAST:
+            started = time.perf_counter()
+            try:
+                answer = self.fast_pipeline.run(message, chat_history)
+            except FastPathError as e:
+                logger.warning("fast_path_fallback", session_id=session_id, reason=e.reason, details=e.details)
+                route = Route(INTENT_DATA, f"fast_path_fallback:{e.reason}", route.confidence)
+            else:
+                return self._fast_run(answer, route, session_id, started)
+        
         # Prepare chat history string
         if chat_history:
             history_str = "\n".join([
@@ -471,8 +631,10 @@ class NFeCrew:
         else:
             history_str = "Nenhum histórico disponível"
         
-        # Get database schema information
-        database_schema = self._get_schema_summary()
+        # Get database schema information (only the tables relevant to the
+        # message, and only for paths that write SQL)
+        needs_schema = any(name in route.tasks for name in ("execute_sql_query_task", "process_user_message_task"))
+        database_schema = self._get_schema_summary(message) if needs_schema else ""
         
         # Prepare inputs for the crew
         inputs = {
@@ -489,50 +651,80 @@ class NFeCrew:
             }
         }
         
-        # Kickoff the crew
-        # The sequential process will:
-        # 1. Have coordenador analyze intent
-        # 2. Execute query or respond directly
-        # 3. Return formatted response
-        result = self.crew().kickoff(inputs=inputs)
+        # Kickoff only the tasks of the chosen path
+        crew = self.build(route.intent)
+        started = time.perf_counter()
+        self._step_marks = []
+        result = crew.kickoff(inputs=inputs)
+        
+        # Time of each task (from the end of the previous one)
+        step_timings_ms = {}
+        previous = started
+        for name, finished in zip(route.tasks, self._step_marks):
+            step_timings_ms[name.removesuffix("_task")] = round((finished - previous) * 1000, 1)
+            previous = finished
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+        
+        logger.info(
+            "crew_run_completed",
+            session_id=session_id,
+            intent=route.intent,
+            routing_reason=route.reason,
+            step_timings_ms=step_timings_ms,
+            total_ms=total_ms
+        )
         
         # Extract the final output
         # CrewAI returns a CrewOutput object, we need the raw output
-        if hasattr(result, 'raw'):
-            return result.raw
-        else:
-            return str(result)
+        response = result.raw if hasattr(result, 'raw') else str(result)
+        return CrewRun(response=response, route=route, step_timings_ms=step_timings_ms, total_ms=total_ms)
+    
+    def _fast_run(self, answer: Dict[str, Any], route: Route, session_id: Optional[str], started: float) -> CrewRun:
+        """CrewRun of an answer of the fast pipeline"""
+        total_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            "crew_run_completed",
+            session_id=session_id,
+            intent=route.intent,
+            routing_reason=route.reason,
+            step_timings_ms=answer["step_timings_ms"],
+            total_ms=total_ms
+        )
+        return CrewRun(
+            response=answer["response"],
+            route=route,
+            step_timings_ms=answer["step_timings_ms"],
+            total_ms=total_ms,
+            sql=answer["sql"]
+        )
     
-    def _get_schema_summary(self) -> str:
+    def _get_schema_summary(self, message: Optional[str] = None) -> str:
         """
         Get a summary of the database schema for agents.
         
         This provides agents with essential information about the database
-        structure without overwhelming them with details.
+        structure without overwhelming them with details. Tables and columns
+        come from the live schema snapshot, so renamed columns never reach
+        the prompt. With a message, only the tables most relevant to it (and
+        the tables they reference) are listed.
+        
+        Args:
+            message: User message used to select the tables
         
         Returns:
             str: Formatted schema summary
         """
-        return """
-Schema NF-e (PostgreSQL):
-
-Tabelas: empresas, notas_fiscais, nf_itens, nf_pagamentos, nf_transporte
-
-Colunas principais:
-- empresas: id, cpf_cnpj, razao_social, nome_fantasia
-- notas_fiscais: id, chave_acesso, numero_nf, emitente_id, destinatario_id, 
-  valor_total_nota, data_hora_emissao, status
-- nf_itens: id, nota_fiscal_id, descricao_produto, quantidade_comercial, valor_total_bruto
-
-Relacionamentos:
-- notas_fiscais.emitente_id → empresas.id
-- notas_fiscais.destinatario_id → empresas.id
-- nf_itens.nota_fiscal_id → notas_fiscais.id
+        tables = select_schema_tables(message) if message else None
+        return get_schema_summary(tables) + """
 
 Regras SQL:
 1. LIMIT obrigatório (máx 100)
 2. Filtre status='autorizada'
 3. LEFT JOIN para empresas, INNER JOIN para itens
+4. Pergunta comum (vendas por período, top produtos, notas de empresa,
+   impostos, nota por chave)? Use a Catalog Query Tool em vez de SQL
+5. Vários totais independentes? Uma chamada da Multi SQL Query Tool
+6. Precisa de uma tabela que não está acima? Use a Schema Search Tool
 """
 
 
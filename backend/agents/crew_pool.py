@@ -0,0 +1,178 @@
+"""
+Pool of ready NFeCrew instances
+
+Building a crew creates the Agent, LLM and Task objects and validates their
+pydantic models, which is too slow to repeat on every chat message. A Crew
+is also not safe to share: kickoff() writes the request inputs into its
+tasks. The pool builds crew_pool_size crews once at startup and lends one
+to each request; concurrent requests beyond the pool size wait up to
+crew_pool_timeout_seconds for a crew to be returned.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+import queue
+import threading
+import time
+
+from agents.answer_cache import get_answer_cache
+from agents.crew import NFeCrew, CrewRun
+from agents.router import MODE_AUTO, MODE_CREW
+from config import settings
+from database.cancellation import current_cancel_scope
+from database.query_cache import get_data_version
+from utils.exceptions import AgentException
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class CrewPool:
+    """Fixed set of prebuilt crews, one per concurrent chat request"""
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        factory: Callable[[], NFeCrew] = NFeCrew
+    ):
+        """
+        Build every crew of the pool.
+
+        Args:
+            size: Number of crews (defaults to settings.crew_pool_size)
+            timeout: Seconds a request waits for a free crew (defaults to
+                settings.crew_pool_timeout_seconds)
+            factory: Creates one NFeCrew
+        """
+        self.size = max(1, size or settings.crew_pool_size)
+        self.timeout = settings.crew_pool_timeout_seconds if timeout is None else timeout
+        self._factory = factory
+        # LIFO: the most recently used crew is handed out first
+        self._idle: "queue.LifoQueue[NFeCrew]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "rebuilds": 0
+        }
+
+        started = time.perf_counter()
+        for _ in range(self.size):
+            self._idle.put(self._build())
+        logger.info(
+            "crew_pool_built",
+            size=self.size,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 1)
+        )
+
+    def _build(self) -> NFeCrew:
+        crew = self._factory()
+        crew.build_all()
+        return crew
+
+    @contextmanager
+    def crew(self, timeout: Optional[float] = None) -> Iterator[NFeCrew]:
+        """
+        Borrow a crew for one request.
+
+        A crew whose run raised is replaced by a new one, so a half-finished
+        kickoff never leaks into the next request.
+
+        Raises:
+            AgentException: No crew became free within the timeout
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self._stats["requests"] += 1
+        try:
+            crew = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self._stats["waits"] += 1
+            try:
+                crew = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise AgentException(
+                    "Todos os agentes estão ocupados, tente novamente em instantes",
+                    details={"reason": "crew_pool_timeout", "timeout_seconds": timeout, "pool_size": self.size}
+                )
+
+        try:
+            yield crew
+        except BaseException:
+            try:
+                crew = self._build()
+                with self._lock:
+                    self._stats["rebuilds"] += 1
+            finally:
+                self._idle.put(crew)
+            raise
+        else:
+            self._idle.put(crew)
+
+    def process_message(
+        self,
+        message: str,
+        chat_history: Optional[List[Dict[str, str]]] = None,
+        session_id: Optional[str] = None
+    ) -> str:
+        """Process a message with a borrowed crew (see NFeCrew.process_message)"""
+        with self.crew() as crew:
+            return crew.process_message(
+                message=message,
+                chat_history=chat_history,
+                session_id=session_id
+            )
+
+    def run(
+        self,
+        message: str,
+        chat_history: Optional[List[Dict[str, str]]] = None,
+        session_id: Optional[str] = None,
+        mode: str = MODE_AUTO
+    ) -> CrewRun:
+        """
+        Run a message with a borrowed crew (see NFeCrew.run).
+
+        With answer_cache_enabled, a near-duplicate of an answered question
+        is answered from the cache without borrowing a crew (except with
+        mode="crew", which always runs the agents).
+        """
+        cache = get_answer_cache() if settings.answer_cache_enabled and mode != MODE_CREW else None
+        # Questions asked with chat history may depend on it
+        scope = session_id if chat_history else None
+        if cache is not None:
+            cached = cache.get(message, scope)
+            if cached is not None:
+                logger.info("answer_cache_hit", session_id=session_id, **cached.cached)
+                return cached
+
+        data_version = get_data_version()
+        with self.crew() as crew:
+            crew_run = crew.run(
+                message=message,
+                chat_history=chat_history,
+                session_id=session_id,
+                mode=mode
+            )
+
+        # An abandoned request may have an incomplete answer
+        cancel_scope = current_cancel_scope()
+        if cache is not None and not (cancel_scope is not None and cancel_scope.cancelled):
+            cache.put(message, crew_run, data_version, scope)
+        return crew_run
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pool size, free crews and counters for the health endpoint"""
+        with self._lock:
+            return {
+                "size": self.size,
+                "available": self._idle.qsize(),
+                "timeout_seconds": self.timeout,
+                **self._stats
+            }
@@ -0,0 +1,260 @@
+"""
+Single-call text-to-SQL pipeline
+
+The fast path for plain data questions: one LLM call writes the SQL from
+the question and the relevant schema, the SQL goes through the same
+validation, cost guard and cache as the agents' SQL Query Tool, and the
+answer is formatted locally. No agent loop, no delegation and no LLM call
+for formatting (about 3-5 s instead of 10-15 s for the crew).
+
+The SQL of every answered question is offered to the SQL plan cache
+(agents/sql_plan_cache.py); run_plan() answers a question of a known
+template with no LLM call at all.
+
+When the LLM does not produce a valid query, or the query fails, the
+pipeline raises FastPathError and the caller falls back to the crew.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+import re
+import time
+
+from crewai import LLM
+
+from agents.sql_plan_cache import get_sql_plan_cache
+from agents.tools.sql_query_tool import SQLQueryTool
+from config import settings
+from database.schema import get_schema_summary
+from database.schema_selection import select_schema_tables
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Rows shown in the answer table (the rest is summarized)
+MAX_ANSWER_ROWS = 20
+
+_SYSTEM_PROMPT = """Você gera SQL PostgreSQL para um banco de notas fiscais eletrônicas (NF-e).
+
+{schema}
+
+Regras:
+1. Responda APENAS com uma consulta SELECT, sem explicações
+2. Filtre notas_fiscais.status = 'autorizada'
+3. Use aliases legíveis em português (total_vendas, quantidade_notas)
+4. Arredonde valores monetários com ROUND(...::numeric, 2)
+5. LIMIT de no máximo {max_limit} linhas
+6. Data de hoje: {today}
+7. Se a pergunta não puder ser respondida com o schema, responda NAO_SEI"""
+
+_SQL_BLOCK = re.compile(r"```(?:sql)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+# Columns formatted as money (R$)
+_MONEY_COLUMN = re.compile(r"valor|total_vend|faturamento|preco|receita|icms|ipi|pis|cofins|frete|imposto|ticket")
+
+
+class FastPathError(Exception):
+    """The fast path could not answer; the crew should handle the message"""
+
+    def __init__(self, reason: str, details: Optional[str] = None):
+        super().__init__(details or reason)
+        self.reason = reason
+        self.details = details
+
+
+def extract_sql(text: str) -> str:
+    """SQL from the LLM reply (with or without a ```sql block)"""
+    match = _SQL_BLOCK.search(text or "")
+    sql = (match.group(1) if match else text or "").strip()
+    if not sql or "NAO_SEI" in sql.upper() or not re.match(r"(?is)^\s*(select|with)\b", sql):
+        raise FastPathError("no_sql", (text or "").strip()[:200])
+    return sql
+
+
+def _label(column: str) -> str:
+    return column.replace("_", " ").strip().capitalize()
+
+
+def format_number(value: float, decimals: int = 2) -> str:
+    """Brazilian number format (1.234,56)"""
+    text = f"{value:,.{decimals}f}"
+    return text.replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def format_value(column: str, value: Any) -> str:
+    """One result value for the answer (R$ for money columns, dd/mm/aaaa dates)"""
+    if value is None:
+        return "-"
+    if isinstance(value, bool):
+        return "sim" if value else "não"
+    if isinstance(value, (int, float, Decimal)):
+        if _MONEY_COLUMN.search(column.lower()):
+            return f"R$ {format_number(float(value))}"
+        if isinstance(value, int) or float(value).is_integer():
+            return format_number(float(value), 0)
+        return format_number(float(value))
+    if isinstance(value, datetime):
+        return value.strftime("%d/%m/%Y %H:%M")
+    if isinstance(value, date):
+        return value.strftime("%d/%m/%Y")
+    return str(value)
+
+
+def format_answer(results: List[Dict[str, Any]], truncated: bool = False) -> str:
+    """
+    Turn query results into the chat answer without an LLM.
+
+    One value becomes a sentence, one row a list, several rows a table.
+    """
+    if not results:
+        return "Não encontrei nenhum resultado para essa pergunta."
+
+    columns = list(results[0])
+    if len(results) == 1:
+        row = results[0]
+        if len(columns) == 1:
+            return f"{_label(columns[0])}: **{format_value(columns[0], row[columns[0]])}**"
+        return "\n".join(f"- {_label(column)}: **{format_value(column, row[column])}**" for column in columns)
+
+    shown = results[:MAX_ANSWER_ROWS]
+    lines = [
+        "| " + " | ".join(_label(column) for column in columns) + " |",
+        "|" + "---|" * len(columns)
+    ]
+    lines.extend(
+        "| " + " | ".join(format_value(column, row.get(column)) for column in columns) + " |"
+        for row in shown
+    )
+    if len(results) > len(shown) or truncated:
+        lines.append("")
+        lines.append(f"Mostrando {len(shown)} de {len(results)}{'+' if truncated else ''} linhas.")
+    return "\n".join(lines)
+
+
+class _StepTimer:
+    """Milliseconds since the previous step, by step name"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._mark = time.perf_counter()
+
+    def __call__(self, name: str):
+        now = time.perf_counter()
+        self.timings[name] = round((now - self._mark) * 1000, 1)
+        self._mark = now
+
+
+class FastSQLPipeline:
+    """Question → one LLM call → validated SQL → local formatting"""
+
+    def __init__(self, llm: Optional[LLM] = None, sql_tool: Optional[SQLQueryTool] = None):
+        """
+        Args:
+            llm: LLM writing the SQL (default: settings.fast_path_model, temperature 0)
+            sql_tool: Tool executing the SQL (validation, cost guard, cache)
+        """
+        self.llm = llm or LLM(model=settings.fast_path_model or settings.openai_model, temperature=0)
+        self.sql_tool = sql_tool or SQLQueryTool()
+
+    def _messages(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+        schema = get_schema_summary(select_schema_tables(message))
+        system = _SYSTEM_PROMPT.format(
+            schema=schema,
+            max_limit=settings.sql_max_limit,
+            today=date.today().isoformat()
+        )
+        # Previous turns, so follow-ups ("quantas notas ela emitiu?") keep their context
+        history = [
+            {"role": turn["role"], "content": turn["content"]}
+            for turn in (chat_history or [])[-settings.max_chat_history:]
+            if turn.get("role") in ("user", "assistant")
+        ]
+        return [
+            {"role": "system", "content": system},
+            *history,
+            {"role": "user", "content": message}
+        ]
+
+    def run(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+        """
+        Answer a data question.
+
+        Args:
+            message: User question
+            chat_history: Previous messages (follow-ups refer to them)
+
+        Returns:
+            dict: "response" (formatted answer), "sql" (executed query),
+            "row_count" and "step_timings_ms"
+
+        Raises:
+            FastPathError: No valid SQL, or the query failed
+        """
+        step = _StepTimer()
+        reply = self.llm.call(self._messages(message, chat_history))
+        sql = extract_sql(str(reply))
+        step("generate_sql")
+
+        answer = self._execute(sql, step)
+        if settings.sql_plan_cache_enabled and not answer.get("cancelled") and not chat_history:
+            get_sql_plan_cache().store(message, sql)
+        return answer
+
+    def run_plan(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Answer a question with the stored SQL of its template, without the LLM.
+
+        Returns:
+            dict: Same as run() plus "plan" (the question template), or None
+            when no plan matches or the stored query failed (the plan is dropped)
+        """
+        step = _StepTimer()
+        cache = get_sql_plan_cache()
+        found = cache.lookup(message)
+        if found is None:
+            return None
+        plan, sql = found
+        step("bind_plan")
+
+        try:
+            answer = self._execute(sql, step)
+        except FastPathError as e:
+            cache.invalidate(plan.template)
+            logger.warning("sql_plan_failed", template=plan.template, reason=e.reason, details=e.details)
+            return None
+        return {**answer, "plan": plan.template}
+
+    def _execute(self, sql: str, step: "_StepTimer") -> Dict[str, Any]:
+        """Run the SQL through the tool and format the answer"""
+        result = self.sql_tool.execute(sql)
+        step("execute_sql")
+        if result.get("error_type") == "cancelled":
+            # Requisição abandonada: não há para quem responder, nem motivo para acionar a crew
+            return {
+                "response": result["details"],
+                "sql": sql,
+                "row_count": 0,
+                "step_timings_ms": step.timings,
+                "cancelled": True
+            }
+        if not result["success"]:
+            raise FastPathError(result.get("error_type") or "query_failed", result.get("details") or result.get("error"))
+
+        response = format_answer(result["results"], truncated=result.get("truncated", False))
+        step("format_answer")
+
+        logger.info(
+            "fast_path_completed",
+            row_count=result["row_count"],
+            cached=result.get("cached", False),
+            step_timings_ms=step.timings
+        )
+        return {
+            "response": response,
+            "sql": result.get("executed_query", sql),
+            "row_count": result["row_count"],
+            "step_timings_ms": step.timings
+        }
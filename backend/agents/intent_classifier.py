@@ -0,0 +1,209 @@
+"""
+Local intent classifier for chat messages
+
+Decides in well under a millisecond, without an LLM call, whether a
+message is chatter (greeting, thanks, confirmation, question about the
+system, follow-up on the previous answer), a data question or a tax
+question:
+
+1. High-precision rules over the normalized message: messages made only of
+   greetings, thanks and confirmations, optionally thanking "pela/pelo ..."
+   something without a data question, first ("obrigado pela análise do
+   ICMS" is chatter, "ok, e em setembro?" is not), then tax terms, then
+   questions about the system.
+2. Otherwise, k nearest labelled examples (agents/config/intent_examples.yaml)
+   by cosine similarity of word and character-trigram counts, so accents,
+   plurals and typos still match. Confidence is the similarity-weighted
+   share of the winning task path among the neighbours. Messages with a data
+   hint (aggregates, entities, months, years) never get a conversation
+   intent here: only the data and tax neighbours vote.
+
+Callers fall back to the LLM coordinator when the confidence is below
+settings.intent_min_confidence.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import math
+import re
+import threading
+
+import yaml
+
+from database.schema_search import normalize_text, trigrams
+
+
+INTENT_CONVERSATION = "conversation"
+INTENT_DATA = "data"
+INTENT_FISCAL = "fiscal"
+
+# Label of the examples → task path
+LABEL_INTENTS: Dict[str, str] = {
+    "greeting": INTENT_CONVERSATION,
+    "thanks": INTENT_CONVERSATION,
+    "confirmation": INTENT_CONVERSATION,
+    "system_question": INTENT_CONVERSATION,
+    "follow_up": INTENT_CONVERSATION,
+    "data": INTENT_DATA,
+    "fiscal": INTENT_FISCAL
+}
+
+EXAMPLES_PATH = Path(__file__).parent / "config" / "intent_examples.yaml"
+
+# Neighbours voting, the similarity below which a neighbour is ignored and
+# the power applied to similarities in the vote
+NEIGHBOURS = 5
+MIN_SIMILARITY = 0.2
+VOTE_POWER = 3
+
+# Patterns over the normalized message (lowercase, no accents)
+_CHATTER = (
+    r"(ola|oi|opa|e ai|bom dia|boa tarde|boa noite|hello|hi|obrigad[oa]|valeu|muito obrigad[oa]|"
+    r"ok|okay|certo|entendi|beleza|blz|perfeito|show|tchau|ate mais|ate logo|tudo bem|tudo bom)"
+)
+_GREETING = re.compile(rf"^{_CHATTER}( {_CHATTER})*( (pel[oa]s?|por) .*)?$")
+_SYSTEM_QUESTION = re.compile(
+    r"\b(o que (voce|vc) (pode|sabe|faz)|como (voce|vc) funciona|como funciona o sistema|"
+    r"quem e (voce|vc)|o que e (uma )?(nf e|nfe|nota fiscal eletronica)|ajuda|help)\b"
+)
+_DATA_HINT = re.compile(
+    r"\b(quant[oa]s?|qual|quais|total|soma|media|maior(es)?|menor(es)?|top|lista[r]?|mostr[ae]|"
+    r"vend\w*|fatur\w*|notas?|empresas?|clientes?|fornecedor\w*|produtos?|itens|valor\w*|"
+    r"mes|ano|hoje|ontem|semana|periodo|janeiro|fevereiro|marco|abril|maio|junho|julho|agosto|"
+    r"setembro|outubro|novembro|dezembro|(19|20)\d{2}|\d+)\b"
+)
+_FISCAL_HINT = re.compile(
+    r"\b(icms|ipi|pis|cofins|impostos?|tribut\w*|aliquota\w*|carga tributaria|"
+    r"cst|csosn|credito\w* (de )?(icms|ipi|pis|cofins)|substituicao tributaria|st)\b"
+)
+
+
+def has_data_hint(message: str) -> bool:
+    """Whether a message asks for data (aggregates, entities, periods, numbers)"""
+    return bool(_DATA_HINT.search(normalize_text(message)))
+
+
+@dataclass(frozen=True)
+class Classification:
+    """Intent of a message and how sure the classifier is"""
+    label: str
+    intent: str
+    confidence: float
+    method: str  # rule | knn
+
+
+def text_features(text: str) -> Dict[str, float]:
+    """Word and character-trigram counts, L2-normalized"""
+    counts: Counter = Counter()
+    for word in normalize_text(text).split():
+        counts[f"w:{word}"] += 1.0
+        for trigram in trigrams(word):
+            counts[f"t:{trigram}"] += 0.5
+    norm = math.sqrt(sum(value * value for value in counts.values())) or 1.0
+    return {key: value / norm for key, value in counts.items()}
+
+
+def sparse_cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(key, 0.0) for key, value in a.items())
+
+
+def load_examples(path: Path = EXAMPLES_PATH) -> List[Tuple[str, str]]:
+    """Labelled examples as (text, label)"""
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    return [(str(text), label) for label, texts in data.items() for text in texts]
+
+
+class IntentClassifier:
+    """Rules plus k-nearest-neighbours over labelled examples"""
+
+    def __init__(self, examples: Optional[List[Tuple[str, str]]] = None, neighbours: int = NEIGHBOURS):
+        """
+        Vectorize the labelled examples.
+
+        Args:
+            examples: (text, label) pairs (default: intent_examples.yaml)
+            neighbours: Examples voting on each message
+        """
+        examples = load_examples() if examples is None else examples
+        self.neighbours = neighbours
+        self._examples = [(text_features(text), label) for text, label in examples]
+
+    def _nearest(self, text: str, has_history: bool, allow_conversation: bool = True) -> Tuple[str, str, float]:
+        """Label of the closest example, and the winning intent with its vote share"""
+        features = text_features(text)
+        scored = sorted(
+            ((sparse_cosine(features, example), label) for example, label in self._examples),
+            reverse=True
+        )[:self.neighbours]
+        scored = [
+            (similarity, label) for similarity, label in scored
+            if similarity >= MIN_SIMILARITY
+            and (allow_conversation or self._intent(label, has_history) != INTENT_CONVERSATION)
+        ]
+        if not scored:
+            return "data", INTENT_DATA, 0.0
+
+        # Labels leading to the same task path vote together; closer neighbours weigh more
+        votes: Dict[str, float] = {}
+        for similarity, label in scored:
+            intent = self._intent(label, has_history)
+            votes[intent] = votes.get(intent, 0.0) + similarity ** VOTE_POWER
+        intent = max(votes, key=votes.get)
+        label = next(label for _, label in scored if self._intent(label, has_history) == intent)
+        return label, intent, votes[intent] / sum(votes.values())
+
+    @staticmethod
+    def _intent(label: str, has_history: bool) -> str:
+        # Follow-ups are answered from the conversation; without one they are data questions
+        if label == "follow_up" and not has_history:
+            return INTENT_DATA
+        return LABEL_INTENTS[label]
+
+    def classify(self, message: str, chat_history: Optional[List[Dict[str, str]]] = None) -> Classification:
+        """
+        Classify a message.
+
+        Args:
+            message: User message
+            chat_history: Previous messages
+
+        Returns:
+            Classification: Label, task intent and confidence (0-1)
+        """
+        text = normalize_text(message)
+        data_hint = has_data_hint(text)
+
+        if _GREETING.match(text) and not data_hint:
+            return Classification("greeting", INTENT_CONVERSATION, 1.0, "rule")
+        if _FISCAL_HINT.search(text):
+            return Classification("fiscal", INTENT_FISCAL, 1.0, "rule")
+        if _SYSTEM_QUESTION.search(text) and not data_hint:
+            return Classification("system_question", INTENT_CONVERSATION, 1.0, "rule")
+
+        # A data question is never chatter, even when its neighbours are follow-ups
+        # or questions about the system; with no other neighbour it gets confidence 0
+        label, intent, confidence = self._nearest(text, bool(chat_history), allow_conversation=not data_hint)
+        return Classification(label, intent, round(confidence, 3), "knn")
+
+
+_classifier: Optional[IntentClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """Get the classifier (examples are vectorized once)"""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = IntentClassifier()
+        return _classifier
+
+
+def classify_intent(message: str, chat_history: Optional[List[Dict[str, str]]] = None) -> Classification:
+    """Classify a message with the shared classifier"""
+    return get_intent_classifier().classify(message, chat_history)
@@ -0,0 +1,136 @@
+"""
+Intent routing for chat messages
+
+Picks the shortest task path for a message instead of running every task
+of the crew in sequence:
+
+- conversation (greetings, thanks, questions about the system, follow-ups):
+  direct_conversation
+- data (questions answered from the database): execute_sql_query, then
+  format_response
+- fiscal (tax questions): execute_sql_query, then fiscal_analysis
+- fast (simple aggregates such as "quanto vendemos em janeiro?"): no crew
+  at all, the single-call text-to-SQL pipeline (agents/fast_path.py)
+
+The intent comes from the local classifier (agents/intent_classifier.py),
+so most messages are routed without an LLM call. The "full" path is the
+original sequential graph with all five tasks, whose first task is the LLM
+coordinator: it is used when the classifier is not confident enough and
+when routing is disabled.
+"""
+
+from dataclasses import dataclass
+import re
+from typing import Dict, List, Optional
+
+from agents.intent_classifier import (
+    INTENT_CONVERSATION,
+    INTENT_DATA,
+    INTENT_FISCAL,
+    classify_intent,
+    has_data_hint
+)
+from config import settings
+from database.schema_search import normalize_text
+
+
+INTENT_FULL = "full"
+INTENT_FAST = "fast"
+
+# Request modes: let the router decide, always use the crew, prefer the fast path
+MODE_AUTO = "auto"
+MODE_CREW = "crew"
+MODE_FAST = "fast"
+
+# Crew task methods run for each intent, in order
+TASK_PATHS: Dict[str, List[str]] = {
+    INTENT_CONVERSATION: ["direct_conversation_task"],
+    INTENT_DATA: ["execute_sql_query_task", "format_response_task"],
+    INTENT_FISCAL: ["execute_sql_query_task", "fiscal_analysis_task"],
+    INTENT_FULL: [
+        "process_user_message_task",
+        "execute_sql_query_task",
+        "fiscal_analysis_task",
+        "format_response_task",
+        "direct_conversation_task"
+    ],
+    # Not crew tasks: the steps of the fast pipeline, for the timings metadata
+    INTENT_FAST: ["generate_sql", "execute_sql", "format_answer"]
+}
+
+# Intents answered by a crew (the fast path has none)
+CREW_INTENTS = [INTENT_CONVERSATION, INTENT_DATA, INTENT_FISCAL, INTENT_FULL]
+
+# Agent that writes the final answer of each path
+ANSWERING_AGENTS: Dict[str, str] = {
+    INTENT_CONVERSATION: "conversation_specialist",
+    INTENT_DATA: "sql_specialist",
+    INTENT_FISCAL: "fiscal_specialist",
+    INTENT_FULL: "coordenador",
+    INTENT_FAST: "fast_sql"
+}
+
+# Simple aggregates (one number or a short ranking) and what makes a question
+# more than that, over the normalized message
+_AGGREGATE = re.compile(
+    r"\b(quant[oa]s?|quantidade|total|soma|media|maior(es)?|menor(es)?|top \d+|\d+ (mais|menos)|"
+    r"mais vendid\w*|ultim[oa]s?)\b"
+)
+_ANALYSIS = re.compile(
+    r"\b(compar\w*|versus|vs|por que|porque|analis\w*|analise|tendencia\w*|expli\w*|evolucao|"
+    r"cresc\w*|queda|variacao|projec\w*|previs\w*|recomend\w*|sugest\w*|insight\w*)\b"
+)
+
+@dataclass(frozen=True)
+class Route:
+    """Task path chosen for a message"""
+    intent: str
+    reason: str
+    confidence: float = 1.0
+
+    @property
+    def tasks(self) -> List[str]:
+        return TASK_PATHS[self.intent]
+
+
+def is_simple_aggregate(message: str) -> bool:
+    """Whether a data question asks for a plain number or ranking (no analysis)"""
+    text = normalize_text(message)
+    return bool(_AGGREGATE.search(text)) and not _ANALYSIS.search(text)
+
+
+def route_message(
+    message: str,
+    chat_history: Optional[List[Dict[str, str]]] = None,
+    mode: str = MODE_AUTO
+) -> Route:
+    """
+    Choose the task path for a message.
+
+    Args:
+        message: User message
+        chat_history: Previous messages (follow-ups need them)
+        mode: "auto", "crew" (never the fast path) or "fast" (fast path for
+            every data question)
+
+    Returns:
+        Route: Intent, the classifier label that decided it and its confidence
+    """
+    classification = classify_intent(message, chat_history)
+    reason = f"{classification.method}:{classification.label}"
+
+    requested_fast = mode == MODE_FAST and classification.intent == INTENT_DATA
+    if classification.confidence < settings.intent_min_confidence and not requested_fast:
+        return Route(INTENT_FULL, f"low_confidence:{classification.label}", classification.confidence)
+
+    # direct_conversation never queries the database: a data question it would
+    # answer from memory goes through the coordinator instead
+    if classification.intent == INTENT_CONVERSATION and has_data_hint(message):
+        return Route(INTENT_FULL, f"data_hint:{classification.label}", classification.confidence)
+
+    if classification.intent == INTENT_DATA and mode != MODE_CREW:
+        if requested_fast:
+            return Route(INTENT_FAST, f"requested:{classification.label}", classification.confidence)
+        if settings.fast_path_enabled and is_simple_aggregate(message):
+            return Route(INTENT_FAST, f"simple_aggregate:{classification.label}", classification.confidence)
+    return Route(classification.intent, reason, classification.confidence)
@@ -0,0 +1,328 @@
+"""
+SQL plan cache for recurring data questions
+
+Report-style questions come back with other values: "top 5 produtos de
+2024" / "top 10 produtos de 2025", "notas do CNPJ 12.345.678/0001-90".
+Once a question has been answered with validated SQL, the question becomes
+a template ("top {number} produtos de {number}") and its literal values
+(numbers, months, dates, CNPJs and other codes) parameters located in the
+SQL. A later question with the same template gets the stored SQL with its
+own values bound, and runs it without any LLM call; the data is always
+current, since only the SQL is reused.
+
+A plan is only stored when every parameter can be rebound safely: each
+value must be found in the SQL (a bare number exactly once, so LIMIT 2 and
+ROUND(x, 2) are not confused), no two parameters may render the same, and
+no date may be left that the parameters do not explain: a quoted date, a
+bare year (2026) or a number compared with EXTRACT/date_part or passed to
+make_date was derived from "mês passado" or from today, and would go stale. A plan whose
+query fails (e.g. after a schema change) is dropped.
+
+Questions asked after other turns neither store nor use plans: a follow-up
+("quantas notas ela emitiu?", "e as de setembro?", "e a maior?") is
+answered from the conversation, not from its words alone, and no word list
+tells every follow-up apart from a self-contained question.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple, Union
+import re
+import threading
+import unicodedata
+
+from config import settings
+from database.schema_search import normalize_text
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+MONTHS = [
+    "janeiro", "fevereiro", "marco", "abril", "maio", "junho",
+    "julho", "agosto", "setembro", "outubro", "novembro", "dezembro"
+]
+
+# Literal values of a question (lowercase, no accents, punctuation kept)
+_PARAMETER = re.compile(
+    r"(?P<cnpj>\b\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}\b)"
+    r"|(?P<date>\b\d{1,2}/\d{1,2}/\d{4}\b|\b\d{4}-\d{2}-\d{2}\b)"
+    r"|(?P<code>\b\d{8,}\b)"
+    r"|(?P<month>\b(?:" + "|".join(MONTHS) + r")\b)"
+    r"|(?P<number>\b\d{1,3}(?:\.\d{3})+(?:,\d+)?\b|\b\d+(?:,\d+)?\b)"
+)
+
+# SQL string literals and quoted identifiers (odd items of split())
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+# Date parts hardcoded in the SQL text (parameters replaced by "?")
+_YEAR = re.compile(r"(?<![\w.])(?:19|20)\d{2}(?![\w.])")
+_DATE_PART_NUMBER = re.compile(
+    r"(?:extract|date_part)\s*\([^()]*\)\s*(?:=|<>|!=|<=|>=|<|>|between|in)\s*\(?\s*\d"
+    r"|make_(?:date|timestamp)\s*\([^)]*\d",
+    re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class Parameter:
+    """One literal value of a question"""
+    kind: str  # cnpj | date | code | month | number
+    value: Any
+
+
+@dataclass(frozen=True)
+class QuestionTemplate:
+    """Question with its literal values taken out"""
+    template: str
+    parameters: Tuple[Parameter, ...]
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def _number(text: str) -> Decimal:
+    # Brazilian format: 1.234,5
+    return Decimal(text.replace(".", "").replace(",", "."))
+
+
+def parse_question(question: str) -> Optional[QuestionTemplate]:
+    """
+    Split a question into its template and parameters.
+
+    Returns:
+        QuestionTemplate, or None when a value cannot be parsed (31/02/2025)
+    """
+    text = _fold(question)
+    pieces: List[str] = []
+    parameters: List[Parameter] = []
+    position = 0
+    for match in _PARAMETER.finditer(text):
+        kind = match.lastgroup
+        raw = match.group()
+        try:
+            if kind == "date":
+                if "/" in raw:
+                    day, month, year = (int(part) for part in raw.split("/"))
+                    value = date(year, month, day)
+                else:
+                    value = date.fromisoformat(raw)
+            elif kind == "month":
+                value = MONTHS.index(raw) + 1
+            elif kind == "number":
+                value = _number(raw)
+            elif kind == "cnpj":
+                value = re.sub(r"\D", "", raw)
+            else:
+                value = raw
+        except (ValueError, InvalidOperation):
+            return None
+        pieces.append(normalize_text(text[position:match.start()]))
+        pieces.append("{" + kind + "}")
+        parameters.append(Parameter(kind, value))
+        position = match.end()
+    pieces.append(normalize_text(text[position:]))
+    return QuestionTemplate(" ".join(piece for piece in pieces if piece), tuple(parameters))
+
+
+def _render(value: Any, style: str) -> str:
+    """Text of a parameter value in the SQL"""
+    if style == "number":
+        if isinstance(value, Decimal):
+            return str(int(value)) if value == value.to_integral_value() else format(value.normalize(), "f")
+        return str(value)
+    if style == "date":
+        return value.isoformat()
+    if style == "cnpj":
+        return f"{value[:2]}.{value[2:5]}.{value[5:8]}/{value[8:12]}-{value[12:]}"
+    return str(value)  # digits
+
+
+def _renderings(parameter: Parameter) -> List[Tuple[str, bool]]:
+    """Styles a parameter may appear in, and whether inside a string literal"""
+    if parameter.kind in ("number", "month"):
+        return [("number", False), ("number", True)]
+    if parameter.kind == "date":
+        return [("date", True)]
+    if parameter.kind == "cnpj":
+        return [("digits", True), ("cnpj", True)]
+    return [("digits", True)]
+
+
+Segment = Union[str, Tuple[int, str]]
+
+
+@dataclass
+class SQLPlan:
+    """Validated SQL of a question template, with slots for its parameters"""
+    template: str
+    kinds: Tuple[str, ...]
+    segments: List[Segment]
+    hits: int = 0
+
+    def bind(self, parameters: Tuple[Parameter, ...]) -> str:
+        """SQL for the values of another question of the same template"""
+        return "".join(
+            segment if isinstance(segment, str) else _render(parameters[segment[0]].value, segment[1])
+            for segment in self.segments
+        )
+
+
+def build_plan(question: QuestionTemplate, sql: str) -> Optional[SQLPlan]:
+    """
+    Locate the parameters of a question in its SQL.
+
+    Returns:
+        SQLPlan, or None when some parameter cannot be rebound safely
+    """
+    parts = _QUOTED.split(sql.strip().rstrip(";").strip())
+    occurrences: List[Tuple[int, int, int, int, str]] = []  # (part, start, end, parameter, style)
+
+    for index, parameter in enumerate(question.parameters):
+        found = []
+        for style, in_literal in _renderings(parameter):
+            text = re.escape(_render(parameter.value, style))
+            if not in_literal:
+                pattern = re.compile(rf"(?<![\w.]){text}(?![\w.])")  # whole token
+            elif style == "number":
+                pattern = re.compile(rf"(?<='){text}(?=')")  # the whole literal ('123', not '2025-10-01')
+            else:
+                pattern = re.compile(rf"(?<![\w.]){text}(?![\w])")
+            for part_index, part in enumerate(parts):
+                if bool(part_index % 2) != in_literal or (in_literal and not part.startswith("'")):
+                    continue
+                found.extend(
+                    (part_index, match.start(), match.end(), index, style)
+                    for match in pattern.finditer(part)
+                )
+        bare = [occurrence for occurrence in found if not occurrence[0] % 2]
+        if not found or len(bare) > 1:
+            return None
+        occurrences.extend(found)
+
+    # Two parameters with the same text would be indistinguishable
+    spans = sorted(occurrences)
+    for previous, current in zip(spans, spans[1:]):
+        if previous[0] == current[0] and current[1] < previous[2]:
+            return None
+
+    segments: List[Segment] = []
+    for part_index, part in enumerate(parts):
+        cursor = 0
+        for _, start, end, parameter, style in (o for o in spans if o[0] == part_index):
+            segments.append(part[cursor:start])
+            segments.append((parameter, style))
+            cursor = end
+        segments.append(part[cursor:])
+
+    # Dates not explained by the parameters would go stale
+    text = "".join(segment if isinstance(segment, str) else "?" for segment in segments)
+    text_parts = _QUOTED.split(text)
+    if any(_ISO_DATE.search(literal) for literal in text_parts[1::2]):
+        return None
+    code = " ".join(text_parts[0::2])
+    if _YEAR.search(code) or _DATE_PART_NUMBER.search(code):
+        return None
+
+    return SQLPlan(
+        template=question.template,
+        kinds=tuple(parameter.kind for parameter in question.parameters),
+        segments=[segment for segment in segments if segment != ""]
+    )
+
+
+class SQLPlanCache:
+    """Thread-safe LRU of SQL plans keyed by question template"""
+
+    def __init__(self, max_entries: int = 500):
+        """
+        Args:
+            max_entries: Stored plans (least recently used are evicted)
+        """
+        self.max_entries = max_entries
+        self._plans: "OrderedDict[str, SQLPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "rejected": 0, "invalidations": 0, "evictions": 0}
+
+    def lookup(self, question: str) -> Optional[Tuple[SQLPlan, str]]:
+        """
+        Find the plan of a question's template.
+
+        Returns:
+            (plan, SQL with the question's values), or None
+        """
+        parsed = parse_question(question)
+        with self._lock:
+            plan = self._plans.get(parsed.template) if parsed else None
+            if plan is None or plan.kinds != tuple(parameter.kind for parameter in parsed.parameters):
+                self._stats["misses"] += 1
+                return None
+            self._plans.move_to_end(parsed.template)
+            plan.hits += 1
+            self._stats["hits"] += 1
+        return plan, plan.bind(parsed.parameters)
+
+    def store(self, question: str, sql: str) -> bool:
+        """
+        Store the validated SQL that answered a question.
+
+        Returns:
+            True if a plan was stored (False when it could not be rebound safely)
+        """
+        parsed = parse_question(question)
+        plan = build_plan(parsed, sql) if parsed else None
+        with self._lock:
+            if plan is None:
+                self._stats["rejected"] += 1
+                return False
+            self._plans.pop(plan.template, None)
+            while len(self._plans) >= self.max_entries:
+                self._plans.popitem(last=False)
+                self._stats["evictions"] += 1
+            self._plans[plan.template] = plan
+            self._stats["stores"] += 1
+        logger.debug("sql_plan_stored", template=plan.template, parameters=len(plan.kinds))
+        return True
+
+    def invalidate(self, template: str):
+        """Drop a plan whose query failed"""
+        with self._lock:
+            if self._plans.pop(template, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        """Drop every plan"""
+        with self._lock:
+            self._plans.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Cache usage and counters for the health endpoint"""
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._plans)
+
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            **stats,
+            "hit_ratio": round(stats["hits"] / lookups, 3) if lookups else 0.0
+        }
+
+
+_cache: Optional[SQLPlanCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_sql_plan_cache() -> SQLPlanCache:
+    """Get the process-wide SQL plan cache (created on first use)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLPlanCache(max_entries=settings.sql_plan_cache_max_entries)
+        return _cache
@@ -0,0 +1,133 @@
+"""
+Catalog Query Tool for CrewAI
+
+Runs the named, parameterized queries of database/query_catalog.py, so
+that common questions are answered without writing SQL.
+"""
+
+from typing import Type, Optional, Dict, Any
+from pydantic import BaseModel, Field
+from crewai.tools import BaseTool
+import concurrent.futures
+import psycopg2
+import psycopg2.errors
+import json
+
+from database.cancellation import current_cancel_scope
+from database.query_catalog import CATALOG, run_catalog_query
+from utils.exceptions import ValidationException, DatabaseConnectionException
+from agents.tools.output_format import encode_response
+
+
+def _catalog_summary() -> str:
+    """One line per catalog query: name(params) - description"""
+    lines = []
+    for query in CATALOG.values():
+        params = ", ".join(
+            f"{param.name}: {param.type}" + ("" if param.required else f" = {param.default}")
+            for param in query.params
+        )
+        lines.append(f"{query.name}({params}) - {query.description}")
+    return "; ".join(lines)
+
+
+class CatalogQueryInput(BaseModel):
+    """Input schema for CatalogQueryTool"""
+    query_name: str = Field(
+        ...,
+        description="Nome da consulta do catálogo (ex: 'total_vendas_periodo', 'top_produtos')"
+    )
+    params: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description=(
+            "Parâmetros da consulta por nome. Datas no formato AAAA-MM-DD. "
+            "Exemplo: {'data_inicio': '2025-01-01', 'data_fim': '2025-02-01'}"
+        )
+    )
+
+
+class CatalogQueryTool(BaseTool):
+    """
+    Tool para executar consultas prontas do catálogo por nome.
+
+    As consultas do catálogo são as perguntas mais comuns (vendas por
+    período, top produtos, notas de uma empresa, impostos...) já escritas
+    e testadas. Executá-las dispensa escrever SQL e é mais rápido que a
+    SQL Query Tool (plano reaproveitado pelo PostgreSQL).
+
+    Exemplos de uso:
+
+    1. Total de vendas de janeiro:
+       query_name="total_vendas_periodo"
+       params={"data_inicio": "2025-01-01", "data_fim": "2025-02-01"}
+
+    2. Top 5 produtos:
+       query_name="top_produtos"
+       params={"limit": 5}
+    """
+
+    name: str = "Catalog Query Tool"
+    description: str = (
+        "Executa consultas prontas do catálogo por nome, sem escrever SQL. "
+        "Use SEMPRE que a pergunta corresponder a uma delas; para o resto use a SQL Query Tool. "
+        f"Consultas disponíveis: {_catalog_summary()}"
+    )
+    args_schema: Type[BaseModel] = CatalogQueryInput
+
+    def _cancelled_response(self, query_name: str) -> str:
+        """Resposta para consulta cancelada porque a requisição foi abandonada"""
+        scope = current_cancel_scope()
+        reason = scope.reason if scope is not None else None
+        return json.dumps({
+            "success": False,
+            "error_type": "cancelled",
+            "error": "Consulta cancelada",
+            "details": f"A requisição foi encerrada ({reason or 'cancelada'})",
+            "hint": "Não execute novas consultas; a resposta não será entregue.",
+            "query_name": query_name
+        }, ensure_ascii=False, indent=2)
+
+    def _run(self, query_name: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Executa uma consulta do catálogo.
+
+        Args:
+            query_name: Nome da consulta no catálogo
+            params: Parâmetros da consulta
+
+        Returns:
+            str: JSON com os resultados ou mensagem de erro
+        """
+        try:
+            result = run_catalog_query(query_name, params)
+            return encode_response({"success": True, **result})
+
+        except ValidationException as e:
+            return json.dumps({
+                "success": False,
+                "error": e.message,
+                "details": e.details,
+                "query_name": query_name
+            }, ensure_ascii=False, indent=2, default=str)
+
+        except DatabaseConnectionException as e:
+            return json.dumps({
+                "success": False,
+                "error": "Banco de dados indisponível",
+                "details": e.message,
+                "query_name": query_name
+            }, ensure_ascii=False, indent=2)
+
+        except concurrent.futures.CancelledError:
+            return self._cancelled_response(query_name)
+
+        except psycopg2.Error as e:
+            scope = current_cancel_scope()
+            if isinstance(e, psycopg2.errors.QueryCanceled) and scope is not None and scope.cancelled:
+                return self._cancelled_response(query_name)
+            return json.dumps({
+                "success": False,
+                "error": "Erro ao executar consulta do catálogo",
+                "details": str(e).strip(),
+                "query_name": query_name
+            }, ensure_ascii=False, indent=2)
@@ -11,6 +11,7 @@ from crewai.tools import BaseTool
 import requests
 import json
 from config import settings
+from agents.tools.output_format import encode_response
 
 
 class DatabaseQueryInput(BaseModel):
@@ -159,7 +160,7 @@ class DatabaseQueryTool(BaseTool):
                 results = response.json()
                 
                 # Formatar resposta
-                return json.dumps({
+                return encode_response({
                     "success": True,
                     "table": table,
                     "count": len(results),
@@ -171,7 +172,7 @@ class DatabaseQueryTool(BaseTool):
                         "limit": limit,
                         "offset": offset
                     }
-                }, ensure_ascii=False, indent=2)
+                })
             
             else:
                 # Erro na requisição
@@ -341,7 +342,7 @@ class DatabaseJoinQueryTool(BaseTool):
             if response.status_code == 200:
                 results = response.json()
                 
-                return json.dumps({
+                return encode_response({
                     "success": True,
                     "base_table": base_table,
                     "count": len(results),
@@ -352,7 +353,7 @@ class DatabaseJoinQueryTool(BaseTool):
                         "order": order,
                         "limit": limit
                     }
-                }, ensure_ascii=False, indent=2)
+                })
             
             else:
                 error_detail = response.text
@@ -0,0 +1,158 @@
+"""
+Multi SQL Query Tool for CrewAI
+
+Runs several independent SELECT queries concurrently over the connection
+pool and returns every result set in one tool call, so aggregates such as
+ICMS, PIS and COFINS totals do not cost one agent iteration each.
+"""
+
+from typing import Type, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, wait
+from pydantic import BaseModel, Field
+from crewai.tools import BaseTool
+import json
+import time
+
+from config import settings
+from database.cancellation import QueryCancelScope, cancel_scope, current_cancel_scope
+from agents.tools.sql_query_tool import SQLQueryTool
+from agents.tools.output_format import encode_response
+
+
+# Tempo extra para as queries canceladas no timeout devolverem a conexão
+CANCEL_GRACE_SECONDS = 2.0
+
+
+class MultiSQLQueryInput(BaseModel):
+    """Input schema for MultiSQLQueryTool"""
+    queries: Dict[str, str] = Field(
+        ...,
+        description=(
+            "Queries SELECT independentes por nome (o nome identifica o resultado). "
+            "Exemplo: {'icms': 'SELECT SUM(valor_icms) AS total FROM notas_fiscais', "
+            "'notas': 'SELECT COUNT(*) AS total FROM notas_fiscais'}"
+        )
+    )
+
+
+class MultiSQLQueryTool(BaseTool):
+    """
+    Tool para executar várias queries SELECT independentes em paralelo.
+
+    Cada query passa pelas mesmas validações da SQL Query Tool (parser,
+    LIMIT, limite de custo, cache, statement_timeout). Todas compartilham
+    um tempo limite total: as que não terminarem a tempo são canceladas
+    no servidor e aparecem com error_type 'multi_query_timeout'.
+
+    Exemplo de uso:
+
+       queries={
+           "icms": "SELECT SUM(valor_icms) AS total FROM notas_fiscais WHERE status = 'autorizada'",
+           "pis": "SELECT SUM(valor_pis) AS total FROM notas_fiscais WHERE status = 'autorizada'",
+           "notas": "SELECT COUNT(*) AS total FROM notas_fiscais WHERE status = 'autorizada'"
+       }
+    """
+
+    name: str = "Multi SQL Query Tool"
+    description: str = (
+        "Executa várias queries SQL SELECT independentes em paralelo e retorna todos os "
+        "resultados de uma vez, cada um sob o nome dado. Use quando precisar de vários totais "
+        "ou agregações que não dependem uns dos outros (ex: ICMS, PIS, COFINS e quantidade de notas), "
+        f"em vez de chamar a SQL Query Tool várias vezes. Máximo de {settings.sql_multi_query_max} queries."
+    )
+    args_schema: Type[BaseModel] = MultiSQLQueryInput
+
+    def _run_one(self, scope: QueryCancelScope, query: str) -> Dict[str, Any]:
+        """Executa uma query dentro do escopo de cancelamento do lote"""
+        with cancel_scope(scope):
+            return SQLQueryTool().execute(query)
+
+    def execute(self, queries: Dict[str, str], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Executa as queries em paralelo com tempo limite total.
+
+        Args:
+            queries: SQL por nome
+            timeout: Tempo limite total em segundos (padrão: sql_multi_query_timeout_seconds)
+
+        Returns:
+            dict: Resposta por nome de query em "results"
+        """
+        if not queries:
+            return {"success": False, "error": "Nenhuma query informada"}
+
+        if len(queries) > settings.sql_multi_query_max:
+            return {
+                "success": False,
+                "error": f"Máximo de {settings.sql_multi_query_max} queries por chamada",
+                "details": f"{len(queries)} queries recebidas",
+                "hint": "Divida em mais de uma chamada ou combine agregações na mesma query."
+            }
+
+        timeout = settings.sql_multi_query_timeout_seconds if timeout is None else timeout
+        started = time.monotonic()
+
+        # Escopo do lote, filho do escopo da requisição (desconexão do cliente
+        # também cancela) e cancelado sozinho no timeout total
+        scope = QueryCancelScope(parent=current_cancel_scope())
+        workers = min(len(queries), settings.sql_multi_query_max_concurrency)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="multi_sql")
+
+        try:
+            futures = {
+                executor.submit(self._run_one, scope, query): name
+                for name, query in queries.items()
+            }
+            done, pending = wait(futures, timeout=timeout)
+
+            if pending:
+                scope.cancel("multi_query_timeout")
+                late_done, pending = wait(pending, timeout=CANCEL_GRACE_SECONDS)
+                done |= late_done
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        results: Dict[str, Any] = {}
+        for future, name in futures.items():
+            if future in done and not future.cancelled():
+                result = future.result()
+                timed_out = (
+                    result.get("error_type") == "cancelled"
+                    and scope.reason == "multi_query_timeout"
+                    and not (scope.parent is not None and scope.parent.cancelled)
+                )
+                if not timed_out:
+                    results[name] = result
+                    continue
+
+            results[name] = {
+                "success": False,
+                "error_type": "multi_query_timeout",
+                "error": "Query não terminou dentro do tempo limite do lote",
+                "details": f"Tempo limite total de {timeout:g} s",
+                "hint": "Execute esta query sozinha ou simplifique-a (filtros, agregações).",
+                "query": queries[name]
+            }
+
+        return {
+            "success": all(result["success"] for result in results.values()),
+            "query_count": len(queries),
+            "failed": [name for name, result in results.items() if not result["success"]],
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+            "results": results
+        }
+
+    def _run(self, queries: Dict[str, str]) -> str:
+        """
+        Executa várias queries SQL em paralelo.
+
+        Args:
+            queries: SQL SELECT queries por nome
+
+        Returns:
+            str: JSON com os resultados de cada query
+        """
+        result = self.execute(queries)
+        if "results" in result:
+            return encode_response(result)
+        return json.dumps(result, ensure_ascii=False, indent=2)
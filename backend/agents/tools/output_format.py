@@ -0,0 +1,207 @@
+"""
+Token-efficient encoding of tool responses
+
+Tool outputs go straight into the LLM prompt. The default
+json.dumps(..., indent=2) of a list of rows repeats every key on every
+row and spends most of its tokens on indentation. encode_response()
+picks the cheapest encoding that still fits the token budget:
+
+1. compact JSON (no indentation), same structure as before
+2. tabular: every list of records becomes {"columns": [...], "rows": [[...]]}
+3. tabular with long text cells truncated (200, 80, then 40 chars)
+
+Numbers are always normalized (Decimal -> number, floats rounded,
+dates in ISO format). TOOL_OUTPUT_FORMAT=json restores the old output.
+"""
+
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, time
+from decimal import Decimal
+import json
+
+from config import settings
+
+
+# Tamanhos máximos de texto por célula, tentados em ordem até caber no orçamento
+TRUNCATION_STEPS = (200, 80, 40)
+
+# Listas de dicts e dicts de dicts com ao menos este número de itens viram tabela
+MIN_TABLE_ROWS = 2
+
+_encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Count (or estimate) the prompt tokens of a text
+
+    Uses tiktoken when installed; otherwise ~4 characters per token, which
+    is close for JSON with Portuguese text.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Number of tokens
+    """
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except ImportError:
+            _encoding = False
+
+    if _encoding:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def _format_number(value: Any) -> Any:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, Decimal):
+        if value == value.to_integral_value():
+            return int(value)
+        value = float(value)
+    if isinstance(value, float):
+        rounded = round(value, 4)
+        return int(rounded) if rounded.is_integer() and abs(rounded) < 1e15 else rounded
+    return value
+
+
+def normalize(value: Any) -> Any:
+    """Convert values to compact JSON-native types
+
+    Args:
+        value: Any value of a tool response
+
+    Returns:
+        Value with numbers normalized and dates as ISO strings
+    """
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if isinstance(value, (Decimal, float, bool)):
+        return _format_number(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (str, int)) or value is None:
+        return value
+    return str(value)
+
+
+def _truncate(value: Any, max_chars: Optional[int]) -> Any:
+    if max_chars and isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars - 1] + "…"
+    return value
+
+
+def to_table(records: List[Dict[str, Any]], max_chars: Optional[int] = None) -> Dict[str, Any]:
+    """Encode a list of records as a header plus value rows
+
+    Args:
+        records: Dictionaries (keys may differ between records)
+        max_chars: Maximum characters of a text cell (None keeps text whole)
+
+    Returns:
+        Dictionary with "columns" and "rows"
+    """
+    columns: List[str] = []
+    seen = set()
+    for record in records:
+        for key in record:
+            if key not in seen:
+                seen.add(key)
+                columns.append(key)
+
+    return {
+        "columns": columns,
+        "rows": [
+            [_truncate(tabulate(record.get(column), max_chars), max_chars) for column in columns]
+            for record in records
+        ],
+    }
+
+
+def _is_records(value: Any) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) >= MIN_TABLE_ROWS
+        and all(isinstance(item, dict) for item in value)
+    )
+
+
+def _is_keyed_records(value: Any) -> bool:
+    return (
+        isinstance(value, dict)
+        and len(value) >= MIN_TABLE_ROWS
+        and all(isinstance(item, dict) for item in value.values())
+    )
+
+
+def tabulate(value: Any, max_chars: Optional[int] = None) -> Any:
+    """Replace every list of records (and dict of records) with a table
+
+    A dict of records such as {"id": {"type": ...}, ...} becomes a table
+    whose first column, "name", holds the keys.
+
+    Args:
+        value: Normalized response (or part of it)
+        max_chars: Maximum characters of a text cell inside tables
+
+    Returns:
+        Value with records encoded as tables
+    """
+    if _is_records(value):
+        return to_table(value, max_chars)
+    if _is_keyed_records(value):
+        return to_table([{"name": key, **item} for key, item in value.items()], max_chars)
+    if isinstance(value, dict):
+        return {key: tabulate(item, max_chars) for key, item in value.items()}
+    if isinstance(value, list):
+        return [tabulate(item, max_chars) for item in value]
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def encode_response(
+    response: Dict[str, Any],
+    token_budget: Optional[int] = None,
+    output_format: Optional[str] = None
+) -> str:
+    """Serialize a tool response with the cheapest encoding that fits the budget
+
+    Args:
+        response: Tool response dictionary
+        token_budget: Target prompt tokens (defaults to settings.tool_output_token_budget)
+        output_format: "auto", "table" or "json" (defaults to settings.tool_output_format)
+
+    Returns:
+        JSON string for the agent
+    """
+    output_format = output_format or settings.tool_output_format
+    token_budget = token_budget or settings.tool_output_token_budget
+
+    if output_format == "json":
+        return json.dumps(response, ensure_ascii=False, indent=2, default=str)
+
+    normalized = normalize(response)
+
+    if output_format == "auto":
+        encoded = _dumps(normalized)
+        if estimate_tokens(encoded) <= token_budget:
+            return encoded
+
+    encoded = _dumps(tabulate(normalized))
+    if estimate_tokens(encoded) <= token_budget:
+        return encoded
+
+    for max_chars in TRUNCATION_STEPS:
+        encoded = _dumps({**tabulate(normalized, max_chars), "text_truncated_at": max_chars})
+        if estimate_tokens(encoded) <= token_budget:
+            break
+    return encoded
@@ -3,19 +3,82 @@ Schema Information Tool for CrewAI
 
 This tool provides AI agents with information about the database schema,
 including table structures, relationships, and common query patterns.
+
+Responses only change when the schema does, so they are serialized once
+per schema version and served from memory afterwards.
 """
 
-from typing import Type, Optional, List
+from typing import Type, Optional, List, Dict, Tuple, Callable
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
 import json
+import threading
 from database.schema import (
     get_schema_info,
     get_table_info,
     get_main_tables,
     get_relationships,
-    get_common_queries
+    get_common_queries,
+    get_schema_snapshot,
+    get_compact_schema,
+    get_compact_table_info
 )
+from database.schema_search import get_schema_search_index
+from agents.tools.output_format import encode_response
+
+
+VALID_QUERY_TYPES = ["full", "table", "tables", "relationships", "queries"]
+
+# Schema Search Tool: número máximo de tabelas e score a partir do qual a relevância é alta
+MAX_SEARCH_RESULTS = 5
+HIGH_RELEVANCE_SCORE = 3.0
+
+
+class SchemaResponseCache:
+    """
+    Respostas da Schema Info Tool já serializadas, por versão do schema.
+    
+    Guarda as strings prontas (imutáveis); quando a versão do schema muda,
+    todas as respostas da versão anterior são descartadas de uma vez.
+    """
+    
+    def __init__(self):
+        self._version: Optional[str] = None
+        self._responses: Dict[Tuple, str] = {}
+        self._lock = threading.Lock()
+    
+    def get_or_build(self, version: str, key: Tuple, build: Callable[[], str]) -> str:
+        """
+        Retorna a resposta da versão, montando-a só na primeira vez.
+        
+        Args:
+            version: Versão do schema
+            key: Identificação da resposta (tipo, tabela, formato)
+            build: Monta a resposta serializada
+        """
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._responses = {}
+            response = self._responses.get(key)
+        
+        if response is None:
+            response = build()
+            with self._lock:
+                if version == self._version:
+                    response = self._responses.setdefault(key, response)
+        return response
+    
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._responses = {}
+    
+    def __len__(self) -> int:
+        return len(self._responses)
+
+
+_responses = SchemaResponseCache()
 
 
 class SchemaInfoInput(BaseModel):
@@ -35,6 +98,13 @@ class SchemaInfoInput(BaseModel):
         default=None,
         description="Nome da tabela (obrigatório quando query_type='table')"
     )
+    compact: bool = Field(
+        default=False,
+        description=(
+            "True para a forma resumida (colunas como 'nome tipo', sem descrições "
+            "nem exemplos de SQL), bem menor e suficiente para escrever queries"
+        )
+    )
 
 
 class SchemaInfoTool(BaseTool):
@@ -67,6 +137,10 @@ class SchemaInfoTool(BaseTool):
     
     5. Ver exemplos de queries comuns:
        query_type="queries"
+    
+    6. Schema completo resumido:
+       query_type="full"
+       compact=True
     """
     
     name: str = "Schema Info Tool"
@@ -74,14 +148,73 @@ class SchemaInfoTool(BaseTool):
         "Retorna informações sobre o schema do banco de dados de notas fiscais eletrônicas. "
         "Use esta tool para entender a estrutura das tabelas, relacionamentos, e ver exemplos "
         "de queries antes de executar consultas. Suporta consultas sobre schema completo, "
-        "tabelas específicas, relacionamentos e queries comuns."
+        "tabelas específicas, relacionamentos e queries comuns. Use compact=true para a "
+        "forma resumida."
     )
     args_schema: Type[BaseModel] = SchemaInfoInput
     
+    def _build(self, query_type: str, table_name: Optional[str], compact: bool) -> str:
+        """Monta e serializa a resposta (chamado uma vez por versão do schema)"""
+        if query_type == "full":
+            # Retorna schema completo
+            return encode_response({
+                "success": True,
+                "query_type": "full",
+                "schema": get_compact_schema() if compact else get_schema_info()
+            })
+        
+        elif query_type == "table":
+            # Retorna informações de uma tabela específica
+            return encode_response({
+                "success": True,
+                "query_type": "table",
+                "table_name": table_name,
+                "info": get_compact_table_info(table_name) if compact else get_table_info(table_name)
+            })
+        
+        elif query_type == "tables":
+            # Retorna lista de tabelas principais
+            tables = get_main_tables()
+            return encode_response({
+                "success": True,
+                "query_type": "tables",
+                "tables": [f"{table['name']}: {table['description']}" for table in tables] if compact else tables,
+                "count": len(tables)
+            })
+        
+        elif query_type == "relationships":
+            # Retorna relacionamentos entre tabelas
+            relationships = get_relationships()
+            if compact:
+                relationships = [
+                    f"{r['from_table']}.{r['from_column']} → {r['to_table']}.{r['to_column']} ({r['description']})"
+                    for r in relationships
+                ]
+            return encode_response({
+                "success": True,
+                "query_type": "relationships",
+                "relationships": relationships
+            })
+        
+        # Retorna exemplos de queries comuns
+        queries = get_common_queries()
+        if compact:
+            queries = [f"{query['name']}: {query['description']}" for query in queries]
+        return encode_response({
+            "success": True,
+            "query_type": "queries",
+            "common_queries": queries,
+            "note": (
+                "Use {placeholders} para substituir valores dinâmicos. "
+                "Estas consultas também podem ser executadas por nome na Catalog Query Tool."
+            )
+        })
+    
     def _run(
         self,
         query_type: str = "full",
-        table_name: Optional[str] = None
+        table_name: Optional[str] = None,
+        compact: bool = False
     ) -> str:
         """
         Retorna informações do schema conforme o tipo de consulta.
@@ -89,73 +222,41 @@ class SchemaInfoTool(BaseTool):
         Args:
             query_type: Tipo de informação a retornar
             table_name: Nome da tabela (para query_type='table')
+            compact: Forma resumida
         
         Returns:
             str: Informações do schema formatadas
         """
         try:
-            if query_type == "full":
-                # Retorna schema completo
-                schema_info = get_schema_info()
+            if query_type not in VALID_QUERY_TYPES:
+                # Tipo de query inválido
                 return json.dumps({
-                    "success": True,
-                    "query_type": "full",
-                    "schema": schema_info
+                    "success": False,
+                    "error": f"query_type inválido: '{query_type}'",
+                    "valid_types": VALID_QUERY_TYPES
                 }, ensure_ascii=False, indent=2)
             
-            elif query_type == "table":
-                # Retorna informações de uma tabela específica
+            snapshot = get_schema_snapshot()
+            
+            if query_type == "table":
                 if not table_name:
                     return json.dumps({
                         "success": False,
                         "error": "table_name é obrigatório quando query_type='table'",
-                        "available_tables": get_main_tables()
+                        "available_tables": sorted(snapshot.tables)
                     }, ensure_ascii=False, indent=2)
                 
-                table_info = get_table_info(table_name)
-                return json.dumps({
-                    "success": True,
-                    "query_type": "table",
-                    "table_name": table_name,
-                    "info": table_info
-                }, ensure_ascii=False, indent=2)
-            
-            elif query_type == "tables":
-                # Retorna lista de tabelas principais
-                tables = get_main_tables()
-                return json.dumps({
-                    "success": True,
-                    "query_type": "tables",
-                    "tables": tables,
-                    "count": len(tables)
-                }, ensure_ascii=False, indent=2)
-            
-            elif query_type == "relationships":
-                # Retorna relacionamentos entre tabelas
-                relationships = get_relationships()
-                return json.dumps({
-                    "success": True,
-                    "query_type": "relationships",
-                    "relationships": relationships
-                }, ensure_ascii=False, indent=2)
-            
-            elif query_type == "queries":
-                # Retorna exemplos de queries comuns
-                queries = get_common_queries()
-                return json.dumps({
-                    "success": True,
-                    "query_type": "queries",
-                    "common_queries": queries,
-                    "note": "Use {placeholders} para substituir valores dinâmicos"
-                }, ensure_ascii=False, indent=2)
-            
+                # Tabela inexistente: resposta de erro, não guardada no cache
+                if snapshot.table(table_name) is None:
+                    return self._build(query_type, table_name, compact)
             else:
-                # Tipo de query inválido
-                return json.dumps({
-                    "success": False,
-                    "error": f"query_type inválido: '{query_type}'",
-                    "valid_types": ["full", "table", "tables", "relationships", "queries"]
-                }, ensure_ascii=False, indent=2)
+                table_name = None
+            
+            return _responses.get_or_build(
+                snapshot.version,
+                (query_type, table_name, bool(compact)),
+                lambda: self._build(query_type, table_name, compact)
+            )
         
         except Exception as e:
             return json.dumps({
@@ -166,6 +267,29 @@ class SchemaInfoTool(BaseTool):
             }, ensure_ascii=False, indent=2)
 
 
+def precompute_schema_responses() -> int:
+    """
+    Monta antecipadamente as respostas da Schema Info Tool e o índice de busca
+    da versão atual.
+    
+    Chamado na inicialização, para que nenhuma consulta de schema durante o
+    chat precise montar ou serializar a resposta.
+    
+    Returns:
+        int: Número de respostas em cache
+    """
+    tool = SchemaInfoTool()
+    snapshot = get_schema_snapshot()
+    get_schema_search_index(snapshot)
+    for compact in (False, True):
+        for query_type in VALID_QUERY_TYPES:
+            if query_type != "table":
+                tool._run(query_type=query_type, compact=compact)
+        for table_name in snapshot.tables:
+            tool._run(query_type="table", table_name=table_name, compact=compact)
+    return len(_responses)
+
+
 class SchemaSearchInput(BaseModel):
     """Input schema for SchemaSearchTool"""
     search_term: str = Field(
@@ -179,7 +303,9 @@ class SchemaSearchTool(BaseTool):
     Tool para buscar tabelas e colunas no schema por termo de busca.
     
     Esta tool ajuda a encontrar rapidamente onde determinadas informações
-    estão armazenadas no banco de dados.
+    estão armazenadas no banco de dados. A busca ignora acentos e tolera
+    plurais e pequenos erros de digitação ("tributação", "pagamnto"), e as
+    tabelas vêm ordenadas por relevância.
     
     Exemplos:
     
@@ -197,7 +323,8 @@ class SchemaSearchTool(BaseTool):
     description: str = (
         "Busca tabelas e colunas no schema do banco de dados por termo de busca. "
         "Use esta tool para encontrar rapidamente onde determinadas informações "
-        "estão armazenadas (ex: buscar 'icms' para encontrar tabelas de impostos)."
+        "estão armazenadas (ex: buscar 'icms' para encontrar tabelas de impostos). "
+        "Acentos são ignorados e pequenos erros de digitação são tolerados."
     )
     args_schema: Type[BaseModel] = SchemaSearchInput
     
@@ -206,75 +333,55 @@ class SchemaSearchTool(BaseTool):
         Busca tabelas e colunas que correspondem ao termo de busca.
         
         Args:
-            search_term: Termo para buscar
+            search_term: Termo para buscar (uma ou mais palavras)
         
         Returns:
-            str: JSON com resultados da busca
+            str: JSON com resultados da busca, do mais para o menos relevante
         """
         try:
-            search_lower = search_term.lower()
-            
-            # Mapeamento de tabelas e suas descrições/colunas principais
-            table_keywords = {
-                "empresas": ["empresa", "emitente", "destinatario", "cnpj", "cpf", "razao social", "endereco"],
-                "notas_fiscais": ["nota", "nfe", "nf-e", "fiscal", "chave", "numero", "valor", "total", "emissao"],
-                "nf_itens": ["item", "produto", "mercadoria", "quantidade", "preco", "unitario", "ncm", "cfop"],
-                "nf_itens_icms": ["icms", "imposto", "tributacao", "aliquota", "base calculo"],
-                "nf_itens_ipi": ["ipi", "imposto", "produto industrializado"],
-                "nf_itens_pis": ["pis", "contribuicao", "social"],
-                "nf_itens_cofins": ["cofins", "contribuicao", "financiamento"],
-                "nf_pagamentos": ["pagamento", "forma", "dinheiro", "cartao", "pix", "boleto"],
-                "nf_transporte": ["transporte", "frete", "transportadora", "veiculo", "placa"],
-                "nf_transporte_volumes": ["volume", "peso", "quantidade", "embalagem"],
-                "nf_cobranca": ["cobranca", "fatura", "duplicata"],
-                "nf_duplicatas": ["duplicata", "vencimento", "parcela"],
-                "nf_referencias": ["referencia", "nota referenciada", "devolucao"],
-                "nf_cce": ["carta", "correcao", "cce", "evento"]
-            }
-            
-            # Buscar tabelas relevantes
-            matching_tables = []
-            for table, keywords in table_keywords.items():
-                if search_lower in table.lower():
-                    matching_tables.append({
-                        "table": table,
-                        "match_type": "table_name",
-                        "relevance": "high"
-                    })
-                elif any(search_lower in keyword for keyword in keywords):
-                    matching_tables.append({
-                        "table": table,
-                        "match_type": "keyword",
-                        "relevance": "medium"
-                    })
+            snapshot = get_schema_snapshot()
+            index = get_schema_search_index(snapshot)
+            matching_tables = [
+                {
+                    "table": result.table,
+                    "match_type": result.match_type,
+                    "relevance": "high" if result.score >= HIGH_RELEVANCE_SCORE else "medium",
+                    "score": result.score,
+                    "matched_terms": result.matched_terms,
+                    **({"columns": result.columns} if result.columns else {})
+                }
+                for result in index.search(search_term, limit=MAX_SEARCH_RESULTS)
+            ]
             
             if matching_tables:
                 # Obter informações detalhadas das tabelas encontradas
                 detailed_info = []
                 for match in matching_tables:
                     table_info = get_table_info(match["table"])
-                    detailed_info.append({
-                        "table": match["table"],
-                        "match_type": match["match_type"],
-                        "relevance": match["relevance"],
-                        "info": table_info
-                    })
+                    if match["match_type"] == "column_name" and match.get("columns"):
+                        # Só as colunas encontradas, não a tabela inteira
+                        table_info = {
+                            **table_info,
+                            "columns": {name: table_info["columns"][name] for name in match["columns"]}
+                        }
+                    detailed_info.append({**match, "info": table_info})
                 
-                return json.dumps({
+                return encode_response({
                     "success": True,
                     "search_term": search_term,
+                    "schema_version": snapshot.version,
                     "matches_found": len(matching_tables),
                     "results": detailed_info
-                }, ensure_ascii=False, indent=2)
+                })
             
             else:
-                return json.dumps({
+                return encode_response({
                     "success": True,
                     "search_term": search_term,
                     "matches_found": 0,
                     "message": f"Nenhuma tabela encontrada para '{search_term}'",
                     "suggestion": "Tente termos como: nota, empresa, item, pagamento, transporte, icms, ipi"
-                }, ensure_ascii=False, indent=2)
+                })
         
         except Exception as e:
             return json.dumps({
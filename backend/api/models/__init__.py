@@ -1,6 +1,6 @@
 """API models package"""
 
-from .requests import ChatRequest, BatchUploadRequest
+from .requests import ChatRequest, BatchUploadRequest, CatalogQueryRequest
 from .responses import (
     ChatResponse,
     BatchUploadResponse,
@@ -8,19 +8,22 @@ from .responses import (
     ErrorResponse,
     HealthCheckResponse,
     AgentType,
-    BatchJobStatus
+    BatchJobStatus,
+    CatalogQueryResponse
 )
 
 __all__ = [
     # Request models
     "ChatRequest",
     "BatchUploadRequest",
+    "CatalogQueryRequest",
     # Response models
     "ChatResponse",
     "BatchUploadResponse",
     "BatchStatusResponse",
     "ErrorResponse",
     "HealthCheckResponse",
+    "CatalogQueryResponse",
     # Enums
     "AgentType",
     "BatchJobStatus",
@@ -1,7 +1,7 @@
 """Request models for API endpoints"""
 
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional
+from typing import Optional, Dict, Any, Literal
 
 
 class ChatRequest(BaseModel):
@@ -23,6 +23,11 @@ class ChatRequest(BaseModel):
         description="Mensagem do usuário",
         examples=["Quantas notas fiscais foram emitidas este mês?"]
     )
+    mode: Literal["auto", "crew", "fast"] = Field(
+        default="auto",
+        description="Caminho de resposta: auto (o roteador escolhe), crew (sempre os agentes) "
+                    "ou fast (uma chamada ao LLM gera o SQL, para perguntas de dados)"
+    )
     
     @field_validator('session_id')
     @classmethod
@@ -97,3 +102,12 @@ class BatchUploadRequest(BaseModel):
             ]
         }
     }
+
+
+class CatalogQueryRequest(BaseModel):
+    """Request model for running a catalog query"""
+    params: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Parâmetros da consulta por nome (datas no formato AAAA-MM-DD)",
+        examples=[{"data_inicio": "2025-01-01", "data_fim": "2025-02-01"}]
+    )
@@ -11,6 +11,8 @@ class AgentType(str, Enum):
     coordenador = "coordenador"
     SQL_SPECIALIST = "sql_specialist"
     CONVERSATION_SPECIALIST = "conversation_specialist"
+    FISCAL_SPECIALIST = "fiscal_specialist"
+    FAST_SQL = "fast_sql"
     SYSTEM = "system"
 
 
@@ -186,7 +188,11 @@ class BatchStatusResponse(BaseModel):
     )
     errors: List[Dict[str, str]] = Field(
         default_factory=list,
-        description="Lista de erros encontrados"
+        description="Amostra dos erros encontrados (limitada por classe de erro)"
+    )
+    error_summary: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Contagem agregada de erros por classe e fingerprint da mensagem"
     )
     started_at: Optional[datetime] = Field(
         default=None,
@@ -283,3 +289,41 @@ class HealthCheckResponse(BaseModel):
             ]
         }
     }
+
+
+class CatalogQueryResponse(BaseModel):
+    """Response model for a catalog query run"""
+    query_name: str = Field(
+        ...,
+        description="Nome da consulta do catálogo"
+    )
+    params: Dict[str, Any] = Field(
+        ...,
+        description="Parâmetros aplicados (convertidos e com valores padrão)"
+    )
+    row_count: int = Field(
+        ...,
+        description="Número de linhas retornadas"
+    )
+    results: List[Dict[str, Any]] = Field(
+        ...,
+        description="Linhas do resultado"
+    )
+    cached: bool = Field(
+        default=False,
+        description="Resultado servido do cache (nenhuma importação desde a execução)"
+    )
+    
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "query_name": "total_vendas_periodo",
+                    "params": {"data_inicio": "2025-01-01", "data_fim": "2025-02-01"},
+                    "row_count": 1,
+                    "results": [{"total_notas": 42, "valor_total": 125430.50, "valor_medio": 2986.44}],
+                    "cached": False
+                }
+            ]
+        }
+    }
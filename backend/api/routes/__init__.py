@@ -2,5 +2,7 @@
 
 from api.routes.chat import router as chat_router
 from api.routes.batch import router as batch_router
+from api.routes.notas import router as notas_router
+from api.routes.queries import router as queries_router
 
-__all__ = ["chat_router", "batch_router"]
+__all__ = ["chat_router", "batch_router", "notas_router", "queries_router"]
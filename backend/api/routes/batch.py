@@ -12,7 +12,8 @@ Requirements satisfied:
 - 1.5: Generate report with successes and failures
 """
 
-from fastapi import APIRouter, HTTPException, status, BackgroundTasks, UploadFile, File
+from fastapi import APIRouter, HTTPException, status, BackgroundTasks, UploadFile, File, Query
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from datetime import datetime
 from typing import Optional, List
 import asyncio
@@ -110,13 +111,10 @@ async def _run_batch_processing(
                 failed=result.get("failed", 0)
             )
             
-            # Add errors to job
-            for error in result.get("errors", []):
-                job.add_error(
-                    file_name=error.get("file", "unknown"),
-                    error_message=error.get("error", "Unknown error"),
-                    error_type=error.get("error_type")
-                )
+            # Share the processor's aggregated error log (bounded in memory)
+            error_log = batch_processor.get_error_log(job_id)
+            if error_log:
+                job.attach_error_log(error_log)
             
             # Mark job as complete or failed
             if result.get("status") == "completed":
@@ -365,9 +363,11 @@ async def start_batch_upload(
     - Current status (pending, running, completed, failed)
     - Progress percentage
     - Number of files processed, successful, and failed
-    - List of errors encountered
+    - Sample of errors (capped per error class) and aggregated error counts
     - Timing information
     
+    The full error detail is available via GET /api/batch/errors/{job_id}.
+    
     Requirements:
     - 7.5: REST API endpoint for status checking
     - 1.1: Track batch processing progress
@@ -466,6 +466,7 @@ async def get_batch_status(job_id: str) -> BatchStatusResponse:
                 failed=processor_status.get("failed", 0),
                 current_file=None,  # Processor doesn't track current file
                 errors=processor_status.get("errors", []),
+                error_summary=processor_status.get("error_summary"),
                 started_at=started_at,
                 estimated_completion=None  # Could be calculated based on progress
             )
@@ -513,6 +514,7 @@ async def get_batch_status(job_id: str) -> BatchStatusResponse:
                 failed=job_data.get("failed_files", 0),
                 current_file=None,
                 errors=job_data.get("errors", []),
+                error_summary=job_data.get("error_summary"),
                 started_at=started_at,
                 estimated_completion=None
             )
@@ -553,6 +555,266 @@ async def get_batch_status(job_id: str) -> BatchStatusResponse:
         )
 
 
+@router.get(
+    "/errors/{job_id}",
+    summary="List batch job errors",
+    description="""
+    Page through the full error log of a batch job.
+    
+    The status endpoint only returns a capped sample of errors per error
+    class plus aggregated counts. This endpoint reads every recorded error
+    from the job's on-disk NDJSON log, page by page.
+    """,
+    responses={
+        200: {
+            "description": "Error page retrieved successfully",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "job_id": "batch-20251027-103000-abc123",
+                        "offset": 0,
+                        "limit": 100,
+                        "count": 1,
+                        "total": 1,
+                        "errors": [
+                            {
+                                "file": "nota_003.xml",
+                                "error": "XML malformado",
+                                "error_type": "ParseError",
+                                "fingerprint": "3f9a0c1d2e4b",
+                                "timestamp": "2025-10-27T10:30:05"
+                            }
+                        ],
+                        "error_summary": {
+                            "total": 1,
+                            "sample_size": 5,
+                            "by_class": {
+                                "ParseError": {
+                                    "count": 1,
+                                    "fingerprints": [
+                                        {
+                                            "fingerprint": "3f9a0c1d2e4b",
+                                            "message_template": "XML malformado",
+                                            "count": 1
+                                        }
+                                    ]
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        404: {"description": "Job not found"},
+        500: {"description": "Internal server error"}
+    }
+)
+async def list_batch_errors(
+    job_id: str,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000)
+):
+    """List errors of a batch job with pagination
+    
+    Args:
+        job_id: Unique job identifier
+        offset: Number of errors to skip
+        limit: Maximum number of errors to return (max 1000)
+        
+    Returns:
+        Dictionary with the error page and aggregated summary
+        
+    Raises:
+        HTTPException: If services not initialized or job not found
+    """
+    if batch_processor is None:
+        logger.error("batch_services_not_initialized")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Batch services not initialized"
+        )
+    
+    error_log = batch_processor.get_error_log(job_id)
+    
+    if error_log is None:
+        logger.warning(
+            "batch_job_not_found",
+            job_id=job_id
+        )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job '{job_id}' not found"
+        )
+    
+    try:
+        errors = list(error_log.iter_entries(offset=offset, limit=limit))
+        
+        logger.debug(
+            "batch_errors_listed",
+            job_id=job_id,
+            offset=offset,
+            count=len(errors)
+        )
+        
+        return {
+            "job_id": job_id,
+            "offset": offset,
+            "limit": limit,
+            "count": len(errors),
+            "total": error_log.total,
+            "errors": errors,
+            "error_summary": error_log.summary()
+        }
+        
+    except Exception as e:
+        logger.exception(
+            "unexpected_error_in_list_errors",
+            e,
+            job_id=job_id
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Unexpected error: {str(e)}"
+        )
+
+
+@router.get(
+    "/errors/{job_id}/download",
+    summary="Download batch job error log",
+    description="""
+    Stream the complete error log of a batch job as NDJSON
+    (one JSON object per line), straight from disk.
+    """,
+    responses={
+        200: {"description": "NDJSON error log", "content": {"application/x-ndjson": {}}},
+        404: {"description": "Job not found"}
+    }
+)
+async def download_batch_errors(job_id: str):
+    """Stream the NDJSON error log of a batch job
+    
+    Args:
+        job_id: Unique job identifier
+        
+    Returns:
+        FileResponse streaming the NDJSON log
+        
+    Raises:
+        HTTPException: If services not initialized or job not found
+    """
+    if batch_processor is None:
+        logger.error("batch_services_not_initialized")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Batch services not initialized"
+        )
+    
+    error_log = batch_processor.get_error_log(job_id)
+    
+    if error_log is None:
+        logger.warning(
+            "batch_job_not_found",
+            job_id=job_id
+        )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job '{job_id}' not found"
+        )
+    
+    if not error_log.path.exists():
+        # Job without errors: empty log
+        return Response(content=b"", media_type="application/x-ndjson")
+    
+    return FileResponse(
+        path=error_log.path,
+        media_type="application/x-ndjson",
+        filename=f"{job_id}-errors.ndjson"
+    )
+
+
+@router.get(
+    "/manifest/{job_id}",
+    summary="Export batch job result manifest",
+    description="""
+    Stream the per-file results of a batch job, one record per file:
+    file, chave_acesso, nota_fiscal_id, status, duration_ms, error_type.
+    
+    Records are written to disk as each file finishes and are streamed
+    from there, so the export works for very large jobs (and while the
+    job is still running) without building the list in memory.
+    
+    Formats:
+    - ndjson (default): one JSON object per line
+    - csv: header row followed by one row per file
+    """,
+    responses={
+        200: {
+            "description": "Result manifest stream",
+            "content": {
+                "application/x-ndjson": {},
+                "text/csv": {}
+            }
+        },
+        422: {"description": "Invalid format"},
+        404: {"description": "Job not found"}
+    }
+)
+async def export_batch_manifest(
+    job_id: str,
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$")
+):
+    """Stream the result manifest of a batch job
+    
+    Args:
+        job_id: Unique job identifier
+        format: Output format ("ndjson" or "csv")
+        
+    Returns:
+        StreamingResponse with the manifest
+        
+    Raises:
+        HTTPException: If services not initialized or job not found
+    """
+    if batch_processor is None:
+        logger.error("batch_services_not_initialized")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Batch services not initialized"
+        )
+    
+    manifest = batch_processor.get_manifest(job_id)
+    
+    if manifest is None:
+        logger.warning(
+            "batch_job_not_found",
+            job_id=job_id
+        )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job '{job_id}' not found"
+        )
+    
+    logger.info(
+        "batch_manifest_export_started",
+        job_id=job_id,
+        format=format,
+        records=manifest.count
+    )
+    
+    if format == "csv":
+        return StreamingResponse(
+            manifest.iter_csv(),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{job_id}-manifest.csv"'}
+        )
+    
+    return StreamingResponse(
+        manifest.iter_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{job_id}-manifest.ndjson"'}
+    )
+
+
 @router.get(
     "/jobs",
     summary="List all batch jobs",
@@ -10,15 +10,18 @@ Requirements satisfied:
 - 7.4: Response returned via API
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Any
+import asyncio
 import time
 
 from api.models.requests import ChatRequest
-from api.models.responses import ChatResponse, AgentType
-from agents.crew import NFeCrew
+from api.models.responses import ChatResponse
+from agents.crew_pool import CrewPool
 from memory.chat_memory import ChatMemory
+from database.cancellation import QueryCancelScope, cancel_scope
+from config import settings
 from utils.exceptions import (
     AppException,
     ErrorCode,
@@ -34,18 +37,18 @@ logger = get_logger(__name__)
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
 # Global instances (will be initialized in main.py startup)
-nfe_crew: Optional[NFeCrew] = None
+nfe_crew: Optional[CrewPool] = None
 chat_memory: Optional[ChatMemory] = None
 
 
-def initialize_chat_services(crew: NFeCrew, memory: ChatMemory):
+def initialize_chat_services(crew: CrewPool, memory: ChatMemory):
     """Initialize chat services with crew and memory instances
     
     This function should be called during application startup to inject
-    the NFeCrew and ChatMemory dependencies.
+    the NFeCrew pool and ChatMemory dependencies.
     
     Args:
-        crew: Initialized NFeCrew instance
+        crew: Pool of prebuilt NFeCrew instances
         memory: Initialized ChatMemory instance
     """
     global nfe_crew, chat_memory
@@ -59,6 +62,58 @@ def initialize_chat_services(crew: NFeCrew, memory: ChatMemory):
     )
 
 
+async def _run_until_disconnect(
+    http_request: Request,
+    scope: QueryCancelScope,
+    session_id: str,
+    func,
+    **kwargs
+) -> Any:
+    """Run a blocking crew call in a thread, cancelling its SQL if the client leaves
+    
+    The crew runs in a worker thread (keeping the event loop free) inside the
+    request's QueryCancelScope. While it runs, the client connection is polled;
+    on disconnect the scope is cancelled, which cancels in-flight queries on the
+    server and makes further SQL tool calls return a "cancelled" error.
+    
+    Args:
+        http_request: Incoming HTTP request (used to detect disconnects)
+        scope: Cancel scope shared with SQLQueryTool
+        session_id: Session identifier (for logging)
+        func: Blocking function to run
+        **kwargs: Arguments for func
+        
+    Returns:
+        Result of func
+        
+    Raises:
+        AgentException: If the client disconnected before the result was ready
+    """
+    with cancel_scope(scope):
+        task = asyncio.create_task(asyncio.to_thread(func, **kwargs))
+    
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=settings.chat_disconnect_poll_seconds)
+        if done:
+            return task.result()
+        
+        if await http_request.is_disconnected():
+            cancelled_queries = scope.cancel("client_disconnected")
+            logger.warning(
+                "chat_request_abandoned",
+                session_id=session_id,
+                cancelled_queries=cancelled_queries
+            )
+            raise AgentException(
+                message="Request abandoned by client",
+                details={
+                    "session_id": session_id,
+                    "reason": "client_disconnected",
+                    "cancelled_queries": cancelled_queries
+                }
+            )
+
+
 @router.post(
     "",
     response_model=ChatResponse,
@@ -100,7 +155,7 @@ def initialize_chat_services(crew: NFeCrew, memory: ChatMemory):
         502: {"description": "OpenAI API error"}
     }
 )
-async def process_chat_message(request: ChatRequest) -> ChatResponse:
+async def process_chat_message(request: ChatRequest, http_request: Request) -> ChatResponse:
     """Process a chat message through the multi-agent system
     
     Requirements:
@@ -113,6 +168,7 @@ async def process_chat_message(request: ChatRequest) -> ChatResponse:
     
     Args:
         request: ChatRequest with session_id and message
+        http_request: Raw HTTP request (used to cancel queries if the client leaves)
         
     Returns:
         ChatResponse with agent's response and metadata
@@ -153,15 +209,23 @@ async def process_chat_message(request: ChatRequest) -> ChatResponse:
         # Step 2: Process message through NFeCrew
         # Requirement 7.3: Messages processed through Agente Master
         try:
-            response_message = nfe_crew.process_message(
+            crew_run = await _run_until_disconnect(
+                http_request,
+                QueryCancelScope(),
+                request.session_id,
+                nfe_crew.run,
                 message=request.message,
                 chat_history=chat_history,
-                session_id=request.session_id
+                session_id=request.session_id,
+                mode=request.mode
             )
+            response_message = crew_run.response
+            
+            # Agent that wrote the answer on the task path chosen by the router
+            agent_used = crew_run.agent_used
             
-            # Determine which agent was primarily used
-            # In hierarchical process, coordenador manages everything
-            agent_used = AgentType.coordenador.value
+        except AppException:
+            raise
             
         except Exception as e:
             # Handle OpenAI API errors
@@ -245,7 +309,8 @@ async def process_chat_message(request: ChatRequest) -> ChatResponse:
             metadata={
                 "processing_time_ms": round(processing_time_ms, 2),
                 "history_messages": len(chat_history),
-                "message_length": len(response_message)
+                "message_length": len(response_message),
+                **crew_run.metadata()
             }
         )
         
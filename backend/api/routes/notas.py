@@ -0,0 +1,120 @@
+"""NF-e note endpoints for Multi-Agent NF-e System
+
+This module implements read endpoints for imported notes that are not
+covered by the chat interface, such as downloading the original XML
+(stored as text or zstd-compressed).
+"""
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import Response
+from typing import Optional
+import asyncio
+
+from db import SupabaseNFeImporter
+from database.xml_storage import read_stored_xml
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Initialize router
+router = APIRouter(prefix="/api/notas", tags=["notas"])
+
+# Global instances
+importer: Optional[SupabaseNFeImporter] = None
+
+
+def initialize_notas_services(nfe_importer: SupabaseNFeImporter):
+    """Initialize note services with the importer instance
+
+    The importer is shared with the batch processor so that XML is read
+    back with the same compressor (and dictionary) used to store it.
+
+    Args:
+        nfe_importer: Initialized SupabaseNFeImporter instance
+    """
+    global importer
+    importer = nfe_importer
+
+    logger.info(
+        "notas_services_initialized",
+        importer_initialized=importer is not None,
+        xml_compression=importer.xml_compressor.codec if importer and importer.xml_compressor else "none"
+    )
+
+
+@router.get(
+    "/{chave_acesso}/xml",
+    summary="Download the original NF-e XML",
+    description="""
+    Return the XML stored for an imported note, identified by its
+    44-digit access key.
+
+    Notes imported with XML compression enabled keep the original file
+    zstd-compressed in xml_compactado; they are decompressed transparently.
+    Notes imported without compression return xml_completo as stored.
+    """,
+    responses={
+        200: {
+            "description": "NF-e XML",
+            "content": {"application/xml": {}}
+        },
+        404: {"description": "Note not found or stored without XML"},
+        500: {"description": "Error reading the stored XML"}
+    }
+)
+async def get_nota_xml(chave_acesso: str):
+    """Download the XML of an imported note
+
+    Args:
+        chave_acesso: Note access key (44 digits)
+
+    Returns:
+        Response with the XML document
+
+    Raises:
+        HTTPException: If services not initialized, note not found or
+            the stored XML cannot be decompressed
+    """
+    if importer is None:
+        logger.error("notas_services_not_initialized")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Note services not initialized"
+        )
+
+    try:
+        row = await asyncio.to_thread(importer.get_nota_xml, chave_acesso)
+        xml = read_stored_xml(row, importer.xml_compressor) if row else None
+
+    except Exception as e:
+        logger.exception(
+            "nota_xml_read_failed",
+            e,
+            chave_acesso=chave_acesso
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to read XML: {str(e)}"
+        )
+
+    if xml is None:
+        logger.warning(
+            "nota_xml_not_found",
+            chave_acesso=chave_acesso
+        )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"XML for note '{chave_acesso}' not found"
+        )
+
+    logger.info(
+        "nota_xml_served",
+        chave_acesso=chave_acesso,
+        compressed=bool(row.get("xml_compactado")) and not row.get("xml_completo")
+    )
+
+    return Response(
+        content=xml,
+        media_type="application/xml",
+        headers={"Content-Disposition": f'attachment; filename="{chave_acesso}.xml"'}
+    )
@@ -0,0 +1,125 @@
+"""Catalog query endpoints for Multi-Agent NF-e System
+
+This module exposes the named, parameterized queries of
+database/query_catalog.py over HTTP, so dashboards and clients can get
+the common KPIs without going through the chat agents.
+"""
+
+from fastapi import APIRouter, HTTPException, status
+from typing import List, Dict, Any
+import asyncio
+
+import psycopg2
+
+from api.models.requests import CatalogQueryRequest
+from api.models.responses import CatalogQueryResponse
+from config import settings
+from database.async_pool import get_async_database
+from database.query_catalog import get_catalog_query, list_catalog, run_catalog_query, run_catalog_query_async
+from utils.exceptions import ValidationException, DatabaseConnectionException
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Initialize router
+router = APIRouter(prefix="/api/queries", tags=["queries"])
+
+
+@router.get(
+    "",
+    summary="List catalog queries",
+    description="""
+    List the named queries of the catalog with their typed parameters
+    (name, type, whether required and default value).
+    """,
+    responses={
+        200: {"description": "Catalog queries"}
+    }
+)
+async def list_queries() -> List[Dict[str, Any]]:
+    """List the catalog queries
+
+    Returns:
+        List of query descriptions
+    """
+    return list_catalog()
+
+
+@router.post(
+    "/{query_name}",
+    response_model=CatalogQueryResponse,
+    summary="Run a catalog query",
+    description="""
+    Run a named catalog query with the given parameters.
+
+    Parameters are validated and converted to their declared types (dates
+    as YYYY-MM-DD); omitted optional parameters take their defaults. The
+    query runs as a prepared statement and its result is cached until the
+    next import. With DB_ASYNC_ENABLED the query is awaited on the asyncpg
+    pool instead of occupying a worker thread.
+    """,
+    responses={
+        200: {"description": "Query results"},
+        400: {"description": "Invalid or missing parameters"},
+        404: {"description": "Query not found in the catalog"},
+        503: {"description": "Database unavailable"},
+        500: {"description": "Query execution failed"}
+    }
+)
+async def run_query(query_name: str, request: CatalogQueryRequest) -> CatalogQueryResponse:
+    """Run a catalog query by name
+
+    Args:
+        query_name: Catalog query name
+        request: Parameter values
+
+    Returns:
+        CatalogQueryResponse with the rows
+
+    Raises:
+        HTTPException: If the query does not exist, parameters are invalid
+            or the query fails
+    """
+    if get_catalog_query(query_name) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Catalog query '{query_name}' not found"
+        )
+
+    try:
+        database = get_async_database() if settings.db_async_enabled else None
+        if database is not None:
+            result = await run_catalog_query_async(database, query_name, request.params)
+        else:
+            result = await asyncio.to_thread(run_catalog_query, query_name, request.params)
+
+    except ValidationException as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
+
+    except DatabaseConnectionException as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.message
+        )
+
+    except psycopg2.Error as e:
+        logger.exception(
+            "catalog_query_failed",
+            e,
+            query_name=query_name
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to run query: {str(e).strip()}"
+        )
+
+    return CatalogQueryResponse(
+        query_name=result["query_name"],
+        params=result["params"],
+        row_count=result["row_count"],
+        results=result["results"],
+        cached=result.get("cached", False)
+    )
@@ -0,0 +1,219 @@
+"""Bounded error tracking for batch processing jobs
+
+Large jobs can fail thousands of files for the same reason. Instead of
+keeping every error in memory, errors are aggregated by class and message
+fingerprint, only a small sample per class is retained, and the full detail
+is appended to an on-disk NDJSON log that can be paged or streamed.
+"""
+
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import json
+import re
+
+
+# Padrões voláteis removidos da mensagem antes de calcular o fingerprint
+_VOLATILE_PATTERNS = [
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "<str>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<hex>"),
+    (re.compile(r"\d+(?:[.,]\d+)*"), "<n>"),
+]
+
+
+def fingerprint_error(message: str) -> Tuple[str, str]:
+    """Normalize an error message and compute its fingerprint
+
+    Numbers, quoted values and identifiers are replaced by placeholders so
+    that "Nota 123 duplicada" and "Nota 456 duplicada" share a fingerprint.
+
+    Args:
+        message: Raw error message
+
+    Returns:
+        Tuple of (message template, 12-char fingerprint)
+    """
+    template = message or ""
+    for pattern, placeholder in _VOLATILE_PATTERNS:
+        template = pattern.sub(placeholder, template)
+    template = " ".join(template.split())[:200]
+
+    digest = hashlib.sha1(template.encode("utf-8")).hexdigest()[:12]
+    return template, digest
+
+
+class ErrorAggregator:
+    """Aggregates errors by class and fingerprint with a capped sample
+
+    Memory use is bounded by the number of distinct error classes and
+    fingerprints, not by the number of failed files.
+    """
+
+    def __init__(self, sample_size: int = 5):
+        """Initialize error aggregator
+
+        Args:
+            sample_size: Maximum number of sample errors kept per error class
+        """
+        self.sample_size = sample_size
+        self.total = 0
+        self._classes: Dict[str, Dict[str, Any]] = {}
+
+    def add(
+        self,
+        file_name: str,
+        error_message: str,
+        error_type: Optional[str] = None,
+        timestamp: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Record an error
+
+        Args:
+            file_name: Name of file that failed
+            error_message: Error message
+            error_type: Type of error (optional)
+            timestamp: ISO timestamp (defaults to now)
+
+        Returns:
+            Error detail dictionary (as written to the log)
+        """
+        error_type = error_type or "UnknownError"
+        template, fingerprint = fingerprint_error(error_message)
+
+        error_detail = {
+            "file": file_name,
+            "error": error_message,
+            "error_type": error_type,
+            "fingerprint": fingerprint,
+            "timestamp": timestamp or datetime.now().isoformat()
+        }
+
+        self.total += 1
+
+        error_class = self._classes.setdefault(error_type, {
+            "count": 0,
+            "fingerprints": {},
+            "samples": []
+        })
+        error_class["count"] += 1
+
+        fingerprint_entry = error_class["fingerprints"].setdefault(fingerprint, {
+            "fingerprint": fingerprint,
+            "message_template": template,
+            "count": 0
+        })
+        fingerprint_entry["count"] += 1
+
+        if len(error_class["samples"]) < self.sample_size:
+            error_class["samples"].append(error_detail)
+
+        return error_detail
+
+    def samples(self) -> List[Dict[str, str]]:
+        """Get the retained sample errors across all classes
+
+        Returns:
+            List of sample error details (at most sample_size per class)
+        """
+        return [
+            sample
+            for error_class in self._classes.values()
+            for sample in error_class["samples"]
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        """Get aggregated error counts
+
+        Returns:
+            Dictionary with total count and per-class breakdown
+        """
+        by_class = {}
+        for error_type, error_class in self._classes.items():
+            fingerprints = sorted(
+                error_class["fingerprints"].values(),
+                key=lambda f: f["count"],
+                reverse=True
+            )
+            by_class[error_type] = {
+                "count": error_class["count"],
+                "fingerprints": [dict(f) for f in fingerprints]
+            }
+
+        return {
+            "total": self.total,
+            "sample_size": self.sample_size,
+            "by_class": by_class
+        }
+
+
+class JobErrorLog(ErrorAggregator):
+    """Error aggregator that also appends every error to an NDJSON file"""
+
+    def __init__(self, job_id: str, log_dir: Path, sample_size: int = 5):
+        """Initialize job error log
+
+        Args:
+            job_id: Job identifier (used as file name)
+            log_dir: Directory where the NDJSON log is written
+            sample_size: Maximum number of sample errors kept per error class
+        """
+        super().__init__(sample_size=sample_size)
+        self.job_id = job_id
+        self.path = Path(log_dir) / f"{job_id}.ndjson"
+        self._handle = None
+
+    def add(
+        self,
+        file_name: str,
+        error_message: str,
+        error_type: Optional[str] = None,
+        timestamp: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Record an error and append it to the NDJSON log"""
+        error_detail = super().add(file_name, error_message, error_type, timestamp)
+
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(self.path, "a", encoding="utf-8")
+
+        self._handle.write(json.dumps(error_detail, ensure_ascii=False) + "\n")
+        self._handle.flush()
+
+        return error_detail
+
+    def iter_entries(self, offset: int = 0, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over logged errors without loading the whole file
+
+        Args:
+            offset: Number of entries to skip
+            limit: Maximum number of entries to yield (None for all)
+
+        Yields:
+            Error detail dictionaries in insertion order
+        """
+        if not self.path.exists():
+            return
+
+        yielded = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for index, line in enumerate(f):
+                if index < offset:
+                    continue
+                if limit is not None and yielded >= limit:
+                    break
+                yield json.loads(line)
+                yielded += 1
+
+    def close(self):
+        """Close the underlying file handle (the log stays on disk)"""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def delete(self):
+        """Close and remove the on-disk log"""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
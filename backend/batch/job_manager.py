@@ -5,8 +5,10 @@ from datetime import datetime
 from enum import Enum
 import uuid
 
+from batch.error_log import ErrorAggregator
 from utils.logger import get_logger
 from utils.exceptions import BatchProcessingException, ErrorCode
+from config import settings
 
 
 logger = get_logger(__name__)
@@ -47,7 +49,7 @@ class BatchJob:
         self.processed_files = 0
         self.successful_files = 0
         self.failed_files = 0
-        self.errors: List[Dict[str, Any]] = []
+        self.error_log = ErrorAggregator(sample_size=settings.batch_error_sample_size)
         self.created_at = datetime.now()
         self.started_at: Optional[datetime] = None
         self.completed_at: Optional[datetime] = None
@@ -135,14 +137,31 @@ class BatchJob:
             error_message: Error message
             error_type: Type of error (optional)
         """
-        error_detail = {
-            "file": file_name,
-            "error": error_message,
-            "error_type": error_type,
-            "timestamp": datetime.now().isoformat()
-        }
+        self.error_log.add(
+            file_name=file_name,
+            error_message=error_message,
+            error_type=error_type
+        )
+    
+    def attach_error_log(self, error_log: ErrorAggregator):
+        """Share an existing error aggregator with this job
         
-        self.errors.append(error_detail)
+        Used to reuse the BatchProcessor's error log instead of copying
+        every error into the job.
+        
+        Args:
+            error_log: Error aggregator to attach
+        """
+        self.error_log = error_log
+    
+    @property
+    def errors(self) -> List[Dict[str, Any]]:
+        """Sample of recorded errors (capped per error class)
+        
+        Returns:
+            List of error detail dictionaries
+        """
+        return self.error_log.samples()
     
     @property
     def progress_percentage(self) -> float:
@@ -202,6 +221,7 @@ class BatchJob:
             "failed_files": self.failed_files,
             "progress_percentage": round(self.progress_percentage, 2),
             "errors": self.errors,
+            "error_summary": self.error_log.summary(),
             "created_at": self.created_at.isoformat(),
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
@@ -0,0 +1,125 @@
+"""Per-file result manifest for batch processing jobs
+
+Every processed file gets one NDJSON line on disk as soon as it finishes,
+so a job's results can be exported (NDJSON or CSV) by streaming the file
+instead of building the list in memory.
+"""
+
+from typing import Dict, Any, Optional, Iterator
+from datetime import datetime
+from pathlib import Path
+import csv
+import io
+import json
+
+
+MANIFEST_COLUMNS = [
+    "file",
+    "chave_acesso",
+    "nota_fiscal_id",
+    "status",
+    "duration_ms",
+    "error_type",
+    "timestamp"
+]
+
+
+class JobManifest:
+    """Append-only NDJSON manifest with the result of each file in a job"""
+
+    def __init__(self, job_id: str, manifest_dir: Path):
+        """Initialize job manifest
+
+        Args:
+            job_id: Job identifier (used as file name)
+            manifest_dir: Directory where the NDJSON manifest is written
+        """
+        self.job_id = job_id
+        self.path = Path(manifest_dir) / f"{job_id}.ndjson"
+        self.count = 0
+        self._handle = None
+
+    def record(
+        self,
+        file_name: str,
+        status: str,
+        duration_ms: float,
+        chave_acesso: Optional[str] = None,
+        nota_fiscal_id: Optional[int] = None,
+        error_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Append the result of a file to the manifest
+
+        Args:
+            file_name: Name of the processed file
+            status: Result status ("imported" or "failed")
+            duration_ms: Processing time in milliseconds
+            chave_acesso: NF-e access key (if it could be read)
+            nota_fiscal_id: Database id of the imported note
+            error_type: Error class name for failures
+
+        Returns:
+            Manifest entry dictionary
+        """
+        entry = {
+            "file": file_name,
+            "chave_acesso": chave_acesso,
+            "nota_fiscal_id": nota_fiscal_id,
+            "status": status,
+            "duration_ms": round(duration_ms, 2),
+            "error_type": error_type,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(self.path, "a", encoding="utf-8")
+
+        self._handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._handle.flush()
+        self.count += 1
+
+        return entry
+
+    def iter_ndjson(self) -> Iterator[str]:
+        """Stream the manifest as NDJSON lines
+
+        Yields:
+            One NDJSON line per processed file
+        """
+        if not self.path.exists():
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield line
+
+    def iter_csv(self) -> Iterator[str]:
+        """Stream the manifest as CSV, converting one line at a time
+
+        Yields:
+            CSV header followed by one CSV row per processed file
+        """
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=MANIFEST_COLUMNS, extrasaction="ignore")
+
+        writer.writeheader()
+        yield buffer.getvalue()
+
+        for line in self.iter_ndjson():
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(json.loads(line))
+            yield buffer.getvalue()
+
+    def close(self):
+        """Close the underlying file handle (the manifest stays on disk)"""
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def delete(self):
+        """Close and remove the on-disk manifest"""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
@@ -7,6 +7,10 @@ from datetime import datetime
 import uuid
 
 from db import SupabaseNFeImporter
+from database.xml_storage import XMLCompressor
+from database.query_cache import bump_data_version
+from batch.error_log import JobErrorLog
+from batch.manifest import JobManifest
 from utils.logger import get_logger
 from utils.exceptions import BatchProcessingException, XMLProcessingException
 from config import settings
@@ -30,13 +34,40 @@ class BatchProcessor:
             max_concurrent: Maximum number of concurrent file processing
                           (defaults to settings.max_concurrent_uploads)
         """
-        self.importer = SupabaseNFeImporter()
+        xml_compressor = None
+        if settings.xml_compression == "zstd":
+            xml_compressor = XMLCompressor(
+                level=settings.xml_compression_level,
+                dict_path=settings.xml_zstd_dict_path
+            )
+        
+        self.importer = SupabaseNFeImporter(
+            mode=settings.import_mode,
+            allocate_ids=settings.import_allocate_ids,
+            xml_compressor=xml_compressor
+        )
         self.max_concurrent = max_concurrent or settings.max_concurrent_uploads
         self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.error_logs: Dict[str, JobErrorLog] = {}
+        self.manifests: Dict[str, JobManifest] = {}
+        
+        if settings.batch_error_log_dir:
+            self.error_log_dir = Path(settings.batch_error_log_dir)
+        else:
+            self.error_log_dir = Path(__file__).parent.parent / "storage" / "batch_errors"
+        
+        if settings.batch_manifest_dir:
+            self.manifest_dir = Path(settings.batch_manifest_dir)
+        else:
+            self.manifest_dir = Path(__file__).parent.parent / "storage" / "batch_manifests"
         
         logger.info(
             "batch_processor_initialized",
-            max_concurrent=self.max_concurrent
+            max_concurrent=self.max_concurrent,
+            import_mode=self.importer.mode,
+            allocate_ids=self.importer.allocate_ids,
+            xml_compression=xml_compressor.codec if xml_compressor else "none",
+            error_log_dir=str(self.error_log_dir)
         )
     
     async def process_folder(
@@ -58,7 +89,8 @@ class BatchProcessor:
             - processed: Number of files processed
             - successful: Number of successful imports
             - failed: Number of failed imports
-            - errors: List of error details
+            - errors: Sample of error details (capped per error class)
+            - error_summary: Aggregated error counts by class and fingerprint
             - duration_seconds: Total processing time
             
         Raises:
@@ -98,6 +130,16 @@ class BatchProcessor:
             )
         
         # Initialize job status
+        error_log = JobErrorLog(
+            job_id=job_id,
+            log_dir=self.error_log_dir,
+            sample_size=settings.batch_error_sample_size
+        )
+        self.error_logs[job_id] = error_log
+        
+        manifest = JobManifest(job_id=job_id, manifest_dir=self.manifest_dir)
+        self.manifests[job_id] = manifest
+        
         self.jobs[job_id] = {
             "job_id": job_id,
             "status": "running",
@@ -107,6 +149,7 @@ class BatchProcessor:
             "successful": 0,
             "failed": 0,
             "errors": [],
+            "error_summary": error_log.summary(),
             "start_time": start_time.isoformat(),
             "end_time": None,
             "duration_seconds": None
@@ -134,6 +177,11 @@ class BatchProcessor:
                 details={"job_id": job_id, "error": str(e)}
             )
         finally:
+            # Full error detail stays on disk; only release the file handle
+            error_log.close()
+            manifest.close()
+            self._refresh_error_fields(job_id)
+            
             # Calculate duration
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
@@ -207,6 +255,8 @@ class BatchProcessor:
             xml_file: Path to XML file
         """
         file_start_time = datetime.now()
+        manifest = self.manifests[job_id]
+        chave_acesso = None
         
         logger.debug(
             "processing_file",
@@ -215,17 +265,37 @@ class BatchProcessor:
         )
         
         try:
-            # Run import in thread pool to avoid blocking
-            await asyncio.to_thread(
-                self.importer.import_nfe,
+            # Run import in thread pool to avoid blocking; the XML is parsed
+            # once and the same parse gives the manifest its access key
+            parsed = await asyncio.to_thread(
+                self.importer.parse_xml,
                 str(xml_file)
             )
+            chave_acesso = self.importer.get_chave_acesso(parsed)
+            try:
+                nf_id = await asyncio.to_thread(
+                    self.importer.import_nfe,
+                    str(xml_file),
+                    parsed=parsed
+                )
+            finally:
+                # The importer may have written even when it failed (or removed
+                # a half-imported note): cached agent SQL results are now stale
+                bump_data_version()
             
             # Update success count
             self.jobs[job_id]["successful"] += 1
             
             duration_ms = (datetime.now() - file_start_time).total_seconds() * 1000
             
+            manifest.record(
+                file_name=xml_file.name,
+                status="imported",
+                duration_ms=duration_ms,
+                chave_acesso=chave_acesso,
+                nota_fiscal_id=nf_id
+            )
+            
             logger.info(
                 "file_processed_successfully",
                 job_id=job_id,
@@ -237,14 +307,21 @@ class BatchProcessor:
             # Update failure count and record error
             self.jobs[job_id]["failed"] += 1
             
-            error_detail = {
-                "file": xml_file.name,
-                "error": str(e),
-                "error_type": type(e).__name__,
-                "timestamp": datetime.now().isoformat()
-            }
+            # Aggregate in memory (bounded) and append full detail to disk
+            error_log = self.error_logs[job_id]
+            error_log.add(
+                file_name=xml_file.name,
+                error_message=str(e),
+                error_type=type(e).__name__
+            )
             
-            self.jobs[job_id]["errors"].append(error_detail)
+            manifest.record(
+                file_name=xml_file.name,
+                status="failed",
+                duration_ms=(datetime.now() - file_start_time).total_seconds() * 1000,
+                chave_acesso=chave_acesso,
+                error_type=type(e).__name__
+            )
             
             logger.error(
                 "file_processing_failed",
@@ -267,14 +344,56 @@ class BatchProcessor:
         Returns:
             Job status dictionary or None if job not found
         """
+        if job_id in self.jobs:
+            self._refresh_error_fields(job_id)
         return self.jobs.get(job_id)
     
+    def _refresh_error_fields(self, job_id: str):
+        """Copy the bounded error sample and summary into the job dictionary
+        
+        Computed on read instead of on every failure, so a systemic failure
+        does not rebuild the summary once per file.
+        
+        Args:
+            job_id: Job identifier
+        """
+        error_log = self.error_logs.get(job_id)
+        if error_log is None:
+            return
+        
+        self.jobs[job_id]["errors"] = error_log.samples()
+        self.jobs[job_id]["error_summary"] = error_log.summary()
+    
+    def get_error_log(self, job_id: str) -> Optional[JobErrorLog]:
+        """Get the error log of a batch job
+        
+        Args:
+            job_id: Job identifier
+            
+        Returns:
+            JobErrorLog instance or None if job not found
+        """
+        return self.error_logs.get(job_id)
+    
+    def get_manifest(self, job_id: str) -> Optional[JobManifest]:
+        """Get the per-file result manifest of a batch job
+        
+        Args:
+            job_id: Job identifier
+            
+        Returns:
+            JobManifest instance or None if job not found
+        """
+        return self.manifests.get(job_id)
+    
     def list_jobs(self) -> List[Dict[str, Any]]:
         """List all batch jobs
         
         Returns:
             List of job status dictionaries
         """
+        for job_id in self.jobs:
+            self._refresh_error_fields(job_id)
         return list(self.jobs.values())
     
     def clear_completed_jobs(self, max_age_seconds: int = 3600):
@@ -297,6 +416,15 @@ class BatchProcessor:
         
         for job_id in jobs_to_remove:
             del self.jobs[job_id]
+            
+            error_log = self.error_logs.pop(job_id, None)
+            if error_log:
+                error_log.delete()
+            
+            manifest = self.manifests.pop(job_id, None)
+            if manifest:
+                manifest.delete()
+            
             logger.debug(
                 "job_cleared",
                 job_id=job_id
@@ -0,0 +1,95 @@
+"""
+Benchmark de tokens das respostas das tools
+
+Compara o formato anterior (JSON indentado, um objeto por linha) com a
+codificação compacta de agents/tools/output_format.py em resultados
+típicos das tools. Não acessa o banco de dados: o schema usado é o
+curado (SCHEMA_INTROSPECTION_ENABLED desligado no próprio script).
+
+Uso:
+    python benchmark_tool_output.py [--budget 3000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from agents.tools.output_format import encode_response, estimate_tokens
+from config import settings
+from database.schema import get_schema_info, get_table_info
+
+
+def sql_rows(count):
+    """Linhas como as da SQL Query Tool (RealDictCursor)"""
+    inicio = datetime(2024, 1, 1, 8, 0)
+    return [
+        {
+            "numero_nf": 1000 + i,
+            "serie": "1",
+            "data_hora_emissao": inicio + timedelta(hours=i),
+            "razao_social": f"Empresa Exemplo {i % 7} Comércio de Alimentos LTDA",
+            "valor_total_nota": Decimal(f"{1500 + i * 37}.{i % 100:02d}"),
+            "status": "autorizada",
+        }
+        for i in range(count)
+    ]
+
+
+def item_rows(count):
+    """Itens com descrição longa (texto livre do XML)"""
+    return [
+        {
+            "numero_item": i + 1,
+            "descricao": "PRODUTO " + "DESCRICAO DETALHADA DO ITEM COM ESPECIFICACAO TECNICA " * 4,
+            "ncm": "21069090",
+            "cfop": "5102",
+            "quantidade_comercial": Decimal("12.0000"),
+            "valor_unitario_comercial": Decimal("19.9900000000"),
+            "valor_total_bruto": Decimal("239.88"),
+        }
+        for i in range(count)
+    ]
+
+
+def cases():
+    return {
+        "sql 10 notas": {"success": True, "row_count": 10, "results": sql_rows(10)},
+        "sql 100 notas": {"success": True, "row_count": 100, "results": sql_rows(100)},
+        "sql 100 itens (texto longo)": {"success": True, "row_count": 100, "results": item_rows(100)},
+        "schema tabela notas_fiscais": {"success": True, "info": get_table_info("notas_fiscais")},
+        "schema completo": {"success": True, "schema": get_schema_info()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tokens das respostas das tools")
+    parser.add_argument("--budget", type=int, default=3000, help="Orçamento de tokens (padrão: 3000)")
+    args = parser.parse_args()
+
+    # Schema curado: sem introspecção do banco, resultados reproduzíveis
+    settings.schema_introspection_enabled = False
+
+    print(f"{'caso':<30} {'json':>8} {'auto':>8} {'table':>8} {'redução':>8} {'ms':>6}")
+    print("-" * 74)
+
+    for name, response in cases().items():
+        legacy = estimate_tokens(encode_response(response, output_format="json"))
+
+        started = time.perf_counter()
+        auto = estimate_tokens(encode_response(response, token_budget=args.budget, output_format="auto"))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        table = estimate_tokens(encode_response(response, token_budget=args.budget, output_format="table"))
+        reduction = 100 * (1 - auto / legacy)
+
+        print(f"{name:<30} {legacy:>8} {auto:>8} {table:>8} {reduction:>7.1f}% {elapsed_ms:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
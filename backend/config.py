@@ -1,7 +1,7 @@
 """Configuration management for Multi-Agent NF-e System"""
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -16,6 +16,7 @@ class Settings(BaseSettings):
     # Supabase Configuration
     supabase_url: str
     supabase_service_key: str
+    supabase_db_password: Optional[str] = None  # Direct PostgreSQL password (falls back to service key)
     
     # Application Configuration
     app_env: str = "development"
@@ -23,6 +24,20 @@ class Settings(BaseSettings):
     app_version: str = "1.0.0"
     log_level: str = "INFO"
     
+    # Crew Pool Configuration
+    crew_pool_size: int = 4  # Crews built at startup (chat requests processed at the same time)
+    crew_pool_timeout_seconds: float = 60.0  # Wait for a free crew before failing the request
+    crew_routing_enabled: bool = True  # Run only the tasks the message intent needs (else all five)
+    intent_min_confidence: float = 0.6  # Local classifier confidence below which the LLM coordinator decides
+    fast_path_enabled: bool = True  # Answer simple aggregates with one LLM call writing the SQL (no crew)
+    fast_path_model: Optional[str] = None  # Model of the fast path (default: openai_model)
+    answer_cache_enabled: bool = True  # Answer near-duplicate questions from earlier answers (until the next import)
+    answer_cache_min_similarity: float = 0.92  # Cosine similarity for two questions to count as the same
+    answer_cache_ttl_seconds: int = 600  # Max age of a cached answer
+    answer_cache_max_entries: int = 500  # Cached answers (least recently used are evicted)
+    sql_plan_cache_enabled: bool = True  # Rerun the stored SQL of a known question template without the LLM
+    sql_plan_cache_max_entries: int = 500  # Question templates with a stored SQL plan
+    
     # Chat Memory Configuration
     max_chat_history: int = 4  # 2 interactions = 4 messages (user + assistant)
     memory_storage_dir: Optional[str] = None  # Custom storage dir for CrewAI memory
@@ -33,6 +48,14 @@ class Settings(BaseSettings):
     xml_folder: str = "xml_nf"
     max_concurrent_uploads: int = 5
     batch_timeout_seconds: int = 300
+    batch_error_sample_size: int = 5  # Sample errors kept in memory per error class
+    batch_error_log_dir: Optional[str] = None  # NDJSON error logs (default: storage/batch_errors)
+    batch_manifest_dir: Optional[str] = None  # NDJSON result manifests (default: storage/batch_manifests)
+    import_mode: Literal["insert", "skip", "replace"] = "insert"  # skip and replace upsert by chave_acesso
+    import_allocate_ids: bool = False  # Reserve child ids client-side and bulk insert (needs reservar_ids)
+    xml_compression: Literal["none", "zstd"] = "none"  # zstd stores the original XML compressed in xml_compactado
+    xml_compression_level: int = 10  # zstd level (1-22)
+    xml_zstd_dict_path: Optional[str] = None  # Optional zstd dictionary trained on NF-e XML
     
     # API Configuration
     api_host: str = "0.0.0.0"
@@ -44,6 +67,39 @@ class Settings(BaseSettings):
     db_pool_size: int = 10
     db_max_overflow: int = 20
     db_pool_timeout: int = 30
+    db_pool_warmup: int = 2  # Connections opened at startup
+    db_pool_health_check_interval: int = 30  # Ping connections idle longer than this (seconds)
+    db_async_enabled: bool = False  # Use an asyncpg pool for agent SQL and query endpoints
+    
+    # Schema Introspection
+    schema_introspection_enabled: bool = True  # Read tables/columns from pg_catalog (else curated descriptions only)
+    schema_refresh_interval_seconds: int = 300  # Check the schema fingerprint at most this often
+    schema_selection_enabled: bool = True  # Only put the tables relevant to the question in the crew prompt
+    schema_selection_top_k: int = 4  # Tables picked per question (plus the tables they reference)
+    schema_embedding_model: str = "paraphrase-multilingual-MiniLM-L12-v2"  # Local CPU sentence-transformers model
+    
+    # SQL Tool Limits
+    sql_tool_max_rows: int = 500  # Rows read per query (backstop: only reached if sql_max_limit is raised above it)
+    sql_tool_max_bytes: int = 200_000  # Serialized JSON bytes returned per query
+    sql_tool_fetch_size: int = 100  # Rows fetched per round trip from the server-side cursor
+    sql_statement_timeout_ms: int = 15000  # statement_timeout for agent SQL
+    sql_lock_timeout_ms: int = 3000  # lock_timeout for agent SQL
+    sql_cost_guard_enabled: bool = True  # EXPLAIN agent SQL before running it
+    sql_max_plan_cost: float = 1_000_000.0  # Planner total cost (plan with the LIMIT) above which queries are rejected
+    sql_max_plan_rows: int = 100_000  # Estimated rows without the sql_max_limit LIMIT above which the action applies
+    sql_cost_guard_action: Literal["limit", "reject"] = "limit"  # limit (run with the LIMIT) | reject (for queries over sql_max_plan_rows)
+    sql_max_limit: int = 100  # LIMIT injected into (or clamped on) every agent query
+    sql_cache_enabled: bool = True  # Cache agent SQL results until the next import
+    sql_cache_ttl_seconds: int = 300  # Max age of a cached result (bounds imports from other processes)
+    sql_cache_max_bytes: int = 16_000_000  # Serialized size of all cached results
+    sql_multi_query_max: int = 8  # Queries per Multi SQL Query Tool call
+    sql_multi_query_max_concurrency: int = 4  # Queries of one call running at the same time
+    sql_multi_query_timeout_seconds: float = 20.0  # Combined timeout of one call
+    chat_disconnect_poll_seconds: float = 1.0  # How often chat checks for abandoned requests
+    
+    # Tool Output Configuration
+    tool_output_format: Literal["auto", "table", "json"] = "auto"  # auto | table | json (indented, one object per row)
+    tool_output_token_budget: int = 3000  # Target prompt tokens of a tool result
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,300 @@
+"""asyncio-native PostgreSQL access (asyncpg) shared by the tools and the API
+
+With DB_ASYNC_ENABLED=true the application starts an asyncpg pool on its
+event loop at startup. API endpoints await it directly; the agent tools,
+which CrewAI calls synchronously from the crew's worker thread, submit
+their coroutine to the same loop with run_sync(). Waiting on PostgreSQL
+then happens in the event loop instead of holding a pooled psycopg2
+connection per waiting thread.
+
+asyncpg caches prepared statements per connection, so repeated queries
+(catalog queries in particular) are parsed once per connection.
+
+Errors are translated to the psycopg2 exception classes of the same
+SQLSTATE, so callers handle both drivers with the same except clauses.
+"""
+
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+import asyncio
+import concurrent.futures
+import json
+
+import psycopg2
+import psycopg2.errors
+
+from config import settings
+from database.pool import build_dsn
+from utils.exceptions import DatabaseConnectionException
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+def _asyncpg():
+    """Import asyncpg (only needed with DB_ASYNC_ENABLED=true)"""
+    try:
+        import asyncpg
+    except ImportError as e:
+        raise DatabaseConnectionException(
+            "DB_ASYNC_ENABLED=true requer o pacote asyncpg (pip install asyncpg)",
+            details={"reason": "driver_missing"}
+        ) from e
+    return asyncpg
+
+
+def translate_error(error: Exception) -> Exception:
+    """Map an asyncpg error to the equivalent psycopg2 exception
+
+    Args:
+        error: Exception raised by asyncpg
+
+    Returns:
+        psycopg2 error of the same SQLSTATE, DatabaseConnectionException for
+        connection failures, or the original error
+    """
+    asyncpg = _asyncpg()
+
+    sqlstate = getattr(error, "sqlstate", None)
+    if isinstance(error, asyncpg.PostgresError) and sqlstate:
+        try:
+            error_class = psycopg2.errors.lookup(sqlstate)
+        except KeyError:
+            error_class = psycopg2.DatabaseError
+        return error_class(str(error))
+
+    if isinstance(error, (asyncpg.InterfaceError, OSError, asyncio.TimeoutError)):
+        return DatabaseConnectionException(
+            "Não foi possível usar a conexão com o PostgreSQL",
+            details={"reason": "connection_error", "error": str(error)}
+        )
+    return error
+
+
+class AsyncDatabase:
+    """asyncpg pool bound to the application event loop"""
+
+    def __init__(self, dsn: str, min_size: int = 2, max_size: int = 10, timeout: float = 30):
+        """Initialize (the pool is created by start())
+
+        Args:
+            dsn: PostgreSQL connection string
+            min_size: Connections opened at startup and kept open
+            max_size: Maximum open connections
+            timeout: Seconds to wait for a free connection
+        """
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pool = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        """Create the pool on the running event loop"""
+        asyncpg = _asyncpg()
+        try:
+            self.pool = await asyncpg.create_pool(
+                dsn=self.dsn,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                timeout=self.timeout
+            )
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError) as e:
+            raise DatabaseConnectionException(
+                "Não foi possível conectar ao PostgreSQL (asyncpg)",
+                details={"reason": "connect_failed", "error": str(e)}
+            ) from e
+        self.loop = asyncio.get_running_loop()
+
+    async def close(self):
+        """Close the pool"""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    async def read_only(self, func: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Run func(connection) in a read-only transaction with the SQL timeouts
+
+        Args:
+            func: Coroutine function receiving the asyncpg connection
+
+        Returns:
+            Result of func
+
+        Raises:
+            DatabaseConnectionException: If the pool is not started or the
+                connection fails
+            psycopg2.Error: Query errors, translated by SQLSTATE
+        """
+        if self.pool is None:
+            raise DatabaseConnectionException("Pool assíncrono não iniciado", details={"reason": "pool_closed"})
+
+        try:
+            async with self.pool.acquire(timeout=self.timeout) as conn:
+                async with conn.transaction(readonly=True):
+                    await conn.execute(
+                        f"SET LOCAL statement_timeout = {int(settings.sql_statement_timeout_ms)}; "
+                        f"SET LOCAL lock_timeout = {int(settings.sql_lock_timeout_ms)}"
+                    )
+                    return await func(conn)
+        except (DatabaseConnectionException, psycopg2.Error):
+            raise
+        except Exception as e:
+            translated = translate_error(e)
+            if translated is e:
+                raise
+            raise translated from e
+
+    async def fetch(self, sql: str, *args: Any) -> List[Dict[str, Any]]:
+        """Run a read-only query and return every row
+
+        Args:
+            sql: Query with $1, $2, ... placeholders
+            *args: Parameter values
+
+        Returns:
+            Rows as dictionaries
+        """
+        async def run(conn):
+            return [dict(record) for record in await conn.fetch(sql, *args)]
+
+        return await self.read_only(run)
+
+    @staticmethod
+    async def explain(conn, sql: str) -> Dict[str, Any]:
+        """Get the estimated plan of a query without running it
+
+        Returns:
+            Root plan node ("Total Cost", "Plan Rows", "Plans", ...)
+        """
+        plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {sql}")
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]
+
+    @staticmethod
+    async def fetch_capped(
+        conn,
+        sql: str,
+        max_rows: int,
+        max_bytes: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Read rows through a server-side cursor until the row or byte cap
+
+        Must run inside read_only() (cursors need a transaction).
+
+        Returns:
+            tuple: (rows, "max_rows" | "max_bytes" | None)
+        """
+        rows: List[Dict[str, Any]] = []
+        total_bytes = 0
+        async for record in conn.cursor(sql, prefetch=settings.sql_tool_fetch_size):
+            if len(rows) >= max_rows:
+                return rows, "max_rows"
+
+            row = dict(record)
+            row_bytes = len(json.dumps(row, ensure_ascii=False, default=str).encode("utf-8"))
+            if total_bytes + row_bytes > max_bytes:
+                return rows, "max_bytes"
+
+            rows.append(row)
+            total_bytes += row_bytes
+        return rows, None
+
+    def run_sync(self, coro: Awaitable[Any], cancel_scope=None) -> Any:
+        """Run a coroutine on the pool's event loop from a worker thread
+
+        The calling thread waits for the result; the database wait itself
+        happens in the event loop.
+
+        Args:
+            coro: Coroutine using this pool
+            cancel_scope: Optional QueryCancelScope; cancelling it cancels
+                the coroutine (asyncpg then cancels the query on the server)
+
+        Returns:
+            Result of the coroutine
+
+        Raises:
+            RuntimeError: If called from the event loop thread itself
+            concurrent.futures.CancelledError: If the scope was cancelled
+        """
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            coro.close()
+            raise RuntimeError("run_sync() não pode ser chamado no loop do pool; use await")
+
+        if cancel_scope is not None and cancel_scope.cancelled:
+            coro.close()
+            raise concurrent.futures.CancelledError()
+
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        if cancel_scope is not None and not cancel_scope.register(future):
+            future.cancel()
+            raise concurrent.futures.CancelledError()
+        try:
+            return future.result()
+        finally:
+            if cancel_scope is not None:
+                cancel_scope.unregister(future)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get pool usage
+
+        Returns:
+            Dictionary with current size and limits
+        """
+        if self.pool is None:
+            return {"driver": "asyncpg", "started": False}
+        return {
+            "driver": "asyncpg",
+            "started": True,
+            "size": self.pool.get_size(),
+            "idle": self.pool.get_idle_size(),
+            "min_size": self.pool.get_min_size(),
+            "max_size": self.pool.get_max_size(),
+        }
+
+
+_database: Optional[AsyncDatabase] = None
+
+
+async def start_async_database() -> AsyncDatabase:
+    """Create and start the process-wide asyncpg pool (application startup)
+
+    Returns:
+        Started AsyncDatabase
+    """
+    global _database
+    if _database is None:
+        database = AsyncDatabase(
+            dsn=build_dsn(),
+            min_size=settings.db_pool_warmup,
+            max_size=settings.db_pool_size + settings.db_max_overflow,
+            timeout=settings.db_pool_timeout
+        )
+        await database.start()
+        _database = database
+        logger.info(
+            "async_database_pool_created",
+            min_size=database.min_size,
+            max_size=database.max_size
+        )
+    return _database
+
+
+def get_async_database() -> Optional[AsyncDatabase]:
+    """Get the started asyncpg pool (None when the async path is disabled or not started)"""
+    return _database
+
+
+async def close_async_database():
+    """Close the process-wide asyncpg pool (application shutdown)"""
+    global _database
+    if _database is not None:
+        await _database.close()
+        _database = None
@@ -0,0 +1,113 @@
+"""Server-side cancellation of agent queries for abandoned requests
+
+The chat endpoint opens a QueryCancelScope per request and runs the crew
+inside it. SQLQueryTool registers the connection of each running query
+with the current scope; when the client disconnects the endpoint cancels
+the scope, which sends a PostgreSQL cancel request for every registered
+connection and makes later tool calls in that request fail fast.
+
+The scope travels in a ContextVar, which asyncio.to_thread copies into the
+worker thread that runs the crew.
+
+A scope can have a parent (e.g. a group of concurrent queries with its own
+timeout inside a chat request): connections registered with the child are
+also registered with the parent, so cancelling either one stops them.
+"""
+
+from typing import Optional, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+
+import psycopg2
+
+
+_current_scope: ContextVar[Optional["QueryCancelScope"]] = ContextVar("query_cancel_scope", default=None)
+
+
+class QueryCancelScope:
+    """Tracks the connections running queries for one request"""
+
+    def __init__(self, parent: Optional["QueryCancelScope"] = None):
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._cancelled = False
+        self._reason: Optional[str] = None
+        self.parent = parent
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether this scope (or its parent) was cancelled"""
+        return self._cancelled or (self.parent is not None and self.parent.cancelled)
+
+    @property
+    def reason(self) -> Optional[str]:
+        """Why the scope was cancelled (the parent's reason if it was cancelled first)"""
+        if self._cancelled:
+            return self._reason
+        return self.parent.reason if self.parent is not None else None
+
+    def register(self, conn) -> bool:
+        """Track a connection that is about to run a query
+
+        Returns:
+            False if the scope was already cancelled (do not run the query)
+        """
+        if self.parent is not None and not self.parent.register(conn):
+            return False
+
+        with self._lock:
+            if self._cancelled:
+                registered = False
+            else:
+                self._connections.add(conn)
+                registered = True
+
+        if not registered and self.parent is not None:
+            self.parent.unregister(conn)
+        return registered
+
+    def unregister(self, conn):
+        """Stop tracking a connection whose query finished"""
+        with self._lock:
+            self._connections.discard(conn)
+        if self.parent is not None:
+            self.parent.unregister(conn)
+
+    def cancel(self, reason: str = "client_disconnected") -> int:
+        """Cancel every running query of the scope
+
+        Args:
+            reason: Why the request was cancelled (reported by the tool)
+
+        Returns:
+            Number of queries a cancel request was sent for
+        """
+        with self._lock:
+            self._cancelled = True
+            self._reason = reason
+            connections = list(self._connections)
+
+        sent = 0
+        for conn in connections:
+            try:
+                conn.cancel()
+                sent += 1
+            except psycopg2.Error:
+                pass
+        return sent
+
+
+def current_cancel_scope() -> Optional[QueryCancelScope]:
+    """Get the cancel scope of the current request (None outside a request)"""
+    return _current_scope.get()
+
+
+@contextmanager
+def cancel_scope(scope: QueryCancelScope) -> Iterator[QueryCancelScope]:
+    """Make scope the current cancel scope inside the block"""
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
@@ -0,0 +1,208 @@
+"""Result cache for agent SQL, invalidated by imports
+
+Chat users repeat the same KPI questions, and the agent writes the same
+SQL for them. SQLQueryTool keeps successful responses in a byte-bounded
+LRU keyed by the normalized SQL. Every entry is stamped with the data
+version current when its query started; the batch processor bumps the
+version after each imported note, so an entry never outlives the data it
+was computed from. The TTL bounds staleness for imports done by other
+processes (importar_lote.py), which cannot bump this process's version.
+"""
+
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+import json
+import re
+import threading
+import time
+
+from config import settings
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Literais ('...') e identificadores entre aspas ("...") preservados na normalização
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Normalize SQL for use as a cache key
+
+    Collapses whitespace and lowercases everything outside quoted literals
+    and identifiers, and drops a trailing semicolon.
+
+    Args:
+        sql: SQL text
+
+    Returns:
+        Normalized SQL
+    """
+    parts = _QUOTED.split(sql.strip().rstrip(';').strip())
+    normalized = []
+    for index, part in enumerate(parts):
+        if index % 2:
+            normalized.append(part)
+        else:
+            normalized.append(_WHITESPACE.sub(" ", part).lower())
+    return "".join(normalized).strip()
+
+
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+
+def get_data_version() -> int:
+    """Get the current data version (bumped on every committed import)"""
+    return _data_version
+
+
+def bump_data_version() -> int:
+    """Mark cached results as stale after new data was committed
+
+    Returns:
+        New data version
+    """
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
+        return _data_version
+
+
+class QueryResultCache:
+    """Thread-safe LRU of tool responses bounded by serialized size"""
+
+    def __init__(self, max_bytes: int = 16_000_000, ttl_seconds: float = 300):
+        """Initialize the cache
+
+        Args:
+            max_bytes: Total serialized size of the cached responses
+            ttl_seconds: Maximum age of an entry
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (response, size, stored_at, version)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "too_large": 0}
+
+    def _remove(self, key: str):
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached response computed from the current data version
+
+        Args:
+            key: Normalized SQL
+
+        Returns:
+            Copy of the cached response with cache metadata, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            response, _, stored_at, version = entry
+            age = time.monotonic() - stored_at
+            if version != get_data_version() or age > self.ttl_seconds:
+                self._remove(key)
+                self._stats["stale"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+
+        return {**response, "cached": True, "cache_age_seconds": round(age, 3)}
+
+    def put(self, key: str, response: Dict[str, Any], version: int) -> bool:
+        """Store a response
+
+        Args:
+            key: Normalized SQL
+            response: Tool response (JSON-serializable with default=str)
+            version: Data version read before the query started; responses
+                from a version that is already outdated are not stored
+
+        Returns:
+            True if the response was stored
+        """
+        size = len(json.dumps(response, ensure_ascii=False, default=str).encode("utf-8"))
+
+        with self._lock:
+            if version != get_data_version():
+                return False
+            if size > self.max_bytes:
+                self._stats["too_large"] += 1
+                return False
+
+            if key in self._entries:
+                self._remove(key)
+
+            while self._entries and self._bytes + size > self.max_bytes:
+                _, (_, evicted_size, _, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats["evictions"] += 1
+
+            self._entries[key] = (response, size, time.monotonic(), version)
+            self._bytes += size
+            return True
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get cache usage and counters
+
+        Returns:
+            Dictionary with size, hit ratio and cumulative counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+            size = self._bytes
+
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "data_version": get_data_version(),
+            **stats,
+            "hit_ratio": round(stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+_cache: Optional[QueryResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryResultCache:
+    """Get the process-wide query result cache (created on first use)
+
+    Returns:
+        Shared QueryResultCache sized by the sql_cache_* settings
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryResultCache(
+                max_bytes=settings.sql_cache_max_bytes,
+                ttl_seconds=settings.sql_cache_ttl_seconds
+            )
+            logger.info(
+                "query_cache_created",
+                max_bytes=_cache.max_bytes,
+                ttl_seconds=_cache.ttl_seconds
+            )
+        return _cache
@@ -0,0 +1,548 @@
+"""Catalog of named, parameterized queries
+
+The canonical questions of get_common_queries() (totals by period, top
+products, notes of a company, ...) as named queries with typed parameters.
+CatalogQueryTool and the /api/queries endpoints run them by name, so a
+common question needs no SQL generation and no SQL validation.
+
+Each query is PREPAREd once per pooled connection and then run with
+EXECUTE, so PostgreSQL parses it once and can reuse a generic plan.
+Results go through the same import-versioned cache as SQLQueryTool, and
+like its queries they are cancelled with the request's QueryCancelScope.
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import date, datetime
+import concurrent.futures
+import re
+import threading
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extras
+
+from config import settings
+from database.async_pool import get_async_database
+from database.cancellation import current_cancel_scope
+from database.pool import get_pool
+from database.query_cache import get_query_cache, get_data_version
+from utils.exceptions import ValidationException
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Tipo do parâmetro -> tipo PostgreSQL do PREPARE
+PARAM_SQL_TYPES = {
+    "date": "date",
+    "int": "integer",
+    "text": "text",
+}
+
+# :nome (grupo 1; não confunde com casts ::numeric). Literais e identificadores
+# entre aspas casam sem grupo e ficam como estão ('HH24:MI', 'dd:mm')
+_PARAM_PATTERN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|(?<!:):([a-z_][a-z0-9_]*)")
+
+
+def placeholders(sql: str) -> List[str]:
+    """Names of the :name parameters of a query, outside quoted literals"""
+    return [match.group(1) for match in _PARAM_PATTERN.finditer(sql) if match.group(1)]
+
+
+@dataclass
+class QueryParam:
+    """Typed parameter of a catalog query"""
+
+    name: str
+    type: str  # date | int | text
+    description: str
+    default: Any = None
+    min_value: Optional[int] = None
+    max_value: Optional[int] = None
+    max_length: Optional[int] = None
+
+    @property
+    def required(self) -> bool:
+        return self.default is None
+
+    def convert(self, value: Any) -> Any:
+        """Convert a raw value (JSON or query string) to the parameter type
+
+        Raises:
+            ValueError: If the value does not match the type or bounds
+        """
+        if self.type == "date":
+            if isinstance(value, datetime):
+                return value.date()
+            if isinstance(value, date):
+                return value
+            return date.fromisoformat(str(value).strip()[:10])
+
+        if self.type == "int":
+            if isinstance(value, bool):
+                raise ValueError("esperado inteiro")
+            number = int(value)
+            if self.min_value is not None and number < self.min_value:
+                raise ValueError(f"mínimo {self.min_value}")
+            if self.max_value is not None and number > self.max_value:
+                raise ValueError(f"máximo {self.max_value}")
+            return number
+
+        text = str(value).strip()
+        if not text:
+            raise ValueError("texto vazio")
+        if self.max_length is not None and len(text) > self.max_length:
+            raise ValueError(f"máximo {self.max_length} caracteres")
+        return text
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "type": self.type,
+            "description": self.description,
+            "required": self.required,
+            "default": self.default,
+        }
+
+
+@dataclass
+class CatalogQuery:
+    """Named query; parameters are written as :name in the SQL"""
+
+    name: str
+    title: str
+    description: str
+    sql: str
+    params: List[QueryParam] = field(default_factory=list)
+
+    @property
+    def statement_name(self) -> str:
+        return f"catalog_{self.name}"
+
+    def positional_sql(self) -> str:
+        """Query with the :name parameters as $1, $2, ... (declaration order)"""
+        positions = {param.name: index + 1 for index, param in enumerate(self.params)}
+        return _PARAM_PATTERN.sub(
+            lambda m: f"${positions[m.group(1)]}" if m.group(1) else m.group(0),
+            self.sql.strip()
+        )
+
+    def prepare_sql(self) -> str:
+        """PREPARE statement with the :name parameters as $1, $2, ..."""
+        body = self.positional_sql()
+        if not self.params:
+            return f"PREPARE {self.statement_name} AS {body}"
+        types = ", ".join(PARAM_SQL_TYPES[param.type] for param in self.params)
+        return f"PREPARE {self.statement_name} ({types}) AS {body}"
+
+    def execute_sql(self) -> str:
+        """EXECUTE statement with psycopg2 placeholders for the arguments"""
+        if not self.params:
+            return f"EXECUTE {self.statement_name}"
+        return f"EXECUTE {self.statement_name} ({', '.join(['%s'] * len(self.params))})"
+
+    def bind(self, values: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate and convert the given parameter values
+
+        Args:
+            values: Raw values by parameter name (defaults fill the gaps)
+
+        Returns:
+            Converted values by parameter name, in declaration order
+
+        Raises:
+            ValidationException: If a parameter is unknown, missing or invalid
+        """
+        values = dict(values or {})
+        known = {param.name for param in self.params}
+        unknown = sorted(set(values) - known)
+        if unknown:
+            raise ValidationException(
+                f"Parâmetros desconhecidos para '{self.name}': {', '.join(unknown)}",
+                details={"query": self.name, "reason": "unknown_parameter", "expected": sorted(known)}
+            )
+
+        bound = {}
+        for param in self.params:
+            raw = values.get(param.name, param.default)
+            if raw is None:
+                raise ValidationException(
+                    f"Parâmetro obrigatório ausente: {param.name}",
+                    details={"query": self.name, "reason": "missing_parameter", "parameter": param.to_dict()}
+                )
+            try:
+                bound[param.name] = param.convert(raw)
+            except (TypeError, ValueError) as e:
+                raise ValidationException(
+                    f"Valor inválido para '{param.name}' ({param.type}): {e}",
+                    details={"query": self.name, "reason": "invalid_parameter", "parameter": param.to_dict()}
+                )
+        return bound
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "title": self.title,
+            "description": self.description,
+            "params": [param.to_dict() for param in self.params],
+        }
+
+
+_LIMIT = dict(min_value=1, max_value=100)
+
+CATALOG: Dict[str, CatalogQuery] = {
+    query.name: query for query in [
+        CatalogQuery(
+            name="total_vendas_periodo",
+            title="Total de vendas por período",
+            description="Quantidade, soma e média das notas autorizadas em um período",
+            sql="""
+SELECT
+  COUNT(*) as total_notas,
+  ROUND(SUM(valor_total_nota)::numeric, 2) as valor_total,
+  ROUND(AVG(valor_total_nota)::numeric, 2) as valor_medio
+FROM notas_fiscais
+WHERE status = 'autorizada'
+  AND data_hora_emissao >= :data_inicio
+  AND data_hora_emissao < :data_fim
+""",
+            params=[
+                QueryParam("data_inicio", "date", "Data inicial (inclusive), AAAA-MM-DD"),
+                QueryParam("data_fim", "date", "Data final (exclusive), AAAA-MM-DD"),
+            ],
+        ),
+        CatalogQuery(
+            name="top_produtos",
+            title="Top produtos mais vendidos",
+            description="Ranking de produtos por quantidade vendida em notas autorizadas",
+            sql="""
+SELECT
+  i.descricao as produto,
+  SUM(i.quantidade_comercial) as quantidade_total,
+  ROUND(SUM(i.valor_total_bruto)::numeric, 2) as valor_total,
+  COUNT(DISTINCT i.nota_fiscal_id) as num_notas
+FROM nf_itens i
+INNER JOIN notas_fiscais nf ON i.nota_fiscal_id = nf.id
+WHERE nf.status = 'autorizada'
+GROUP BY i.descricao
+ORDER BY quantidade_total DESC
+LIMIT :limit
+""",
+            params=[QueryParam("limit", "int", "Quantidade de produtos", default=10, **_LIMIT)],
+        ),
+        CatalogQuery(
+            name="notas_por_empresa",
+            title="Notas por empresa",
+            description="Notas autorizadas em que a empresa (parte da razão social) é emitente ou destinatária",
+            sql="""
+SELECT
+  nf.numero_nf,
+  nf.serie,
+  TO_CHAR(nf.data_hora_emissao, 'DD/MM/YYYY') as data_emissao,
+  ROUND(nf.valor_total_nota::numeric, 2) as valor_total,
+  e.razao_social as emitente,
+  d.razao_social as destinatario
+FROM notas_fiscais nf
+LEFT JOIN empresas e ON nf.emitente_id = e.id
+LEFT JOIN empresas d ON nf.destinatario_id = d.id
+WHERE nf.status = 'autorizada'
+  AND (e.razao_social ILIKE '%' || :empresa || '%' OR d.razao_social ILIKE '%' || :empresa || '%')
+ORDER BY nf.data_hora_emissao DESC
+LIMIT :limit
+""",
+            params=[
+                QueryParam("empresa", "text", "Parte da razão social", max_length=100),
+                QueryParam("limit", "int", "Quantidade de notas", default=20, **_LIMIT),
+            ],
+        ),
+        CatalogQuery(
+            name="faturamento_mensal",
+            title="Faturamento mensal",
+            description="Notas autorizadas agrupadas por mês a partir de uma data",
+            sql="""
+SELECT
+  DATE_TRUNC('month', data_hora_emissao) as mes,
+  COUNT(*) as total_notas,
+  ROUND(SUM(valor_total_nota)::numeric, 2) as valor_total,
+  ROUND(AVG(valor_total_nota)::numeric, 2) as valor_medio
+FROM notas_fiscais
+WHERE status = 'autorizada'
+  AND data_hora_emissao >= :data_inicio
+GROUP BY mes
+ORDER BY mes DESC
+LIMIT :limit
+""",
+            params=[
+                QueryParam("data_inicio", "date", "Data inicial, AAAA-MM-DD"),
+                QueryParam("limit", "int", "Quantidade de meses", default=12, **_LIMIT),
+            ],
+        ),
+        CatalogQuery(
+            name="total_impostos",
+            title="Total de impostos",
+            description="Soma de ICMS, IPI, PIS e COFINS das notas autorizadas em um período",
+            sql="""
+SELECT
+  ROUND(SUM(valor_icms)::numeric, 2) as total_icms,
+  ROUND(SUM(valor_ipi)::numeric, 2) as total_ipi,
+  ROUND(SUM(valor_pis)::numeric, 2) as total_pis,
+  ROUND(SUM(valor_cofins)::numeric, 2) as total_cofins,
+  ROUND((SUM(valor_icms) + SUM(valor_ipi) + SUM(valor_pis) + SUM(valor_cofins))::numeric, 2) as total_geral
+FROM notas_fiscais
+WHERE status = 'autorizada'
+  AND data_hora_emissao >= :data_inicio
+  AND data_hora_emissao < :data_fim
+""",
+            params=[
+                QueryParam("data_inicio", "date", "Data inicial (inclusive), AAAA-MM-DD"),
+                QueryParam("data_fim", "date", "Data final (exclusive), AAAA-MM-DD"),
+            ],
+        ),
+        CatalogQuery(
+            name="nota_por_chave",
+            title="Buscar nota por chave",
+            description="Dados gerais de uma nota pela chave de acesso",
+            sql="""
+SELECT
+  nf.id,
+  nf.numero_nf,
+  nf.serie,
+  nf.chave_acesso,
+  TO_CHAR(nf.data_hora_emissao, 'DD/MM/YYYY HH24:MI') as data_hora,
+  ROUND(nf.valor_total_nota::numeric, 2) as valor_total,
+  nf.status,
+  e.razao_social as emitente,
+  d.razao_social as destinatario
+FROM notas_fiscais nf
+LEFT JOIN empresas e ON nf.emitente_id = e.id
+LEFT JOIN empresas d ON nf.destinatario_id = d.id
+WHERE nf.chave_acesso = :chave_acesso
+LIMIT 1
+""",
+            params=[QueryParam("chave_acesso", "text", "Chave de acesso (44 dígitos)", max_length=44)],
+        ),
+        CatalogQuery(
+            name="itens_da_nota",
+            title="Itens de uma nota",
+            description="Itens de uma nota fiscal pelo id da nota",
+            sql="""
+SELECT
+  i.numero_item,
+  i.codigo_produto,
+  i.descricao,
+  i.quantidade_comercial,
+  ROUND(i.valor_unitario_comercial::numeric, 2) as valor_unitario,
+  ROUND(i.valor_total_bruto::numeric, 2) as valor_total,
+  i.unidade_comercial,
+  i.ncm,
+  i.cfop
+FROM nf_itens i
+WHERE i.nota_fiscal_id = :nota_fiscal_id
+ORDER BY i.numero_item
+LIMIT 100
+""",
+            params=[QueryParam("nota_fiscal_id", "int", "ID da nota fiscal", min_value=1)],
+        ),
+        CatalogQuery(
+            name="notas_de_hoje",
+            title="Notas de hoje",
+            description="Notas autorizadas emitidas hoje",
+            sql="""
+SELECT
+  nf.numero_nf,
+  nf.serie,
+  TO_CHAR(nf.data_hora_emissao, 'HH24:MI') as hora,
+  ROUND(nf.valor_total_nota::numeric, 2) as valor,
+  e.razao_social as emitente
+FROM notas_fiscais nf
+LEFT JOIN empresas e ON nf.emitente_id = e.id
+WHERE DATE(nf.data_hora_emissao) = CURRENT_DATE
+  AND nf.status = 'autorizada'
+ORDER BY nf.data_hora_emissao DESC
+LIMIT 50
+""",
+        ),
+    ]
+}
+
+
+def get_catalog_query(name: str) -> Optional[CatalogQuery]:
+    """Get a catalog query by name (None if it does not exist)"""
+    return CATALOG.get(name)
+
+
+def list_catalog() -> List[Dict[str, Any]]:
+    """Describe every catalog query and its parameters"""
+    return [query.to_dict() for query in CATALOG.values()]
+
+
+# Statements já preparados por conexão: (id da conexão, pid do backend) -> nomes.
+# Conexões psycopg2 não aceitam weakref; o pid distingue uma conexão nova que
+# reaproveite o mesmo id, e o retry em InvalidSqlStatementName cobre o resto.
+_prepared: Dict[Tuple[int, int], set] = {}
+_prepared_lock = threading.Lock()
+_MAX_TRACKED_CONNECTIONS = 1000
+
+
+def _connection_key(conn) -> Tuple[int, int]:
+    return id(conn), conn.info.backend_pid
+
+
+def _is_prepared(conn, statement_name: str) -> bool:
+    with _prepared_lock:
+        return statement_name in _prepared.get(_connection_key(conn), ())
+
+
+def _mark_prepared(conn, statement_name: str, prepared: bool = True):
+    key = _connection_key(conn)
+    with _prepared_lock:
+        if prepared:
+            if key not in _prepared and len(_prepared) >= _MAX_TRACKED_CONNECTIONS:
+                _prepared.clear()
+            _prepared.setdefault(key, set()).add(statement_name)
+        else:
+            _prepared.get(key, set()).discard(statement_name)
+
+
+def _execute_prepared(conn, query: CatalogQuery, args: List[Any]) -> List[Dict[str, Any]]:
+    """Run a catalog query on conn, preparing it on first use"""
+    for attempt in range(2):
+        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+            cursor.execute(
+                "SET LOCAL statement_timeout = %s; SET LOCAL lock_timeout = %s",
+                (settings.sql_statement_timeout_ms, settings.sql_lock_timeout_ms)
+            )
+            if not _is_prepared(conn, query.statement_name):
+                try:
+                    cursor.execute(query.prepare_sql())
+                except psycopg2.errors.DuplicatePreparedStatement:
+                    # Preparado antes de a conexão ser rastreada
+                    conn.rollback()
+                    _mark_prepared(conn, query.statement_name)
+                    continue
+                _mark_prepared(conn, query.statement_name)
+
+            try:
+                cursor.execute(query.execute_sql(), args)
+            except psycopg2.errors.InvalidSqlStatementName:
+                # Statement perdido (ex: DISCARD ALL no servidor): prepara de novo
+                conn.rollback()
+                _mark_prepared(conn, query.statement_name, prepared=False)
+                if attempt:
+                    raise
+                continue
+            return [dict(row) for row in cursor.fetchall()]
+
+    raise psycopg2.errors.InvalidSqlStatementName(f"prepared statement {query.statement_name} unavailable")
+
+
+def _bind_catalog_query(name: str, params: Optional[Dict[str, Any]]) -> Tuple[CatalogQuery, Dict[str, Any], str]:
+    """Look up and bind a catalog query
+
+    Returns:
+        tuple: (query, bound parameters, result cache key)
+
+    Raises:
+        ValidationException: If the query does not exist or a parameter is invalid
+    """
+    query = get_catalog_query(name)
+    if query is None:
+        raise ValidationException(
+            f"Consulta '{name}' não existe no catálogo",
+            details={"reason": "unknown_query", "available": list(CATALOG)}
+        )
+
+    bound = query.bind(params)
+    cache_key = f"catalog:{name}:{sorted((key, str(value)) for key, value in bound.items())}"
+    return query, bound, cache_key
+
+
+def run_catalog_query(name: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Run a catalog query by name
+
+    Args:
+        name: Catalog query name
+        params: Raw parameter values by name
+
+    Returns:
+        Dictionary with the query name, bound parameters, row_count and results
+
+    Runs on the asyncpg pool when it is enabled and started (through
+    AsyncDatabase.run_sync), else as a prepared statement on the psycopg2 pool.
+
+    Raises:
+        ValidationException: If the query does not exist or a parameter is invalid
+        DatabaseConnectionException: If no database connection is available
+        concurrent.futures.CancelledError: If the request's cancel scope was cancelled
+        psycopg2.Error: If the query fails
+    """
+    query, bound, cache_key = _bind_catalog_query(name, params)
+    response = {"query_name": name, "params": bound}
+
+    data_version = get_data_version()
+    if settings.sql_cache_enabled:
+        cached = get_query_cache().get(cache_key)
+        if cached is not None:
+            return cached
+
+    scope = current_cancel_scope()
+    database = get_async_database() if settings.db_async_enabled else None
+    if database is not None:
+        rows = database.run_sync(database.fetch(query.positional_sql(), *bound.values()), cancel_scope=scope)
+    else:
+        with get_pool().connection() as conn:
+            # Conexão registrada no escopo: cancelar a requisição cancela a query
+            if scope is not None and not scope.register(conn):
+                raise concurrent.futures.CancelledError()
+            try:
+                rows = _execute_prepared(conn, query, list(bound.values()))
+                conn.rollback()
+            finally:
+                if scope is not None:
+                    scope.unregister(conn)
+
+    response.update({"row_count": len(rows), "results": rows})
+
+    if settings.sql_cache_enabled:
+        get_query_cache().put(cache_key, response, data_version)
+
+    logger.info("catalog_query_executed", query_name=name, row_count=len(rows))
+    return response
+
+
+async def run_catalog_query_async(database, name: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Run a catalog query on the asyncpg pool (same result and cache as run_catalog_query)
+
+    asyncpg prepares the statement on first use and keeps it in the
+    connection's statement cache, so no explicit PREPARE is needed.
+
+    Args:
+        database: Started AsyncDatabase
+        name: Catalog query name
+        params: Raw parameter values by name
+
+    Raises:
+        ValidationException: If the query does not exist or a parameter is invalid
+        DatabaseConnectionException: If no database connection is available
+        psycopg2.Error: If the query fails (translated from asyncpg)
+    """
+    query, bound, cache_key = _bind_catalog_query(name, params)
+    response = {"query_name": name, "params": bound}
+
+    data_version = get_data_version()
+    if settings.sql_cache_enabled:
+        cached = get_query_cache().get(cache_key)
+        if cached is not None:
+            return cached
+
+    rows = await database.fetch(query.positional_sql(), *bound.values())
+
+    response.update({"row_count": len(rows), "results": rows})
+
+    if settings.sql_cache_enabled:
+        get_query_cache().put(cache_key, response, data_version)
+
+    logger.info("catalog_query_executed", query_name=name, row_count=len(rows), driver="asyncpg")
+    return response
@@ -3,10 +3,302 @@ Database Schema Information Module
 
 Provides comprehensive information about the NF-e database schema
 for AI agents to construct accurate SQL queries.
+
+Table and column names, types, keys and indexes come from the live
+database (database/schema_provider.py); the curated descriptions below
+only document what the database has no COMMENT for, and are the fallback
+when the database cannot be reached.
 """
 
 from typing import Dict, List, Any, Optional
 
+from config import settings
+from database.schema_provider import SchemaProvider, SchemaSnapshot, TableInfo
+
+
+# Descrições curadas (layout 4.00, database/schema_nfe_completo.sql)
+_CURATED_TABLES: Dict[str, Dict[str, Any]] = {
+    "notas_fiscais": {
+        "description": "Tabela principal contendo dados gerais das NF-e",
+        "columns": {
+            "id": {"type": "integer", "nullable": False, "description": "Chave primária"},
+            "chave_acesso": {"type": "character varying(44)", "nullable": False, "unique": True, "description": "Chave única de 44 dígitos"},
+            "numero_nf": {"type": "integer", "nullable": False, "description": "Número da nota fiscal"},
+            "serie": {"type": "character varying(3)", "nullable": False, "description": "Série da nota"},
+            "modelo": {"type": "character varying(2)", "nullable": False, "description": "55=NF-e, 65=NFC-e"},
+            "data_hora_emissao": {"type": "timestamp without time zone", "nullable": False, "description": "Data e hora de emissão"},
+            "emitente_id": {"type": "integer", "nullable": True, "fk": "empresas(id)"},
+            "destinatario_id": {"type": "integer", "nullable": True, "fk": "empresas(id)"},
+            "valor_total_nota": {"type": "numeric(15,2)", "nullable": False, "description": "Valor total da NF-e"},
+            "valor_total_produtos": {"type": "numeric(15,2)", "nullable": False},
+            "valor_icms": {"type": "numeric(15,2)", "nullable": True},
+            "valor_ipi": {"type": "numeric(15,2)", "nullable": True},
+            "valor_pis": {"type": "numeric(15,2)", "nullable": True},
+            "valor_cofins": {"type": "numeric(15,2)", "nullable": True},
+            "valor_frete": {"type": "numeric(15,2)", "nullable": True},
+            "valor_desconto": {"type": "numeric(15,2)", "nullable": True},
+            "status": {"type": "character varying(20)", "nullable": True, "description": "emitida, autorizada, cancelada, denegada, rejeitada, inutilizada"},
+            "natureza_operacao": {"type": "character varying(60)", "nullable": False},
+            "tipo_operacao": {"type": "character(1)", "nullable": False, "description": "0=Entrada, 1=Saída"},
+            "modalidade_frete": {"type": "character(1)", "nullable": True, "description": "0=Emitente, 1=Destinatário, 2=Terceiros, 9=Sem frete"},
+        },
+        "indexes": ["chave_acesso", "data_hora_emissao", "emitente_id", "destinatario_id", "status"]
+    },
+    
+    "empresas": {
+        "description": "Cadastro de empresas (emitentes e destinatários)",
+        "columns": {
+            "id": {"type": "integer", "nullable": False},
+            "cpf_cnpj": {"type": "character varying(14)", "nullable": False, "unique": True},
+            "tipo_pessoa": {"type": "character varying(10)", "nullable": True, "description": "juridica ou fisica"},
+            "razao_social": {"type": "character varying(60)", "nullable": True},
+            "nome_fantasia": {"type": "character varying(60)", "nullable": True},
+            "inscricao_estadual": {"type": "character varying(14)", "nullable": True},
+            "logradouro": {"type": "character varying(60)", "nullable": True},
+            "numero": {"type": "character varying(60)", "nullable": True},
+            "bairro": {"type": "character varying(60)", "nullable": True},
+            "nome_municipio": {"type": "character varying(60)", "nullable": True, "description": "Nome da cidade"},
+            "uf": {"type": "character(2)", "nullable": True},
+            "cep": {"type": "character varying(8)", "nullable": True}
+        },
+        "indexes": ["cpf_cnpj", "tipo_pessoa"]
+    },
+    
+    "nf_itens": {
+        "description": "Produtos/serviços da nota fiscal",
+        "columns": {
+            "id": {"type": "integer", "nullable": False},
+            "nota_fiscal_id": {"type": "integer", "nullable": True, "fk": "notas_fiscais(id)"},
+            "numero_item": {"type": "integer", "nullable": False},
+            "codigo_produto": {"type": "character varying(60)", "nullable": False},
+            "descricao": {"type": "character varying(120)", "nullable": False, "description": "Descrição do produto"},
+            "ncm": {"type": "character varying(8)", "nullable": True, "description": "Nomenclatura Comum do Mercosul"},
+            "cfop": {"type": "character varying(4)", "nullable": False, "description": "Código Fiscal de Operações e Prestações"},
+            "unidade_comercial": {"type": "character varying(6)", "nullable": False},
+            "quantidade_comercial": {"type": "numeric(15,4)", "nullable": False},
+            "valor_unitario_comercial": {"type": "numeric(21,10)", "nullable": False},
+            "valor_total_bruto": {"type": "numeric(15,2)", "nullable": False}
+        },
+        "indexes": ["nota_fiscal_id", "codigo_produto", "ncm", "cfop"]
+    },
+    
+    "nf_itens_icms": {
+        "description": "Informações de ICMS dos itens",
+        "columns": {
+            "id": {"type": "integer", "nullable": False},
+            "nf_item_id": {"type": "integer", "nullable": True, "fk": "nf_itens(id)"},
+            "origem": {"type": "character varying(1)", "nullable": False, "description": "0=Nacional, 1=Estrangeira importação direta, ..."},
+            "cst": {"type": "character varying(3)", "nullable": True, "description": "Código de Situação Tributária"},
+            "csosn": {"type": "character varying(4)", "nullable": True, "description": "CSOSN (Simples Nacional)"},
+            "valor_bc": {"type": "numeric(15,2)", "nullable": True},
+            "aliquota": {"type": "numeric(5,2)", "nullable": True},
+            "valor_icms": {"type": "numeric(15,2)", "nullable": True}
+        },
+        "indexes": ["nf_item_id"]
+    },
+    
+    "nf_itens_ipi": {
+        "description": "Informações de IPI dos itens",
+        "columns": {
+            "id": {"type": "integer", "nullable": False},
+            "nf_item_id": {"type": "integer", "nullable": True, "fk": "nf_itens(id)"},
+            "cst": {"type": "character varying(2)", "nullable": True},
+            "valor_bc": {"type": "numeric(15,2)", "nullable": True},
+            "aliquota": {"type": "numeric(5,2)", "nullable": True},
+            "valor_ipi": {"type": "numeric(15,2)", "nullable": True}
+        },
+        "indexes": ["nf_item_id"]
+    },
+    
+    "nf_itens_pis": {
+        "description": "Informações de PIS dos itens",
+        "columns": {
+            "id": {"type": "integer", "nullable": False},
+            "nf_item_id": {"type": "integer", "nullable": True, "fk": "nf_itens(id)"},
+            "cst": {"type": "character varying(2)", "nullable": True},
+            "valor_bc": {"type": "numeric(15,2)", "nullable": True},
+            "aliquota": {"type": "numeric(5,2)", "nullable": True},
+            "valor_pis": {"type": "numeric(15,2)", "nullable": True}
+        },
+        "indexes": ["nf_item_id"]
+    },
+    
+    "nf_itens_cofins": {
+        "description": "Informações de COFINS dos itens",
+        "columns": {
+            "id": {"type": "integer", "nullable": False},
+            "nf_item_id": {"type": "integer", "nullable": True, "fk": "nf_itens(id)"},
+            "cst": {"type": "character varying(2)", "nullable": True},
+            "valor_bc": {"type": "numeric(15,2)", "nullable": True},
+            "aliquota": {"type": "numeric(5,2)", "nullable": True},
+            "valor_cofins": {"type": "numeric(15,2)", "nullable": True}
+        },
+        "indexes": ["nf_item_id"]
+    },
+    
+    "nf_pagamentos": {
+        "description": "Formas de pagamento da nota",
+        "columns": {
+            "id": {"type": "integer", "nullable": False},
+            "nota_fiscal_id": {"type": "integer", "nullable": True, "fk": "notas_fiscais(id)"},
+            "indicador_pagamento": {"type": "character varying(1)", "nullable": True, "description": "0=À vista, 1=A prazo"},
+            "forma_pagamento": {"type": "character varying(2)", "nullable": False, "description": "01=Dinheiro, 02=Cheque, 03=Cartão de crédito, ..."},
+            "valor_pagamento": {"type": "numeric(15,2)", "nullable": False}
+        },
+        "indexes": ["nota_fiscal_id", "forma_pagamento"]
+    },
+    
+    "nf_transporte": {
+        "description": "Dados de transporte da nota",
+        "columns": {
+            "id": {"type": "integer", "nullable": False},
+            "nota_fiscal_id": {"type": "integer", "nullable": True, "fk": "notas_fiscais(id)"},
+            "modalidade_frete": {"type": "character(1)", "nullable": False, "description": "0=Emitente, 1=Destinatário, 2=Terceiros, 9=Sem frete"},
+            "transportadora_cpf_cnpj": {"type": "character varying(14)", "nullable": True},
+            "transportadora_nome": {"type": "character varying(60)", "nullable": True},
+            "placa_veiculo": {"type": "character varying(8)", "nullable": True}
+        },
+        "indexes": ["nota_fiscal_id"]
+    },
+    
+    "nf_transporte_volumes": {
+        "description": "Volumes transportados",
+        "columns": {
+            "id": {"type": "integer", "nullable": False},
+            "transporte_id": {"type": "integer", "nullable": True, "fk": "nf_transporte(id)"},
+            "quantidade": {"type": "integer", "nullable": True},
+            "especie": {"type": "character varying(60)", "nullable": True},
+            "peso_liquido": {"type": "numeric(15,3)", "nullable": True},
+            "peso_bruto": {"type": "numeric(15,3)", "nullable": True}
+        }
+    },
+    
+    "nf_referencias": {
+        "description": "Notas fiscais referenciadas",
+        "columns": {
+            "id": {"type": "integer", "nullable": False},
+            "nota_fiscal_id": {"type": "integer", "nullable": True, "fk": "notas_fiscais(id)"},
+            "tipo": {"type": "character varying(10)", "nullable": True, "description": "nfe, nfce, modelo1, cte, nfp, ecf"},
+            "chave_acesso_referenciada": {"type": "character varying(44)", "nullable": True}
+        }
+    },
+    
+    "nf_cobranca": {
+        "description": "Dados de cobrança/fatura",
+        "columns": {
+            "id": {"type": "integer", "nullable": False},
+            "nota_fiscal_id": {"type": "integer", "nullable": True, "fk": "notas_fiscais(id)"},
+            "numero_fatura": {"type": "character varying(60)", "nullable": True},
+            "valor_original": {"type": "numeric(15,2)", "nullable": True},
+            "valor_liquido": {"type": "numeric(15,2)", "nullable": True}
+        }
+    },
+    
+    "nf_duplicatas": {
+        "description": "Duplicatas/parcelas da cobrança",
+        "columns": {
+            "id": {"type": "integer", "nullable": False},
+            "cobranca_id": {"type": "integer", "nullable": True, "fk": "nf_cobranca(id)"},
+            "numero_duplicata": {"type": "character varying(60)", "nullable": True},
+            "data_vencimento": {"type": "date", "nullable": True},
+            "valor": {"type": "numeric(15,2)", "nullable": False}
+        }
+    }
+}
+
+# Tabelas principais e suas colunas mais usadas (ordem de exibição)
+_MAIN_COLUMNS: Dict[str, List[str]] = {
+    "notas_fiscais": [
+        "id", "chave_acesso", "numero_nf", "serie", "data_hora_emissao", "emitente_id", "destinatario_id",
+        "valor_total_nota", "valor_total_produtos", "valor_icms", "valor_ipi", "valor_pis", "valor_cofins", "status"
+    ],
+    "empresas": [
+        "id", "cpf_cnpj", "tipo_pessoa", "razao_social", "nome_fantasia", "inscricao_estadual",
+        "logradouro", "numero", "bairro", "nome_municipio", "uf", "cep"
+    ],
+    "nf_itens": [
+        "id", "nota_fiscal_id", "numero_item", "codigo_produto", "descricao", "ncm", "cfop",
+        "quantidade_comercial", "valor_unitario_comercial", "valor_total_bruto", "unidade_comercial"
+    ],
+    "nf_itens_icms": ["nf_item_id", "origem", "cst", "csosn", "valor_bc", "aliquota", "valor_icms"],
+    "nf_itens_ipi": ["nf_item_id", "cst", "valor_bc", "aliquota", "valor_ipi"],
+    "nf_itens_pis": ["nf_item_id", "cst", "valor_bc", "aliquota", "valor_pis"],
+    "nf_itens_cofins": ["nf_item_id", "cst", "valor_bc", "aliquota", "valor_cofins"],
+    "nf_pagamentos": ["nota_fiscal_id", "forma_pagamento", "valor_pagamento"],
+    "nf_transporte": ["nota_fiscal_id", "modalidade_frete"],
+    "nf_transporte_volumes": ["transporte_id", "quantidade", "especie", "peso_liquido", "peso_bruto"],
+    "nf_referencias": ["nota_fiscal_id", "tipo", "chave_acesso_referenciada"],
+    "nf_duplicatas": ["cobranca_id", "numero_duplicata", "data_vencimento", "valor"]
+}
+
+# Tamanho esperado quando a estimativa do PostgreSQL não está disponível
+_ROW_ESTIMATES = {
+    "notas_fiscais": "milhares a milhões",
+    "empresas": "centenas a milhares",
+    "nf_itens": "dezenas de milhares a milhões"
+}
+
+# Tipo de relacionamento e JOIN recomendado por foreign key
+_RELATIONSHIP_NOTES = {
+    ("notas_fiscais", "emitente_id"): ("many-to-one", "Cada nota tem um emitente (LEFT JOIN pois pode ser NULL)"),
+    ("notas_fiscais", "destinatario_id"): ("many-to-one", "Cada nota tem um destinatário (LEFT JOIN pois pode ser NULL)"),
+    ("nf_itens", "nota_fiscal_id"): ("many-to-one", "Cada item pertence a uma nota (INNER JOIN pois sempre existe)"),
+    ("nf_itens_icms", "nf_item_id"): ("one-to-one", "Cada item pode ter dados de ICMS (LEFT JOIN)"),
+    ("nf_itens_ipi", "nf_item_id"): ("one-to-one", "Cada item pode ter dados de IPI (LEFT JOIN)"),
+    ("nf_itens_pis", "nf_item_id"): ("one-to-one", "Cada item pode ter dados de PIS (LEFT JOIN)"),
+    ("nf_itens_cofins", "nf_item_id"): ("one-to-one", "Cada item pode ter dados de COFINS (LEFT JOIN)"),
+    ("nf_pagamentos", "nota_fiscal_id"): ("many-to-one", "Uma nota pode ter múltiplos pagamentos (INNER JOIN)"),
+    ("nf_transporte", "nota_fiscal_id"): ("one-to-one", "Uma nota pode ter dados de transporte (LEFT JOIN)")
+}
+
+_IMPORTANT_NOTES = (
+    "SEMPRE use LIMIT para evitar retornar muitos dados",
+    "SEMPRE filtre por status='autorizada' para dados válidos",
+    "Use LEFT JOIN para empresas (pode ser NULL)",
+    "Use INNER JOIN para itens (sempre existem)",
+    "Valores monetários são NUMERIC(15,2)",
+    "Datas são TIMESTAMP (sem fuso horário)"
+)
+
+# Tabelas resumidas no prompt dos agentes
+_PROMPT_TABLES = ["empresas", "notas_fiscais", "nf_itens", "nf_pagamentos", "nf_transporte"]
+
+
+_provider = SchemaProvider(
+    curated=_CURATED_TABLES,
+    refresh_interval=settings.schema_refresh_interval_seconds
+)
+
+
+def get_schema_snapshot() -> SchemaSnapshot:
+    """
+    Retorna o snapshot atual do schema (lido do banco e mantido em cache).
+    
+    Returns:
+        SchemaSnapshot com versão, origem ("live" ou "static") e tabelas
+    """
+    return _provider.get_snapshot()
+
+
+def get_loaded_schema_snapshot() -> Optional[SchemaSnapshot]:
+    """
+    Retorna o snapshot já carregado, sem consultar o banco.
+    
+    Returns:
+        SchemaSnapshot, ou None se o schema ainda não foi carregado
+    """
+    return _provider.snapshot
+
+
+def refresh_schema(force: bool = False) -> SchemaSnapshot:
+    """
+    Relê o schema do banco se ele mudou (ou sempre, com force).
+    
+    Returns:
+        SchemaSnapshot atual
+    """
+    return _provider.refresh(force=force)
+
 
 def get_schema_info() -> Dict[str, Any]:
     """
@@ -15,10 +307,13 @@ def get_schema_info() -> Dict[str, Any]:
     Returns:
         Dicionário com estrutura completa do banco
     """
+    snapshot = get_schema_snapshot()
     return {
         "database": "postgresql",
         "description": "Sistema de Notas Fiscais Eletrônicas (NF-e)",
         "version": "4.00",
+        "schema_version": snapshot.version,
+        "schema_source": snapshot.source,
         "encoding": "UTF-8",
         "timezone": "America/Sao_Paulo",
         
@@ -26,17 +321,17 @@ def get_schema_info() -> Dict[str, Any]:
         "relationships": get_relationships(),
         "common_queries": get_common_queries(),
         
-        "important_notes": [
-            "SEMPRE use LIMIT para evitar retornar muitos dados",
-            "SEMPRE filtre por status='autorizada' para dados válidos",
-            "Use LEFT JOIN para empresas (pode ser NULL)",
-            "Use INNER JOIN para itens (sempre existem)",
-            "Valores monetários são NUMERIC(15,2)",
-            "Datas são TIMESTAMP WITH TIME ZONE"
-        ]
+        "important_notes": list(_IMPORTANT_NOTES)
     }
 
 
+def _main_columns(table: TableInfo) -> List[str]:
+    """Colunas principais da tabela que existem no schema atual"""
+    existing = set(table.column_names)
+    curated = [name for name in _MAIN_COLUMNS.get(table.name, []) if name in existing]
+    return curated or table.column_names[:12]
+
+
 def get_main_tables() -> List[Dict[str, Any]]:
     """
     Retorna lista das tabelas principais do sistema.
@@ -44,157 +339,41 @@ def get_main_tables() -> List[Dict[str, Any]]:
     Returns:
         Lista de tabelas com descrições
     """
-    return [
-        {
-            "name": "notas_fiscais",
-            "description": "Tabela principal com dados gerais das NF-e",
-            "primary_key": "id",
-            "unique_keys": ["chave_acesso"],
-            "row_estimate": "milhares a milhões",
-            "main_columns": [
-                "id (PK)",
-                "chave_acesso (44 dígitos)",
-                "numero_nf, serie",
-                "data_hora_emissao",
-                "emitente_id (FK → empresas)",
-                "destinatario_id (FK → empresas)",
-                "valor_total_nota",
-                "valor_total_produtos",
-                "valor_icms, valor_ipi, valor_pis, valor_cofins",
-                "status (emitida|autorizada|cancelada)"
-            ]
-        },
-        {
-            "name": "empresas",
-            "description": "Cadastro de empresas (emitentes e destinatários)",
-            "primary_key": "id",
-            "unique_keys": ["cpf_cnpj"],
-            "row_estimate": "centenas a milhares",
-            "main_columns": [
-                "id (PK)",
-                "cpf_cnpj",
-                "tipo_pessoa (juridica|fisica)",
-                "razao_social, nome_fantasia",
-                "inscricao_estadual",
-                "logradouro, numero, bairro",
-                "nome_municipio (cidade), uf, cep"
-            ]
-        },
-        {
-            "name": "nf_itens",
-            "description": "Produtos/serviços da nota fiscal",
-            "primary_key": "id",
-            "foreign_keys": ["nota_fiscal_id → notas_fiscais"],
-            "row_estimate": "dezenas de milhares a milhões",
-            "main_columns": [
-                "id (PK)",
-                "nota_fiscal_id (FK)",
-                "numero_item",
-                "codigo_produto, descricao",
-                "ncm, cfop",
-                "quantidade_comercial",
-                "valor_unitario_comercial",
-                "valor_total_bruto",
-                "unidade_comercial"
-            ]
-        },
-        {
-            "name": "nf_itens_icms",
-            "description": "Detalhamento de ICMS por item",
-            "primary_key": "id",
-            "foreign_keys": ["nf_item_id → nf_itens"],
-            "main_columns": [
-                "nf_item_id (FK)",
-                "origem, cst, csosn",
-                "valor_bc, aliquota, valor_icms"
-            ]
-        },
-        {
-            "name": "nf_itens_ipi",
-            "description": "Detalhamento de IPI por item",
-            "primary_key": "id",
-            "foreign_keys": ["nf_item_id → nf_itens"],
-            "main_columns": [
-                "nf_item_id (FK)",
-                "cst, valor_bc, aliquota, valor_ipi"
-            ]
-        },
-        {
-            "name": "nf_itens_pis",
-            "description": "Detalhamento de PIS por item",
-            "primary_key": "id",
-            "foreign_keys": ["nf_item_id → nf_itens"],
-            "main_columns": [
-                "nf_item_id (FK)",
-                "cst, valor_bc, aliquota, valor_pis"
-            ]
-        },
-        {
-            "name": "nf_itens_cofins",
-            "description": "Detalhamento de COFINS por item",
-            "primary_key": "id",
-            "foreign_keys": ["nf_item_id → nf_itens"],
-            "main_columns": [
-                "nf_item_id (FK)",
-                "cst, valor_bc, aliquota, valor_cofins"
-            ]
-        },
-        {
-            "name": "nf_pagamentos",
-            "description": "Formas de pagamento da nota",
-            "primary_key": "id",
-            "foreign_keys": ["nota_fiscal_id → notas_fiscais"],
-            "main_columns": [
-                "nota_fiscal_id (FK)",
-                "forma_pagamento",
-                "valor_pagamento"
-            ]
-        },
-        {
-            "name": "nf_transporte",
-            "description": "Dados de transporte da nota",
-            "primary_key": "id",
-            "foreign_keys": ["nota_fiscal_id → notas_fiscais"],
-            "main_columns": [
-                "nota_fiscal_id (FK)",
-                "modalidade_frete"
-            ]
-        },
-        {
-            "name": "nf_transporte_volumes",
-            "description": "Volumes transportados",
-            "primary_key": "id",
-            "foreign_keys": ["transporte_id → nf_transporte"],
-            "main_columns": [
-                "transporte_id (FK)",
-                "quantidade, especie",
-                "peso_liquido, peso_bruto"
-            ]
-        },
-        {
-            "name": "nf_referencias",
-            "description": "Notas fiscais referenciadas",
-            "primary_key": "id",
-            "foreign_keys": ["nota_fiscal_id → notas_fiscais"],
-            "main_columns": [
-                "nota_fiscal_id (FK)",
-                "tipo",
-                "chave_acesso_referenciada"
-            ]
-        },
-        {
-            "name": "nf_duplicatas",
-            "description": "Duplicatas/parcelas da cobrança",
-            "primary_key": "id",
-            "foreign_keys": ["cobranca_id → nf_cobranca"],
-            "main_columns": [
-                "cobranca_id (FK)",
-                "numero_duplicata",
-                "data_vencimento",
-                "valor_duplicata"
-            ]
+    snapshot = get_schema_snapshot()
+    tables = []
+    
+    for name in _MAIN_COLUMNS:
+        table = snapshot.table(name)
+        if table is None:
+            continue
+        
+        foreign_keys_by_table = {fk.column: fk for fk in table.foreign_keys}
+        main_columns = []
+        for column in _main_columns(table):
+            if column in table.primary_key:
+                main_columns.append(f"{column} (PK)")
+            elif column in foreign_keys_by_table:
+                main_columns.append(f"{column} (FK → {foreign_keys_by_table[column].ref_table})")
+            else:
+                main_columns.append(column)
+        
+        entry = {
+            "name": table.name,
+            "description": table.description,
+            "primary_key": ", ".join(table.primary_key) or None,
+            "main_columns": main_columns
         }
-    ]
+        if table.unique_keys:
+            entry["unique_keys"] = [", ".join(key) for key in table.unique_keys]
+        if table.foreign_keys:
+            entry["foreign_keys"] = [f"{fk.column} → {fk.ref_table}" for fk in table.foreign_keys]
+        if table.row_estimate is not None:
+            entry["row_estimate"] = table.row_estimate
+        elif name in _ROW_ESTIMATES:
+            entry["row_estimate"] = _ROW_ESTIMATES[name]
+        tables.append(entry)
+    
+    return tables
 
 
 def get_table_info(table_name: str) -> Dict[str, Any]:
@@ -207,112 +386,44 @@ def get_table_info(table_name: str) -> Dict[str, Any]:
     Returns:
         Dicionário com informações da tabela
     """
-    tables_info = {
-        "notas_fiscais": {
-            "description": "Tabela principal contendo dados gerais das NF-e",
-            "columns": {
-                "id": {"type": "SERIAL", "nullable": False, "description": "Chave primária"},
-                "chave_acesso": {"type": "VARCHAR(44)", "nullable": False, "unique": True, "description": "Chave única de 44 dígitos"},
-                "numero_nf": {"type": "INTEGER", "nullable": False, "description": "Número da nota fiscal"},
-                "serie": {"type": "VARCHAR(3)", "nullable": True, "description": "Série da nota"},
-                "data_hora_emissao": {"type": "TIMESTAMP", "nullable": False, "description": "Data e hora de emissão"},
-                "emitente_id": {"type": "INTEGER", "nullable": False, "fk": "empresas(id)"},
-                "destinatario_id": {"type": "INTEGER", "nullable": False, "fk": "empresas(id)"},
-                "valor_total_nota": {"type": "NUMERIC(15,2)", "nullable": False, "description": "Valor total da NF-e"},
-                "valor_total_produtos": {"type": "NUMERIC(15,2)", "nullable": True},
-                "valor_icms": {"type": "NUMERIC(15,2)", "nullable": True},
-                "valor_ipi": {"type": "NUMERIC(15,2)", "nullable": True},
-                "valor_pis": {"type": "NUMERIC(15,2)", "nullable": True},
-                "valor_cofins": {"type": "NUMERIC(15,2)", "nullable": True},
-                "status": {"type": "VARCHAR(20)", "nullable": False, "description": "emitida, autorizada, cancelada"},
-                "natureza_operacao": {"type": "VARCHAR(60)", "nullable": True},
-                "tipo_operacao": {"type": "VARCHAR(1)", "nullable": True, "description": "0=Entrada, 1=Saída"},
-            },
-            "indexes": ["chave_acesso", "data_hora_emissao", "emitente_id", "destinatario_id", "status"],
-            "relationships": [
-                "notas_fiscais.emitente_id → empresas.id",
-                "notas_fiscais.destinatario_id → empresas.id"
-            ]
-        },
-        
-        "empresas": {
-            "description": "Cadastro de empresas (emitentes e destinatários)",
-            "columns": {
-                "id": {"type": "SERIAL", "nullable": False},
-                "cpf_cnpj": {"type": "VARCHAR(14)", "nullable": False, "unique": True},
-                "tipo_pessoa": {"type": "VARCHAR(20)", "nullable": False, "description": "juridica ou fisica"},
-                "razao_social": {"type": "VARCHAR(100)", "nullable": False},
-                "nome_fantasia": {"type": "VARCHAR(100)", "nullable": True},
-                "inscricao_estadual": {"type": "VARCHAR(14)", "nullable": True},
-                "logradouro": {"type": "VARCHAR(100)", "nullable": True},
-                "numero": {"type": "VARCHAR(10)", "nullable": True},
-                "bairro": {"type": "VARCHAR(60)", "nullable": True},
-                "nome_municipio": {"type": "VARCHAR(60)", "nullable": True, "description": "Nome da cidade"},
-                "uf": {"type": "VARCHAR(2)", "nullable": True},
-                "cep": {"type": "VARCHAR(8)", "nullable": True}
-            },
-            "indexes": ["cpf_cnpj", "razao_social"],
-            "relationships": []
-        },
-        
-        "nf_itens": {
-            "description": "Produtos/serviços da nota fiscal",
-            "columns": {
-                "id": {"type": "SERIAL", "nullable": False},
-                "nota_fiscal_id": {"type": "INTEGER", "nullable": False, "fk": "notas_fiscais(id)"},
-                "numero_item": {"type": "INTEGER", "nullable": False},
-                "codigo_produto": {"type": "VARCHAR(60)", "nullable": True},
-                "descricao": {"type": "VARCHAR(120)", "nullable": False},
-                "ncm": {"type": "VARCHAR(8)", "nullable": True},
-                "cfop": {"type": "VARCHAR(4)", "nullable": True},
-                "unidade_comercial": {"type": "VARCHAR(6)", "nullable": True},
-                "quantidade_comercial": {"type": "NUMERIC(15,4)", "nullable": False},
-                "valor_unitario_comercial": {"type": "NUMERIC(15,10)", "nullable": False},
-                "valor_total_bruto": {"type": "NUMERIC(15,2)", "nullable": False}
-            },
-            "indexes": ["nota_fiscal_id", "descricao"],
-            "relationships": [
-                "nf_itens.nota_fiscal_id → notas_fiscais.id"
-            ]
-        },
-        
-        "nf_itens_icms": {
-            "description": "Informações de ICMS dos itens",
-            "columns": {
-                "id": {"type": "SERIAL", "nullable": False},
-                "nf_item_id": {"type": "INTEGER", "nullable": False, "fk": "nf_itens(id)"},
-                "origem": {"type": "VARCHAR(1)", "nullable": False},
-                "cst": {"type": "VARCHAR(2)", "nullable": True},
-                "csosn": {"type": "VARCHAR(3)", "nullable": True},
-                "valor_bc": {"type": "NUMERIC(15,2)", "nullable": True},
-                "aliquota": {"type": "NUMERIC(5,2)", "nullable": True},
-                "valor_icms": {"type": "NUMERIC(15,2)", "nullable": True}
-            },
-            "indexes": ["nf_item_id"],
-            "relationships": ["nf_itens_icms.nf_item_id → nf_itens.id"]
-        },
-        
-        "nf_pagamentos": {
-            "description": "Formas de pagamento da nota",
-            "columns": {
-                "id": {"type": "SERIAL", "nullable": False},
-                "nota_fiscal_id": {"type": "INTEGER", "nullable": False, "fk": "notas_fiscais(id)"},
-                "forma_pagamento": {"type": "VARCHAR(2)", "nullable": False},
-                "valor_pagamento": {"type": "NUMERIC(15,2)", "nullable": False}
-            },
-            "indexes": ["nota_fiscal_id"],
-            "relationships": ["nf_pagamentos.nota_fiscal_id → notas_fiscais.id"]
-        }
-    }
+    snapshot = get_schema_snapshot()
+    table = snapshot.table(table_name)
     
     # Retornar info da tabela ou erro
-    if table_name in tables_info:
-        return tables_info[table_name]
-    else:
+    if table is None:
         return {
             "error": f"Tabela '{table_name}' não encontrada",
-            "available_tables": list(tables_info.keys())
+            "available_tables": sorted(snapshot.tables)
         }
+    
+    foreign_keys = {fk.column: fk for fk in table.foreign_keys}
+    unique_columns = {key[0] for key in table.unique_keys if len(key) == 1}
+    
+    columns = {}
+    for column in table.columns:
+        details = {"type": column.type, "nullable": column.nullable}
+        if column.name in unique_columns:
+            details["unique"] = True
+        if column.name in foreign_keys:
+            fk = foreign_keys[column.name]
+            details["fk"] = f"{fk.ref_table}({fk.ref_column})"
+        if column.description:
+            details["description"] = column.description
+        columns[column.name] = details
+    
+    info = {
+        "description": table.description,
+        "columns": columns,
+        "primary_key": list(table.primary_key),
+        "indexes": [", ".join(index) for index in table.indexes],
+        "relationships": [
+            f"{table.name}.{fk.column} → {fk.ref_table}.{fk.ref_column}"
+            for fk in table.foreign_keys
+        ]
+    }
+    if table.row_estimate is not None:
+        info["row_estimate"] = table.row_estimate
+    return info
 
 
 def get_relationships() -> List[Dict[str, str]]:
@@ -322,80 +433,120 @@ def get_relationships() -> List[Dict[str, str]]:
     Returns:
         Lista de relacionamentos
     """
-    return [
-        {
-            "from_table": "notas_fiscais",
-            "from_column": "emitente_id",
-            "to_table": "empresas",
-            "to_column": "id",
-            "relationship_type": "many-to-one",
-            "description": "Cada nota tem um emitente (LEFT JOIN pois pode ser NULL)"
-        },
-        {
-            "from_table": "notas_fiscais",
-            "from_column": "destinatario_id",
-            "to_table": "empresas",
-            "to_column": "id",
-            "relationship_type": "many-to-one",
-            "description": "Cada nota tem um destinatário (LEFT JOIN pois pode ser NULL)"
-        },
-        {
-            "from_table": "nf_itens",
-            "from_column": "nota_fiscal_id",
-            "to_table": "notas_fiscais",
-            "to_column": "id",
-            "relationship_type": "many-to-one",
-            "description": "Cada item pertence a uma nota (INNER JOIN pois sempre existe)"
-        },
-        {
-            "from_table": "nf_itens_icms",
-            "from_column": "nf_item_id",
-            "to_table": "nf_itens",
-            "to_column": "id",
-            "relationship_type": "one-to-one",
-            "description": "Cada item pode ter dados de ICMS (LEFT JOIN)"
-        },
-        {
-            "from_table": "nf_itens_ipi",
-            "from_column": "nf_item_id",
-            "to_table": "nf_itens",
-            "to_column": "id",
-            "relationship_type": "one-to-one",
-            "description": "Cada item pode ter dados de IPI (LEFT JOIN)"
-        },
-        {
-            "from_table": "nf_itens_pis",
-            "from_column": "nf_item_id",
-            "to_table": "nf_itens",
-            "to_column": "id",
-            "relationship_type": "one-to-one",
-            "description": "Cada item pode ter dados de PIS (LEFT JOIN)"
-        },
-        {
-            "from_table": "nf_itens_cofins",
-            "from_column": "nf_item_id",
-            "to_table": "nf_itens",
-            "to_column": "id",
-            "relationship_type": "one-to-one",
-            "description": "Cada item pode ter dados de COFINS (LEFT JOIN)"
-        },
-        {
-            "from_table": "nf_pagamentos",
-            "from_column": "nota_fiscal_id",
-            "to_table": "notas_fiscais",
-            "to_column": "id",
-            "relationship_type": "many-to-one",
-            "description": "Uma nota pode ter múltiplos pagamentos (INNER JOIN)"
-        },
-        {
-            "from_table": "nf_transporte",
-            "from_column": "nota_fiscal_id",
-            "to_table": "notas_fiscais",
-            "to_column": "id",
-            "relationship_type": "one-to-one",
-            "description": "Uma nota pode ter dados de transporte (LEFT JOIN)"
+    relationships = []
+    for table in get_schema_snapshot().tables.values():
+        for fk in table.foreign_keys:
+            relationship_type, description = _RELATIONSHIP_NOTES.get(
+                (table.name, fk.column),
+                ("many-to-one", f"{table.name}.{fk.column} referencia {fk.ref_table}.{fk.ref_column}")
+            )
+            relationships.append({
+                "from_table": table.name,
+                "from_column": fk.column,
+                "to_table": fk.ref_table,
+                "to_column": fk.ref_column,
+                "relationship_type": relationship_type,
+                "description": description
+            })
+    
+    # Relacionamentos documentados primeiro (os mais usados em JOINs)
+    notes = list(_RELATIONSHIP_NOTES)
+    relationships.sort(key=lambda r: (
+        notes.index((r["from_table"], r["from_column"])) if (r["from_table"], r["from_column"]) in _RELATIONSHIP_NOTES else len(notes),
+        r["from_table"],
+        r["from_column"]
+    ))
+    return relationships
+
+
+def get_compact_schema() -> Dict[str, Any]:
+    """
+    Retorna o schema resumido: colunas principais por tabela, relacionamentos e regras.
+    
+    Returns:
+        Dicionário com uma linha de colunas por tabela
+    """
+    return {
+        "schema_version": get_schema_snapshot().version,
+        "tables": {table["name"]: ", ".join(table["main_columns"]) for table in get_main_tables()},
+        "relationships": [
+            f"{r['from_table']}.{r['from_column']} → {r['to_table']}.{r['to_column']}"
+            for r in get_relationships()
+        ],
+        "important_notes": list(_IMPORTANT_NOTES)
+    }
+
+
+def get_compact_table_info(table_name: str) -> Dict[str, Any]:
+    """
+    Retorna a tabela resumida: uma string por coluna ("nome tipo [PK] [→ tabela.coluna]").
+    
+    Args:
+        table_name: Nome da tabela
+    
+    Returns:
+        Dicionário com descrição, colunas e índices da tabela
+    """
+    snapshot = get_schema_snapshot()
+    table = snapshot.table(table_name)
+    if table is None:
+        return {
+            "error": f"Tabela '{table_name}' não encontrada",
+            "available_tables": sorted(snapshot.tables)
         }
+    
+    foreign_keys = {fk.column: fk for fk in table.foreign_keys}
+    columns = []
+    for column in table.columns:
+        text = f"{column.name} {column.type}"
+        if column.name in table.primary_key:
+            text += " PK"
+        if column.name in foreign_keys:
+            text += f" → {foreign_keys[column.name].ref_table}.{foreign_keys[column.name].ref_column}"
+        columns.append(text)
+    
+    return {
+        "description": table.description,
+        "columns": columns,
+        "indexes": [", ".join(index) for index in table.indexes]
+    }
+
+
+def get_schema_summary(tables: Optional[List[str]] = None) -> str:
+    """
+    Retorna o resumo do schema para o prompt dos agentes.
+    
+    Lista só colunas que existem no schema atual, então o prompt não
+    sugere nomes de colunas desatualizados.
+    
+    Args:
+        tables: Tabelas a incluir (padrão: principais tabelas de negócio)
+    
+    Returns:
+        str: Tabelas, colunas principais e relacionamentos
+    """
+    snapshot = get_schema_snapshot()
+    selected = [snapshot.table(name) for name in (tables or _PROMPT_TABLES)]
+    selected = [table for table in selected if table is not None]
+    names = {table.name for table in selected}
+    
+    lines = [
+        "Schema NF-e (PostgreSQL):",
+        "",
+        f"Tabelas: {', '.join(table.name for table in selected)}",
+        "",
+        "Colunas principais:"
     ]
+    lines.extend(f"- {table.name}: {', '.join(_main_columns(table))}" for table in selected)
+    
+    lines.extend(["", "Relacionamentos:"])
+    lines.extend(
+        f"- {table.name}.{fk.column} → {fk.ref_table}.{fk.ref_column}"
+        for table in selected
+        for fk in table.foreign_keys
+        if fk.ref_table in names
+    )
+    return "\n".join(lines)
 
 
 def get_common_queries() -> List[Dict[str, Any]]:
@@ -581,10 +732,10 @@ LIMIT 50;
 # Função auxiliar para obter todas as tabelas
 def get_all_tables() -> List[str]:
     """Retorna lista de nomes de todas as tabelas"""
-    return [table["name"] for table in get_main_tables()]
+    return sorted(get_schema_snapshot().tables)
 
 
 # Função auxiliar para validar se tabela existe
 def table_exists(table_name: str) -> bool:
     """Verifica se uma tabela existe no schema"""
-    return table_name in get_all_tables()
\ No newline at end of file
+    return get_schema_snapshot().table(table_name) is not None
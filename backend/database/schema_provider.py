@@ -0,0 +1,405 @@
+"""Live database schema snapshots
+
+Reads tables, columns, keys, indexes and comments from pg_catalog once and
+keeps them as an immutable, versioned SchemaSnapshot. The version is a
+fingerprint of everything read (relations, columns, keys, indexes and
+comments); refreshing first compares that fingerprint (one cheap query)
+and only re-reads the catalog when the schema actually changed.
+
+Curated descriptions (database/schema.py) fill in what the database has no
+COMMENT for. When the database cannot be reached, the snapshot is built
+from the curated data alone (source "static") and live introspection is
+retried after the refresh interval.
+"""
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple, Mapping, Callable
+import hashlib
+import threading
+import time
+
+import psycopg2
+
+from config import settings
+from database.pool import get_pool
+from utils.exceptions import DatabaseConnectionException
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Relations visible to the agents: tables, partitioned tables, views, materialized views
+_RELATION_KINDS = "('r', 'p', 'v', 'm')"
+
+_TABLES_SQL = f"""
+SELECT c.relname, obj_description(c.oid, 'pg_class'), c.reltuples::bigint
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = %s AND c.relkind IN {_RELATION_KINDS}
+ORDER BY c.relname
+"""
+
+_COLUMNS_SQL = f"""
+SELECT c.relname, a.attname, format_type(a.atttypid, a.atttypmod),
+       NOT a.attnotnull, col_description(c.oid, a.attnum)
+FROM pg_attribute a
+JOIN pg_class c ON c.oid = a.attrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = %s AND c.relkind IN {_RELATION_KINDS}
+  AND a.attnum > 0 AND NOT a.attisdropped
+ORDER BY c.relname, a.attnum
+"""
+
+_CONSTRAINTS_SQL = """
+SELECT c.relname, con.contype,
+       ARRAY(SELECT a.attname FROM unnest(con.conkey) WITH ORDINALITY k(attnum, ord)
+             JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+             ORDER BY k.ord),
+       ref.relname,
+       ARRAY(SELECT a.attname FROM unnest(con.confkey) WITH ORDINALITY k(attnum, ord)
+             JOIN pg_attribute a ON a.attrelid = con.confrelid AND a.attnum = k.attnum
+             ORDER BY k.ord)
+FROM pg_constraint con
+JOIN pg_class c ON c.oid = con.conrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_class ref ON ref.oid = con.confrelid
+WHERE n.nspname = %s AND con.contype IN ('p', 'u', 'f')
+ORDER BY c.relname, con.conname
+"""
+
+_INDEXES_SQL = """
+SELECT t.relname,
+       ARRAY(SELECT a.attname FROM unnest(ix.indkey) WITH ORDINALITY k(attnum, ord)
+             JOIN pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = k.attnum
+             ORDER BY k.ord)
+FROM pg_index ix
+JOIN pg_class t ON t.oid = ix.indrelid
+JOIN pg_class i ON i.oid = ix.indexrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+WHERE n.nspname = %s AND NOT ix.indisprimary
+ORDER BY t.relname, i.relname
+"""
+
+# Everything the snapshot reads: relations and their comments, columns,
+# keys and indexes (a new index or foreign key changes the prompt too)
+_FINGERPRINT_SQL = f"""
+SELECT md5(
+    coalesce((
+        SELECT string_agg(c.relname || ':' || c.relkind || ':' || coalesce(obj_description(c.oid, 'pg_class'), ''),
+                          ',' ORDER BY c.relname)
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %(schema)s AND c.relkind IN {_RELATION_KINDS}
+    ), '')
+    || '|' || coalesce((
+        SELECT string_agg(c.relname || '.' || a.attname || ':' || format_type(a.atttypid, a.atttypmod)
+                          || ':' || a.attnotnull || ':' || coalesce(col_description(c.oid, a.attnum), ''),
+                          ',' ORDER BY c.relname, a.attnum)
+        FROM pg_attribute a
+        JOIN pg_class c ON c.oid = a.attrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %(schema)s AND c.relkind IN {_RELATION_KINDS}
+          AND a.attnum > 0 AND NOT a.attisdropped
+    ), '')
+    || '|' || coalesce((
+        SELECT string_agg(c.relname || '.' || con.conname || ':' || pg_get_constraintdef(con.oid),
+                          ',' ORDER BY c.relname, con.conname)
+        FROM pg_constraint con
+        JOIN pg_class c ON c.oid = con.conrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = %(schema)s AND con.contype IN ('p', 'u', 'f')
+    ), '')
+    || '|' || coalesce((
+        SELECT string_agg(pg_get_indexdef(ix.indexrelid), ',' ORDER BY t.relname, i.relname)
+        FROM pg_index ix
+        JOIN pg_class t ON t.oid = ix.indrelid
+        JOIN pg_class i ON i.oid = ix.indexrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        WHERE n.nspname = %(schema)s
+    ), '')
+)
+"""
+
+
+@dataclass(frozen=True)
+class ColumnInfo:
+    name: str
+    type: str
+    nullable: bool = True
+    description: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ForeignKey:
+    column: str
+    ref_table: str
+    ref_column: str
+
+
+@dataclass(frozen=True)
+class TableInfo:
+    name: str
+    description: Optional[str]
+    columns: Tuple[ColumnInfo, ...]
+    primary_key: Tuple[str, ...] = ()
+    unique_keys: Tuple[Tuple[str, ...], ...] = ()
+    foreign_keys: Tuple[ForeignKey, ...] = ()
+    indexes: Tuple[Tuple[str, ...], ...] = ()
+    row_estimate: Optional[int] = None
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.name for column in self.columns]
+
+    def column(self, name: str) -> Optional[ColumnInfo]:
+        for column in self.columns:
+            if column.name == name:
+                return column
+        return None
+
+
+@dataclass(frozen=True)
+class SchemaSnapshot:
+    """Immutable view of the schema at one version"""
+
+    version: str
+    source: str  # "live" (pg_catalog) or "static" (curated descriptions only)
+    loaded_at: float
+    tables: Mapping[str, TableInfo]
+
+    def table(self, name: str) -> Optional[TableInfo]:
+        return self.tables.get(name)
+
+
+def fingerprint(conn, schema: str = "public") -> str:
+    """md5 of the relations, columns, keys, indexes and comments of the schema (one query)"""
+    with conn.cursor() as cursor:
+        cursor.execute(_FINGERPRINT_SQL, {"schema": schema})
+        return cursor.fetchone()[0]
+
+
+def introspect(conn, schema: str = "public") -> Dict[str, TableInfo]:
+    """Read tables, columns, keys and indexes of a schema from pg_catalog
+
+    Args:
+        conn: psycopg2 connection
+        schema: Schema name
+
+    Returns:
+        TableInfo by table name
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(_TABLES_SQL, (schema,))
+        table_rows = cursor.fetchall()
+        cursor.execute(_COLUMNS_SQL, (schema,))
+        column_rows = cursor.fetchall()
+        cursor.execute(_CONSTRAINTS_SQL, (schema,))
+        constraint_rows = cursor.fetchall()
+        cursor.execute(_INDEXES_SQL, (schema,))
+        index_rows = cursor.fetchall()
+
+    columns: Dict[str, List[ColumnInfo]] = {}
+    for table, name, data_type, nullable, description in column_rows:
+        columns.setdefault(table, []).append(ColumnInfo(name, data_type, bool(nullable), description))
+
+    primary_keys: Dict[str, Tuple[str, ...]] = {}
+    unique_keys: Dict[str, List[Tuple[str, ...]]] = {}
+    foreign_keys: Dict[str, List[ForeignKey]] = {}
+    for table, kind, key_columns, ref_table, ref_columns in constraint_rows:
+        if kind == "p":
+            primary_keys[table] = tuple(key_columns)
+        elif kind == "u":
+            unique_keys.setdefault(table, []).append(tuple(key_columns))
+        else:
+            foreign_keys.setdefault(table, []).extend(
+                ForeignKey(column, ref_table, ref_column)
+                for column, ref_column in zip(key_columns, ref_columns)
+            )
+
+    indexes: Dict[str, List[Tuple[str, ...]]] = {}
+    for table, index_columns in index_rows:
+        # Expression indexes have no columns
+        if index_columns:
+            indexes.setdefault(table, []).append(tuple(index_columns))
+
+    return {
+        table: TableInfo(
+            name=table,
+            description=description,
+            columns=tuple(columns.get(table, [])),
+            primary_key=primary_keys.get(table, ()),
+            unique_keys=tuple(unique_keys.get(table, [])),
+            foreign_keys=tuple(foreign_keys.get(table, [])),
+            indexes=tuple(indexes.get(table, [])),
+            # reltuples is -1 for tables never analyzed
+            row_estimate=int(row_estimate) if row_estimate is not None and row_estimate >= 0 else None
+        )
+        for table, description, row_estimate in table_rows
+    }
+
+
+def static_tables(curated: Mapping[str, Dict[str, Any]]) -> Dict[str, TableInfo]:
+    """Build TableInfo from the curated descriptions (no database access)
+
+    Args:
+        curated: Table name -> {"description", "columns": {name: {"type",
+            "nullable", "description", "fk", "unique"}}, "indexes"}
+    """
+    tables = {}
+    for name, info in curated.items():
+        column_items = info.get("columns", {}).items()
+        foreign_keys = []
+        for column, details in column_items:
+            if details.get("fk"):
+                ref_table, _, ref_column = details["fk"].rstrip(")").partition("(")
+                foreign_keys.append(ForeignKey(column, ref_table, ref_column or "id"))
+
+        tables[name] = TableInfo(
+            name=name,
+            description=info.get("description"),
+            columns=tuple(
+                ColumnInfo(column, details.get("type", ""), details.get("nullable", True), details.get("description"))
+                for column, details in column_items
+            ),
+            primary_key=("id",) if "id" in info.get("columns", {}) else (),
+            unique_keys=tuple((column,) for column, details in column_items if details.get("unique")),
+            foreign_keys=tuple(foreign_keys),
+            indexes=tuple((column,) for column in info.get("indexes", []))
+        )
+    return tables
+
+
+def annotate(tables: Dict[str, TableInfo], curated: Mapping[str, Dict[str, Any]]) -> Dict[str, TableInfo]:
+    """Fill table and column descriptions missing in the database from the curated ones"""
+    annotated = {}
+    for name, table in tables.items():
+        info = curated.get(name)
+        if info is None:
+            annotated[name] = table
+            continue
+
+        curated_columns = info.get("columns", {})
+        columns = tuple(
+            column if column.description or column.name not in curated_columns
+            else ColumnInfo(column.name, column.type, column.nullable, curated_columns[column.name].get("description"))
+            for column in table.columns
+        )
+        annotated[name] = TableInfo(
+            name=table.name,
+            description=table.description or info.get("description"),
+            columns=columns,
+            primary_key=table.primary_key,
+            unique_keys=table.unique_keys,
+            foreign_keys=table.foreign_keys,
+            indexes=table.indexes,
+            row_estimate=table.row_estimate
+        )
+    return annotated
+
+
+def _static_version(tables: Mapping[str, TableInfo]) -> str:
+    digest = hashlib.md5(
+        ",".join(
+            f"{table.name}.{column.name}:{column.type}"
+            for table in sorted(tables.values(), key=lambda t: t.name)
+            for column in table.columns
+        ).encode("utf-8")
+    ).hexdigest()
+    return f"static-{digest[:12]}"
+
+
+class SchemaProvider:
+    """Holds the current SchemaSnapshot and refreshes it when the schema changes"""
+
+    def __init__(
+        self,
+        curated: Mapping[str, Dict[str, Any]],
+        schema: str = "public",
+        refresh_interval: float = 300,
+        connection_factory: Optional[Callable[[], Any]] = None
+    ):
+        """Initialize (nothing is read until the first get_snapshot/refresh)
+
+        Args:
+            curated: Curated table descriptions (see static_tables)
+            schema: PostgreSQL schema to read
+            refresh_interval: Seconds between fingerprint checks in get_snapshot()
+            connection_factory: Context manager factory yielding a psycopg2
+                connection (default: the SQL tool pool)
+        """
+        self.curated = curated
+        self.schema = schema
+        self.refresh_interval = refresh_interval
+        self._connection = connection_factory or (lambda: get_pool().connection())
+        self._snapshot: Optional[SchemaSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _static_snapshot(self) -> SchemaSnapshot:
+        tables = static_tables(self.curated)
+        return SchemaSnapshot(
+            version=_static_version(tables),
+            source="static",
+            loaded_at=time.time(),
+            tables=MappingProxyType(tables)
+        )
+
+    @property
+    def snapshot(self) -> Optional[SchemaSnapshot]:
+        """Current snapshot without checking for changes (None before the first load)"""
+        return self._snapshot
+
+    def get_snapshot(self) -> SchemaSnapshot:
+        """Get the current snapshot, checking for schema changes at most once per interval"""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+            return snapshot
+        return self.refresh()
+
+    def refresh(self, force: bool = False) -> SchemaSnapshot:
+        """Re-read the schema if its fingerprint changed (or always with force)
+
+        Failures keep the previous snapshot (the curated one on first load).
+
+        Returns:
+            Current snapshot
+        """
+        with self._lock:
+            if not settings.schema_introspection_enabled:
+                if self._snapshot is None:
+                    self._snapshot = self._static_snapshot()
+                self._checked_at = time.monotonic()
+                return self._snapshot
+
+            try:
+                with self._connection() as conn:
+                    version = fingerprint(conn, self.schema)
+                    current = self._snapshot
+                    if force or current is None or current.source != "live" or current.version != version:
+                        tables = annotate(introspect(conn, self.schema), self.curated)
+                        self._snapshot = SchemaSnapshot(
+                            version=version,
+                            source="live",
+                            loaded_at=time.time(),
+                            tables=MappingProxyType(tables)
+                        )
+                        logger.info(
+                            "schema_snapshot_loaded",
+                            version=version,
+                            tables=len(tables),
+                            previous_version=current.version if current else None
+                        )
+                    conn.rollback()
+
+            except (DatabaseConnectionException, psycopg2.Error) as e:
+                logger.warning(
+                    "schema_introspection_failed",
+                    error=str(e).strip()
+                )
+                if self._snapshot is None:
+                    self._snapshot = self._static_snapshot()
+
+            self._checked_at = time.monotonic()
+            return self._snapshot
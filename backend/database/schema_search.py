@@ -0,0 +1,208 @@
+"""Search index over the schema snapshot
+
+Built once per schema version from table names, column names, descriptions
+and business synonyms. Text is lowercased and stripped of accents
+("tributação" and "tributacao" are the same term), identifiers are split on
+underscores, and each query term is matched exactly, by prefix ("nota" ->
+"notas") or by trigram similarity (typos such as "pagamnto"), as pg_trgm
+does. Tables are ranked by the sum of their best match per query term.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+import re
+import threading
+import unicodedata
+
+from database.schema_provider import SchemaSnapshot
+
+
+# Business terms per table (besides the names and descriptions in the schema)
+TABLE_SYNONYMS: Dict[str, List[str]] = {
+    "empresas": ["empresa", "emitente", "destinatário", "cliente", "fornecedor", "cnpj", "cpf", "razão social", "endereço"],
+    "notas_fiscais": ["nota", "nfe", "nf-e", "fiscal", "chave", "número", "valor", "total", "emissão", "faturamento", "venda"],
+    "nf_itens": ["item", "produto", "mercadoria", "quantidade", "preço", "unitário", "ncm", "cfop"],
+    "nf_itens_icms": ["icms", "imposto", "tributação", "alíquota", "base de cálculo"],
+    "nf_itens_ipi": ["ipi", "imposto", "produto industrializado"],
+    "nf_itens_pis": ["pis", "contribuição", "social"],
+    "nf_itens_cofins": ["cofins", "contribuição", "financiamento"],
+    "nf_pagamentos": ["pagamento", "forma", "dinheiro", "cartão", "pix", "boleto"],
+    "nf_transporte": ["transporte", "frete", "transportadora", "veículo", "placa"],
+    "nf_transporte_volumes": ["volume", "peso", "quantidade", "embalagem"],
+    "nf_cobranca": ["cobrança", "fatura", "duplicata"],
+    "nf_duplicatas": ["duplicata", "vencimento", "parcela"],
+    "nf_referencias": ["referência", "nota referenciada", "devolução"],
+    "nf_cce": ["carta", "correção", "cce", "evento"]
+}
+
+# Weight of the field where a term was found
+FIELD_WEIGHTS = {"table": 3.0, "column": 2.0, "synonym": 2.0, "description": 1.0}
+
+# Score factor for prefix matches, and the trigram similarity needed for a fuzzy match
+PREFIX_FACTOR = 0.8
+FUZZY_FACTOR = 0.7
+FUZZY_THRESHOLD = 0.4
+MAX_FUZZY_CANDIDATES = 10
+
+_STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "na", "no", "nas", "nos",
+    "para", "por", "com", "um", "uma", "que", "qual", "quais", "the", "of"
+}
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and turn everything but letters and digits into spaces"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    ascii_text = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_WORD.sub(" ", ascii_text.lower()).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    """Normalized terms of a text (identifiers are split on underscores)"""
+    return [token for token in normalize_text(text).split() if token not in _STOPWORDS]
+
+
+def trigrams(token: str) -> Set[str]:
+    """Trigrams of a term, padded like pg_trgm ("  ab" ... "bc ")"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: str, b: str) -> float:
+    """Trigram similarity (shared / total trigrams), as pg_trgm's similarity()"""
+    first, second = trigrams(a), trigrams(b)
+    return len(first & second) / len(first | second)
+
+
+@dataclass
+class SearchResult:
+    table: str
+    score: float
+    match_type: str  # table_name | column_name | keyword | description
+    columns: List[str] = field(default_factory=list)
+    matched_terms: Dict[str, str] = field(default_factory=dict)  # query term -> indexed term
+
+
+_MATCH_TYPES = {"table": "table_name", "column": "column_name", "synonym": "keyword", "description": "description"}
+
+# (table, column or None, field)
+_Posting = Tuple[str, Optional[str], str]
+
+
+class SchemaSearchIndex:
+    """Inverted index of schema terms with trigram fuzzy matching"""
+
+    def __init__(self, snapshot: SchemaSnapshot, synonyms: Optional[Dict[str, List[str]]] = None):
+        """Index every table and column of the snapshot
+
+        Args:
+            snapshot: Schema snapshot to index
+            synonyms: Business terms by table (default: TABLE_SYNONYMS)
+        """
+        self.version = snapshot.version
+        # Postings are dicts used as ordered sets, so results are deterministic
+        self._postings: Dict[str, Dict[_Posting, None]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        synonyms = TABLE_SYNONYMS if synonyms is None else synonyms
+
+        for table in snapshot.tables.values():
+            self._add(table.name, table.name, None, "table")
+            self._add(table.description or "", table.name, None, "description")
+            for term in synonyms.get(table.name, []):
+                self._add(term, table.name, None, "synonym")
+            for column in table.columns:
+                self._add(column.name, table.name, column.name, "column")
+                self._add(column.description or "", table.name, column.name, "description")
+
+    def _add(self, text: str, table: str, column: Optional[str], field_name: str):
+        for token in tokenize(text):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                for trigram in trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(token)
+            postings[(table, column, field_name)] = None
+
+    def _expand(self, term: str) -> Dict[str, float]:
+        """Indexed terms matching a query term, with their match factor"""
+        matches: Dict[str, float] = {}
+        if len(term) >= 3:
+            for token in self._postings:
+                if len(token) >= 3 and (token.startswith(term) or term.startswith(token)):
+                    matches[token] = PREFIX_FACTOR
+        if term in self._postings:
+            # Exact match: only prefixes are added ("nota" also finds "notas")
+            matches[term] = 1.0
+            return matches
+
+        # Candidates share trigrams with the term; similarity is only computed for them
+        shared: Dict[str, int] = {}
+        for trigram in trigrams(term):
+            for token in self._trigrams.get(trigram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        candidates = sorted(shared, key=shared.get, reverse=True)[:MAX_FUZZY_CANDIDATES * 3]
+        fuzzy = sorted(
+            ((token, similarity(term, token)) for token in candidates if token not in matches),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        for token, score in fuzzy[:MAX_FUZZY_CANDIDATES]:
+            if score >= FUZZY_THRESHOLD:
+                matches[token] = score * FUZZY_FACTOR
+        return matches
+
+    def search(self, query: str, limit: int = 5) -> List[SearchResult]:
+        """Rank tables for a search query
+
+        Args:
+            query: Free text (accents, plural and small typos are tolerated)
+            limit: Maximum number of tables
+
+        Returns:
+            Results ordered by score (highest first)
+        """
+        results: Dict[str, SearchResult] = {}
+        best_fields: Dict[str, str] = {}
+
+        for term in dict.fromkeys(tokenize(query)):
+            best: Dict[str, Tuple[float, str, str]] = {}
+            columns: Dict[str, List[str]] = {}
+            for token, factor in self._expand(term).items():
+                for table, column, field_name in self._postings[token]:
+                    score = FIELD_WEIGHTS[field_name] * factor
+                    if table not in best or score > best[table][0]:
+                        best[table] = (score, field_name, token)
+                    if field_name == "column" and column not in columns.setdefault(table, []):
+                        columns[table].append(column)
+
+            for table, (score, field_name, token) in best.items():
+                result = results.setdefault(table, SearchResult(table, 0.0, _MATCH_TYPES[field_name]))
+                # The match type is the one of the strongest field found
+                if table not in best_fields or FIELD_WEIGHTS[field_name] > FIELD_WEIGHTS[best_fields[table]]:
+                    best_fields[table] = field_name
+                    result.match_type = _MATCH_TYPES[field_name]
+                result.score += score
+                result.matched_terms[term] = token
+                for column in columns.get(table, []):
+                    if column not in result.columns:
+                        result.columns.append(column)
+
+        ranked = sorted(results.values(), key=lambda r: (-r.score, r.table))
+        for result in ranked:
+            result.score = round(result.score, 2)
+        return ranked[:limit]
+
+
+_index: Optional[SchemaSearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_schema_search_index(snapshot: SchemaSnapshot) -> SchemaSearchIndex:
+    """Get the search index of a snapshot (built once per schema version)"""
+    global _index
+    with _index_lock:
+        if _index is None or _index.version != snapshot.version:
+            _index = SchemaSearchIndex(snapshot)
+        return _index
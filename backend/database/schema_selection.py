@@ -0,0 +1,156 @@
+"""Relevant-schema selection for the crew prompt
+
+Instead of the same fixed summary for every question, only the tables most
+related to the question go into the prompt. Each table is described by one
+short document (name, description, business terms and columns) that is
+embedded once per schema version with a local CPU sentence-transformers
+model; a question is embedded once and compared with all tables by cosine
+similarity.
+
+When sentence-transformers is not installed (or the model cannot be loaded)
+the tables are ranked with the lexical schema search index instead. Either
+way, the tables referenced by foreign keys of the selected ones are added,
+so every JOIN path in the prompt is complete.
+"""
+
+from typing import List, Optional, Tuple
+import threading
+
+from config import settings
+from database.schema import get_schema_snapshot
+from database.schema_provider import SchemaSnapshot
+from database.schema_search import TABLE_SYNONYMS, get_schema_search_index
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+# Questions whose best table scores below this get the default prompt tables
+MIN_EMBEDDING_SCORE = 0.2
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def load_embedding_model():
+    """Load the embedding model once (None when sentence-transformers is unavailable)"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(settings.schema_embedding_model, device="cpu")
+                logger.info("schema_embedding_model_loaded", model=settings.schema_embedding_model)
+            except ImportError:
+                logger.warning("schema_embedding_unavailable", reason="sentence_transformers_missing")
+                _model = False
+            except Exception as e:
+                logger.warning("schema_embedding_unavailable", reason=str(e))
+                _model = False
+        return _model or None
+
+
+def table_document(snapshot: SchemaSnapshot, name: str) -> str:
+    """Text embedded for one table"""
+    table = snapshot.tables[name]
+    columns = ", ".join(
+        f"{column.name.replace('_', ' ')} ({column.description})" if column.description
+        else column.name.replace("_", " ")
+        for column in table.columns
+    )
+    terms = ", ".join(TABLE_SYNONYMS.get(name, []))
+    return f"{name.replace('_', ' ')}: {table.description or ''}. Termos: {terms}. Colunas: {columns}"
+
+
+class SchemaSelector:
+    """Ranks the tables of one schema version by relevance to a question"""
+
+    def __init__(self, snapshot: SchemaSnapshot, model=None):
+        """Embed every table of the snapshot
+
+        Args:
+            snapshot: Schema snapshot to select from
+            model: Object with a sentence-transformers encode() method
+                (None ranks tables with the lexical search index)
+        """
+        self.snapshot = snapshot
+        self.version = snapshot.version
+        self.model = model
+        self._names = list(snapshot.tables)
+        self._embeddings = None
+        if model is not None and self._names:
+            self._embeddings = model.encode(
+                [table_document(snapshot, name) for name in self._names],
+                normalize_embeddings=True
+            )
+
+    @property
+    def method(self) -> str:
+        return "embedding" if self._embeddings is not None else "lexical"
+
+    def rank(self, question: str, top_k: int) -> List[Tuple[str, float]]:
+        """Most relevant tables for a question, with their score"""
+        if self._embeddings is None:
+            results = get_schema_search_index(self.snapshot).search(question, limit=top_k)
+            return [(result.table, result.score) for result in results]
+
+        query = self.model.encode([question], normalize_embeddings=True)[0]
+        scores = self._embeddings @ query
+        ranked = sorted(zip(self._names, scores), key=lambda item: -item[1])
+        if not ranked or ranked[0][1] < MIN_EMBEDDING_SCORE:
+            return []
+        return [(name, float(score)) for name, score in ranked[:top_k]]
+
+    def select(self, question: str, top_k: int) -> Optional[List[str]]:
+        """Tables for the prompt: the top-k plus the tables they reference
+
+        Returns:
+            Table names, or None when nothing is relevant (the caller uses
+            the default tables)
+        """
+        selected = [name for name, _ in self.rank(question, top_k)]
+        if not selected:
+            return None
+
+        # Foreign key targets of the selected tables, transitively (itens -> notas -> empresas)
+        for name in selected:
+            for fk in self.snapshot.tables[name].foreign_keys:
+                if fk.ref_table in self.snapshot.tables and fk.ref_table not in selected:
+                    selected.append(fk.ref_table)
+        return selected
+
+
+_selector: Optional[SchemaSelector] = None
+_selector_lock = threading.Lock()
+
+
+def get_schema_selector(snapshot: Optional[SchemaSnapshot] = None) -> SchemaSelector:
+    """Get the selector of a snapshot (tables are embedded once per schema version)"""
+    global _selector
+    snapshot = snapshot or get_schema_snapshot()
+    with _selector_lock:
+        if _selector is None or _selector.version != snapshot.version:
+            _selector = SchemaSelector(snapshot, load_embedding_model())
+        return _selector
+
+
+def select_schema_tables(question: str, top_k: Optional[int] = None) -> Optional[List[str]]:
+    """Tables relevant to a question (None: use the default prompt tables)
+
+    Args:
+        question: User message
+        top_k: Tables ranked by relevance (default: settings.schema_selection_top_k);
+            referenced tables are added on top of these
+    """
+    if not settings.schema_selection_enabled:
+        return None
+    selector = get_schema_selector()
+    tables = selector.select(question, top_k or settings.schema_selection_top_k)
+    logger.info(
+        "schema_tables_selected",
+        method=selector.method,
+        tables=tables,
+        schema_version=selector.version
+    )
+    return tables
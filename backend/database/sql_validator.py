@@ -0,0 +1,202 @@
+"""Parser-based validation of agent-written SQL
+
+Replaces keyword substring matching (which rejected harmless columns such
+as updated_at and created_at) with a sqlglot parse of the query:
+
+- exactly one statement, a SELECT (or UNION/INTERSECT/EXCEPT of SELECTs)
+- nothing that writes or locks: data-modifying CTEs, SELECT INTO,
+  FOR UPDATE/SHARE, side-effect functions (pg_sleep, nextval, ...)
+- no SELECT * over tables that carry the NF-e XML columns
+- the outermost query always ends up with a LIMIT of at most max_limit;
+  the statement without the LIMIT the validator added or clamped is kept
+  for the cost guard, which estimates the rows the agent actually asked for
+"""
+
+from typing import List, Optional
+from dataclasses import dataclass, field
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+
+
+# Tabelas com colunas de XML (texto/bytes grandes): SELECT * proibido
+XML_BEARING_TABLES = {
+    "notas_fiscais": ("xml_completo", "xml_assinado", "xml_compactado"),
+}
+
+# Nós que escrevem no banco ou executam comandos arbitrários
+_WRITE_NODES = tuple(
+    getattr(exp, name) for name in (
+        "Insert", "Update", "Delete", "Merge", "Create", "Drop", "Alter",
+        "TruncateTable", "Command", "Copy", "Set", "Grant", "Into", "Lock"
+    )
+    if hasattr(exp, name)
+)
+
+# Funções com efeito colateral ou acesso ao servidor
+FORBIDDEN_FUNCTIONS = {
+    "pg_sleep", "pg_sleep_for", "pg_sleep_until",
+    "pg_terminate_backend", "pg_cancel_backend", "pg_reload_conf",
+    "pg_read_file", "pg_read_binary_file", "pg_ls_dir", "pg_stat_file",
+    "lo_import", "lo_export", "dblink", "dblink_exec",
+    "set_config", "nextval", "setval", "txid_current",
+}
+
+# Famílias inteiras: advisory locks (o lock de sessão vazaria para o próximo
+# usuário da conexão do pool), dblink (conexões a outros servidores) e
+# large objects (lo_*)
+FORBIDDEN_FUNCTION_PREFIXES = (
+    "pg_advisory_", "pg_try_advisory_", "dblink", "lo_",
+)
+
+
+class SQLValidationError(ValueError):
+    """Query rejected by the validator (message is shown to the agent)"""
+
+
+@dataclass
+class ValidatedQuery:
+    """Result of a successful validation"""
+
+    sql: str
+    limit: int
+    changes: List[str] = field(default_factory=list)
+    unbounded_sql: Optional[str] = None  # sql without the LIMIT added or clamped (None if unchanged)
+
+
+def _function_name(node: exp.Func) -> str:
+    if isinstance(node, exp.Anonymous):
+        return str(node.name).lower()
+    return node.sql_name().lower()
+
+
+def _is_forbidden(name: str) -> bool:
+    return name in FORBIDDEN_FUNCTIONS or name.startswith(FORBIDDEN_FUNCTION_PREFIXES)
+
+
+def _scope_tables(select: exp.Select) -> dict:
+    """Map alias (or name) -> table name for the FROM/JOIN of one SELECT"""
+    sources = []
+    from_clause = select.args.get("from_") or select.args.get("from")
+    if from_clause is not None:
+        sources.append(from_clause.this)
+    for join in select.args.get("joins") or []:
+        sources.append(join.this)
+
+    return {
+        source.alias_or_name: source.name.lower()
+        for source in sources
+        if isinstance(source, exp.Table)
+    }
+
+
+def _check_star_on_xml_tables(statement: exp.Expression):
+    for select in statement.find_all(exp.Select):
+        tables = _scope_tables(select)
+        for projection in select.expressions:
+            if isinstance(projection, exp.Star):
+                starred = tables.values()
+            elif isinstance(projection, exp.Column) and isinstance(projection.this, exp.Star):
+                starred = [tables.get(projection.table, projection.table.lower())]
+            else:
+                continue
+
+            for table in starred:
+                if table in XML_BEARING_TABLES:
+                    columns = ", ".join(XML_BEARING_TABLES[table])
+                    raise SQLValidationError(
+                        f"SELECT * em '{table}' não é permitido (traz {columns}). "
+                        "Liste apenas as colunas necessárias."
+                    )
+
+
+def _literal_limit(node: exp.Expression) -> Optional[int]:
+    """Numeric value of a LIMIT/FETCH node (None for ALL or expressions)"""
+    value = node.args.get("count") if isinstance(node, exp.Fetch) else node.expression
+    if isinstance(value, exp.Literal) and not value.is_string:
+        try:
+            return int(value.this)
+        except ValueError:
+            return None
+    return None
+
+
+def validate_select(query: str, max_limit: int = 100) -> ValidatedQuery:
+    """Validate a read-only SELECT and enforce its LIMIT
+
+    Args:
+        query: SQL written by the agent
+        max_limit: Maximum LIMIT allowed on the outermost query
+
+    Returns:
+        ValidatedQuery with the SQL to run (LIMIT injected or clamped)
+
+    Raises:
+        SQLValidationError: If the query is not a single read-only SELECT
+    """
+    sql = query.strip().rstrip(';').strip()
+    if not sql:
+        raise SQLValidationError("Query vazia")
+
+    try:
+        statements = [s for s in sqlglot.parse(sql, read="postgres") if s is not None]
+    except ParseError as e:
+        raise SQLValidationError(f"Erro de sintaxe SQL: {str(e).splitlines()[0]}") from e
+
+    if len(statements) != 1:
+        raise SQLValidationError("Múltiplas queries não são permitidas")
+
+    statement = statements[0]
+    if not isinstance(statement, (exp.Select, exp.SetOperation)):
+        raise SQLValidationError("Apenas queries SELECT são permitidas")
+
+    for node in statement.walk():
+        if isinstance(node, _WRITE_NODES):
+            raise SQLValidationError(
+                f"Operação '{node.key.upper()}' não é permitida (apenas leitura)"
+            )
+        if isinstance(node, exp.Func) and _is_forbidden(_function_name(node)):
+            raise SQLValidationError(f"Função '{_function_name(node)}' não é permitida")
+
+    _check_star_on_xml_tables(statement)
+
+    limit_node = statement.args.get("limit")
+    if limit_node is None:
+        # Anexa ao texto original (preserva a sintaxe escrita pelo agente);
+        # a quebra de linha protege contra comentário "--" no final
+        return ValidatedQuery(
+            sql=f"{sql}\nLIMIT {max_limit}",
+            limit=max_limit,
+            changes=[f"LIMIT {max_limit} adicionado"],
+            unbounded_sql=sql
+        )
+
+    current = _literal_limit(limit_node)
+    if current is not None and current <= max_limit:
+        return ValidatedQuery(sql=sql, limit=current)
+
+    value = limit_node.args.get("count") if isinstance(limit_node, exp.Fetch) else limit_node.expression
+    if current is not None:
+        change = f"LIMIT {current} reduzido para {max_limit}"
+    elif isinstance(value, (exp.Var, exp.Identifier)) and str(value.name).upper() == "ALL":
+        change = f"LIMIT ALL reduzido para {max_limit}"
+    else:
+        # LIMIT $1, LIMIT 50+100: valor desconhecido até a execução
+        change = f"LIMIT não literal ({value.sql(dialect='postgres')}) substituído por {max_limit}"
+
+    unbounded = statement.copy()
+    unbounded.set("limit", None)
+
+    if isinstance(limit_node, exp.Fetch):
+        limit_node.set("count", exp.Literal.number(max_limit))
+    else:
+        limit_node.set("expression", exp.Literal.number(max_limit))
+
+    return ValidatedQuery(
+        sql=statement.sql(dialect="postgres"),
+        limit=max_limit,
+        changes=[change],
+        unbounded_sql=unbounded.sql(dialect="postgres")
+    )
+
@@ -0,0 +1,159 @@
+"""Compressed storage of the original NF-e XML
+
+By default the importer keeps the re-serialized XML as plain text in
+notas_fiscais.xml_completo. With compression enabled, the original file bytes
+are stored zstd-compressed in notas_fiscais.xml_compactado (BYTEA) and
+xml_compressao records the codec, so the largest column of the table shrinks
+and the upload payload shrinks with it.
+
+A zstd dictionary trained on NF-e XML improves the ratio further, since
+every note repeats the same tags and namespaces. Train one with:
+
+    python -m database.xml_storage <diretorio_com_xmls> <arquivo_dicionario>
+"""
+
+from typing import Dict, Any, Iterable, Optional
+from pathlib import Path
+
+from config import settings
+
+
+# Valores de notas_fiscais.xml_compressao
+CODEC_ZSTD = "zstd"
+CODEC_ZSTD_DICT = "zstd-dict"
+
+# Tamanho padrão do dicionário treinado (110 KB, padrão do zstd)
+DEFAULT_DICT_SIZE = 112640
+
+
+def _zstd():
+    """Import zstandard lazily (only needed when compression is enabled)"""
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError(
+            "Compressão de XML requer o pacote 'zstandard' (pip install zstandard)"
+        ) from e
+    return zstandard
+
+
+def encode_bytea(data: bytes) -> str:
+    """Encode bytes for a BYTEA column in a PostgREST JSON payload"""
+    return "\\x" + data.hex()
+
+
+def decode_bytea(value: str) -> bytes:
+    """Decode a BYTEA value as returned by PostgREST (hex format)"""
+    if value.startswith("\\x"):
+        value = value[2:]
+    return bytes.fromhex(value)
+
+
+class XMLCompressor:
+    """zstd compressor for NF-e XML, optionally using a trained dictionary"""
+
+    def __init__(self, level: int = 10, dict_path: Optional[str] = None):
+        """Initialize compressor
+
+        Args:
+            level: zstd compression level (1-22)
+            dict_path: Optional path to a dictionary trained on NF-e XML
+        """
+        zstd = _zstd()
+        self.level = level
+        self.dict_path = dict_path
+        self._dict = None
+
+        if dict_path:
+            self._dict = zstd.ZstdCompressionDict(Path(dict_path).read_bytes())
+
+    @property
+    def codec(self) -> str:
+        """Codec name stored in xml_compressao"""
+        return CODEC_ZSTD_DICT if self._dict is not None else CODEC_ZSTD
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress XML bytes
+
+        A new ZstdCompressor is created per call because instances are not
+        thread-safe and imports run concurrently.
+        """
+        zstd = _zstd()
+        compressor = zstd.ZstdCompressor(level=self.level, dict_data=self._dict)
+        return compressor.compress(data)
+
+    def decompress(self, data: bytes, codec: str = CODEC_ZSTD) -> bytes:
+        """Decompress XML bytes
+
+        Args:
+            data: Compressed bytes
+            codec: Codec recorded with the data
+
+        Raises:
+            ValueError: If the codec is unknown or needs a dictionary that is
+                not configured
+        """
+        zstd = _zstd()
+        if codec == CODEC_ZSTD_DICT and self._dict is None:
+            raise ValueError("XML compactado com dicionário, mas nenhum dicionário foi configurado")
+        if codec not in (CODEC_ZSTD, CODEC_ZSTD_DICT):
+            raise ValueError(f"Codec de XML desconhecido: {codec}")
+
+        dict_data = self._dict if codec == CODEC_ZSTD_DICT else None
+        decompressor = zstd.ZstdDecompressor(dict_data=dict_data)
+        return decompressor.decompress(data)
+
+
+def read_stored_xml(row: Dict[str, Any], compressor: Optional[XMLCompressor] = None) -> Optional[str]:
+    """Get the XML text of a notas_fiscais row, decompressing when needed
+
+    Args:
+        row: Row with xml_completo, xml_compactado and xml_compressao
+        compressor: Compressor holding the dictionary (by default one is
+            created with settings.xml_zstd_dict_path, so notes compressed
+            with the dictionary still decode after compression is disabled)
+
+    Returns:
+        XML text, or None if the note has no stored XML
+    """
+    # Texto tem prioridade: uma nota reimportada sem compressão (modo replace)
+    # pode manter o xml_compactado antigo
+    if row.get("xml_completo"):
+        return row["xml_completo"]
+
+    compressed = row.get("xml_compactado")
+    if not compressed:
+        return None
+
+    compressor = compressor or XMLCompressor(dict_path=settings.xml_zstd_dict_path)
+    data = compressor.decompress(decode_bytea(compressed), row.get("xml_compressao") or CODEC_ZSTD)
+    return data.decode("utf-8")
+
+
+def train_dictionary(xml_paths: Iterable[str], dict_size: int = DEFAULT_DICT_SIZE) -> bytes:
+    """Train a zstd dictionary on sample NF-e XML files
+
+    Args:
+        xml_paths: Sample XML files (a few hundred notes is enough)
+        dict_size: Maximum dictionary size in bytes
+
+    Returns:
+        Dictionary bytes (save to a file and set XML_ZSTD_DICT_PATH)
+    """
+    zstd = _zstd()
+    samples = [Path(p).read_bytes() for p in xml_paths]
+    return zstd.train_dictionary(dict_size, samples).as_bytes()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Uso: python -m database.xml_storage <diretorio_com_xmls> <arquivo_dicionario>")
+        sys.exit(1)
+
+    xml_dir, output = sys.argv[1], sys.argv[2]
+    paths = [p for p in Path(xml_dir).iterdir() if p.suffix.lower() == ".xml"]
+    dictionary = train_dictionary(paths)
+    Path(output).write_bytes(dictionary)
+    print(f"✅ Dicionário com {len(dictionary)} bytes treinado em {len(paths)} XMLs: {output}")
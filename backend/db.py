@@ -6,11 +6,15 @@ Usa service_role key para bypass de RLS
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 import requests
+import threading
 import json
 import os
 from dotenv import load_dotenv
 
+from database.xml_storage import encode_bytea
+
 
 load_dotenv()
 
@@ -30,10 +34,63 @@ HEADERS = {
 # Namespace padrão da NF-e
 NS = {'nfe': 'http://www.portalfiscal.inf.br/nfe'}
 
+# Modos de importação:
+# - insert: insere a nota; falha se a chave de acesso já existir
+# - skip: upsert por chave_acesso ignorando notas já importadas (filhos não são tocados)
+# - replace: upsert por chave_acesso atualizando a nota e recriando os filhos
+#
+# Cada requisição PostgREST é uma transação própria: se a gravação dos filhos
+# falhar depois do upsert (ou da remoção dos filhos antigos no modo replace),
+# a nota é removida para que não fique sem itens e seja importada de novo na
+# próxima execução, inclusive no modo skip.
+IMPORT_MODES = ("insert", "skip", "replace")
+
+# Tabelas filhas recriadas no modo replace (demais filhos saem por ON DELETE CASCADE)
+NOTA_CHILD_TABLES = ("nf_itens", "nf_transporte", "nf_pagamentos", "nf_referencias")
+
+# Tabelas de impostos por item (nf_item_id)
+ITEM_TAX_TABLES = ("nf_itens_icms", "nf_itens_ipi", "nf_itens_pis", "nf_itens_cofins")
+
+# Requisições simultâneas por nível da gravação em lote (allocate_ids)
+BULK_MAX_WORKERS = 5
+
+
+class DuplicateRecordError(Exception):
+    """Registro já existe no banco (HTTP 409 do PostgREST)"""
+    
+    def __init__(self, message, endpoint=None):
+        super().__init__(message)
+        self.endpoint = endpoint
+
 
 class SupabaseNFeImporter:
-    def __init__(self):
+    def __init__(self, mode="insert", allocate_ids=False, xml_compressor=None):
+        """
+        Args:
+            mode: Modo de importação (insert, skip ou replace)
+            allocate_ids: Reserva os IDs dos filhos no cliente (função reservar_ids)
+                e grava cada tabela filha em uma única requisição em lote
+            xml_compressor: XMLCompressor para gravar o XML original compactado
+                em xml_compactado (None mantém o texto em xml_completo)
+        """
+        if mode not in IMPORT_MODES:
+            raise ValueError(f"Modo de importação inválido: {mode} (use {', '.join(IMPORT_MODES)})")
         self.base_url = f"{SUPABASE_URL}/rest/v1"
+        self.mode = mode
+        self.allocate_ids = allocate_ids
+        self.xml_compressor = xml_compressor
+        self._executor = None
+        self._executor_lock = threading.Lock()
+    
+    def _get_executor(self):
+        """Pool de threads compartilhado para as requisições em paralelo"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=BULK_MAX_WORKERS,
+                    thread_name_prefix="nfe-bulk"
+                )
+            return self._executor
     
     def get_text(self, element, path, default=None):
         """Busca texto em elemento XML com namespace"""
@@ -56,17 +113,23 @@ class SupabaseNFeImporter:
         value = value.split('-03:00')[0].split('+')[0].split('Z')[0]
         return value
     
-    def supabase_request(self, method, endpoint, data=None, params=None):
-        """Faz requisição HTTP para Supabase"""
+    def supabase_request(self, method, endpoint, data=None, params=None, headers=None):
+        """Faz requisição HTTP para Supabase
+        
+        headers sobrescreve os HEADERS padrão (ex: Prefer para upsert).
+        """
         url = f"{self.base_url}/{endpoint}"
+        request_headers = {**HEADERS, **headers} if headers else HEADERS
         
         try:
             if method == "GET":
-                response = requests.get(url, headers=HEADERS, params=params)
+                response = requests.get(url, headers=request_headers, params=params)
             elif method == "POST":
-                response = requests.post(url, headers=HEADERS, json=data)
+                response = requests.post(url, headers=request_headers, params=params, json=data)
             elif method == "PATCH":
-                response = requests.patch(url, headers=HEADERS, json=data)
+                response = requests.patch(url, headers=request_headers, params=params, json=data)
+            elif method == "DELETE":
+                response = requests.delete(url, headers=request_headers, params=params)
             
             response.raise_for_status()
             return response.json() if response.text else None
@@ -80,7 +143,7 @@ class SupabaseNFeImporter:
                     error_msg = "Empresa com este CPF/CNPJ já está cadastrada"
                 elif 'notas_fiscais' in endpoint:
                     error_msg = "Nota fiscal com esta chave de acesso já foi importada"
-                raise Exception(error_msg)
+                raise DuplicateRecordError(error_msg, endpoint=endpoint)
             
             # Para outros erros HTTP, manter comportamento original
             print(f"Erro na requisição: {e}")
@@ -107,18 +170,323 @@ class SupabaseNFeImporter:
             return result[0]['id']
         
         # Insere nova empresa
+        try:
+            result = self.supabase_request(
+                "POST",
+                "empresas",
+                data=dados_empresa
+            )
+        except DuplicateRecordError:
+            # Inserida por outra importação concorrente entre o GET e o POST
+            result = self.supabase_request(
+                "GET",
+                "empresas",
+                params={"cpf_cnpj": f"eq.{cnpj_cpf}", "select": "id"}
+            )
+        
+        return result[0]['id'] if result else None
+    
+    def get_nota_fiscal_id(self, chave_acesso):
+        """Retorna o ID da nota com a chave de acesso (ou None se não existir)"""
         result = self.supabase_request(
-            "POST",
-            "empresas",
-            data=dados_empresa
+            "GET",
+            "notas_fiscais",
+            params={"chave_acesso": f"eq.{chave_acesso}", "select": "id"}
         )
+        return result[0]['id'] if result else None
+    
+    def upsert_nota_fiscal(self, nota_data, mode):
+        """Insere ou faz upsert da nota por chave_acesso em uma única requisição
+        
+        Returns:
+            ID da nota, ou None no modo skip quando a nota já existia
+        """
+        if mode == "insert":
+            result = self.supabase_request("POST", "notas_fiscais", data=nota_data)
+        else:
+            resolution = "ignore-duplicates" if mode == "skip" else "merge-duplicates"
+            result = self.supabase_request(
+                "POST",
+                "notas_fiscais",
+                data=nota_data,
+                params={"on_conflict": "chave_acesso"},
+                headers={"Prefer": f"resolution={resolution},return=representation"}
+            )
         
         return result[0]['id'] if result else None
     
+    def delete_nota_children(self, nf_id):
+        """Remove os filhos da nota para que sejam recriados (modo replace)"""
+        for table in NOTA_CHILD_TABLES:
+            self.supabase_request(
+                "DELETE",
+                table,
+                params={"nota_fiscal_id": f"eq.{nf_id}"}
+            )
+    
+    def delete_nota_fiscal(self, nf_id):
+        """Remove a nota (os filhos saem por ON DELETE CASCADE)"""
+        self.supabase_request(
+            "DELETE",
+            "notas_fiscais",
+            params={"id": f"eq.{nf_id}"}
+        )
+    
+    def reserve_ids(self, quantidades):
+        """Reserva IDs das sequences em uma única chamada (função reservar_ids)
+        
+        Args:
+            quantidades: Dict {tabela: quantidade de IDs}
+        
+        Returns:
+            Dict {tabela: [ids]} (tabelas com quantidade 0 ficam de fora)
+        """
+        tabelas = [t for t, n in quantidades.items() if n > 0]
+        if not tabelas:
+            return {}
+        
+        result = self.supabase_request(
+            "POST",
+            "rpc/reservar_ids",
+            data={
+                'p_tabelas': tabelas,
+                'p_quantidades': [quantidades[t] for t in tabelas]
+            }
+        )
+        return result or {}
+    
+    def bulk_insert(self, rows_by_table):
+        """Insere várias tabelas em paralelo, uma requisição em lote por tabela
+        
+        As linhas já devem trazer os IDs reservados; nada é devolvido
+        (return=minimal).
+        """
+        executor = self._get_executor()
+        futures = [
+            executor.submit(
+                self.supabase_request,
+                "POST",
+                table,
+                data=rows,
+                headers={"Prefer": "return=minimal"}
+            )
+            for table, rows in rows_by_table.items()
+            if rows
+        ]
+        for future in futures:
+            future.result()
+    
+    def extract_children(self, inf_nfe, ide):
+        """Extrai referências, itens (com impostos), transporte e pagamentos
+        
+        Os dados não trazem nota_fiscal_id, nf_item_id nem transporte_id;
+        as chaves são preenchidas na gravação.
+        """
+        children = {
+            'referencias': [],
+            'itens': [],
+            'transporte': None,
+            'volume': None,
+            'pagamentos': []
+        }
+        
+        # Referências
+        for nf_ref in ide.findall('nfe:NFref', NS):
+            ref_nfe = self.get_text(nf_ref, 'nfe:refNFe')
+            if ref_nfe:
+                children['referencias'].append({
+                    'tipo': 'nfe',
+                    'chave_acesso_referenciada': ref_nfe
+                })
+        
+        # Itens
+        for det in inf_nfe.findall('nfe:det', NS):
+            prod = det.find('nfe:prod', NS)
+            imposto = det.find('nfe:imposto', NS)
+            
+            item_data = {
+                'numero_item': int(det.get('nItem')),
+                'codigo_produto': self.get_text(prod, 'nfe:cProd'),
+                'codigo_ean': self.get_text(prod, 'nfe:cEAN'),
+                'descricao': self.get_text(prod, 'nfe:xProd'),
+                'ncm': self.get_text(prod, 'nfe:NCM'),
+                'cfop': self.get_text(prod, 'nfe:CFOP'),
+                'unidade_comercial': self.get_text(prod, 'nfe:uCom'),
+                'quantidade_comercial': self.parse_decimal(self.get_text(prod, 'nfe:qCom')),
+                'valor_unitario_comercial': self.parse_decimal(self.get_text(prod, 'nfe:vUnCom')),
+                'valor_total_bruto': self.parse_decimal(self.get_text(prod, 'nfe:vProd')),
+                'codigo_ean_tributavel': self.get_text(prod, 'nfe:cEANTrib'),
+                'unidade_tributavel': self.get_text(prod, 'nfe:uTrib'),
+                'quantidade_tributavel': self.parse_decimal(self.get_text(prod, 'nfe:qTrib')),
+                'valor_unitario_tributavel': self.parse_decimal(self.get_text(prod, 'nfe:vUnTrib')),
+                'valor_frete': self.parse_decimal(self.get_text(prod, 'nfe:vFrete')),
+                'valor_seguro': self.parse_decimal(self.get_text(prod, 'nfe:vSeg')),
+                'valor_desconto': self.parse_decimal(self.get_text(prod, 'nfe:vDesc')),
+                'valor_outras_despesas': self.parse_decimal(self.get_text(prod, 'nfe:vOutro')),
+                'indicador_total': self.get_text(prod, 'nfe:indTot', '1')
+            }
+            
+            impostos = {}
+            
+            # ICMS
+            icms = imposto.find('.//nfe:ICMS/*', NS)
+            if icms is not None:
+                impostos['nf_itens_icms'] = {
+                    'origem': self.get_text(icms, 'nfe:orig'),
+                    'cst': self.get_text(icms, 'nfe:CST'),
+                    'csosn': self.get_text(icms, 'nfe:CSOSN'),
+                    'modalidade_bc': self.get_text(icms, 'nfe:modBC'),
+                    'percentual_reducao_bc': self.parse_decimal(self.get_text(icms, 'nfe:pRedBC')),
+                    'valor_bc': self.parse_decimal(self.get_text(icms, 'nfe:vBC')),
+                    'aliquota': self.parse_decimal(self.get_text(icms, 'nfe:pICMS')),
+                    'valor_icms': self.parse_decimal(self.get_text(icms, 'nfe:vICMS'))
+                }
+            
+            # IPI
+            ipi = imposto.find('.//nfe:IPI/*', NS)
+            if ipi is not None:
+                impostos['nf_itens_ipi'] = {
+                    'cst': self.get_text(ipi, 'nfe:CST'),
+                    'valor_bc': self.parse_decimal(self.get_text(ipi, 'nfe:vBC')),
+                    'aliquota': self.parse_decimal(self.get_text(ipi, 'nfe:pIPI')),
+                    'valor_ipi': self.parse_decimal(self.get_text(ipi, 'nfe:vIPI'))
+                }
+            
+            # PIS
+            pis = imposto.find('.//nfe:PIS/*', NS)
+            if pis is not None:
+                impostos['nf_itens_pis'] = {
+                    'cst': self.get_text(pis, 'nfe:CST'),
+                    'valor_bc': self.parse_decimal(self.get_text(pis, 'nfe:vBC')),
+                    'aliquota': self.parse_decimal(self.get_text(pis, 'nfe:pPIS')),
+                    'valor_pis': self.parse_decimal(self.get_text(pis, 'nfe:vPIS'))
+                }
+            
+            # COFINS
+            cofins = imposto.find('.//nfe:COFINS/*', NS)
+            if cofins is not None:
+                impostos['nf_itens_cofins'] = {
+                    'cst': self.get_text(cofins, 'nfe:CST'),
+                    'valor_bc': self.parse_decimal(self.get_text(cofins, 'nfe:vBC')),
+                    'aliquota': self.parse_decimal(self.get_text(cofins, 'nfe:pCOFINS')),
+                    'valor_cofins': self.parse_decimal(self.get_text(cofins, 'nfe:vCOFINS'))
+                }
+            
+            children['itens'].append((item_data, impostos))
+        
+        # Transporte
+        transp = inf_nfe.find('nfe:transp', NS)
+        if transp is not None:
+            children['transporte'] = {
+                'modalidade_frete': self.get_text(transp, 'nfe:modFrete')
+            }
+            
+            vol = transp.find('nfe:vol', NS)
+            if vol is not None:
+                children['volume'] = {
+                    'quantidade': int(self.get_text(vol, 'nfe:qVol', '0') or '0'),
+                    'especie': self.get_text(vol, 'nfe:esp'),
+                    'peso_liquido': self.parse_decimal(self.get_text(vol, 'nfe:pesoL')),
+                    'peso_bruto': self.parse_decimal(self.get_text(vol, 'nfe:pesoB'))
+                }
+        
+        # Pagamentos
+        for pag in inf_nfe.findall('nfe:pag/nfe:detPag', NS):
+            children['pagamentos'].append({
+                'indicador_pagamento': self.get_text(pag, 'nfe:indPag'),
+                'forma_pagamento': self.get_text(pag, 'nfe:tPag'),
+                'valor_pagamento': self.parse_decimal(self.get_text(pag, 'nfe:vPag'))
+            })
+        
+        return children
+    
+    def insert_children(self, nf_id, children):
+        """Insere os filhos da nota um a um, usando os IDs devolvidos pelo banco"""
+        for ref_data in children['referencias']:
+            self.supabase_request("POST", "nf_referencias", data={'nota_fiscal_id': nf_id, **ref_data})
+        
+        print("📦 Inserindo itens...")
+        for item_data, impostos in children['itens']:
+            result = self.supabase_request("POST", "nf_itens", data={'nota_fiscal_id': nf_id, **item_data})
+            item_id = result[0]['id'] if result else None
+            
+            if not item_id:
+                continue
+            
+            for table, imposto_data in impostos.items():
+                self.supabase_request("POST", table, data={'nf_item_id': item_id, **imposto_data})
+        
+        print("🚚 Inserindo transporte...")
+        if children['transporte']:
+            result = self.supabase_request(
+                "POST", "nf_transporte", data={'nota_fiscal_id': nf_id, **children['transporte']}
+            )
+            transp_id = result[0]['id'] if result else None
+            
+            if transp_id and children['volume']:
+                self.supabase_request(
+                    "POST", "nf_transporte_volumes", data={'transporte_id': transp_id, **children['volume']}
+                )
+        
+        print("💳 Inserindo pagamento...")
+        for pag_data in children['pagamentos']:
+            self.supabase_request("POST", "nf_pagamentos", data={'nota_fiscal_id': nf_id, **pag_data})
+    
+    def insert_children_bulk(self, nf_id, children, reserved_ids):
+        """Insere os filhos da nota com IDs reservados no cliente
+        
+        Com os IDs conhecidos de antemão, cada tabela vai em uma única
+        requisição em lote e as tabelas de um mesmo nível vão em paralelo:
+        nível 1 (itens, transporte, pagamentos, referências) e nível 2
+        (impostos e volumes). O número de requisições não cresce com o
+        número de itens.
+        """
+        item_ids = reserved_ids.get('nf_itens', [])
+        transp_ids = reserved_ids.get('nf_transporte', [])
+        if len(item_ids) != len(children['itens']) or (children['transporte'] and not transp_ids):
+            raise Exception("IDs reservados insuficientes para os filhos da nota")
+        
+        nivel_1 = {
+            'nf_itens': [],
+            'nf_transporte': [],
+            'nf_pagamentos': [{'nota_fiscal_id': nf_id, **pag} for pag in children['pagamentos']],
+            'nf_referencias': [{'nota_fiscal_id': nf_id, **ref} for ref in children['referencias']]
+        }
+        nivel_2 = {table: [] for table in ITEM_TAX_TABLES}
+        nivel_2['nf_transporte_volumes'] = []
+        
+        for item_id, (item_data, impostos) in zip(item_ids, children['itens']):
+            nivel_1['nf_itens'].append({'id': item_id, 'nota_fiscal_id': nf_id, **item_data})
+            for table, imposto_data in impostos.items():
+                nivel_2[table].append({'nf_item_id': item_id, **imposto_data})
+        
+        if children['transporte']:
+            transp_id = transp_ids[0]
+            nivel_1['nf_transporte'].append({'id': transp_id, 'nota_fiscal_id': nf_id, **children['transporte']})
+            if children['volume']:
+                nivel_2['nf_transporte_volumes'].append({'transporte_id': transp_id, **children['volume']})
+        
+        print(f"📦 Inserindo {len(item_ids)} itens, transporte e pagamentos em lote...")
+        self.bulk_insert(nivel_1)
+        self.bulk_insert(nivel_2)
+    
+    def get_nota_xml(self, chave_acesso):
+        """Retorna as colunas de XML da nota (ou None se não existir)"""
+        result = self.supabase_request(
+            "GET",
+            "notas_fiscais",
+            params={
+                "chave_acesso": f"eq.{chave_acesso}",
+                "select": "id,xml_completo,xml_compactado,xml_compressao"
+            }
+        )
+        return result[0] if result else None
+    
     def parse_xml(self, xml_path):
         """Faz o parse do XML da NF-e"""
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
+        with open(xml_path, 'rb') as f:
+            xml_bytes = f.read()
+        root = ET.fromstring(xml_bytes)
         
         # Localiza o nó principal
         nfe = root.find('.//nfe:NFe', NS)
@@ -128,16 +496,40 @@ class SupabaseNFeImporter:
         return {
             'inf_nfe': inf_nfe,
             'prot_nfe': prot_nfe,
-            'xml_completo': ET.tostring(root, encoding='unicode')
+            'xml_bytes': xml_bytes,
+            'root': root
         }
     
-    def import_nfe(self, xml_path):
-        """Importa NF-e completa do XML para o Supabase"""
+    def get_chave_acesso(self, parsed):
+        """Chave de acesso de um XML já lido por parse_xml (para o manifesto do lote)
+        
+        Retorna None se o XML não tiver chave.
+        """
+        inf_nfe = parsed['inf_nfe']
+        chave = inf_nfe.get('Id') if inf_nfe is not None else None
+        return chave.replace('NFe', '') if chave else None
+    
+    def import_nfe(self, xml_path, mode=None, parsed=None):
+        """Importa NF-e completa do XML para o Supabase
+        
+        Args:
+            xml_path: Caminho do XML
+            mode: insert, skip ou replace (padrão: modo do importador)
+            parsed: Resultado de parse_xml, quando o chamador já leu o
+                arquivo (evita um segundo parse)
+        
+        Returns:
+            ID da nota fiscal (existente, nos modos skip/replace)
+        """
+        mode = mode or self.mode
+        if mode not in IMPORT_MODES:
+            raise ValueError(f"Modo de importação inválido: {mode} (use {', '.join(IMPORT_MODES)})")
+        
         try:
             print("🔄 Iniciando importação...")
             
             # Parse do XML
-            parsed = self.parse_xml(xml_path)
+            parsed = parsed or self.parse_xml(xml_path)
             inf_nfe = parsed['inf_nfe']
             prot_nfe = parsed['prot_nfe']
             
@@ -149,6 +541,13 @@ class SupabaseNFeImporter:
             
             print(f"📄 Processando NF-e: {chave_acesso}")
             
+            if mode == "skip":
+                # Re-execução: uma única requisição, sem tocar empresas nem filhos
+                existing_id = self.get_nota_fiscal_id(chave_acesso)
+                if existing_id:
+                    print(f"⏭️  NF-e {chave_acesso} já importada (ID: {existing_id}), ignorando")
+                    return existing_id
+            
             # Emitente (emit)
             emit = inf_nfe.find('nfe:emit', NS)
             emit_cnpj = self.get_text(emit, 'nfe:CNPJ')
@@ -285,153 +684,60 @@ class SupabaseNFeImporter:
                 'resp_tecnico_cnpj': self.get_text(inf_resp_tec, 'nfe:CNPJ') if inf_resp_tec is not None else None,
                 'resp_tecnico_contato': self.get_text(inf_resp_tec, 'nfe:xContato') if inf_resp_tec is not None else None,
                 'resp_tecnico_email': self.get_text(inf_resp_tec, 'nfe:email') if inf_resp_tec is not None else None,
-                'resp_tecnico_telefone': self.get_text(inf_resp_tec, 'nfe:fone') if inf_resp_tec is not None else None,
-                'xml_completo': parsed['xml_completo']
+                'resp_tecnico_telefone': self.get_text(inf_resp_tec, 'nfe:fone') if inf_resp_tec is not None else None
             }
             
-            result = self.supabase_request("POST", "notas_fiscais", data=nota_data)
-            nf_id = result[0]['id'] if result else None
+            if self.xml_compressor:
+                # XML original compactado (a coluna de texto fica vazia)
+                nota_data['xml_completo'] = None
+                nota_data['xml_compactado'] = encode_bytea(self.xml_compressor.compress(parsed['xml_bytes']))
+                nota_data['xml_compressao'] = self.xml_compressor.codec
+            else:
+                nota_data['xml_completo'] = ET.tostring(parsed['root'], encoding='unicode')
+            
+            children = self.extract_children(inf_nfe, ide)
+            
+            reserved_ids = None
+            if self.allocate_ids:
+                # Reserva os IDs dos filhos em paralelo ao upsert da nota
+                reserved_ids = self._get_executor().submit(
+                    self.reserve_ids,
+                    {
+                        'nf_itens': len(children['itens']),
+                        'nf_transporte': 1 if children['transporte'] else 0
+                    }
+                )
+            
+            nf_id = self.upsert_nota_fiscal(nota_data, mode)
+            
+            if not nf_id and mode == "skip":
+                # Importada concorrentemente entre a verificação e o upsert
+                existing_id = self.get_nota_fiscal_id(chave_acesso)
+                if existing_id:
+                    print(f"⏭️  NF-e {chave_acesso} já importada (ID: {existing_id}), ignorando")
+                    return existing_id
             
             if not nf_id:
                 raise Exception("Erro ao inserir nota fiscal")
             
-            # ===== INSERIR REFERÊNCIAS =====
-            nf_refs = ide.findall('nfe:NFref', NS)
-            for nf_ref in nf_refs:
-                ref_nfe = self.get_text(nf_ref, 'nfe:refNFe')
-                if ref_nfe:
-                    self.supabase_request("POST", "nf_referencias", data={
-                        'nota_fiscal_id': nf_id,
-                        'tipo': 'nfe',
-                        'chave_acesso_referenciada': ref_nfe
-                    })
-            
-            # ===== INSERIR ITENS =====
-            print("📦 Inserindo itens...")
-            detalhes = inf_nfe.findall('nfe:det', NS)
-            
-            for det in detalhes:
-                numero_item = int(det.get('nItem'))
-                prod = det.find('nfe:prod', NS)
-                imposto = det.find('nfe:imposto', NS)
-                
-                item_data = {
-                    'nota_fiscal_id': nf_id,
-                    'numero_item': numero_item,
-                    'codigo_produto': self.get_text(prod, 'nfe:cProd'),
-                    'codigo_ean': self.get_text(prod, 'nfe:cEAN'),
-                    'descricao': self.get_text(prod, 'nfe:xProd'),
-                    'ncm': self.get_text(prod, 'nfe:NCM'),
-                    'cfop': self.get_text(prod, 'nfe:CFOP'),
-                    'unidade_comercial': self.get_text(prod, 'nfe:uCom'),
-                    'quantidade_comercial': self.parse_decimal(self.get_text(prod, 'nfe:qCom')),
-                    'valor_unitario_comercial': self.parse_decimal(self.get_text(prod, 'nfe:vUnCom')),
-                    'valor_total_bruto': self.parse_decimal(self.get_text(prod, 'nfe:vProd')),
-                    'codigo_ean_tributavel': self.get_text(prod, 'nfe:cEANTrib'),
-                    'unidade_tributavel': self.get_text(prod, 'nfe:uTrib'),
-                    'quantidade_tributavel': self.parse_decimal(self.get_text(prod, 'nfe:qTrib')),
-                    'valor_unitario_tributavel': self.parse_decimal(self.get_text(prod, 'nfe:vUnTrib')),
-                    'valor_frete': self.parse_decimal(self.get_text(prod, 'nfe:vFrete')),
-                    'valor_seguro': self.parse_decimal(self.get_text(prod, 'nfe:vSeg')),
-                    'valor_desconto': self.parse_decimal(self.get_text(prod, 'nfe:vDesc')),
-                    'valor_outras_despesas': self.parse_decimal(self.get_text(prod, 'nfe:vOutro')),
-                    'indicador_total': self.get_text(prod, 'nfe:indTot', '1')
-                }
-                
-                result = self.supabase_request("POST", "nf_itens", data=item_data)
-                item_id = result[0]['id'] if result else None
+            try:
+                if mode == "replace":
+                    print("♻️  Substituindo itens, transporte, pagamentos e referências...")
+                    self.delete_nota_children(nf_id)
                 
-                if not item_id:
-                    continue
-                
-                # ICMS
-                icms = imposto.find('.//nfe:ICMS/*', NS)
-                if icms is not None:
-                    icms_data = {
-                        'nf_item_id': item_id,
-                        'origem': self.get_text(icms, 'nfe:orig'),
-                        'cst': self.get_text(icms, 'nfe:CST'),
-                        'csosn': self.get_text(icms, 'nfe:CSOSN'),
-                        'modalidade_bc': self.get_text(icms, 'nfe:modBC'),
-                        'percentual_reducao_bc': self.parse_decimal(self.get_text(icms, 'nfe:pRedBC')),
-                        'valor_bc': self.parse_decimal(self.get_text(icms, 'nfe:vBC')),
-                        'aliquota': self.parse_decimal(self.get_text(icms, 'nfe:pICMS')),
-                        'valor_icms': self.parse_decimal(self.get_text(icms, 'nfe:vICMS'))
-                    }
-                    self.supabase_request("POST", "nf_itens_icms", data=icms_data)
-                
-                # IPI
-                ipi = imposto.find('.//nfe:IPI/*', NS)
-                if ipi is not None:
-                    ipi_data = {
-                        'nf_item_id': item_id,
-                        'cst': self.get_text(ipi, 'nfe:CST'),
-                        'valor_bc': self.parse_decimal(self.get_text(ipi, 'nfe:vBC')),
-                        'aliquota': self.parse_decimal(self.get_text(ipi, 'nfe:pIPI')),
-                        'valor_ipi': self.parse_decimal(self.get_text(ipi, 'nfe:vIPI'))
-                    }
-                    self.supabase_request("POST", "nf_itens_ipi", data=ipi_data)
-                
-                # PIS
-                pis = imposto.find('.//nfe:PIS/*', NS)
-                if pis is not None:
-                    pis_data = {
-                        'nf_item_id': item_id,
-                        'cst': self.get_text(pis, 'nfe:CST'),
-                        'valor_bc': self.parse_decimal(self.get_text(pis, 'nfe:vBC')),
-                        'aliquota': self.parse_decimal(self.get_text(pis, 'nfe:pPIS')),
-                        'valor_pis': self.parse_decimal(self.get_text(pis, 'nfe:vPIS'))
-                    }
-                    self.supabase_request("POST", "nf_itens_pis", data=pis_data)
-                
-                # COFINS
-                cofins = imposto.find('.//nfe:COFINS/*', NS)
-                if cofins is not None:
-                    cofins_data = {
-                        'nf_item_id': item_id,
-                        'cst': self.get_text(cofins, 'nfe:CST'),
-                        'valor_bc': self.parse_decimal(self.get_text(cofins, 'nfe:vBC')),
-                        'aliquota': self.parse_decimal(self.get_text(cofins, 'nfe:pCOFINS')),
-                        'valor_cofins': self.parse_decimal(self.get_text(cofins, 'nfe:vCOFINS'))
-                    }
-                    self.supabase_request("POST", "nf_itens_cofins", data=cofins_data)
-            
-            # ===== INSERIR TRANSPORTE =====
-            print("🚚 Inserindo transporte...")
-            transp = inf_nfe.find('nfe:transp', NS)
-            if transp is not None:
-                transp_data = {
-                    'nota_fiscal_id': nf_id,
-                    'modalidade_frete': self.get_text(transp, 'nfe:modFrete')
-                }
-                
-                result = self.supabase_request("POST", "nf_transporte", data=transp_data)
-                transp_id = result[0]['id'] if result else None
-                
-                # Volume
-                if transp_id:
-                    vol = transp.find('nfe:vol', NS)
-                    if vol is not None:
-                        vol_data = {
-                            'transporte_id': transp_id,
-                            'quantidade': int(self.get_text(vol, 'nfe:qVol', '0') or '0'),
-                            'especie': self.get_text(vol, 'nfe:esp'),
-                            'peso_liquido': self.parse_decimal(self.get_text(vol, 'nfe:pesoL')),
-                            'peso_bruto': self.parse_decimal(self.get_text(vol, 'nfe:pesoB'))
-                        }
-                        self.supabase_request("POST", "nf_transporte_volumes", data=vol_data)
-            
-            # ===== INSERIR PAGAMENTO =====
-            print("💳 Inserindo pagamento...")
-            pagamentos = inf_nfe.findall('nfe:pag/nfe:detPag', NS)
-            for pag in pagamentos:
-                pag_data = {
-                    'nota_fiscal_id': nf_id,
-                    'indicador_pagamento': self.get_text(pag, 'nfe:indPag'),
-                    'forma_pagamento': self.get_text(pag, 'nfe:tPag'),
-                    'valor_pagamento': self.parse_decimal(self.get_text(pag, 'nfe:vPag'))
-                }
-                self.supabase_request("POST", "nf_pagamentos", data=pag_data)
+                # ===== INSERIR FILHOS (REFERÊNCIAS, ITENS, TRANSPORTE, PAGAMENTOS) =====
+                if self.allocate_ids:
+                    self.insert_children_bulk(nf_id, children, reserved_ids.result())
+                else:
+                    self.insert_children(nf_id, children)
+            except Exception:
+                # Sem transação entre as requisições: a nota não pode ficar sem filhos
+                print(f"↩️  Removendo NF-e {chave_acesso} (ID: {nf_id}) para ser importada de novo")
+                try:
+                    self.delete_nota_fiscal(nf_id)
+                except Exception as cleanup_error:
+                    print(f"❌ Não foi possível remover a NF-e {chave_acesso}: {cleanup_error}")
+                raise
             
             print(f"✅ NF-e {chave_acesso} importada com sucesso! (ID: {nf_id})")
             return nf_id
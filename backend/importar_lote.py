@@ -1,14 +1,14 @@
 #!/usr/bin/env python3
 """
 Script para importar múltiplas NF-e de um diretório para o Supabase
-Uso: python importar_lote.py <diretorio_com_xmls>
+Uso: python importar_lote.py <diretorio_com_xmls> [--modo=insert|skip|replace] [--alocar-ids]
 """
 
 import os
 import sys
 import time
 from datetime import datetime
-from importar_nfe_supabase import SupabaseNFeImporter
+from db import SupabaseNFeImporter, DuplicateRecordError, IMPORT_MODES
 
 def formatar_tempo(segundos):
     """Formata segundos em formato legível"""
@@ -24,15 +24,35 @@ def main():
         print("📦 IMPORTADOR EM LOTE DE NF-e PARA SUPABASE")
         print("=" * 70)
         print()
-        print("Uso: python importar_lote.py <diretorio_com_xmls>")
+        print("Uso: python importar_lote.py <diretorio_com_xmls> [--modo=insert|skip|replace] [--alocar-ids]")
+        print()
+        print("Modos:")
+        print("  insert   Falha em notas já importadas (padrão)")
+        print("  skip     Ignora notas já importadas (re-execução segura)")
+        print("  replace  Atualiza notas já importadas e recria itens/pagamentos")
+        print()
+        print("  --alocar-ids  Reserva os IDs no cliente e grava itens/impostos em lote")
+        print("                (requer a função reservar_ids do schema)")
         print()
         print("Exemplo:")
-        print("  python importar_lote.py ./notas_fiscais/")
+        print("  python importar_lote.py ./notas_fiscais/ --modo=skip")
         print()
         sys.exit(1)
     
     xml_dir = sys.argv[1]
     
+    modo = "insert"
+    alocar_ids = False
+    for arg in sys.argv[2:]:
+        if arg.startswith("--modo="):
+            modo = arg.split("=", 1)[1]
+        elif arg == "--alocar-ids":
+            alocar_ids = True
+    
+    if modo not in IMPORT_MODES:
+        print(f"❌ Erro: modo '{modo}' inválido (use {', '.join(IMPORT_MODES)})")
+        sys.exit(1)
+    
     if not os.path.isdir(xml_dir):
         print(f"❌ Erro: '{xml_dir}' não é um diretório válido")
         sys.exit(1)
@@ -50,6 +70,9 @@ def main():
     print()
     print(f"📁 Diretório: {xml_dir}")
     print(f"📄 Total de XMLs encontrados: {len(xml_files)}")
+    print(f"⚙️  Modo de importação: {modo}")
+    if alocar_ids:
+        print("⚡ Alocação de IDs no cliente: itens e impostos gravados em lote")
     print()
     
     resposta = input("Deseja continuar com a importação? (s/n): ")
@@ -63,7 +86,7 @@ def main():
     print()
     
     # Criar importador
-    importer = SupabaseNFeImporter()
+    importer = SupabaseNFeImporter(mode=modo, allocate_ids=alocar_ids)
     
     # Contadores
     sucesso = 0
@@ -87,20 +110,18 @@ def main():
             sucesso += 1
             print(f"    ✅ Importada com sucesso! ID: {nf_id}")
             
+        except DuplicateRecordError:
+            duplicados += 1
+            print(f"    ⚠️  Já existe no banco (duplicada)")
+        
         except Exception as e:
             erro_str = str(e)
-            
-            # Verificar se é erro de duplicação
-            if 'duplicate key' in erro_str.lower() or 'unique constraint' in erro_str.lower():
-                duplicados += 1
-                print(f"    ⚠️  Já existe no banco (duplicada)")
-            else:
-                erros += 1
-                print(f"    ❌ Erro: {erro_str[:100]}...")
-                log_erros.append({
-                    'arquivo': filename,
-                    'erro': erro_str
-                })
+            erros += 1
+            print(f"    ❌ Erro: {erro_str[:100]}...")
+            log_erros.append({
+                'arquivo': filename,
+                'erro': erro_str
+            })
         
         print()
     
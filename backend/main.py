@@ -19,6 +19,7 @@ Requirements satisfied:
 
 import os
 import sys
+import asyncio
 from contextlib import asynccontextmanager
 from typing import Dict, Any
 
@@ -28,11 +29,19 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 
 from config import settings
-from agents.crew import NFeCrew
+from agents.answer_cache import get_answer_cache
+from agents.crew_pool import CrewPool
+from agents.sql_plan_cache import get_sql_plan_cache
 from memory.chat_memory import ChatMemory
 from batch.processor import BatchProcessor
 from batch.job_manager import get_job_manager
-from api.routes import chat, batch
+from api.routes import chat, batch, notas, queries
+from database.pool import get_pool, close_pool
+from database.async_pool import start_async_database, get_async_database, close_async_database
+from database.query_cache import get_query_cache
+from database.schema import refresh_schema, get_loaded_schema_snapshot
+from agents.tools.schema_tool import precompute_schema_responses
+from database.schema_selection import get_schema_selector
 from utils.logger import get_logger
 from utils.exceptions import AppException, ErrorCode
 
@@ -40,7 +49,7 @@ from utils.exceptions import AppException, ErrorCode
 logger = get_logger(__name__)
 
 # Global instances (initialized in lifespan)
-nfe_crew: NFeCrew = None
+nfe_crew: CrewPool = None
 chat_memory: ChatMemory = None
 batch_processor: BatchProcessor = None
 job_manager = None
@@ -97,6 +106,28 @@ def validate_environment():
     )
 
 
+async def refresh_schema_periodically():
+    """
+    Keep the schema snapshot, the schema tool responses and the table
+    embeddings used for prompt schema selection current.
+    
+    Runs the fingerprint check in the background at half the
+    schema_refresh_interval_seconds, so the on-demand check in
+    get_schema_snapshot() never runs during a chat turn.
+    """
+    while True:
+        await asyncio.sleep(settings.schema_refresh_interval_seconds / 2)
+        try:
+            await asyncio.to_thread(refresh_schema)
+            await asyncio.to_thread(precompute_schema_responses)
+            await asyncio.to_thread(get_schema_selector)
+        except Exception as e:
+            logger.exception(
+                "schema_refresh_failed",
+                e
+            )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -107,7 +138,7 @@ async def lifespan(app: FastAPI):
     - Shutdown: Cleanup resources
     
     Requirements:
-    - Initializes NFeCrew with CrewAI agents
+    - Builds a pool of NFeCrew instances (agents and tasks created once)
     - Initializes ChatMemory with RAG capabilities
     - Initializes BatchProcessor for XML imports
     """
@@ -132,14 +163,17 @@ async def lifespan(app: FastAPI):
     )
     
     try:
-        # Initialize NFeCrew
+        # Build the NFeCrew pool (agents and tasks are created once, here)
         logger.info("initializing_nfe_crew")
         global nfe_crew
-        nfe_crew = NFeCrew()
+        nfe_crew = await asyncio.to_thread(CrewPool)
         logger.info(
             "nfe_crew_initialized",
-            agents=["coordenador", "sql_specialist", "conversation_specialist", "fiscal_specialist"]
+            agents=["coordenador", "sql_specialist", "conversation_specialist", "fiscal_specialist"],
+            pool_size=nfe_crew.size
         )
+        if settings.answer_cache_enabled:
+            await asyncio.to_thread(get_answer_cache)
         
         # Initialize ChatMemory
         logger.info("initializing_chat_memory")
@@ -169,9 +203,50 @@ async def lifespan(app: FastAPI):
         job_manager = get_job_manager()
         logger.info("job_manager_initialized")
         
+        # Warm up the PostgreSQL pool used by SQLQueryTool
+        # (non-fatal: the pool connects on demand if the database is unreachable now)
+        try:
+            idle = await asyncio.to_thread(get_pool().warm_up, settings.db_pool_warmup)
+            logger.info(
+                "database_pool_warmed_up",
+                idle_connections=idle
+            )
+        except AppException as e:
+            logger.warning(
+                "database_pool_warmup_failed",
+                error=e.message
+            )
+        
+        # Load the schema snapshot used by the schema tools and the crew prompt
+        # (falls back to the curated descriptions if the database is unreachable)
+        snapshot = await asyncio.to_thread(refresh_schema)
+        cached_responses = await asyncio.to_thread(precompute_schema_responses)
+        selector = await asyncio.to_thread(get_schema_selector, snapshot)
+        logger.info(
+            "schema_snapshot_ready",
+            version=snapshot.version,
+            source=snapshot.source,
+            tables=len(snapshot.tables),
+            cached_responses=cached_responses,
+            schema_selection=selector.method
+        )
+        schema_refresh_task = asyncio.create_task(refresh_schema_periodically())
+        
+        # asyncpg pool on this event loop for SQLQueryTool and /api/queries
+        # (non-fatal: both fall back to the psycopg2 pool if it cannot start)
+        if settings.db_async_enabled:
+            try:
+                await start_async_database()
+            except AppException as e:
+                logger.warning(
+                    "async_database_start_failed",
+                    error=e.message
+                )
+        
         # Inject dependencies into route modules
         chat.initialize_chat_services(nfe_crew, chat_memory)
         batch.initialize_batch_services(batch_processor, job_manager)
+        notas.initialize_notas_services(batch_processor.importer)
         
         logger.info(
             "application_startup_complete",
@@ -190,6 +265,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("application_shutdown")
+    schema_refresh_task.cancel()
     
     # Cleanup resources if needed
     try:
@@ -200,6 +276,9 @@ async def lifespan(app: FastAPI):
         if job_manager:
             job_manager.cleanup_old_jobs()
         
+        close_pool()
+        await close_async_database()
+        
         logger.info("application_shutdown_complete")
         
     except Exception as e:
@@ -251,6 +330,8 @@ logger.info(
 # Include routers
 app.include_router(chat.router)
 app.include_router(batch.router)
+app.include_router(notas.router)
+app.include_router(queries.router)
 
 logger.info("routers_registered")
 
@@ -449,15 +530,20 @@ async def detailed_health_check():
                 "conversation_specialist"
             ],
             "model": settings.openai_model,
-            "process": "hierarchical",
+            "process": "sequential",
+            "intent_routing": settings.crew_routing_enabled,
+            "fast_path": settings.fast_path_enabled,
             "memory_enabled": True,
             "tools": [
                 "DatabaseQueryTool",
                 "DatabaseJoinQueryTool",
                 "SchemaInfoTool",
                 "SQLQueryTool",
-                "SchemaSearchTool"
-            ]
+                "MultiSQLQueryTool",
+                "SchemaSearchTool",
+                "CatalogQueryTool"
+            ],
+            "pool": nfe_crew.metrics()
         }
     else:
         health_info["services"]["crewai"] = {
@@ -503,6 +589,35 @@ async def detailed_health_check():
         }
         health_info["status"] = "degraded"
     
+    # PostgreSQL pool status (SQLQueryTool)
+    health_info["services"]["database_pool"] = get_pool().metrics()
+    
+    async_database = get_async_database()
+    if async_database is not None:
+        health_info["services"]["database_async_pool"] = async_database.metrics()
+    
+    # Schema snapshot seen by the agents
+    snapshot = get_loaded_schema_snapshot()
+    if snapshot is not None:
+        health_info["services"]["schema"] = {
+            "version": snapshot.version,
+            "source": snapshot.source,
+            "tables": len(snapshot.tables)
+        }
+    else:
+        health_info["services"]["schema"] = {"loaded": False}
+    
+    # Agent SQL result cache
+    health_info["services"]["query_cache"] = get_query_cache().metrics()
+    
+    # Semantic answer cache (not created when disabled: that loads the embedding model)
+    health_info["services"]["answer_cache"] = (
+        get_answer_cache().metrics() if settings.answer_cache_enabled else {"enabled": False}
+    )
+    
+    # NL question -> SQL plan cache
+    health_info["services"]["sql_plan_cache"] = get_sql_plan_cache().metrics()
+    
     # Configuration
     health_info["configuration"] = {
         "openai_model": settings.openai_model,
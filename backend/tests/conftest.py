@@ -0,0 +1,56 @@
+"""Shared pytest configuration for backend tests"""
+
+import os
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_path = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_path))
+
+# Set dummy environment variables for testing
+os.environ.setdefault("OPENAI_API_KEY", "sk-test-key-for-testing")
+os.environ.setdefault("SUPABASE_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
+os.environ.setdefault("ENABLE_SEMANTIC_SEARCH", "false")
+
+# Imported after the environment above (settings are read at import)
+import pytest
+
+from config import settings
+from database import schema
+from database.schema_provider import SchemaProvider
+
+
+class FakeLLM:
+    """LLM stand-in returning a fixed reply; records the calls"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.messages = None
+        self.calls = 0
+
+    def call(self, messages):
+        self.calls += 1
+        self.messages = messages
+        return self.reply
+
+
+class FakeSQLTool:
+    """SQLQueryTool stand-in returning a fixed result; records the queries"""
+
+    def __init__(self, result=None):
+        self.result = result or {"success": True, "results": [{"total": 1}], "row_count": 1}
+        self.queries = []
+
+    def execute(self, query):
+        self.queries.append(query)
+        return self.result
+
+
+@pytest.fixture
+def static_schema(monkeypatch):
+    """Curated schema (no database); returns its snapshot"""
+    monkeypatch.setattr(settings, "schema_introspection_enabled", False)
+    monkeypatch.setattr(schema, "_provider", SchemaProvider(curated=schema._CURATED_TABLES))
+    return schema.get_schema_snapshot()
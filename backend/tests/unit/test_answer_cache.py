@@ -0,0 +1,203 @@
+"""Unit tests for the semantic answer cache"""
+
+import numpy as np
+import pytest
+
+from agents.answer_cache import AnswerCache, question_literals
+from agents.crew import CrewRun
+from agents.crew_pool import CrewPool
+from agents.router import INTENT_CONVERSATION, INTENT_DATA, Route
+from config import settings
+from database.query_cache import bump_data_version
+
+
+def data_run(response="R$ 10,00"):
+    return CrewRun(response=response, route=Route(INTENT_DATA, "knn:data"))
+
+
+class DenseModel:
+    """Embedding stand-in: questions map to fixed unit vectors"""
+
+    vectors = {
+        "quanto faturamos em outubro?": [1.0, 0.0],
+        "qual o faturamento de outubro?": [0.96, 0.28],
+        "quantas notas de outubro?": [0.0, 1.0],
+    }
+
+    def encode(self, texts, normalize_embeddings=True):
+        return np.array([self.vectors[text] for text in texts])
+
+
+class FakeCrew:
+    def __init__(self):
+        self.runs = 0
+
+    def build_all(self):
+        pass
+
+    def run(self, message, chat_history=None, session_id=None, mode="auto"):
+        self.runs += 1
+        intent = INTENT_CONVERSATION if message == "olá" else INTENT_DATA
+        return CrewRun(response=f"resposta {self.runs}", route=Route(intent, "test"))
+
+
+class TestQuestionLiterals:
+    """Tests for the values that must match exactly"""
+
+    def test_literals(self):
+        """Test that numbers, months and periods are extracted, accents ignored"""
+        assert question_literals("Top 5 produtos de março de 2025") == {"5", "marco", "2025"}
+        assert question_literals("vendas do mês passado") == {"mes", "passado"}
+        assert question_literals("quais clientes compram mesmo?") == frozenset()
+        assert question_literals("Notas autorizadas de SP com ICMS") == {"autorizada", "sp", "icms"}
+
+
+class TestAnswerCache:
+    """Tests for matching questions by similarity"""
+
+    def test_rephrased_question_hits(self):
+        """Test that a close rewording gets the stored answer with the cache details"""
+        cache = AnswerCache()
+        cache.put("quais os 5 produtos mais vendidos?", data_run(), bump_data_version())
+
+        hit = cache.get("Quais são os 5 produtos mais vendidos")
+
+        assert hit.response == "R$ 10,00"
+        assert hit.metadata()["answer_cache"]["matched_question"] == "quais os 5 produtos mais vendidos?"
+        assert hit.cached["similarity"] >= cache.min_similarity
+        assert cache.metrics()["hits"] == 1
+
+    def test_different_literal_misses(self):
+        """Test that top 5 / top 10 and October / November are different questions"""
+        cache = AnswerCache()
+        version = bump_data_version()
+        cache.put("quais os 5 produtos mais vendidos?", data_run(), version)
+        cache.put("quanto faturamos em outubro?", data_run(), version)
+
+        assert cache.get("quais os 10 produtos mais vendidos?") is None
+        assert cache.get("quanto faturamos em novembro?") is None
+
+    def test_dissimilar_question_misses(self):
+        """Test that questions below the threshold are not served"""
+        cache = AnswerCache()
+        cache.put("quantas notas foram emitidas hoje", data_run(), bump_data_version())
+
+        assert cache.get("quantas notas foram canceladas hoje") is None
+
+    @pytest.mark.parametrize("stored, asked", [
+        ("qual o valor total de icms das notas fiscais autorizadas emitidas em outubro de 2024",
+         "qual o valor total de ipi das notas fiscais autorizadas emitidas em outubro de 2024"),
+        ("quanto vendemos para clientes de SP em outubro?", "quanto vendemos para clientes de RJ em outubro?"),
+        ("quais os 5 produtos mais vendidos?", "quais os 5 produtos menos vendidos?"),
+        ("quantas notas autorizadas temos?", "quantas notas canceladas temos?"),
+        ("qual o total das notas de entrada de outubro?", "qual o total das notas de saída de outubro?"),
+        ("qual a maior nota de outubro?", "qual a menor nota de outubro?"),
+    ])
+    def test_different_domain_term_misses(self, stored, asked):
+        """Test that questions differing in a tax, state, status or ordering are different questions"""
+        cache = AnswerCache()
+        cache.put(stored, data_run(), bump_data_version())
+
+        assert cache.get(asked) is None
+        assert cache.get(stored) is not None
+
+    def test_embedding_model(self):
+        """Test matching with dense embeddings when the model is available"""
+        cache = AnswerCache(model=DenseModel())
+        version = bump_data_version()
+        cache.put("quanto faturamos em outubro?", data_run(), version)
+
+        assert cache.method == "embedding"
+        assert cache.get("qual o faturamento de outubro?").cached["similarity"] == 0.96
+        assert cache.get("quantas notas de outubro?") is None
+
+    def test_import_invalidates(self):
+        """Test that answers computed before an import are not served"""
+        cache = AnswerCache()
+        cache.put("quanto vendemos hoje?", data_run(), bump_data_version())
+        bump_data_version()
+
+        assert cache.get("quanto vendemos hoje?") is None
+        assert cache.metrics()["stale"] == 1
+
+    def test_outdated_answer_not_stored(self):
+        """Test that a run that started before an import is not stored"""
+        cache = AnswerCache()
+        version = bump_data_version()
+        bump_data_version()
+
+        assert cache.put("quanto vendemos hoje?", data_run(), version) is False
+
+    def test_ttl(self):
+        """Test that answers older than the TTL are dropped"""
+        cache = AnswerCache(ttl_seconds=0)
+        cache.put("quanto vendemos hoje?", data_run(), bump_data_version())
+
+        assert cache.get("quanto vendemos hoje?") is None
+
+    def test_lru_eviction(self):
+        """Test that the least recently used answer is evicted first"""
+        cache = AnswerCache(max_entries=2)
+        version = bump_data_version()
+        cache.put("quanto vendemos em janeiro?", data_run("jan"), version)
+        cache.put("quanto vendemos em fevereiro?", data_run("fev"), version)
+        cache.get("quanto vendemos em janeiro?")
+        cache.put("quanto vendemos em março?", data_run("mar"), version)
+
+        assert cache.get("quanto vendemos em janeiro?").response == "jan"
+        assert cache.get("quanto vendemos em fevereiro?") is None
+        assert cache.metrics()["evictions"] == 1
+
+    def test_session_scope(self):
+        """Test that answers given with chat history stay in their session"""
+        cache = AnswerCache()
+        cache.put("e em fevereiro?", data_run(), bump_data_version(), scope="sessao-1")
+
+        assert cache.get("e em fevereiro?", scope="sessao-1") is not None
+        assert cache.get("e em fevereiro?", scope="sessao-2") is None
+        assert cache.get("e em fevereiro?") is None
+
+    def test_conversation_not_stored(self):
+        """Test that greetings and follow-ups are never cached"""
+        cache = AnswerCache()
+        run = CrewRun(response="Olá!", route=Route(INTENT_CONVERSATION, "rule:greeting"))
+
+        assert cache.put("olá", run, bump_data_version()) is False
+
+
+class TestPoolAnswerCache:
+    """Tests for the answer cache in front of the crews"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        cache = AnswerCache()
+        monkeypatch.setattr("agents.crew_pool.get_answer_cache", lambda: cache)
+        return cache
+
+    def test_repeated_question_skips_crew(self):
+        """Test that a repeated question is answered without a crew run"""
+        pool = CrewPool(size=1, factory=FakeCrew)
+        first = pool.run("quanto vendemos em janeiro?")
+        second = pool.run("Quanto vendemos em janeiro")
+
+        assert second.response == first.response
+        assert "answer_cache" not in first.metadata()
+        assert second.metadata()["answer_cache"]["hit"] is True
+        assert pool.metrics()["requests"] == 1
+
+    def test_crew_mode_bypasses_cache(self):
+        """Test that mode=crew always runs the agents and stores nothing"""
+        pool = CrewPool(size=1, factory=FakeCrew)
+        pool.run("quanto vendemos em janeiro?")
+
+        assert pool.run("quanto vendemos em janeiro?", mode="crew").response == "resposta 2"
+        assert pool.run("quanto vendemos em fevereiro?", mode="crew").response == "resposta 3"
+        assert pool.run("quanto vendemos em fevereiro?").response == "resposta 4"
+
+    def test_disabled(self, monkeypatch):
+        """Test that ANSWER_CACHE_ENABLED=false always runs the crew"""
+        monkeypatch.setattr(settings, "answer_cache_enabled", False)
+        pool = CrewPool(size=1, factory=FakeCrew)
+        pool.run("quanto vendemos em janeiro?")
+
+        assert pool.run("quanto vendemos em janeiro?").response == "resposta 2"
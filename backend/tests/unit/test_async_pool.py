@@ -0,0 +1,229 @@
+"""Unit tests for the asyncpg execution path"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+import psycopg2.errors
+import pytest
+
+from agents.tools import sql_query_tool
+from agents.tools.sql_query_tool import SQLQueryTool
+from config import settings
+from database.async_pool import AsyncDatabase, translate_error
+from database.cancellation import QueryCancelScope, cancel_scope
+from database.query_cache import QueryResultCache
+from utils.exceptions import DatabaseConnectionException
+
+asyncpg = pytest.importorskip("asyncpg")
+
+
+class FakeRecordCursor:
+    """Async iterator over canned rows (stands in for asyncpg's cursor)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = iter(conn.rows)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            row = next(self._rows)
+        except StopIteration:
+            raise StopAsyncIteration
+        self.conn.fetched += 1
+        return row
+
+
+class FakeAsyncConnection:
+    def __init__(self, rows, plan=None):
+        self.rows = rows
+        self.plan = plan or {"Node Type": "Seq Scan", "Total Cost": 10.0, "Plan Rows": len(rows)}
+        self.limited_plan = {"Node Type": "Limit", "Total Cost": 5.0, "Plan Rows": 100}
+        self.executed = []
+        self.fetched = 0
+        self.error = None
+
+    async def fetchval(self, sql):
+        self.executed.append(sql)
+        plan = self.limited_plan if "LIMIT" in sql else self.plan
+        return [{"Plan": dict(plan)}]
+
+    def cursor(self, sql, prefetch=None):
+        self.executed.append(sql)
+        if self.error is not None:
+            raise self.error
+        return FakeRecordCursor(self)
+
+
+class FakeAsyncDatabase(AsyncDatabase):
+    """AsyncDatabase whose read_only() hands out a fake connection"""
+
+    def __init__(self, conn, loop):
+        super().__init__(dsn="postgresql://test")
+        self.conn = conn
+        self.loop = loop
+
+    async def read_only(self, func):
+        try:
+            return await func(self.conn)
+        except Exception as e:
+            translated = translate_error(e)
+            if translated is e:
+                raise
+            raise translated from e
+
+
+@pytest.fixture
+def event_loop_thread():
+    """Event loop running in a background thread (like the app loop)"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+    loop.close()
+
+
+@pytest.fixture
+def async_db(monkeypatch, event_loop_thread):
+    """Route SQLQueryTool to a fake asyncpg database; returns a function that sets the rows"""
+
+    def install(rows, plan=None):
+        database = FakeAsyncDatabase(FakeAsyncConnection(rows, plan), event_loop_thread)
+        monkeypatch.setattr(settings, "db_async_enabled", True)
+        monkeypatch.setattr(sql_query_tool, "get_async_database", lambda: database)
+        monkeypatch.setattr(sql_query_tool, "get_query_cache", lambda: QueryResultCache())
+        return database.conn
+
+    return install
+
+
+class TestTranslateError:
+    """Tests for mapping asyncpg errors to psycopg2 classes"""
+
+    def test_statement_timeout_maps_to_query_canceled(self):
+        """Test that SQLSTATE 57014 becomes psycopg2's QueryCanceled"""
+        error = translate_error(asyncpg.exceptions.QueryCanceledError("canceling statement"))
+        assert isinstance(error, psycopg2.errors.QueryCanceled)
+        assert "canceling statement" in str(error)
+
+    def test_lock_timeout_maps_to_lock_not_available(self):
+        """Test that SQLSTATE 55P03 becomes psycopg2's LockNotAvailable"""
+        error = translate_error(asyncpg.exceptions.LockNotAvailableError("could not obtain lock"))
+        assert isinstance(error, psycopg2.errors.LockNotAvailable)
+
+    def test_connection_errors_map_to_database_connection_exception(self):
+        """Test that network failures become DatabaseConnectionException"""
+        error = translate_error(ConnectionRefusedError("refused"))
+        assert isinstance(error, DatabaseConnectionException)
+
+    def test_other_errors_returned_unchanged(self):
+        """Test that non-database errors are not translated"""
+        original = KeyError("x")
+        assert translate_error(original) is original
+
+
+class TestRunSync:
+    """Tests for running coroutines on the pool loop from worker threads"""
+
+    def test_returns_coroutine_result(self, event_loop_thread):
+        """Test that the calling thread gets the coroutine result"""
+        database = FakeAsyncDatabase(FakeAsyncConnection([]), event_loop_thread)
+
+        async def answer():
+            return 42
+
+        assert database.run_sync(answer()) == 42
+
+    def test_cancel_scope_cancels_coroutine(self, event_loop_thread):
+        """Test that cancelling the scope cancels the running coroutine"""
+        database = FakeAsyncDatabase(FakeAsyncConnection([]), event_loop_thread)
+        scope = QueryCancelScope()
+        started = threading.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(30)
+
+        timer = threading.Timer(0.05, lambda: started.wait(5) and scope.cancel("client_disconnected"))
+        timer.start()
+        with pytest.raises(concurrent.futures.CancelledError):
+            database.run_sync(slow(), cancel_scope=scope)
+        timer.join()
+
+    def test_cancelled_scope_does_not_start(self, event_loop_thread):
+        """Test that an already cancelled scope does not run the coroutine"""
+        database = FakeAsyncDatabase(FakeAsyncConnection([]), event_loop_thread)
+        scope = QueryCancelScope()
+        scope.cancel()
+        ran = []
+
+        async def record():
+            ran.append(True)
+
+        with pytest.raises(concurrent.futures.CancelledError):
+            database.run_sync(record(), cancel_scope=scope)
+        assert ran == []
+
+
+class TestSQLQueryToolAsync:
+    """Tests for SQLQueryTool on the asyncpg path"""
+
+    def test_rows_returned(self, async_db):
+        """Test that results come from the async database"""
+        conn = async_db([{"id": i} for i in range(3)])
+        result = SQLQueryTool().execute("SELECT id FROM notas_fiscais")
+
+        assert result["success"] is True
+        assert result["results"] == [{"id": 0}, {"id": 1}, {"id": 2}]
+        assert any(sql.startswith("EXPLAIN") for sql in conn.executed)
+
+    def test_row_cap(self, async_db, monkeypatch):
+        """Test that reading stops at sql_tool_max_rows"""
+        monkeypatch.setattr(settings, "sql_tool_max_rows", 5)
+        conn = async_db([{"id": i} for i in range(50)])
+        result = SQLQueryTool().execute("SELECT id FROM notas_fiscais")
+
+        assert result["row_count"] == 5
+        assert result["truncated_reason"] == "max_rows"
+        assert conn.fetched == 6
+
+    def test_cost_guard_estimates_rows_without_limit(self, async_db, monkeypatch):
+        """Test that the plan-row guard reads the query without the injected LIMIT"""
+        monkeypatch.setattr(settings, "sql_cost_guard_action", "limit")
+        plan = {"Node Type": "Seq Scan", "Total Cost": 10.0, "Plan Rows": settings.sql_max_plan_rows + 1}
+        async_db([{"id": 1}], plan=plan)
+        result = SQLQueryTool().execute("SELECT id FROM notas_fiscais")
+
+        assert result["success"] is True
+        assert result["executed_query"].endswith("LIMIT 100")
+        assert result["plan"]["estimated_rows"] == 100
+        assert result["plan"]["original_estimated_rows"] == settings.sql_max_plan_rows + 1
+
+        monkeypatch.setattr(settings, "sql_cost_guard_action", "reject")
+        result = SQLQueryTool().execute("SELECT id FROM notas_fiscais WHERE id > 0")
+        assert result["error_type"] == "cost_limit_exceeded"
+
+    def test_statement_timeout_reported(self, async_db):
+        """Test that asyncpg timeouts get the same error_type as psycopg2"""
+        conn = async_db([{"id": 1}])
+        conn.error = asyncpg.exceptions.QueryCanceledError("canceling statement due to statement timeout")
+        result = SQLQueryTool().execute("SELECT id FROM notas_fiscais")
+
+        assert result["success"] is False
+        assert result["error_type"] == "statement_timeout"
+
+    def test_cancelled_scope_reported(self, async_db):
+        """Test that a cancelled request scope yields the cancelled response"""
+        async_db([{"id": 1}])
+        scope = QueryCancelScope()
+
+        with cancel_scope(scope):
+            scope.cancel("client_disconnected")
+            result = SQLQueryTool().execute("SELECT id FROM notas_fiscais")
+
+        assert result["error_type"] == "cancelled"
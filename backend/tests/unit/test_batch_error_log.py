@@ -0,0 +1,110 @@
+"""Unit tests for bounded batch error tracking"""
+
+import json
+
+from batch.error_log import ErrorAggregator, JobErrorLog, fingerprint_error
+from batch.job_manager import BatchJob
+
+
+class TestFingerprintError:
+    """Tests for error message fingerprinting"""
+    
+    def test_numbers_and_quoted_values_share_fingerprint(self):
+        """Test that volatile values do not change the fingerprint"""
+        template_a, fp_a = fingerprint_error("Nota 123 com chave '4225...' duplicada")
+        template_b, fp_b = fingerprint_error("Nota 456 com chave '3519...' duplicada")
+        assert fp_a == fp_b
+        assert template_a == template_b
+        assert "<n>" in template_a
+    
+    def test_different_messages_differ(self):
+        """Test that distinct messages get distinct fingerprints"""
+        assert fingerprint_error("Timeout")[1] != fingerprint_error("XML malformado")[1]
+
+
+class TestErrorAggregator:
+    """Tests for ErrorAggregator"""
+    
+    def test_samples_are_capped_per_class(self):
+        """Test that only sample_size errors are kept per class"""
+        aggregator = ErrorAggregator(sample_size=3)
+        for i in range(1000):
+            aggregator.add(f"nota_{i}.xml", f"Timeout após {i}s", "Timeout")
+        aggregator.add("nota_x.xml", "XML malformado", "ParseError")
+        
+        assert aggregator.total == 1001
+        samples = aggregator.samples()
+        assert len(samples) == 4
+        assert sum(1 for s in samples if s["error_type"] == "Timeout") == 3
+    
+    def test_summary_counts_by_class_and_fingerprint(self):
+        """Test aggregated counts"""
+        aggregator = ErrorAggregator(sample_size=2)
+        for i in range(10):
+            aggregator.add(f"nota_{i}.xml", f"Nota {i} duplicada", "Exception")
+        aggregator.add("nota_y.xml", "Erro de conexão", "Exception")
+        
+        summary = aggregator.summary()
+        assert summary["total"] == 11
+        exception_class = summary["by_class"]["Exception"]
+        assert exception_class["count"] == 11
+        assert exception_class["fingerprints"][0]["count"] == 10
+        assert len(exception_class["fingerprints"]) == 2
+
+
+class TestJobErrorLog:
+    """Tests for JobErrorLog (NDJSON on disk)"""
+    
+    def test_full_detail_written_to_disk(self, tmp_path):
+        """Test that every error is appended to the NDJSON log"""
+        error_log = JobErrorLog("job-1", tmp_path, sample_size=1)
+        for i in range(25):
+            error_log.add(f"nota_{i}.xml", "Timeout", "Timeout")
+        error_log.close()
+        
+        lines = error_log.path.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 25
+        assert json.loads(lines[0])["file"] == "nota_0.xml"
+        assert len(error_log.samples()) == 1
+    
+    def test_iter_entries_pagination(self, tmp_path):
+        """Test offset/limit pagination over the log"""
+        error_log = JobErrorLog("job-2", tmp_path)
+        for i in range(10):
+            error_log.add(f"nota_{i}.xml", "Erro", "Exception")
+        
+        page = list(error_log.iter_entries(offset=4, limit=3))
+        assert [e["file"] for e in page] == ["nota_4.xml", "nota_5.xml", "nota_6.xml"]
+    
+    def test_delete_removes_file(self, tmp_path):
+        """Test that delete removes the on-disk log"""
+        error_log = JobErrorLog("job-3", tmp_path)
+        error_log.add("nota.xml", "Erro", "Exception")
+        error_log.delete()
+        assert not error_log.path.exists()
+        assert list(error_log.iter_entries()) == []
+
+
+class TestBatchJobErrors:
+    """Tests for BatchJob error tracking"""
+    
+    def test_job_errors_are_bounded(self):
+        """Test that BatchJob keeps only a sample and a summary"""
+        job = BatchJob(job_id="job-4", folder_path="/tmp", total_files=500)
+        for i in range(500):
+            job.add_error(f"nota_{i}.xml", "Timeout", "Timeout")
+        
+        job_dict = job.to_dict()
+        assert len(job_dict["errors"]) == job.error_log.sample_size
+        assert job_dict["error_summary"]["total"] == 500
+    
+    def test_attach_error_log(self, tmp_path):
+        """Test sharing an error log with a job"""
+        error_log = JobErrorLog("job-5", tmp_path)
+        error_log.add("nota.xml", "Erro", "Exception")
+        
+        job = BatchJob(job_id="job-5", folder_path="/tmp")
+        job.attach_error_log(error_log)
+        
+        assert job.to_dict()["error_summary"]["total"] == 1
+        error_log.delete()
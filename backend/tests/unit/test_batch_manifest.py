@@ -0,0 +1,48 @@
+"""Unit tests for the batch result manifest"""
+
+import json
+
+from batch.manifest import JobManifest, MANIFEST_COLUMNS
+
+
+class TestJobManifest:
+    """Tests for JobManifest"""
+    
+    def test_record_appends_ndjson(self, tmp_path):
+        """Test that each record is appended as one NDJSON line"""
+        manifest = JobManifest("job-1", tmp_path)
+        manifest.record("a.xml", "imported", 12.345, chave_acesso="4225", nota_fiscal_id=7)
+        manifest.record("b.xml", "failed", 3.0, error_type="ParseError")
+        manifest.close()
+        
+        lines = list(manifest.iter_ndjson())
+        assert len(lines) == 2
+        first = json.loads(lines[0])
+        assert first["nota_fiscal_id"] == 7
+        assert first["duration_ms"] == 12.35
+        assert json.loads(lines[1])["error_type"] == "ParseError"
+        assert manifest.count == 2
+    
+    def test_iter_csv(self, tmp_path):
+        """Test CSV export with header and one row per file"""
+        manifest = JobManifest("job-2", tmp_path)
+        manifest.record("a.xml", "imported", 1.0, chave_acesso="4225", nota_fiscal_id=1)
+        manifest.record("b.xml", "failed", 2.0, error_type="Timeout")
+        
+        rows = "".join(manifest.iter_csv()).splitlines()
+        assert rows[0] == ",".join(MANIFEST_COLUMNS)
+        assert rows[1].startswith("a.xml,4225,1,imported,1.0,")
+        assert len(rows) == 3
+    
+    def test_empty_manifest(self, tmp_path):
+        """Test exporting a job that has no results yet"""
+        manifest = JobManifest("job-3", tmp_path)
+        assert list(manifest.iter_ndjson()) == []
+        assert "".join(manifest.iter_csv()).strip() == ",".join(MANIFEST_COLUMNS)
+    
+    def test_delete_removes_file(self, tmp_path):
+        """Test that delete removes the on-disk manifest"""
+        manifest = JobManifest("job-4", tmp_path)
+        manifest.record("a.xml", "imported", 1.0)
+        manifest.delete()
+        assert not manifest.path.exists()
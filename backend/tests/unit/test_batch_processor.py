@@ -0,0 +1,68 @@
+"""Unit tests for BatchProcessor"""
+
+import asyncio
+import json
+
+import pytest
+
+from batch.processor import BatchProcessor
+from config import settings
+from database.query_cache import get_data_version
+from db import SupabaseNFeImporter
+from tests.unit.test_db_importer import CHAVE, NFE_XML, FakeSupabase
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    """Processor writing its logs under tmp_path, with a fake Supabase"""
+    monkeypatch.setattr(settings, "batch_error_log_dir", str(tmp_path / "errors"))
+    monkeypatch.setattr(settings, "batch_manifest_dir", str(tmp_path / "manifests"))
+    processor = BatchProcessor(max_concurrent=2)
+    processor.importer.supabase_request = FakeSupabase()
+    return processor
+
+
+class TestBatchProcessor:
+    """Tests for processing a folder of XML files"""
+    
+    def test_manifest_rows_written(self, processor, tmp_path, monkeypatch):
+        """Test that each processed file gets a manifest row, parsing each XML once"""
+        folder = tmp_path / "xml"
+        folder.mkdir()
+        (folder / "nota.xml").write_text(NFE_XML, encoding="utf-8")
+        (folder / "quebrada.xml").write_text("<nfeProc>", encoding="utf-8")
+        
+        parses = []
+        parse_xml = SupabaseNFeImporter.parse_xml
+        monkeypatch.setattr(
+            processor.importer, "parse_xml",
+            lambda path: parses.append(path) or parse_xml(processor.importer, path)
+        )
+        
+        job = asyncio.run(processor.process_folder(str(folder), job_id="job-1"))
+        rows = {
+            row["file"]: row
+            for row in map(json.loads, processor.get_manifest("job-1").iter_ndjson())
+        }
+        
+        assert (job["successful"], job["failed"]) == (1, 1)
+        assert len(parses) == 2
+        assert rows["nota.xml"]["status"] == "imported"
+        assert rows["nota.xml"]["chave_acesso"] == CHAVE
+        assert isinstance(rows["nota.xml"]["nota_fiscal_id"], int)
+        assert rows["quebrada.xml"]["status"] == "failed"
+        assert rows["quebrada.xml"]["chave_acesso"] is None
+    
+    def test_failed_import_bumps_data_version(self, processor, tmp_path):
+        """Test that cached SQL results are invalidated when an import fails after writing"""
+        folder = tmp_path / "xml"
+        folder.mkdir()
+        (folder / "nota.xml").write_text(NFE_XML, encoding="utf-8")
+        (folder / "quebrada.xml").write_text("<nfeProc>", encoding="utf-8")
+        processor.importer.supabase_request = FakeSupabase(fail_endpoint="nf_itens")
+        version = get_data_version()
+        
+        job = asyncio.run(processor.process_folder(str(folder), job_id="job-2"))
+        
+        assert (job["successful"], job["failed"]) == (0, 2)
+        assert get_data_version() == version + 1
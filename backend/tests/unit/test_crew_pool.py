@@ -0,0 +1,101 @@
+"""Unit tests for the pool of prebuilt crews"""
+
+import threading
+
+import pytest
+
+from agents.crew import NFeCrew
+from agents.crew_pool import CrewPool
+from utils.exceptions import AgentException
+
+
+class FakeCrew:
+    created = 0
+
+    def __init__(self):
+        FakeCrew.created += 1
+        self.builds = 0
+        self.messages = []
+
+    def build_all(self):
+        self.builds += 1
+
+    def process_message(self, message, chat_history=None, session_id=None):
+        if message == "falha":
+            raise RuntimeError("kickoff failed")
+        self.messages.append(message)
+        return f"resposta: {message}"
+
+
+@pytest.fixture(autouse=True)
+def reset_counter():
+    FakeCrew.created = 0
+
+
+class TestCrewPool:
+    """Tests for lending prebuilt crews to requests"""
+
+    def test_crews_built_once(self):
+        """Test that every crew is built at startup and reused afterwards"""
+        pool = CrewPool(size=2, factory=FakeCrew)
+        for i in range(5):
+            assert pool.process_message(f"pergunta {i}") == f"resposta: pergunta {i}"
+
+        assert FakeCrew.created == 2
+        assert pool.metrics()["requests"] == 5
+
+    def test_concurrent_requests_get_different_crews(self):
+        """Test that a crew is never lent to two requests at once"""
+        pool = CrewPool(size=2, factory=FakeCrew)
+        with pool.crew() as first, pool.crew() as second:
+            assert first is not second
+            assert pool.metrics()["available"] == 0
+
+        assert pool.metrics()["available"] == 2
+
+    def test_waits_then_times_out(self):
+        """Test that requests beyond the pool size fail after the timeout"""
+        pool = CrewPool(size=1, timeout=0.05, factory=FakeCrew)
+        with pool.crew():
+            with pytest.raises(AgentException) as exc:
+                pool.process_message("pergunta")
+
+        assert exc.value.details["reason"] == "crew_pool_timeout"
+        assert pool.metrics()["timeouts"] == 1
+
+    def test_waiting_request_gets_returned_crew(self):
+        """Test that a waiting request proceeds once a crew is returned"""
+        pool = CrewPool(size=1, timeout=5, factory=FakeCrew)
+        results = []
+
+        with pool.crew():
+            waiter = threading.Thread(target=lambda: results.append(pool.process_message("depois")))
+            waiter.start()
+            waiter.join(0.05)
+            assert results == []
+
+        waiter.join(5)
+        assert results == ["resposta: depois"]
+        assert pool.metrics()["waits"] == 1
+
+    def test_failed_crew_replaced(self):
+        """Test that a crew whose kickoff raised is not reused"""
+        pool = CrewPool(size=1, factory=FakeCrew)
+        with pytest.raises(RuntimeError):
+            pool.process_message("falha")
+
+        assert FakeCrew.created == 2
+        assert pool.metrics()["rebuilds"] == 1
+        assert pool.process_message("pergunta") == "resposta: pergunta"
+
+
+class TestNFeCrewBuild:
+    """Tests for building the crew graph once per NFeCrew"""
+
+    def test_build_returns_same_crew(self):
+        """Test that agents and tasks are not recreated per message"""
+        crew = NFeCrew()
+        built = crew.build()
+
+        assert crew.build() is built
+        assert built.tasks[0].agent is built.agents[0]
@@ -0,0 +1,170 @@
+"""Unit tests for the PostgreSQL connection pool"""
+
+import threading
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+from database.pool import ConnectionPool
+from utils.exceptions import DatabaseConnectionException
+
+
+class FakeInfo:
+    def __init__(self):
+        self.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, query):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection")
+
+
+class FakeConnection:
+    """Minimal stand-in for a psycopg2 connection"""
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.info = FakeInfo()
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**kwargs):
+    pool = ConnectionPool(dsn="postgresql://test", **kwargs)
+    pool._connect_calls = 0
+
+    def connect():
+        pool._connect_calls += 1
+        pool._stats["connections_created"] += 1
+        return FakeConnection()
+
+    pool._connect = connect
+    return pool
+
+
+class TestConnectionPool:
+    """Tests for ConnectionPool"""
+
+    def test_connection_is_reused(self):
+        """Test that a returned connection is handed out again"""
+        pool = make_pool(pool_size=2, max_overflow=0)
+
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+
+        assert first is second
+        assert pool._connect_calls == 1
+        assert pool.metrics()["checkouts"] == 2
+
+    def test_connection_returned_on_error(self):
+        """Test that errors inside the block do not leak the connection"""
+        pool = make_pool(pool_size=1, max_overflow=0)
+
+        with pytest.raises(psycopg2.ProgrammingError):
+            with pool.connection():
+                raise psycopg2.ProgrammingError("syntax error")
+
+        metrics = pool.metrics()
+        assert metrics["in_use"] == 0
+        assert metrics["idle"] == 1
+
+    def test_operational_error_discards_connection(self):
+        """Test that connection-level errors drop the connection"""
+        pool = make_pool(pool_size=1, max_overflow=0)
+
+        with pytest.raises(psycopg2.OperationalError):
+            with pool.connection():
+                raise psycopg2.OperationalError("connection reset")
+
+        assert pool.metrics()["idle"] == 0
+        assert pool.metrics()["connections_discarded"] == 1
+
+    def test_overflow_connections_closed_on_release(self):
+        """Test that connections above pool_size are not kept idle"""
+        pool = make_pool(pool_size=1, max_overflow=1)
+
+        first = pool.acquire()
+        second = pool.acquire()
+        pool.release(first)
+        pool.release(second)
+
+        assert pool.metrics()["idle"] == 1
+        assert second.closed
+
+    def test_timeout_when_exhausted(self):
+        """Test that waiting for a busy pool times out with a typed error"""
+        pool = make_pool(pool_size=1, max_overflow=0)
+        pool.acquire()
+
+        with pytest.raises(DatabaseConnectionException) as exc_info:
+            pool.acquire(timeout=0.05)
+
+        assert exc_info.value.details["reason"] == "pool_timeout"
+        assert pool.metrics()["timeouts"] == 1
+
+    def test_waiter_gets_released_connection(self):
+        """Test that a waiting caller receives a connection when one is released"""
+        pool = make_pool(pool_size=1, max_overflow=0)
+        conn = pool.acquire()
+        received = []
+
+        waiter = threading.Thread(target=lambda: received.append(pool.acquire(timeout=2)))
+        waiter.start()
+        pool.release(conn)
+        waiter.join(timeout=2)
+
+        assert received == [conn]
+        assert pool.metrics()["waits"] == 1
+
+    def test_broken_idle_connection_replaced(self):
+        """Test that stale connections failing the ping are replaced"""
+        pool = make_pool(pool_size=1, max_overflow=0, health_check_interval=0)
+
+        with pool.connection() as conn:
+            pass
+        conn.broken = True
+
+        with pool.connection() as replacement:
+            pass
+
+        assert replacement is not conn
+        assert conn.closed
+        assert pool.metrics()["health_check_failures"] == 1
+
+    def test_warm_up_opens_idle_connections(self):
+        """Test that warm-up opens connections up to pool_size"""
+        pool = make_pool(pool_size=3, max_overflow=5)
+
+        assert pool.warm_up(2) == 2
+        assert pool.warm_up(10) == 3
+        assert pool._connect_calls == 3
+
+    def test_closed_pool_rejects_checkout(self):
+        """Test that a closed pool refuses connections"""
+        pool = make_pool(pool_size=1)
+        pool.warm_up()
+        pool.close()
+
+        with pytest.raises(DatabaseConnectionException):
+            pool.acquire()
@@ -0,0 +1,194 @@
+"""Unit tests for SupabaseNFeImporter import modes"""
+
+import pytest
+
+from db import SupabaseNFeImporter, DuplicateRecordError
+
+
+NFE_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe">
+  <NFe>
+    <infNFe Id="NFe42250802314041001583650100000616501312602792">
+      <ide><cUF>42</cUF><nNF>61650</nNF><dhEmi>2025-08-01T10:00:00-03:00</dhEmi></ide>
+      <emit><CNPJ>02314041001583</CNPJ><xNome>Emitente</xNome><enderEmit><UF>SC</UF></enderEmit></emit>
+      <dest><CPF>12345678901</CPF><xNome>Destinatario</xNome><enderDest><UF>SC</UF></enderDest></dest>
+      <det nItem="1">
+        <prod><cProd>1</cProd><xProd>Produto</xProd><qCom>1</qCom><vProd>10.00</vProd></prod>
+        <imposto><ICMS><ICMS00><orig>0</orig><CST>00</CST><vICMS>1.70</vICMS></ICMS00></ICMS></imposto>
+      </det>
+      <total><ICMSTot><vNF>10.00</vNF></ICMSTot></total>
+      <pag><detPag><tPag>01</tPag><vPag>10.00</vPag></detPag></pag>
+    </infNFe>
+  </NFe>
+</nfeProc>
+"""
+
+CHAVE = "42250802314041001583650100000616501312602792"
+
+
+class FakeSupabase:
+    """Records requests and answers like PostgREST"""
+    
+    def __init__(self, existing_nota_id=None, fail_endpoint=None):
+        self.calls = []
+        self.existing_nota_id = existing_nota_id
+        self.fail_endpoint = fail_endpoint
+        self.next_id = 100
+        self.payloads = {}
+    
+    def __call__(self, method, endpoint, data=None, params=None, headers=None):
+        self.calls.append((method, endpoint, params, headers))
+        self.payloads.setdefault(endpoint, []).append(data)
+        
+        if method == "POST" and endpoint == self.fail_endpoint:
+            raise Exception(f"Erro ao inserir em {endpoint}")
+        if endpoint == "rpc/reservar_ids":
+            reserved = {}
+            for table, quantity in zip(data["p_tabelas"], data["p_quantidades"]):
+                reserved[table] = list(range(self.next_id + 1, self.next_id + 1 + quantity))
+                self.next_id += quantity
+            return reserved
+        if (headers or {}).get("Prefer") == "return=minimal":
+            return None
+        if method == "GET" and endpoint == "notas_fiscais":
+            return [{"id": self.existing_nota_id}] if self.existing_nota_id else []
+        if method == "GET":
+            return []
+        if method == "DELETE":
+            return None
+        if endpoint == "notas_fiscais" and self.existing_nota_id:
+            prefer = (headers or {}).get("Prefer", "")
+            if "ignore-duplicates" in prefer:
+                return []
+            if "merge-duplicates" in prefer:
+                return [{"id": self.existing_nota_id}]
+            raise DuplicateRecordError("Nota fiscal com esta chave de acesso já foi importada")
+        
+        self.next_id += 1
+        return [{"id": self.next_id}]
+
+
+@pytest.fixture
+def xml_path(tmp_path):
+    path = tmp_path / "nota.xml"
+    path.write_text(NFE_XML, encoding="utf-8")
+    return str(path)
+
+
+def make_importer(fake, mode="insert", allocate_ids=False):
+    importer = SupabaseNFeImporter(mode=mode, allocate_ids=allocate_ids)
+    importer.supabase_request = fake
+    return importer
+
+
+class TestImportModes:
+    """Tests for insert, skip and replace modes"""
+    
+    def test_invalid_mode(self):
+        """Test that unknown modes are rejected"""
+        with pytest.raises(ValueError):
+            SupabaseNFeImporter(mode="upsert")
+    
+    def test_insert_duplicate_raises_typed_error(self, xml_path):
+        """Test that duplicates surface as DuplicateRecordError"""
+        fake = FakeSupabase(existing_nota_id=7)
+        with pytest.raises(DuplicateRecordError):
+            make_importer(fake).import_nfe(xml_path)
+    
+    def test_skip_existing_is_single_request(self, xml_path):
+        """Test that skip mode returns the existing id with one request"""
+        fake = FakeSupabase(existing_nota_id=7)
+        nf_id = make_importer(fake, "skip").import_nfe(xml_path)
+        
+        assert nf_id == 7
+        assert fake.calls == [
+            ("GET", "notas_fiscais", {"chave_acesso": f"eq.{CHAVE}", "select": "id"}, None)
+        ]
+    
+    def test_skip_new_note_uses_on_conflict(self, xml_path):
+        """Test that skip mode inserts new notes with on_conflict"""
+        fake = FakeSupabase()
+        make_importer(fake, "skip").import_nfe(xml_path)
+        
+        nota_posts = [c for c in fake.calls if c[0] == "POST" and c[1] == "notas_fiscais"]
+        assert nota_posts[0][2] == {"on_conflict": "chave_acesso"}
+        assert "resolution=ignore-duplicates" in nota_posts[0][3]["Prefer"]
+    
+    def test_replace_recreates_children(self, xml_path):
+        """Test that replace mode merges the note and deletes its children"""
+        fake = FakeSupabase(existing_nota_id=7)
+        nf_id = make_importer(fake, "replace").import_nfe(xml_path)
+        
+        assert nf_id == 7
+        deleted = [c[1] for c in fake.calls if c[0] == "DELETE"]
+        assert deleted == ["nf_itens", "nf_transporte", "nf_pagamentos", "nf_referencias"]
+        assert any(c[0] == "POST" and c[1] == "nf_itens" for c in fake.calls)
+    
+    @pytest.mark.parametrize("mode, allocate_ids", [("replace", False), ("skip", True)])
+    def test_failed_children_remove_the_note(self, xml_path, mode, allocate_ids):
+        """Test that a note whose children failed is removed so that it is imported again"""
+        fake = FakeSupabase(existing_nota_id=7 if mode == "replace" else None, fail_endpoint="nf_itens")
+        
+        with pytest.raises(Exception, match="nf_itens"):
+            make_importer(fake, mode, allocate_ids).import_nfe(xml_path)
+        
+        deleted_notes = [c[2] for c in fake.calls if c[:2] == ("DELETE", "notas_fiscais")]
+        assert len(deleted_notes) == 1
+        if mode == "replace":
+            assert deleted_notes == [{"id": "eq.7"}]
+    
+    def test_import_reuses_parse(self, xml_path, monkeypatch):
+        """Test that a caller's parse gives the access key and is not repeated by import_nfe"""
+        importer = make_importer(FakeSupabase())
+        parsed = importer.parse_xml(xml_path)
+        monkeypatch.setattr(importer, "parse_xml", lambda path: pytest.fail("XML parsed twice"))
+
+        assert importer.get_chave_acesso(parsed) == CHAVE
+        assert isinstance(importer.import_nfe(xml_path, parsed=parsed), int)
+
+
+class TestAllocateIds:
+    """Tests for client-side id allocation with bulk child inserts"""
+    
+    def test_children_written_in_bulk_with_reserved_ids(self, xml_path):
+        """Test that children use reserved ids and one request per table"""
+        fake = FakeSupabase()
+        nf_id = make_importer(fake, allocate_ids=True).import_nfe(xml_path)
+        
+        reserve = fake.payloads["rpc/reservar_ids"]
+        assert reserve == [{"p_tabelas": ["nf_itens"], "p_quantidades": [1]}]
+        
+        itens = fake.payloads["nf_itens"]
+        assert len(itens) == 1 and isinstance(itens[0], list)
+        item = itens[0][0]
+        assert item["nota_fiscal_id"] == nf_id
+        
+        icms = fake.payloads["nf_itens_icms"][0]
+        assert icms[0]["nf_item_id"] == item["id"]
+        assert icms[0]["valor_icms"] == "1.70"
+        
+        assert fake.payloads["nf_pagamentos"] == [[{
+            "nota_fiscal_id": nf_id,
+            "indicador_pagamento": None,
+            "forma_pagamento": "01",
+            "valor_pagamento": "10.00"
+        }]]
+        
+        child_posts = [c for c in fake.calls if c[1].startswith("nf_")]
+        assert all(c[3] == {"Prefer": "return=minimal"} for c in child_posts)
+    
+    def test_request_count_does_not_grow_with_items(self, tmp_path):
+        """Test that a note with many items uses a fixed number of requests"""
+        det = NFE_XML[NFE_XML.index("<det "):NFE_XML.index("</det>") + len("</det>")]
+        many = "".join(det.replace('nItem="1"', f'nItem="{n}"') for n in range(1, 21))
+        path = tmp_path / "nota_20_itens.xml"
+        path.write_text(NFE_XML.replace(det, many), encoding="utf-8")
+        
+        fake = FakeSupabase()
+        make_importer(fake, allocate_ids=True).import_nfe(str(path))
+        
+        assert len(fake.payloads["nf_itens"][0]) == 20
+        item_ids = {row["id"] for row in fake.payloads["nf_itens"][0]}
+        assert {row["nf_item_id"] for row in fake.payloads["nf_itens_icms"][0]} == item_ids
+        # 2 empresas (GET+POST) + reserva + nota + itens + pagamentos + icms
+        assert len(fake.calls) == 9
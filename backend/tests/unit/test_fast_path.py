@@ -0,0 +1,185 @@
+"""Unit tests for the single-call text-to-SQL fast path"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from agents.crew import NFeCrew
+from agents.fast_path import FastPathError, FastSQLPipeline, extract_sql, format_answer, format_value
+from agents.router import INTENT_DATA, INTENT_FAST, MODE_CREW, MODE_FAST, Route, is_simple_aggregate, route_message
+from agents.sql_plan_cache import get_sql_plan_cache
+from config import settings
+from tests.conftest import FakeLLM, FakeSQLTool
+
+
+def ok(results, truncated=False):
+    return {"success": True, "results": results, "row_count": len(results), "truncated": truncated}
+
+
+@pytest.fixture(autouse=True)
+def empty_plan_cache(static_schema, monkeypatch):
+    """Curated schema, every table in the prompt and no stored SQL plans"""
+    monkeypatch.setattr(settings, "schema_selection_enabled", False)
+    get_sql_plan_cache().clear()
+
+
+class TestExtractSQL:
+    """Tests for reading the SQL out of the LLM reply"""
+
+    def test_plain_and_fenced(self):
+        """Test that bare SQL and ```sql blocks are both accepted"""
+        assert extract_sql("SELECT 1") == "SELECT 1"
+        assert extract_sql("Aqui está:\n```sql\nSELECT COUNT(*) FROM notas_fiscais\n```") == \
+            "SELECT COUNT(*) FROM notas_fiscais"
+
+    @pytest.mark.parametrize("reply", ["NAO_SEI", "", "Não consigo responder", "DELETE FROM notas_fiscais"])
+    def test_no_sql(self, reply):
+        """Test that refusals and non-SELECT replies send the message to the crew"""
+        with pytest.raises(FastPathError) as exc:
+            extract_sql(reply)
+        assert exc.value.reason == "no_sql"
+
+
+class TestFormatAnswer:
+    """Tests for formatting results without an LLM"""
+
+    def test_values(self):
+        """Test money, counts and dates in Brazilian format"""
+        assert format_value("total_vendas", Decimal("1234567.891")) == "R$ 1.234.567,89"
+        assert format_value("quantidade_notas", 1500) == "1.500"
+        assert format_value("data_emissao", date(2025, 1, 31)) == "31/01/2025"
+        assert format_value("nome", None) == "-"
+
+    def test_single_value_is_a_sentence(self):
+        """Test that one aggregate becomes one line"""
+        assert format_answer([{"total_vendas": 10.5}]) == "Total vendas: **R$ 10,50**"
+
+    def test_rows_become_a_table(self):
+        """Test that rankings become a markdown table, cut at MAX_ANSWER_ROWS"""
+        rows = [{"produto": f"P{i}", "quantidade": i} for i in range(25)]
+        answer = format_answer(rows)
+
+        assert answer.startswith("| Produto | Quantidade |")
+        assert "| P19 | 19 |" in answer and "P20" not in answer
+        assert answer.endswith("Mostrando 20 de 25 linhas.")
+
+    def test_empty(self):
+        """Test the answer when the query returns nothing"""
+        assert "Não encontrei" in format_answer([])
+
+
+class TestFastSQLPipeline:
+    """Tests for the question → SQL → answer pipeline"""
+
+    def test_run(self):
+        """Test one LLM call, the SQL through the tool and the timings of each step"""
+        llm = FakeLLM("```sql\nSELECT COUNT(*) AS quantidade_notas FROM notas_fiscais\n```")
+        tool = FakeSQLTool(ok([{"quantidade_notas": 42}]))
+
+        answer = FastSQLPipeline(llm=llm, sql_tool=tool).run("Quantas notas emitimos?")
+
+        assert answer["response"] == "Quantidade notas: **42**"
+        assert tool.queries == ["SELECT COUNT(*) AS quantidade_notas FROM notas_fiscais"]
+        assert "notas_fiscais" in llm.messages[0]["content"]
+        assert llm.messages[1]["content"] == "Quantas notas emitimos?"
+        assert list(answer["step_timings_ms"]) == ["generate_sql", "execute_sql", "format_answer"]
+
+    def test_history_in_prompt(self):
+        """Test that follow-ups get the previous turns, so "ela" resolves to the company"""
+        llm = FakeLLM("SELECT COUNT(*) AS quantidade_notas FROM notas_fiscais")
+        history = [
+            {"role": "user", "content": "qual empresa mais vendeu?"},
+            {"role": "assistant", "content": "A Acme Ltda."}
+        ]
+
+        FastSQLPipeline(llm=llm, sql_tool=FakeSQLTool(ok([{"quantidade_notas": 3}]))).run(
+            "quantas notas ela emitiu?", history
+        )
+
+        assert [m["content"] for m in llm.messages[1:]] == [
+            "qual empresa mais vendeu?", "A Acme Ltda.", "quantas notas ela emitiu?"
+        ]
+
+    def test_query_failure_raises(self):
+        """Test that a rejected query is reported for the crew fallback"""
+        tool = FakeSQLTool({"success": False, "error": "Query inválida", "details": "coluna inexistente"})
+
+        with pytest.raises(FastPathError) as exc:
+            FastSQLPipeline(llm=FakeLLM("SELECT x FROM y"), sql_tool=tool).run("quanto vendemos?")
+        assert exc.value.details == "coluna inexistente"
+
+    def test_cancelled_query_does_not_fall_back(self):
+        """Test that an abandoned request ends without running the crew"""
+        tool = FakeSQLTool({"success": False, "error_type": "cancelled", "details": "A requisição foi encerrada"})
+
+        answer = FastSQLPipeline(llm=FakeLLM("SELECT 1"), sql_tool=tool).run("quanto vendemos?")
+        assert answer["row_count"] == 0
+
+
+class TestFastRouting:
+    """Tests for choosing the fast path"""
+
+    @pytest.mark.parametrize("message, simple", [
+        ("Quanto vendemos em janeiro?", True),
+        ("quais os 5 produtos mais vendidos?", True),
+        ("total de notas por emitente", True),
+        ("compare as vendas deste mês com o mês passado", False),
+        ("por que o faturamento caiu em março?", False),
+        ("liste as notas da empresa", False),
+    ])
+    def test_simple_aggregate(self, message, simple):
+        """Test that plain numbers and rankings are simple, analyses are not"""
+        assert is_simple_aggregate(message) is simple
+
+    def test_auto_mode(self, monkeypatch):
+        """Test that simple aggregates take the fast path unless it is disabled"""
+        assert route_message("Quanto vendemos em janeiro?").intent == INTENT_FAST
+        assert route_message("Total de ICMS do mês").intent != INTENT_FAST
+
+        monkeypatch.setattr(settings, "fast_path_enabled", False)
+        assert route_message("Quanto vendemos em janeiro?").intent == INTENT_DATA
+
+    def test_requested_mode(self):
+        """Test that mode=crew and mode=fast override the router"""
+        assert route_message("Quanto vendemos em janeiro?", mode=MODE_CREW).intent == INTENT_DATA
+        assert route_message("liste as notas da empresa", mode=MODE_FAST).intent == INTENT_FAST
+        assert route_message("olá", mode=MODE_FAST).intent != INTENT_FAST
+
+
+class TestCrewFastPath:
+    """Tests for the fast path inside NFeCrew.run"""
+
+    def test_answer_without_crew(self, monkeypatch):
+        """Test that the fast path answers with the SQL in the metadata and no kickoff"""
+        crew = NFeCrew()
+        crew._fast_pipeline = FastSQLPipeline(
+            llm=FakeLLM("SELECT 42 AS quantidade_notas"),
+            sql_tool=FakeSQLTool(ok([{"quantidade_notas": 42}]))
+        )
+        monkeypatch.setattr(crew, "build", lambda intent: pytest.fail("crew kickoff on the fast path"))
+
+        run = crew.run("Quantas notas emitimos?", route=Route(INTENT_FAST, "test"))
+        metadata = run.metadata()
+
+        assert run.agent_used == "fast_sql"
+        assert metadata["sql"] == "SELECT 42 AS quantidade_notas"
+        assert metadata["task_path"] == ["generate_sql", "execute_sql", "format_answer"]
+
+    def test_falls_back_to_crew(self, monkeypatch):
+        """Test that a fast path failure runs the data path of the crew"""
+        crew = NFeCrew()
+        crew._fast_pipeline = FastSQLPipeline(llm=FakeLLM("NAO_SEI"), sql_tool=FakeSQLTool(ok([])))
+        built = []
+
+        class Kickoff:
+            def kickoff(self, inputs):
+                return type("CrewOutput", (), {"raw": "resposta da crew"})()
+
+        monkeypatch.setattr(crew, "build", lambda intent: built.append(intent) or Kickoff())
+
+        run = crew.run("Quantas notas emitimos?", route=Route(INTENT_FAST, "test"))
+
+        assert run.response == "resposta da crew"
+        assert built == [INTENT_DATA]
+        assert run.route.reason == "fast_path_fallback:no_sql"
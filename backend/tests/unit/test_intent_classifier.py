@@ -0,0 +1,115 @@
+"""Unit tests for the local intent classifier"""
+
+import time
+
+import pytest
+
+from agents.intent_classifier import (
+    INTENT_CONVERSATION,
+    INTENT_DATA,
+    INTENT_FISCAL,
+    IntentClassifier,
+    load_examples
+)
+from agents.router import INTENT_FULL, route_message
+from config import settings
+
+
+HISTORY = [
+    {"role": "user", "content": "Qual empresa mais vendeu em outubro?"},
+    {"role": "assistant", "content": "A empresa Alfa Ltda, com R$ 120.000,00."}
+]
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return IntentClassifier()
+
+
+class TestIntentClassifier:
+    """Tests for classifying messages without an LLM"""
+
+    @pytest.mark.parametrize("message, intent", [
+        ("Olá, bom dia!", INTENT_CONVERSATION),
+        ("valeu!", INTENT_CONVERSATION),
+        ("o que é uma NF-e?", INTENT_CONVERSATION),
+        ("Quanto faturamos em novembro?", INTENT_DATA),
+        ("quais empresas emitiram mais notas?", INTENT_DATA),
+        ("número de notas canceladas em setembro", INTENT_DATA),
+        ("quanto de ICMS pagamos?", INTENT_FISCAL),
+        ("obrigado pela análise do ICMS", INTENT_CONVERSATION),
+        ("ok, valeu pela explicação da substituição tributária", INTENT_CONVERSATION),
+        ("oi, qual o total de ICMS de outubro?", INTENT_FISCAL),
+        ("ok, e em setembro?", INTENT_DATA),
+        ("valeu, e em 2024?", INTENT_DATA),
+        ("valeu pela ajuda", INTENT_CONVERSATION),
+        ("oi, tudo bem?", INTENT_CONVERSATION),
+    ])
+    def test_intent(self, classifier, message, intent):
+        """Test greetings, system questions, data and tax questions"""
+        result = classifier.classify(message)
+
+        assert result.intent == intent
+        assert result.confidence >= settings.intent_min_confidence
+
+    def test_follow_up_uses_history(self, classifier):
+        """Test that follow-ups are answered from the conversation only when there is one"""
+        assert classifier.classify("pode explicar melhor?", HISTORY).intent == INTENT_CONVERSATION
+        assert classifier.classify("pode explicar melhor?").intent == INTENT_DATA
+
+    @pytest.mark.parametrize("message", [
+        "qual é a empresa com maior faturamento?",
+        "quem é o maior fornecedor?",
+        "E qual foi o valor mesmo?",
+    ])
+    def test_data_question_with_history_is_not_chatter(self, classifier, message):
+        """Test that data questions near follow-up or system examples still run a query"""
+        assert classifier.classify(message, HISTORY).intent == INTENT_DATA
+
+    def test_greeting_rule_needs_whole_message(self, classifier):
+        """Test that a confirmation followed by a new question is not taken for a greeting"""
+        result = classifier.classify("ok, e em setembro?", HISTORY)
+
+        assert result.method == "knn"
+        assert result.intent == INTENT_DATA
+
+    def test_typos_and_accents(self, classifier):
+        """Test that messages close to an example match despite accents and typos"""
+        result = classifier.classify("quais os produtos mais vendidoss", HISTORY)
+
+        assert result.intent == INTENT_DATA
+        assert result.method == "knn"
+
+    def test_unrelated_message_has_no_confidence(self, classifier):
+        """Test that messages unlike every example get confidence 0"""
+        assert classifier.classify("xyzzy plugh").confidence == 0.0
+
+    def test_fast(self, classifier):
+        """Test that a classification takes about a millisecond"""
+        started = time.perf_counter()
+        for _ in range(100):
+            classifier.classify("quais clientes compraram mais em 2024?", HISTORY)
+
+        assert (time.perf_counter() - started) / 100 < 0.01
+
+    def test_every_example_label_known(self):
+        """Test that the examples file only uses labels mapped to a task path"""
+        assert {label for _, label in load_examples()} == {
+            "greeting", "thanks", "confirmation", "system_question", "follow_up", "data", "fiscal"
+        }
+
+
+class TestLowConfidence:
+    """Tests for the fallback to the LLM coordinator"""
+
+    def test_low_confidence_goes_to_coordinator(self):
+        """Test that unclear messages run the full path starting with the coordinator"""
+        route = route_message("xyzzy plugh")
+
+        assert route.intent == INTENT_FULL
+        assert route.reason.startswith("low_confidence")
+
+    def test_threshold_from_settings(self, monkeypatch):
+        """Test that INTENT_MIN_CONFIDENCE decides when to fall back"""
+        monkeypatch.setattr(settings, "intent_min_confidence", 1.01)
+        assert route_message("quais empresas emitiram mais notas?").intent == INTENT_FULL
@@ -0,0 +1,83 @@
+"""Unit tests for the token-efficient tool output encoding"""
+
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from agents.tools.output_format import encode_response, estimate_tokens, normalize, to_table
+
+
+def make_rows(count, text="Produto de teste"):
+    return [
+        {"id": i, "descricao": f"{text} {i}", "valor": Decimal("1234.5000"), "emissao": datetime(2024, 1, 15, 10, 30)}
+        for i in range(count)
+    ]
+
+
+class TestNormalize:
+    """Tests for value normalization"""
+
+    def test_numbers_and_dates(self):
+        """Test that Decimal, floats and datetimes become compact JSON values"""
+        value = normalize({"a": Decimal("10.00"), "b": Decimal("1.50"), "c": 0.1 + 0.2, "d": datetime(2024, 1, 2)})
+
+        assert value == {"a": 10, "b": 1.5, "c": 0.3, "d": "2024-01-02T00:00:00"}
+
+
+class TestToTable:
+    """Tests for the header + rows encoding"""
+
+    def test_columns_are_union_in_order(self):
+        """Test that records with different keys share one header"""
+        table = to_table([{"a": 1, "b": 2}, {"a": 3, "c": 4}])
+
+        assert table == {"columns": ["a", "b", "c"], "rows": [[1, 2, None], [3, None, 4]]}
+
+    def test_long_text_truncated(self):
+        """Test that text cells are cut at max_chars"""
+        table = to_table([{"t": "x" * 50}], max_chars=10)
+
+        assert table["rows"][0][0] == "x" * 9 + "…"
+
+
+class TestEncodeResponse:
+    """Tests for budget-driven encoding selection"""
+
+    def test_small_result_stays_records(self):
+        """Test that results within the budget keep one object per row"""
+        encoded = json.loads(encode_response({"success": True, "results": make_rows(2)}, token_budget=1000, output_format="auto"))
+
+        assert encoded["results"][0]["valor"] == 1234.5
+
+    def test_large_result_becomes_table(self):
+        """Test that results over the budget are encoded as a table"""
+        response = {"success": True, "results": make_rows(100)}
+
+        encoded = encode_response(response, token_budget=1500, output_format="auto")
+        legacy = encode_response(response, output_format="json")
+
+        assert json.loads(encoded)["results"]["columns"] == ["id", "descricao", "valor", "emissao"]
+        assert estimate_tokens(encoded) < estimate_tokens(legacy) / 2
+
+    def test_text_truncated_when_table_over_budget(self):
+        """Test that long text is truncated as a last resort"""
+        response = {"success": True, "results": make_rows(50, text="y" * 500)}
+
+        encoded = json.loads(encode_response(response, token_budget=2000, output_format="auto"))
+
+        assert encoded["text_truncated_at"] in (200, 80, 40)
+        assert len(encoded["results"]["rows"][0][1]) <= encoded["text_truncated_at"]
+
+    def test_keyed_records_become_table(self):
+        """Test that column maps such as schema definitions are tabulated"""
+        response = {"info": {"columns": {"id": {"type": "SERIAL"}, "numero_nf": {"type": "INTEGER"}}}}
+
+        encoded = json.loads(encode_response(response, output_format="table"))
+
+        assert encoded["info"]["columns"] == {"columns": ["name", "type"], "rows": [["id", "SERIAL"], ["numero_nf", "INTEGER"]]}
+
+    def test_json_format_is_previous_output(self):
+        """Test that output_format='json' keeps the indented legacy format"""
+        response = {"success": True, "results": [{"id": 1}]}
+
+        assert encode_response(response, output_format="json") == json.dumps(response, ensure_ascii=False, indent=2)
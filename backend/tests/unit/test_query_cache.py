@@ -0,0 +1,85 @@
+"""Unit tests for the agent SQL result cache"""
+
+from database import query_cache
+from database.query_cache import QueryResultCache, bump_data_version, get_data_version, normalize_sql
+
+
+class TestNormalizeSql:
+    """Tests for cache key normalization"""
+
+    def test_whitespace_and_case(self):
+        """Test that formatting differences map to the same key"""
+        assert normalize_sql("SELECT  id\n FROM Notas_Fiscais;") == normalize_sql("select id from notas_fiscais")
+
+    def test_literals_preserved(self):
+        """Test that string literals keep their case and spacing"""
+        key = normalize_sql("SELECT id FROM empresas WHERE razao_social = 'ACME  Ltda'")
+
+        assert "'ACME  Ltda'" in key
+        assert key != normalize_sql("SELECT id FROM empresas WHERE razao_social = 'acme ltda'")
+
+
+class TestQueryResultCache:
+    """Tests for QueryResultCache"""
+
+    def test_hit_returns_copy_with_metadata(self):
+        """Test that hits are marked and do not expose the stored dict"""
+        cache = QueryResultCache()
+        cache.put("q", {"results": [1]}, get_data_version())
+
+        hit = cache.get("q")
+        hit["query"] = "outra"
+
+        assert hit["cached"] is True
+        assert "query" not in cache.get("q")
+        assert cache.metrics()["hits"] == 2
+
+    def test_version_bump_invalidates(self):
+        """Test that entries from an older data version are not served"""
+        cache = QueryResultCache()
+        cache.put("q", {"results": [1]}, get_data_version())
+
+        bump_data_version()
+
+        assert cache.get("q") is None
+        assert cache.metrics()["stale"] == 1
+
+    def test_result_of_outdated_version_not_stored(self):
+        """Test that a query that raced with an import is not cached"""
+        cache = QueryResultCache()
+        version = get_data_version()
+        bump_data_version()
+
+        assert cache.put("q", {"results": [1]}, version) is False
+
+    def test_ttl_expiry(self, monkeypatch):
+        """Test that entries older than the TTL are dropped"""
+        now = [1000.0]
+        monkeypatch.setattr(query_cache.time, "monotonic", lambda: now[0])
+        cache = QueryResultCache(ttl_seconds=10)
+        cache.put("q", {"results": [1]}, get_data_version())
+
+        now[0] += 11
+
+        assert cache.get("q") is None
+
+    def test_lru_eviction_by_bytes(self):
+        """Test that the least recently used entries are evicted to fit the budget"""
+        cache = QueryResultCache(max_bytes=100)
+        version = get_data_version()
+        cache.put("a", {"r": "x" * 30}, version)
+        cache.put("b", {"r": "y" * 30}, version)
+        cache.get("a")
+        cache.put("c", {"r": "z" * 30}, version)
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.metrics()["evictions"] == 1
+        assert cache.metrics()["bytes"] <= 100
+
+    def test_oversized_entry_skipped(self):
+        """Test that a response larger than the whole budget is not cached"""
+        cache = QueryResultCache(max_bytes=10)
+
+        assert cache.put("q", {"r": "x" * 100}, get_data_version()) is False
+        assert cache.metrics()["too_large"] == 1
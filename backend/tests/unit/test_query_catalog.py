@@ -0,0 +1,243 @@
+"""Unit tests for the parameterized query catalog"""
+
+import asyncio
+import concurrent.futures
+from contextlib import contextmanager
+from datetime import date
+
+import psycopg2.errors
+import pytest
+
+from database import query_catalog
+from database.cancellation import QueryCancelScope, cancel_scope
+from database.query_catalog import CATALOG, CatalogQuery, QueryParam, get_catalog_query, placeholders, run_catalog_query
+from database.query_cache import QueryResultCache, bump_data_version
+from utils.exceptions import ValidationException
+
+
+class FakeInfo:
+    def __init__(self, pid):
+        self.backend_pid = pid
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((sql, params))
+        if sql.startswith("PREPARE"):
+            name = sql.split()[1]
+            if name in self.conn.prepared:
+                raise psycopg2.errors.DuplicatePreparedStatement(f"prepared statement \"{name}\" already exists")
+            self.conn.prepared.add(name)
+        elif sql.startswith("EXECUTE"):
+            name = sql.split()[1]
+            if name not in self.conn.prepared:
+                raise psycopg2.errors.InvalidSqlStatementName(f"prepared statement \"{name}\" does not exist")
+            self._rows = list(self.conn.rows)
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeConnection:
+    def __init__(self, rows, pid=100):
+        self.rows = rows
+        self.info = FakeInfo(pid)
+        self.prepared = set()
+        self.executed = []
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Install a fake pool and an empty cache; returns the connection"""
+    conn = FakeConnection([{"total_notas": 3}])
+
+    @contextmanager
+    def connection(timeout=None):
+        yield conn
+
+    pool = type("FakePool", (), {"connection": staticmethod(connection)})()
+    cache = QueryResultCache()
+    monkeypatch.setattr(query_catalog, "get_pool", lambda: pool)
+    monkeypatch.setattr(query_catalog, "get_query_cache", lambda: cache)
+    monkeypatch.setattr(query_catalog, "_prepared", {})
+    return conn
+
+
+def statements(conn, keyword):
+    return [sql for sql, _ in conn.executed if sql.startswith(keyword)]
+
+
+class TestCatalogDefinitions:
+    """Tests for the catalog query definitions"""
+
+    def test_every_placeholder_is_declared(self):
+        """Test that PREPARE text has no leftover :name placeholders"""
+        for query in CATALOG.values():
+            prepared = query.prepare_sql()
+            assert placeholders(prepared) == [], query.name
+            assert prepared.count("$") >= len(query.params), query.name
+
+    def test_casts_are_not_parameters(self):
+        """Test that ::numeric casts survive the placeholder rewrite"""
+        prepared = get_catalog_query("total_vendas_periodo").prepare_sql()
+
+        assert prepared.startswith("PREPARE catalog_total_vendas_periodo (date, date) AS")
+        assert "::numeric" in prepared
+        assert ">= $1" in prepared and "< $2" in prepared
+
+    def test_quoted_literals_are_not_parameters(self):
+        """Test that :name inside quoted literals ('hh24:mi') is left as is"""
+        query = CatalogQuery(
+            name="horas",
+            title="Horas",
+            description="Horário das notas",
+            sql="SELECT TO_CHAR(data_hora_emissao, 'hh24:mi') AS \"hora:minuto\" FROM notas_fiscais WHERE id = :id",
+            params=[QueryParam("id", "int", "Nota")]
+        )
+
+        assert query.positional_sql() == (
+            "SELECT TO_CHAR(data_hora_emissao, 'hh24:mi') AS \"hora:minuto\" FROM notas_fiscais WHERE id = $1"
+        )
+
+
+class TestBind:
+    """Tests for parameter validation and conversion"""
+
+    def test_types_and_defaults(self):
+        """Test that values are converted and defaults applied"""
+        bound = get_catalog_query("notas_por_empresa").bind({"empresa": " ACME "})
+
+        assert bound == {"empresa": "ACME", "limit": 20}
+
+    def test_date_conversion(self):
+        """Test that ISO strings become dates"""
+        bound = get_catalog_query("total_impostos").bind({"data_inicio": "2025-01-01", "data_fim": "2025-02-01T00:00:00"})
+
+        assert bound == {"data_inicio": date(2025, 1, 1), "data_fim": date(2025, 2, 1)}
+
+    @pytest.mark.parametrize("params, reason", [
+        ({}, "missing_parameter"),
+        ({"limit": 1000}, "invalid_parameter"),
+        ({"limit": "dez"}, "invalid_parameter"),
+        ({"limite": 5}, "unknown_parameter"),
+    ])
+    def test_invalid_params(self, params, reason):
+        """Test that bad parameters raise ValidationException with a reason"""
+        query = get_catalog_query("faturamento_mensal" if reason == "missing_parameter" else "top_produtos")
+
+        with pytest.raises(ValidationException) as exc_info:
+            query.bind(params)
+
+        assert exc_info.value.details["reason"] == reason
+
+
+class TestRunCatalogQuery:
+    """Tests for running catalog queries as prepared statements"""
+
+    def test_prepared_once_per_connection(self, fake_db, monkeypatch):
+        """Test that PREPARE runs once and later calls only EXECUTE"""
+        monkeypatch.setattr(query_catalog.settings, "sql_cache_enabled", False)
+
+        run_catalog_query("top_produtos", {"limit": 5})
+        result = run_catalog_query("top_produtos", {"limit": 3})
+
+        assert result["results"] == [{"total_notas": 3}]
+        assert len(statements(fake_db, "PREPARE")) == 1
+        assert [params for sql, params in fake_db.executed if sql.startswith("EXECUTE")] == [[5], [3]]
+
+    def test_lost_statement_is_prepared_again(self, fake_db, monkeypatch):
+        """Test recovery when the server no longer has the statement"""
+        monkeypatch.setattr(query_catalog.settings, "sql_cache_enabled", False)
+        run_catalog_query("notas_de_hoje")
+        fake_db.prepared.clear()
+
+        result = run_catalog_query("notas_de_hoje")
+
+        assert result["row_count"] == 1
+        assert len(statements(fake_db, "PREPARE")) == 2
+
+    def test_result_cached_until_import(self, fake_db):
+        """Test that repeated calls hit the cache until the data version changes"""
+        run_catalog_query("top_produtos")
+        cached = run_catalog_query("top_produtos", {"limit": 10})
+        bump_data_version()
+        fresh = run_catalog_query("top_produtos")
+
+        assert cached["cached"] is True
+        assert "cached" not in fresh
+        assert len(statements(fake_db, "EXECUTE")) == 2
+
+    def test_unknown_query(self, fake_db):
+        """Test that unknown names are rejected before touching the database"""
+        with pytest.raises(ValidationException):
+            run_catalog_query("nao_existe")
+
+        assert fake_db.executed == []
+
+    def test_connection_registered_with_cancel_scope(self, fake_db, monkeypatch):
+        """Test that the connection is cancellable while the query runs and released after"""
+        monkeypatch.setattr(query_catalog.settings, "sql_cache_enabled", False)
+        scope = QueryCancelScope()
+        registered = []
+        execute = FakeCursor.execute
+
+        def record(cursor, sql, params=None):
+            registered.append(fake_db in scope._connections)
+            execute(cursor, sql, params)
+
+        monkeypatch.setattr(FakeCursor, "execute", record)
+        with cancel_scope(scope):
+            run_catalog_query("notas_de_hoje")
+
+        assert registered and all(registered)
+        assert scope._connections == set()
+
+    def test_cancelled_scope_does_not_run(self, fake_db):
+        """Test that an abandoned request does not start catalog queries"""
+        scope = QueryCancelScope()
+        scope.cancel()
+
+        with cancel_scope(scope), pytest.raises(concurrent.futures.CancelledError):
+            run_catalog_query("notas_de_hoje")
+        assert fake_db.executed == []
+
+    def test_async_database_used_when_started(self, fake_db, monkeypatch):
+        """Test that the asyncpg pool runs the query through run_sync with the request scope"""
+        calls = []
+
+        class FakeAsyncDatabase:
+            async def fetch(self, sql, *args):
+                calls.append((sql, args))
+                return [{"total_notas": 7}]
+
+            def run_sync(self, coro, cancel_scope=None):
+                calls.append(cancel_scope)
+                return asyncio.run(coro)
+
+        monkeypatch.setattr(query_catalog.settings, "db_async_enabled", True)
+        monkeypatch.setattr(query_catalog, "get_async_database", lambda: FakeAsyncDatabase())
+        scope = QueryCancelScope()
+
+        with cancel_scope(scope):
+            result = run_catalog_query("top_produtos", {"limit": 5})
+
+        assert result["results"] == [{"total_notas": 7}]
+        assert calls[0] is scope
+        assert "$1" in calls[1][0] and calls[1][1] == (5,)
+        assert fake_db.executed == []
@@ -0,0 +1,117 @@
+"""Unit tests for intent routing of chat messages"""
+
+import pytest
+
+from agents.crew import NFeCrew
+from agents import router
+from agents.intent_classifier import Classification
+from agents.router import INTENT_CONVERSATION, INTENT_DATA, INTENT_FISCAL, INTENT_FULL, Route, route_message
+from config import settings
+
+
+class FakeKickoff:
+    """Crew stand-in that finishes each task of its path in turn"""
+
+    def __init__(self, nfe_crew, route):
+        self.nfe_crew = nfe_crew
+        self.route = route
+        self.inputs = None
+
+    def kickoff(self, inputs):
+        self.inputs = inputs
+        for _ in self.route.tasks:
+            self.nfe_crew._on_task_done(None)
+        return type("CrewOutput", (), {"raw": "resposta"})()
+
+
+@pytest.fixture(scope="module")
+def nfe_crew():
+    return NFeCrew()
+
+
+# Curated schema (no database) for the prompt schema summary
+pytestmark = pytest.mark.usefixtures("static_schema")
+
+
+class TestRouteMessage:
+    """Tests for choosing the task path of a message"""
+
+    @pytest.mark.parametrize("message, intent", [
+        ("Olá!", INTENT_CONVERSATION),
+        ("bom dia", INTENT_CONVERSATION),
+        ("Obrigado pela ajuda", INTENT_CONVERSATION),
+        ("O que você pode fazer?", INTENT_CONVERSATION),
+        ("Quanto vendemos em janeiro?", INTENT_DATA),
+        ("olá, quais os 5 produtos mais vendidos?", INTENT_DATA),
+        ("Total de ICMS do mês", INTENT_FISCAL),
+        ("qual a alíquota média de PIS?", INTENT_FISCAL),
+    ])
+    def test_intent(self, message, intent, monkeypatch):
+        """Test that greetings, data and tax questions get their own path"""
+        monkeypatch.setattr(settings, "fast_path_enabled", False)
+        assert route_message(message).intent == intent
+
+    def test_conversation_with_data_hint_goes_to_coordinator(self, monkeypatch):
+        """Test that a data question classified as chatter is not answered without a query"""
+        monkeypatch.setattr(
+            router, "classify_intent",
+            lambda message, chat_history=None: Classification("follow_up", INTENT_CONVERSATION, 0.9, "knn")
+        )
+
+        route = route_message("qual é a empresa com maior faturamento?", [{"role": "user", "content": "oi"}])
+
+        assert route.intent == INTENT_FULL
+        assert route.reason == "data_hint:follow_up"
+        assert route_message("pode explicar melhor?").intent == INTENT_CONVERSATION
+
+    def test_paths(self):
+        """Test the tasks run by each intent"""
+        assert Route(INTENT_CONVERSATION, "").tasks == ["direct_conversation_task"]
+        assert Route(INTENT_DATA, "").tasks == ["execute_sql_query_task", "format_response_task"]
+        assert Route(INTENT_FISCAL, "").tasks == ["execute_sql_query_task", "fiscal_analysis_task"]
+        assert len(Route(INTENT_FULL, "").tasks) == 5
+
+
+class TestRoutedCrew:
+    """Tests for running only the tasks of the chosen path"""
+
+    def test_path_crews_only_have_their_tasks(self, nfe_crew):
+        """Test that each path crew has just its tasks and agents"""
+        greeting = nfe_crew.build(INTENT_CONVERSATION)
+        data = nfe_crew.build(INTENT_DATA)
+
+        assert len(greeting.tasks) == 1 and len(greeting.agents) == 1
+        assert len(data.tasks) == 2
+        assert nfe_crew.build(INTENT_DATA) is data
+
+    def test_run_reports_path_and_timings(self, nfe_crew, monkeypatch):
+        """Test that the chosen path and per-task timings go into the metadata"""
+        fakes = {}
+        monkeypatch.setattr(
+            nfe_crew, "build",
+            lambda intent: fakes.setdefault(intent, FakeKickoff(nfe_crew, Route(intent, "")))
+        )
+
+        run = nfe_crew.run("Total de ICMS do mês")
+        metadata = run.metadata()
+
+        assert run.response == "resposta"
+        assert run.agent_used == "fiscal_specialist"
+        assert metadata["intent"] == INTENT_FISCAL
+        assert metadata["task_path"] == ["execute_sql_query", "fiscal_analysis"]
+        assert all(ms >= 0 for ms in metadata["step_timings_ms"].values())
+
+    def test_greeting_skips_schema(self, nfe_crew, monkeypatch):
+        """Test that conversation messages do not build the schema summary"""
+        fake = FakeKickoff(nfe_crew, Route(INTENT_CONVERSATION, ""))
+        monkeypatch.setattr(nfe_crew, "build", lambda intent: fake)
+
+        nfe_crew.run("olá")
+        assert fake.inputs["database_schema"] == ""
+
+    def test_routing_disabled_runs_every_task(self, nfe_crew, monkeypatch):
+        """Test that CREW_ROUTING_ENABLED=false keeps the full task graph"""
+        monkeypatch.setattr(settings, "crew_routing_enabled", False)
+        monkeypatch.setattr(nfe_crew, "build", lambda intent: FakeKickoff(nfe_crew, Route(intent, "")))
+
+        assert nfe_crew.run("olá").route.intent == INTENT_FULL
@@ -0,0 +1,239 @@
+"""Unit tests for live schema snapshots"""
+
+from contextlib import contextmanager
+
+import psycopg2
+import pytest
+
+from config import settings
+from database import schema
+from database.schema_provider import _FINGERPRINT_SQL, SchemaProvider, introspect
+from utils.exceptions import DatabaseConnectionException
+
+
+CATALOG = {
+    "tables": [
+        ("empresas", None, 120),
+        ("notas_fiscais", "Notas fiscais", 5000),
+        ("nf_itens", None, -1),
+    ],
+    "columns": [
+        ("empresas", "id", "integer", False, None),
+        ("empresas", "razao_social", "character varying(60)", True, None),
+        ("notas_fiscais", "id", "integer", False, None),
+        ("notas_fiscais", "emitente_id", "integer", True, None),
+        ("notas_fiscais", "valor_total_nota", "numeric(15,2)", False, None),
+        ("notas_fiscais", "status", "character varying(20)", True, None),
+        ("nf_itens", "id", "integer", False, None),
+        ("nf_itens", "nota_fiscal_id", "integer", True, None),
+        ("nf_itens", "descricao", "character varying(120)", False, "Texto do produto"),
+    ],
+    "constraints": [
+        ("empresas", "p", ["id"], None, []),
+        ("notas_fiscais", "p", ["id"], None, []),
+        ("notas_fiscais", "f", ["emitente_id"], "empresas", ["id"]),
+        ("nf_itens", "p", ["id"], None, []),
+        ("nf_itens", "f", ["nota_fiscal_id"], "notas_fiscais", ["id"]),
+    ],
+    "indexes": [
+        ("notas_fiscais", ["status"]),
+        ("nf_itens", []),
+    ],
+}
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append(sql)
+        if "md5(" in sql:
+            self._rows = [(self.conn.version,)]
+        elif "pg_constraint" in sql:
+            self._rows = CATALOG["constraints"]
+        elif "pg_index" in sql:
+            self._rows = CATALOG["indexes"]
+        elif "pg_attribute" in sql:
+            self._rows = CATALOG["columns"]
+        else:
+            self._rows = CATALOG["tables"]
+
+    def fetchone(self):
+        return self._rows[0]
+
+    def fetchall(self):
+        return list(self._rows)
+
+
+class FakeConnection:
+    def __init__(self, version="v1"):
+        self.version = version
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+
+def provider_for(conn, **kwargs):
+    @contextmanager
+    def connection():
+        if isinstance(conn, Exception):
+            raise conn
+        yield conn
+
+    return SchemaProvider(curated=schema._CURATED_TABLES, connection_factory=connection, **kwargs)
+
+
+@pytest.fixture
+def live_schema(monkeypatch):
+    """Point database.schema at a provider over the fake catalog"""
+    conn = FakeConnection()
+    monkeypatch.setattr(schema, "_provider", provider_for(conn))
+    return conn
+
+
+class TestIntrospect:
+    """Tests for reading the catalog rows into TableInfo"""
+
+    def test_columns_keys_and_indexes(self):
+        """Test that columns, primary and foreign keys and indexes are collected"""
+        tables = introspect(FakeConnection())
+        notas = tables["notas_fiscais"]
+
+        assert notas.column_names == ["id", "emitente_id", "valor_total_nota", "status"]
+        assert notas.primary_key == ("id",)
+        assert notas.foreign_keys[0].ref_table == "empresas"
+        assert notas.indexes == (("status",),)
+        assert notas.row_estimate == 5000
+
+    def test_never_analyzed_table_has_no_estimate(self):
+        """Test that reltuples = -1 becomes None"""
+        assert introspect(FakeConnection())["nf_itens"].row_estimate is None
+
+
+class TestSchemaProvider:
+    """Tests for versioned snapshots"""
+
+    def test_live_snapshot_annotated_with_curated_descriptions(self):
+        """Test that missing comments fall back to the curated descriptions"""
+        snapshot = provider_for(FakeConnection()).refresh()
+
+        assert snapshot.source == "live"
+        assert snapshot.version == "v1"
+        assert snapshot.table("empresas").description == schema._CURATED_TABLES["empresas"]["description"]
+        assert snapshot.table("notas_fiscais").description == "Notas fiscais"
+        assert snapshot.table("nf_itens").column("descricao").description == "Texto do produto"
+
+    def test_unchanged_fingerprint_skips_introspection(self):
+        """Test that refresh only reads the catalog again when the fingerprint changes"""
+        conn = FakeConnection()
+        provider = provider_for(conn)
+        first = provider.refresh()
+        conn.executed.clear()
+
+        assert provider.refresh() is first
+        assert len(conn.executed) == 1
+
+        conn.version = "v2"
+        second = provider.refresh()
+        assert second.version == "v2"
+        assert second is not first
+
+    def test_fingerprint_covers_keys_indexes_and_comments(self):
+        """Test that new keys, indexes and table comments change the version"""
+        for catalog in ("pg_constraint", "pg_index", "obj_description(c.oid", "col_description("):
+            assert catalog in _FINGERPRINT_SQL
+
+    def test_get_snapshot_checks_at_most_once_per_interval(self):
+        """Test that get_snapshot does not query the database within the interval"""
+        conn = FakeConnection()
+        provider = provider_for(conn, refresh_interval=300)
+        provider.get_snapshot()
+        conn.executed.clear()
+
+        provider.get_snapshot()
+        assert conn.executed == []
+
+    @pytest.mark.parametrize("error", [
+        DatabaseConnectionException("down"),
+        psycopg2.OperationalError("down"),
+    ])
+    def test_unreachable_database_uses_curated_schema(self, error):
+        """Test that the curated descriptions are used when introspection fails"""
+        snapshot = provider_for(error).refresh()
+
+        assert snapshot.source == "static"
+        assert snapshot.version.startswith("static-")
+        assert "descricao" in snapshot.table("nf_itens").column_names
+
+    def test_failed_refresh_keeps_live_snapshot(self):
+        """Test that a failed refresh does not replace a live snapshot"""
+        conn = FakeConnection()
+        provider = provider_for(conn)
+        live = provider.refresh()
+
+        conn.cursor = lambda: (_ for _ in ()).throw(psycopg2.OperationalError("lost"))
+        assert provider.refresh() is live
+
+    def test_introspection_disabled(self, monkeypatch):
+        """Test that SCHEMA_INTROSPECTION_ENABLED=false never touches the database"""
+        monkeypatch.setattr(settings, "schema_introspection_enabled", False)
+        conn = FakeConnection()
+        snapshot = provider_for(conn).refresh()
+
+        assert snapshot.source == "static"
+        assert conn.executed == []
+
+
+class TestSchemaFunctions:
+    """Tests for the schema information built from the snapshot"""
+
+    def test_table_info_uses_live_columns(self, live_schema):
+        """Test that get_table_info reports the live columns and keys"""
+        info = schema.get_table_info("notas_fiscais")
+
+        assert list(info["columns"]) == ["id", "emitente_id", "valor_total_nota", "status"]
+        assert info["columns"]["emitente_id"]["fk"] == "empresas(id)"
+        assert info["relationships"] == ["notas_fiscais.emitente_id → empresas.id"]
+
+    def test_unknown_table(self, live_schema):
+        """Test that unknown tables list the tables of the snapshot"""
+        info = schema.get_table_info("nf_inexistente")
+        assert info["available_tables"] == ["empresas", "nf_itens", "notas_fiscais"]
+
+    def test_main_tables_only_list_existing_columns(self, live_schema):
+        """Test that curated main columns missing from the database are dropped"""
+        tables = {table["name"]: table for table in schema.get_main_tables()}
+
+        assert set(tables) == {"empresas", "notas_fiscais", "nf_itens"}
+        assert tables["notas_fiscais"]["main_columns"] == [
+            "id (PK)", "emitente_id (FK → empresas)", "valor_total_nota", "status"
+        ]
+
+    def test_summary_uses_actual_column_names(self, live_schema):
+        """Test that the prompt summary lists nf_itens.descricao (not descricao_produto)"""
+        summary = schema.get_schema_summary()
+
+        assert "- nf_itens: id, nota_fiscal_id, descricao" in summary
+        assert "descricao_produto" not in summary
+        assert "- nf_itens.nota_fiscal_id → notas_fiscais.id" in summary
+
+    def test_relationships_from_foreign_keys(self, live_schema):
+        """Test that relationships come from the foreign keys with the curated JOIN notes"""
+        relationships = schema.get_relationships()
+
+        assert [(r["from_table"], r["to_table"]) for r in relationships] == [
+            ("notas_fiscais", "empresas"), ("nf_itens", "notas_fiscais")
+        ]
+        assert "LEFT JOIN" in relationships[0]["description"]
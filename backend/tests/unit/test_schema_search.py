@@ -0,0 +1,89 @@
+"""Unit tests for the schema search index"""
+
+import json
+
+import pytest
+
+from agents.tools.schema_tool import SchemaSearchTool
+from database import schema_search
+from database.schema_provider import SchemaSnapshot
+from database.schema_search import SchemaSearchIndex, get_schema_search_index, normalize_text, similarity
+
+
+@pytest.fixture(autouse=True)
+def no_cached_index(monkeypatch):
+    """No search index left from another test"""
+    monkeypatch.setattr(schema_search, "_index", None)
+
+
+def top_table(snapshot, query):
+    return SchemaSearchIndex(snapshot).search(query)[0].table
+
+
+class TestNormalization:
+    """Tests for text normalization"""
+
+    def test_accents_and_case_removed(self):
+        """Test that accents, case and punctuation do not matter"""
+        assert normalize_text("Tributação") == "tributacao"
+        assert normalize_text("NF-e  Emissão") == "nf e emissao"
+
+    def test_similarity(self):
+        """Test trigram similarity of a typo and of unrelated words"""
+        assert similarity("pagamnto", "pagamento") > 0.4
+        assert similarity("pagamnto", "transporte") < 0.2
+
+
+class TestSchemaSearchIndex:
+    """Tests for ranking tables by search term"""
+
+    @pytest.mark.parametrize("query, table", [
+        ("tributação", "nf_itens_icms"),
+        ("tributacao", "nf_itens_icms"),
+        ("emissão", "notas_fiscais"),
+        ("pagamnto", "nf_pagamentos"),
+        ("descricao produto", "nf_itens"),
+        ("notas", "notas_fiscais"),
+    ])
+    def test_best_table(self, static_schema, query, table):
+        """Test that accents, typos and several words find the right table"""
+        assert top_table(static_schema, query) == table
+
+    def test_column_matches_listed(self, static_schema):
+        """Test that matching columns are reported with the table"""
+        result = SchemaSearchIndex(static_schema).search("descricao produto")[0]
+
+        assert result.match_type == "column_name"
+        assert "descricao" in result.columns
+        assert result.matched_terms == {"descricao": "descricao", "produto": "produto"}
+
+    def test_no_match(self, static_schema):
+        """Test that unrelated terms find nothing"""
+        assert SchemaSearchIndex(static_schema).search("xyzzy") == []
+
+    def test_index_rebuilt_on_new_version(self, static_schema):
+        """Test that the index is built once per schema version"""
+        first = get_schema_search_index(static_schema)
+        assert get_schema_search_index(static_schema) is first
+
+        changed = SchemaSnapshot("v2", "live", static_schema.loaded_at, static_schema.tables)
+        assert get_schema_search_index(changed) is not first
+
+
+class TestSchemaSearchTool:
+    """Tests for the tool response"""
+
+    def test_results_ranked_with_columns(self, static_schema):
+        """Test that the tool returns the ranked tables and only the matching columns"""
+        result = json.loads(SchemaSearchTool()._run(search_term="descrição do produto"))
+
+        assert result["results"][0]["table"] == "nf_itens"
+        assert result["schema_version"] == static_schema.version
+        assert set(result["results"][0]["info"]["columns"]) == set(result["results"][0]["columns"])
+
+    def test_nothing_found(self, static_schema):
+        """Test the suggestion when nothing matches"""
+        result = json.loads(SchemaSearchTool()._run(search_term="xyzzy"))
+
+        assert result["matches_found"] == 0
+        assert "suggestion" in result
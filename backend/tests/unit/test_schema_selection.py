@@ -0,0 +1,91 @@
+"""Unit tests for relevant-schema selection"""
+
+import pytest
+
+from config import settings
+from database import schema, schema_selection
+from database.schema_search import tokenize
+from database.schema_selection import SchemaSelector, select_schema_tables
+
+
+class BagOfWordsModel:
+    """Stand-in for a sentence-transformers model: one dimension per term"""
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.encoded = 0
+
+    def encode(self, texts, normalize_embeddings=False):
+        np = pytest.importorskip("numpy")
+        self.encoded += len(texts)
+        for text in texts:
+            for token in tokenize(text):
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+        vectors = np.zeros((len(texts), 512))
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                vectors[row, self.vocabulary[token] % 512] += 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+@pytest.fixture(autouse=True)
+def no_cached_selector(monkeypatch):
+    """No selector left from another test and no embedding model"""
+    monkeypatch.setattr(schema_selection, "_selector", None)
+    monkeypatch.setattr(schema_selection, "_model", False)
+
+
+class TestLexicalSelection:
+    """Tests for the selection without an embedding model"""
+
+    def test_tax_question_selects_tax_tables_and_join_path(self, static_schema):
+        """Test that referenced tables are added so the JOIN path is complete"""
+        tables = SchemaSelector(static_schema).select("qual o total de icms por alíquota?", top_k=1)
+
+        assert tables[0] == "nf_itens_icms"
+        assert {"nf_itens", "notas_fiscais"} <= set(tables)
+
+    def test_unrelated_message_uses_default_tables(self, static_schema):
+        """Test that greetings get the default summary"""
+        assert SchemaSelector(static_schema).select("olá, tudo bem?", top_k=4) is None
+
+    def test_disabled(self, static_schema, monkeypatch):
+        """Test that SCHEMA_SELECTION_ENABLED=false keeps the default tables"""
+        monkeypatch.setattr(settings, "schema_selection_enabled", False)
+        assert select_schema_tables("pagamentos por pix") is None
+
+
+class TestEmbeddingSelection:
+    """Tests for the selection with an embedding model"""
+
+    def test_tables_embedded_once(self, static_schema):
+        """Test that questions only embed the question itself"""
+        model = BagOfWordsModel()
+        selector = SchemaSelector(static_schema, model)
+        embedded = model.encoded
+
+        selector.select("forma de pagamento pix", top_k=2)
+        selector.select("frete e transportadora", top_k=2)
+
+        assert selector.method == "embedding"
+        assert model.encoded == embedded + 2
+
+    def test_best_table_by_similarity(self, static_schema):
+        """Test that the most similar table comes first"""
+        selector = SchemaSelector(static_schema, BagOfWordsModel())
+
+        assert selector.select("forma de pagamento pix", top_k=2)[0] == "nf_pagamentos"
+        assert selector.select("frete transportadora placa do veículo", top_k=2)[0] == "nf_transporte"
+
+
+class TestPromptSummary:
+    """Tests for the schema summary built from the selection"""
+
+    def test_selected_summary_is_smaller(self, static_schema):
+        """Test that the summary only lists the selected tables"""
+        tables = select_schema_tables("valor do icms por item")
+        summary = schema.get_schema_summary(tables)
+
+        assert "nf_itens_icms" in summary
+        assert "nf_transporte" not in summary
@@ -0,0 +1,87 @@
+"""Unit tests for SchemaInfoTool response caching"""
+
+import json
+
+import pytest
+
+from agents.tools import schema_tool
+from agents.tools.schema_tool import SchemaInfoTool, SchemaResponseCache, precompute_schema_responses
+
+
+@pytest.fixture
+def responses(static_schema, monkeypatch):
+    """Curated schema and an empty response cache"""
+    cache = SchemaResponseCache()
+    monkeypatch.setattr(schema_tool, "_responses", cache)
+    return cache
+
+
+def count_calls(monkeypatch, name):
+    calls = []
+    original = getattr(schema_tool, name)
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(schema_tool, name, counted)
+    return calls
+
+
+class TestSchemaResponseCache:
+    """Tests for responses memoized per schema version"""
+
+    def test_full_schema_built_once(self, responses, monkeypatch):
+        """Test that repeated full-schema calls reuse the serialized response"""
+        calls = count_calls(monkeypatch, "get_schema_info")
+        tool = SchemaInfoTool()
+
+        first = tool._run(query_type="full")
+        second = tool._run(query_type="full")
+
+        assert first is second
+        assert len(calls) == 1
+
+    def test_new_schema_version_rebuilds(self):
+        """Test that a version change discards the previous responses"""
+        cache = SchemaResponseCache()
+        cache.get_or_build("v1", ("full",), lambda: "a")
+        assert cache.get_or_build("v1", ("full",), lambda: "b") == "a"
+        assert cache.get_or_build("v2", ("full",), lambda: "c") == "c"
+        assert len(cache) == 1
+
+    def test_unknown_table_not_cached(self, responses):
+        """Test that lookups of unknown tables do not grow the cache"""
+        result = json.loads(SchemaInfoTool()._run(query_type="table", table_name="nf_inexistente"))
+
+        assert "error" in result["info"]
+        assert len(responses) == 0
+
+    def test_precompute_covers_every_table(self, responses, monkeypatch):
+        """Test that after precomputing, tool calls do not build responses"""
+        precompute_schema_responses()
+        calls = count_calls(monkeypatch, "get_table_info")
+
+        SchemaInfoTool()._run(query_type="table", table_name="nf_itens")
+        assert calls == []
+
+
+class TestCompactForm:
+    """Tests for the compact schema responses"""
+
+    def test_compact_full_is_smaller(self, responses):
+        """Test that the compact schema is much smaller than the full one"""
+        tool = SchemaInfoTool()
+        full = tool._run(query_type="full")
+        compact = tool._run(query_type="full", compact=True)
+
+        assert len(compact) < len(full) / 2
+
+    def test_compact_table_lists_columns_as_strings(self, responses):
+        """Test that compact table info has one 'name type' string per column"""
+        result = json.loads(SchemaInfoTool()._run(query_type="table", table_name="nf_itens", compact=True))
+        columns = result["info"]["columns"]
+
+        assert "id integer PK" in columns
+        assert "nota_fiscal_id integer → notas_fiscais.id" in columns
+        assert any(column.startswith("descricao ") for column in columns)
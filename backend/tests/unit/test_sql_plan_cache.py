@@ -0,0 +1,219 @@
+"""Unit tests for the NL question -> SQL plan cache"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from agents.crew import NFeCrew
+from agents.fast_path import FastSQLPipeline
+from agents.router import INTENT_DATA, INTENT_FAST, MODE_CREW, Route
+from agents.sql_plan_cache import (
+    Parameter, SQLPlanCache, build_plan, get_sql_plan_cache, parse_question
+)
+from config import settings
+from tests.conftest import FakeLLM, FakeSQLTool
+
+
+TOP_PRODUCTS_SQL = (
+    "SELECT i.descricao, SUM(i.quantidade) AS quantidade FROM itens_nota_fiscal i "
+    "JOIN notas_fiscais n ON n.id = i.nota_fiscal_id "
+    "WHERE EXTRACT(MONTH FROM n.data_emissao) = 10 AND EXTRACT(YEAR FROM n.data_emissao) = 2025 "
+    "AND n.status = 'autorizada' GROUP BY i.descricao ORDER BY quantidade DESC LIMIT 5"
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_plan_cache(static_schema, monkeypatch):
+    """Curated schema, every table in the prompt and no stored SQL plans"""
+    monkeypatch.setattr(settings, "schema_selection_enabled", False)
+    get_sql_plan_cache().clear()
+
+
+class TestParseQuestion:
+    """Tests for turning a question into a template and parameters"""
+
+    def test_parameters(self):
+        """Test numbers, months, dates and CNPJs, accents and punctuation ignored"""
+        parsed = parse_question("Top 5 produtos de Março, CNPJ 12.345.678/0001-90, desde 01/02/2025?")
+
+        assert parsed.template == "top {number} produtos de {month} cnpj {cnpj} desde {date}"
+        assert parsed.parameters == (
+            Parameter("number", Decimal(5)),
+            Parameter("month", 3),
+            Parameter("cnpj", "12345678000190"),
+            Parameter("date", date(2025, 2, 1)),
+        )
+
+    def test_same_template(self):
+        """Test that rewording only the values keeps the template"""
+        assert parse_question("quais os 5 produtos mais vendidos em outubro?").template == \
+            parse_question("Quais os 10 produtos mais vendidos em janeiro").template
+
+    def test_invalid_date(self):
+        """Test that a question with an impossible date has no template"""
+        assert parse_question("notas de 31/02/2025") is None
+
+
+class TestBuildPlan:
+    """Tests for locating the parameters in the SQL"""
+
+    def test_rebind(self):
+        """Test that the stored SQL is rebound with the values of another question"""
+        plan = build_plan(parse_question("top 5 produtos de outubro de 2025"), TOP_PRODUCTS_SQL)
+        sql = plan.bind(parse_question("top 10 produtos de março de 2024").parameters)
+
+        assert "EXTRACT(MONTH FROM n.data_emissao) = 3" in sql
+        assert "EXTRACT(YEAR FROM n.data_emissao) = 2024" in sql
+        assert sql.endswith("LIMIT 10")
+        assert "'autorizada'" in sql
+
+    def test_literals(self):
+        """Test CNPJs, dates and codes inside string literals"""
+        plan = build_plan(
+            parse_question("notas do cnpj 12.345.678/0001-90 em 01/02/2025"),
+            "SELECT * FROM notas_fiscais WHERE cnpj_emitente = '12345678000190' AND data_emissao::date = '2025-02-01'"
+        )
+        sql = plan.bind(parse_question("notas do cnpj 98.765.432/0001-10 em 15/03/2025").parameters)
+
+        assert "'98765432000110'" in sql and "'2025-03-15'" in sql
+
+    @pytest.mark.parametrize("question, sql", [
+        # The number is also the ROUND precision
+        ("top 2 clientes", "SELECT ROUND(SUM(valor_total)::numeric, 2) FROM notas_fiscais LIMIT 2"),
+        # The value is not in the SQL
+        ("top 5 clientes", "SELECT * FROM notas_fiscais LIMIT 10"),
+        # The end of the month range is not a parameter
+        ("vendas de outubro de 2025",
+         "SELECT SUM(valor_total) FROM notas_fiscais WHERE data_emissao >= '2025-10-01' AND data_emissao < '2025-11-01'"),
+        # A date computed from "mês passado" would go stale
+        ("vendas do mês passado", "SELECT SUM(valor_total) FROM notas_fiscais WHERE data_emissao >= '2025-09-01'"),
+        # The year came from today, not from the question
+        ("quanto vendemos em outubro?",
+         "SELECT SUM(valor_total) FROM notas_fiscais "
+         "WHERE EXTRACT(MONTH FROM data_emissao) = 10 AND EXTRACT(YEAR FROM data_emissao) = 2026"),
+        ("quanto vendemos este mês?",
+         "SELECT SUM(valor_total) FROM notas_fiscais WHERE date_part('month', data_emissao) = 10"),
+        ("vendas de outubro", "SELECT SUM(valor_total) FROM notas_fiscais WHERE data_emissao >= make_date(2026, 10, 1)"),
+        # Two parameters with the same value
+        ("top 5 produtos de maio", "SELECT * FROM itens WHERE EXTRACT(MONTH FROM data) = 5 LIMIT 5"),
+    ])
+    def test_unsafe_plans_rejected(self, question, sql):
+        """Test that plans whose parameters cannot be rebound safely are not built"""
+        assert build_plan(parse_question(question), sql) is None
+
+    def test_relative_period_with_current_date(self):
+        """Test that questions answered with CURRENT_DATE are stored as is"""
+        sql = "SELECT SUM(valor_total) FROM notas_fiscais WHERE data_emissao >= date_trunc('month', CURRENT_DATE)"
+        plan = build_plan(parse_question("quanto vendemos este mês?"), sql)
+
+        assert plan.bind(()) == sql
+
+
+class TestSQLPlanCache:
+    """Tests for looking plans up by template"""
+
+    def test_lookup(self):
+        """Test that a question of a stored template gets its bound SQL"""
+        cache = SQLPlanCache()
+        assert cache.store("top 5 produtos de outubro de 2025", TOP_PRODUCTS_SQL)
+
+        plan, sql = cache.lookup("Top 3 produtos de junho de 2025?")
+
+        assert plan.template == "top {number} produtos de {month} de {number}"
+        assert sql.endswith("LIMIT 3")
+        assert cache.lookup("top 3 produtos") is None
+        assert cache.metrics()["hits"] == 1
+
+    def test_lru_and_invalidate(self):
+        """Test eviction of the least recently used plan and dropping failed plans"""
+        cache = SQLPlanCache(max_entries=1)
+        cache.store("total de notas", "SELECT COUNT(*) FROM notas_fiscais")
+        cache.store("total de empresas", "SELECT COUNT(*) FROM empresas")
+
+        assert cache.lookup("total de notas") is None
+        cache.invalidate("total de empresas")
+        assert cache.lookup("total de empresas") is None
+        assert cache.metrics()["invalidations"] == 1
+
+
+class TestPlanReuse:
+    """Tests for answering from a stored plan without the LLM"""
+
+    def test_second_question_skips_llm(self):
+        """Test that the fast path stores the plan and run_plan reuses it"""
+        llm = FakeLLM(f"```sql\n{TOP_PRODUCTS_SQL}\n```")
+        tool = FakeSQLTool()
+        pipeline = FastSQLPipeline(llm=llm, sql_tool=tool)
+
+        pipeline.run("top 5 produtos de outubro de 2025")
+        answer = pipeline.run_plan("top 10 produtos de novembro de 2025")
+
+        assert llm.calls == 1
+        assert tool.queries[-1].endswith("LIMIT 10")
+        assert answer["plan"] == "top {number} produtos de {month} de {number}"
+
+    def test_failed_plan_dropped(self):
+        """Test that a plan whose query fails is removed and not answered"""
+        get_sql_plan_cache().store("total de notas", "SELECT COUNT(*) FROM notas_fiscais")
+        pipeline = FastSQLPipeline(llm=FakeLLM("SELECT 1"), sql_tool=FakeSQLTool({
+            "success": False, "error": "Erro ao executar query", "details": "column does not exist"
+        }))
+
+        assert pipeline.run_plan("total de notas") is None
+        assert get_sql_plan_cache().lookup("total de notas") is None
+
+    def test_crew_run_uses_plan(self, monkeypatch):
+        """Test that data questions of a known template skip the crew"""
+        get_sql_plan_cache().store("total de notas", "SELECT COUNT(*) FROM notas_fiscais")
+        crew = NFeCrew()
+        crew._fast_pipeline = FastSQLPipeline(llm=FakeLLM("NAO_SEI"), sql_tool=FakeSQLTool())
+        monkeypatch.setattr(crew, "build", lambda intent: pytest.fail("crew kickoff with a stored plan"))
+
+        run = crew.run("Total de notas", route=Route(INTENT_DATA, "knn:data"))
+
+        assert run.route.intent == INTENT_FAST
+        assert run.route.reason == "sql_plan:knn:data"
+        assert run.metadata()["sql"] == "SELECT COUNT(*) FROM notas_fiscais"
+
+    @pytest.mark.parametrize("message, sql", [
+        ("quantas notas ela emitiu?", "SELECT COUNT(*) FROM notas_fiscais"),
+        (
+            "quantas notas emitiu em setembro?",
+            "SELECT COUNT(*) FROM notas_fiscais WHERE EXTRACT(MONTH FROM data_emissao) = 9"
+        ),
+    ])
+    def test_follow_up_neither_stores_nor_uses_plans(self, message, sql, monkeypatch):
+        """Test that questions asked after other turns are not keyed on their words"""
+        history = [{"role": "user", "content": "qual empresa mais vendeu?"}, {"role": "assistant", "content": "Acme"}]
+        llm = FakeLLM("SELECT COUNT(*) FROM notas_fiscais WHERE cnpj_emitente = '12345678000190'")
+        pipeline = FastSQLPipeline(llm=llm, sql_tool=FakeSQLTool())
+
+        pipeline.run(message, history)
+        assert get_sql_plan_cache().lookup(message) is None
+
+        get_sql_plan_cache().store(message, sql)
+        assert get_sql_plan_cache().lookup(message) is not None
+        crew = NFeCrew()
+        crew._fast_pipeline = pipeline
+        monkeypatch.setattr(crew, "build", lambda intent: pytest.fail("kickoff"))
+        monkeypatch.setattr(pipeline, "run", lambda message, chat_history=None: {
+            "response": "via LLM", "sql": "SELECT 1", "row_count": 1, "step_timings_ms": {}
+        })
+
+        run = crew.run(message, chat_history=history, route=Route(INTENT_FAST, "test"))
+        assert run.response == "via LLM"
+
+    def test_crew_mode_ignores_plan(self, monkeypatch):
+        """Test that mode=crew always runs the agents"""
+        get_sql_plan_cache().store("total de notas", "SELECT COUNT(*) FROM notas_fiscais")
+        crew = NFeCrew()
+
+        class Kickoff:
+            def kickoff(self, inputs):
+                return type("CrewOutput", (), {"raw": "resposta da crew"})()
+
+        monkeypatch.setattr(crew, "build", lambda intent: Kickoff())
+
+        run = crew.run("Total de notas", route=Route(INTENT_DATA, "knn:data"), mode=MODE_CREW)
+        assert run.response == "resposta da crew"
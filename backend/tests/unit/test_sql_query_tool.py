@@ -0,0 +1,466 @@
+"""Unit tests for SQLQueryTool"""
+
+import json
+import threading
+from contextlib import contextmanager
+
+import psycopg2.errors
+import pytest
+
+from agents.tools import sql_query_tool
+from agents.tools.sql_query_tool import SQLQueryTool
+from agents.tools.multi_query_tool import MultiSQLQueryTool
+from config import settings
+from database.cancellation import QueryCancelScope, cancel_scope
+from database.query_cache import QueryResultCache, bump_data_version
+
+
+class FakeCursor:
+    """Cursor over canned rows; EXPLAIN returns a canned plan"""
+
+    def __init__(self, conn, name=None):
+        self.conn = conn
+        self.name = name
+        self.itersize = None
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((self.name, sql))
+        if sql.startswith("EXPLAIN"):
+            plan = self.conn.limited_plan if "LIMIT" in sql and self.conn.limited_plan else self.conn.plan
+            self._rows = [([{"Plan": dict(plan)}],)]
+        elif self.name is None:
+            self._rows = []
+        else:
+            error = self.conn.error() if callable(self.conn.error) else self.conn.error
+            if error is not None:
+                raise error
+            self._rows = list(self.conn.rows)
+
+    def fetchmany(self, size):
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        self.conn.fetched += len(batch)
+        return batch
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+
+class FakeConnection:
+    def __init__(self, rows, plan=None):
+        self.rows = rows
+        self.plan = plan or {"Node Type": "Seq Scan", "Total Cost": 10.0, "Plan Rows": len(rows), "Plan Width": 32}
+        self.executed = []
+        self.fetched = 0
+        self.rolled_back = 0
+        self.error = None
+        self.cancelled = 0
+        self.limited_plan = None  # plan of statements with LIMIT (None: same as plan)
+
+    def cursor(self, name=None, cursor_factory=None):
+        return FakeCursor(self, name=name)
+
+    def rollback(self):
+        self.rolled_back += 1
+
+    def cancel(self):
+        self.cancelled += 1
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.released = 0
+
+    @contextmanager
+    def connection(self, timeout=None):
+        try:
+            yield self.conn
+        finally:
+            self.released += 1
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Install a fake pool; returns a function that sets the result rows"""
+    state = {}
+
+    def install(rows, plan=None):
+        conn = FakeConnection(rows, plan)
+        pool = FakePool(conn)
+        cache = QueryResultCache()
+        monkeypatch.setattr(sql_query_tool, "get_pool", lambda: pool)
+        monkeypatch.setattr(sql_query_tool, "get_query_cache", lambda: cache)
+        state["pool"] = pool
+        return conn
+
+    return install
+
+
+def run(query):
+    return json.loads(SQLQueryTool()._run(query))
+
+
+class TestResultCaps:
+    """Tests for server-side cursor reads with row and byte caps"""
+
+    def test_small_result_not_truncated(self, fake_db):
+        """Test that results under the caps are returned whole"""
+        conn = fake_db([{"id": i} for i in range(3)])
+        result = run("SELECT id FROM notas_fiscais;")
+
+        assert result["success"] is True
+        assert result["row_count"] == 3
+        assert result["truncated"] is False
+        named = [sql for name, sql in conn.executed if name is not None]
+        assert named == ["SELECT id FROM notas_fiscais\nLIMIT 100"]
+
+    def test_row_cap(self, fake_db, monkeypatch):
+        """Test that reading stops at the row cap and reports the estimate"""
+        monkeypatch.setattr(settings, "sql_tool_max_rows", 5)
+        monkeypatch.setattr(settings, "sql_tool_fetch_size", 2)
+        conn = fake_db([{"id": i} for i in range(1000)], plan={"Total Cost": 1.0, "Plan Rows": 1000})
+
+        result = run("SELECT id FROM nf_itens")
+
+        assert result["row_count"] == 5
+        assert result["truncated"] is True
+        assert result["truncated_reason"] == "max_rows"
+        assert result["estimated_total_rows"] == 1000
+        assert conn.fetched < 10
+
+    def test_byte_cap(self, fake_db, monkeypatch):
+        """Test that reading stops at the serialized byte budget"""
+        monkeypatch.setattr(settings, "sql_tool_max_bytes", 500)
+        fake_db([{"descricao": "x" * 100} for _ in range(50)])
+
+        result = run("SELECT descricao FROM nf_itens")
+
+        assert result["truncated_reason"] == "max_bytes"
+        assert 0 < result["row_count"] < 50
+
+    def test_connection_returned_after_query(self, fake_db):
+        """Test that the connection goes back to the pool"""
+        conn = fake_db([{"id": 1}])
+        run("SELECT id FROM notas_fiscais")
+
+        assert sql_query_tool.get_pool().released == 1
+        assert conn.rolled_back == 1
+
+    def test_invalid_query_not_executed(self, fake_db):
+        """Test that rejected queries never reach the database"""
+        conn = fake_db([{"id": 1}])
+        result = run("SELECT * FROM notas_fiscais")
+
+        assert result["success"] is False
+        assert result["error"] == "Query inválida"
+        assert conn.executed == []
+
+    def test_limit_adjustment_reported(self, fake_db):
+        """Test that an injected LIMIT is reported back to the agent"""
+        fake_db([{"id": 1}])
+        result = run("SELECT id FROM notas_fiscais")
+
+        assert result["query_adjustments"] == ["LIMIT 100 adicionado"]
+        assert result["executed_query"].endswith("LIMIT 100")
+
+
+class TestTimeoutsAndCancellation:
+    """Tests for statement/lock timeouts and request cancellation"""
+
+    def test_session_limits_set_before_query(self, fake_db):
+        """Test that the transaction is read-only with statement_timeout and lock_timeout"""
+        conn = fake_db([{"id": 1}])
+        run("SELECT id FROM notas_fiscais")
+
+        assert conn.executed[0] == (
+            None,
+            "SET TRANSACTION READ ONLY; SET LOCAL statement_timeout = %s; SET LOCAL lock_timeout = %s"
+        )
+
+    def test_statement_timeout_is_structured_error(self, fake_db):
+        """Test that statement_timeout surfaces as a typed tool error"""
+        conn = fake_db([])
+        conn.error = psycopg2.errors.QueryCanceled("canceling statement due to statement timeout")
+
+        result = run("SELECT i.id, nf.id FROM nf_itens i, notas_fiscais nf")
+
+        assert result["success"] is False
+        assert result["error_type"] == "statement_timeout"
+        assert result["hint"]
+
+    def test_lock_timeout_is_structured_error(self, fake_db):
+        """Test that lock_timeout surfaces as a typed tool error"""
+        conn = fake_db([])
+        conn.error = psycopg2.errors.LockNotAvailable("canceling statement due to lock timeout")
+
+        assert run("SELECT id FROM notas_fiscais")["error_type"] == "lock_timeout"
+
+    def test_cancelled_scope_skips_query(self, fake_db):
+        """Test that no query runs once the request was abandoned"""
+        conn = fake_db([{"id": 1}])
+        scope = QueryCancelScope()
+        scope.cancel("client_disconnected")
+
+        with cancel_scope(scope):
+            result = run("SELECT id FROM notas_fiscais")
+
+        assert result["error_type"] == "cancelled"
+        assert conn.executed == []
+
+    def test_cancel_during_query_reported_as_cancelled(self, fake_db):
+        """Test that a server-side cancel is reported as cancellation, not timeout"""
+        conn = fake_db([])
+        scope = QueryCancelScope()
+
+        def cancel_and_fail(*args, **kwargs):
+            scope.cancel("client_disconnected")
+            return psycopg2.errors.QueryCanceled("canceling statement due to user request")
+
+        conn.error = cancel_and_fail
+        with cancel_scope(scope):
+            result = run("SELECT id FROM notas_fiscais")
+
+        assert result["error_type"] == "cancelled"
+
+
+class TestQueryCancelScope:
+    """Tests for QueryCancelScope"""
+
+    def test_cancel_sends_cancel_to_running_queries(self):
+        """Test that cancel() reaches every registered connection"""
+        scope = QueryCancelScope()
+        running, finished = FakeConnection([]), FakeConnection([])
+        scope.register(running)
+        scope.register(finished)
+        scope.unregister(finished)
+
+        assert scope.cancel() == 1
+        assert running.cancelled == 1
+        assert finished.cancelled == 0
+        assert scope.register(FakeConnection([])) is False
+
+    def test_parent_cancel_reaches_child_queries(self):
+        """Test that cancelling the request cancels queries of a child scope"""
+        parent = QueryCancelScope()
+        child = QueryCancelScope(parent=parent)
+        conn = FakeConnection([])
+        child.register(conn)
+
+        parent.cancel("client_disconnected")
+
+        assert conn.cancelled == 1
+        assert child.cancelled and child.reason == "client_disconnected"
+
+    def test_child_cancel_leaves_parent_running(self):
+        """Test that a child timeout does not cancel the whole request"""
+        parent = QueryCancelScope()
+        child = QueryCancelScope(parent=parent)
+        child.register(FakeConnection([]))
+
+        child.cancel("multi_query_timeout")
+
+        assert not parent.cancelled
+        assert parent.register(FakeConnection([])) is True
+
+
+class TestCostGuard:
+    """Tests for the EXPLAIN-based cost guard"""
+
+    HEAVY_PLAN = {
+        "Node Type": "Nested Loop",
+        "Total Cost": 5e9,
+        "Plan Rows": 10_000,
+        "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "nf_itens", "Plan Rows": 1_000_000},
+            {"Node Type": "Seq Scan", "Relation Name": "notas_fiscais", "Plan Rows": 50_000},
+        ],
+    }
+
+    def test_over_cost_rejected_with_plan(self, fake_db):
+        """Test that expensive queries are rejected before running"""
+        conn = fake_db([{"id": 1}], plan=self.HEAVY_PLAN)
+
+        result = run("SELECT i.id, nf.id FROM nf_itens i, notas_fiscais nf")
+
+        assert result["success"] is False
+        assert result["error_type"] == "cost_limit_exceeded"
+        assert {s["table"] for s in result["plan"]["scans"]} == {"nf_itens", "notas_fiscais"}
+        assert all(name is None for name, _ in conn.executed)
+
+    def test_rows_estimated_without_injected_limit(self, fake_db):
+        """Test that the row estimate comes from the query without the validator LIMIT"""
+        conn = fake_db([{"id": i} for i in range(10)], plan={"Total Cost": 900.0, "Plan Rows": 2_000_000})
+        conn.limited_plan = {"Node Type": "Limit", "Total Cost": 5.0, "Plan Rows": 100}
+
+        result = run("SELECT id FROM nf_itens ORDER BY id LIMIT 5000")
+
+        assert result["success"] is True
+        assert result["executed_query"].endswith("LIMIT 100")
+        assert result["plan"]["estimated_rows"] == 100
+        assert result["plan"]["original_estimated_rows"] == 2_000_000
+        explained = [sql for name, sql in conn.executed if sql.startswith("EXPLAIN")]
+        assert explained[-1] == "EXPLAIN (FORMAT JSON) SELECT id FROM nf_itens ORDER BY id"
+        named = [sql for name, sql in conn.executed if name is not None]
+        assert named == [result["executed_query"]]
+
+    def test_cost_of_limited_plan(self, fake_db):
+        """Test that the cost limit applies to the plan that runs (with LIMIT)"""
+        conn = fake_db([{"id": 1}], plan={"Total Cost": 5e9, "Plan Rows": 2_000_000})
+        conn.limited_plan = {"Node Type": "Limit", "Total Cost": 40.0, "Plan Rows": 100}
+
+        assert run("SELECT id FROM nf_itens")["success"] is True
+
+        conn.limited_plan = dict(self.HEAVY_PLAN)
+        assert run("SELECT id FROM nf_itens ORDER BY valor_total")["error_type"] == "cost_limit_exceeded"
+
+    def test_many_rows_rejected_in_reject_mode(self, fake_db, monkeypatch):
+        """Test that reject mode refuses queries over the row budget, not ones bounded by the agent"""
+        monkeypatch.setattr(settings, "sql_cost_guard_action", "reject")
+        conn = fake_db([], plan={"Total Cost": 900.0, "Plan Rows": 2_000_000})
+        conn.limited_plan = {"Node Type": "Limit", "Total Cost": 5.0, "Plan Rows": 100}
+
+        assert run("SELECT id FROM nf_itens")["error_type"] == "cost_limit_exceeded"
+        assert run("SELECT id FROM nf_itens LIMIT 10")["success"] is True
+
+    def test_guard_disabled_skips_explain(self, fake_db, monkeypatch):
+        """Test that no EXPLAIN runs when the guard is disabled"""
+        monkeypatch.setattr(settings, "sql_cost_guard_enabled", False)
+        conn = fake_db([{"id": 1}], plan=self.HEAVY_PLAN)
+
+        result = run("SELECT id FROM notas_fiscais")
+
+        assert result["success"] is True
+        assert not any(sql.startswith("EXPLAIN") for _, sql in conn.executed)
+
+
+class TestResultCache:
+    """Tests for the query result cache in front of the tool"""
+
+    def test_repeated_query_served_from_cache(self, fake_db):
+        """Test that equivalent SQL is answered without touching the database"""
+        conn = fake_db([{"total": 42}])
+        first = run("SELECT COUNT(*) AS total FROM notas_fiscais")
+        executed = len(conn.executed)
+
+        second = run("select   count(*) as total\nfrom notas_fiscais;")
+
+        assert "cached" not in first
+        assert second["cached"] is True
+        assert second["results"] == [{"total": 42}]
+        assert len(conn.executed) == executed
+
+    def test_import_invalidates_cache(self, fake_db):
+        """Test that a data version bump forces the query to run again"""
+        conn = fake_db([{"total": 42}])
+        run("SELECT COUNT(*) AS total FROM notas_fiscais")
+        conn.rows = [{"total": 43}]
+
+        bump_data_version()
+        result = run("SELECT COUNT(*) AS total FROM notas_fiscais")
+
+        assert "cached" not in result
+        assert result["results"] == [{"total": 43}]
+
+    def test_errors_not_cached(self, fake_db):
+        """Test that failed queries are retried on the next call"""
+        conn = fake_db([{"id": 1}])
+        conn.error = psycopg2.errors.LockNotAvailable("canceling statement due to lock timeout")
+        run("SELECT id FROM notas_fiscais")
+        conn.error = None
+
+        assert run("SELECT id FROM notas_fiscais")["success"] is True
+
+
+class SlowConnection(FakeConnection):
+    """Connection whose queries containing 'slow_table' block until cancelled"""
+
+    def __init__(self, rows):
+        super().__init__(rows)
+        self.cancel_event = threading.Event()
+        self.error = self._maybe_block
+
+    def _maybe_block(self):
+        if "slow_table" in self.executed[-1][1] and self.cancel_event.wait(timeout=5):
+            return psycopg2.errors.QueryCanceled("canceling statement due to user request")
+        return None
+
+    def cancel(self):
+        super().cancel()
+        self.cancel_event.set()
+
+
+class PerCallPool:
+    """Pool handing out a new connection per checkout"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.connections = []
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = SlowConnection(self.rows)
+        self.connections.append(conn)
+        yield conn
+
+
+class TestMultiSQLQueryTool:
+    """Tests for concurrent execution of independent queries"""
+
+    @pytest.fixture
+    def pool(self, monkeypatch):
+        pool = PerCallPool([{"total": 1}])
+        monkeypatch.setattr(sql_query_tool, "get_pool", lambda: pool)
+        monkeypatch.setattr(sql_query_tool, "get_query_cache", lambda: QueryResultCache())
+        monkeypatch.setattr(settings, "sql_cost_guard_enabled", False)
+        return pool
+
+    def test_all_results_returned_by_name(self, pool):
+        """Test that every query result comes back under its name"""
+        result = MultiSQLQueryTool().execute({
+            "icms": "SELECT SUM(valor_icms) AS total FROM notas_fiscais",
+            "notas": "SELECT COUNT(*) AS total FROM notas_fiscais",
+        })
+
+        assert result["success"] is True
+        assert set(result["results"]) == {"icms", "notas"}
+        assert all(r["results"] == [{"total": 1}] for r in result["results"].values())
+        assert len(pool.connections) == 2
+
+    def test_combined_timeout_cancels_slow_query(self, pool):
+        """Test that queries over the combined timeout are cancelled server-side"""
+        result = MultiSQLQueryTool().execute({
+            "rapida": "SELECT COUNT(*) AS total FROM notas_fiscais",
+            "lenta": "SELECT COUNT(*) AS total FROM slow_table",
+        }, timeout=0.3)
+
+        assert result["success"] is False
+        assert result["failed"] == ["lenta"]
+        assert result["results"]["rapida"]["success"] is True
+        assert result["results"]["lenta"]["error_type"] == "multi_query_timeout"
+        assert sum(conn.cancelled for conn in pool.connections) == 1
+
+    def test_invalid_query_reported_per_name(self, pool):
+        """Test that one invalid query does not fail the others"""
+        result = MultiSQLQueryTool().execute({
+            "ok": "SELECT COUNT(*) AS total FROM notas_fiscais",
+            "ruim": "DELETE FROM notas_fiscais",
+        })
+
+        assert result["failed"] == ["ruim"]
+        assert result["results"]["ok"]["success"] is True
+
+    def test_too_many_queries_rejected(self, pool, monkeypatch):
+        """Test that the per-call query limit is enforced"""
+        monkeypatch.setattr(settings, "sql_multi_query_max", 2)
+
+        result = MultiSQLQueryTool().execute({f"q{i}": "SELECT 1" for i in range(3)})
+
+        assert result["success"] is False
+        assert pool.connections == []
@@ -0,0 +1,115 @@
+"""Unit tests for the parser-based SQL validator"""
+
+import pytest
+
+from database.sql_validator import SQLValidationError, validate_select
+
+
+class TestAccepted:
+    """Tests for queries the validator must accept"""
+
+    def test_columns_containing_keywords(self):
+        """Test that columns like updated_at/created_at are not mistaken for keywords"""
+        result = validate_select("SELECT id, updated_at, created_at FROM notas_fiscais LIMIT 10")
+
+        assert result.sql == "SELECT id, updated_at, created_at FROM notas_fiscais LIMIT 10"
+        assert result.limit == 10
+        assert result.changes == []
+
+    def test_count_star_allowed_on_xml_table(self):
+        """Test that COUNT(*) is not treated as SELECT *"""
+        result = validate_select("SELECT COUNT(*) FROM notas_fiscais")
+
+        assert result.sql.startswith("SELECT COUNT(*) FROM notas_fiscais")
+
+    def test_star_allowed_on_other_tables(self):
+        """Test that SELECT * is only blocked where XML columns exist"""
+        validate_select("SELECT * FROM nf_itens")
+
+    def test_cte_select(self):
+        """Test that read-only CTEs are accepted"""
+        validate_select(
+            "WITH t AS (SELECT emitente_id, SUM(valor_total_nota) v FROM notas_fiscais GROUP BY 1) "
+            "SELECT * FROM t ORDER BY v DESC"
+        )
+
+
+class TestRejected:
+    """Tests for queries the validator must reject"""
+
+    @pytest.mark.parametrize("query", [
+        "SELECT 1; SELECT 2",
+        "DELETE FROM notas_fiscais",
+        "WITH d AS (DELETE FROM notas_fiscais RETURNING id) SELECT * FROM d",
+        "SELECT id FROM notas_fiscais FOR UPDATE",
+        "SELECT id INTO copia FROM notas_fiscais",
+        "SELECT pg_sleep(10)",
+        "SELECT nextval('notas_fiscais_id_seq')",
+        "SELECT pg_advisory_lock(1)",
+        "SELECT pg_try_advisory_lock_shared(1)",
+        "SELECT dblink_connect('host=outro')",
+        "SELECT lo_get(1234)",
+        "SELECT pg_terminate_backend(42)",
+        "SELECT set_config('statement_timeout', '0', false)",
+        "EXPLAIN SELECT 1",
+        "SELECT FROM WHERE",
+        "",
+    ])
+    def test_rejected(self, query):
+        """Test that writes, locks, side effects and invalid SQL are rejected"""
+        with pytest.raises(SQLValidationError):
+            validate_select(query)
+
+    @pytest.mark.parametrize("query", [
+        "SELECT * FROM notas_fiscais",
+        "SELECT nf.* FROM notas_fiscais nf JOIN empresas e ON e.id = nf.emitente_id",
+        "SELECT e.razao_social FROM empresas e WHERE e.id IN (SELECT * FROM notas_fiscais)",
+    ])
+    def test_star_on_xml_table(self, query):
+        """Test that SELECT * over notas_fiscais is rejected"""
+        with pytest.raises(SQLValidationError, match="notas_fiscais"):
+            validate_select(query)
+
+
+class TestLimit:
+    """Tests for LIMIT injection and clamping"""
+
+    def test_limit_injected(self):
+        """Test that a LIMIT is appended when missing"""
+        result = validate_select("SELECT id FROM nf_itens -- itens;", max_limit=50)
+
+        assert result.sql == "SELECT id FROM nf_itens -- itens\nLIMIT 50"
+        assert result.changes == ["LIMIT 50 adicionado"]
+        assert result.unbounded_sql == "SELECT id FROM nf_itens -- itens"
+
+    def test_limit_clamped(self):
+        """Test that a LIMIT above the maximum is reduced"""
+        result = validate_select("SELECT id FROM nf_itens LIMIT 500")
+
+        assert result.sql == "SELECT id FROM nf_itens LIMIT 100"
+        assert result.changes == ["LIMIT 500 reduzido para 100"]
+        assert result.unbounded_sql == "SELECT id FROM nf_itens"
+
+    @pytest.mark.parametrize("query, change", [
+        ("SELECT id FROM nf_itens LIMIT ALL", "LIMIT ALL reduzido para 100"),
+        ("SELECT id FROM nf_itens LIMIT 50 + 100", "LIMIT não literal (50 + 100) substituído por 100"),
+    ])
+    def test_non_numeric_limit_replaced(self, query, change):
+        """Test that LIMIT ALL and expressions are replaced, each with its own message"""
+        result = validate_select(query)
+
+        assert result.limit == 100
+        assert result.changes == [change]
+
+    def test_fetch_first_clamped(self):
+        """Test that FETCH FIRST is treated as a LIMIT"""
+        result = validate_select("SELECT id FROM nf_itens FETCH FIRST 1000 ROWS ONLY")
+
+        assert result.limit == 100
+        assert "1000" not in result.sql
+
+    def test_union_gets_outer_limit(self):
+        """Test that set operations are limited as a whole"""
+        result = validate_select("SELECT id FROM nf_itens UNION SELECT id FROM nf_transporte")
+
+        assert result.sql.endswith("\nLIMIT 100")
@@ -0,0 +1,89 @@
+"""Unit tests for compressed XML storage"""
+
+import pytest
+
+from config import settings
+from database import xml_storage
+from database.xml_storage import (
+    encode_bytea,
+    decode_bytea,
+    read_stored_xml,
+    CODEC_ZSTD
+)
+
+
+XML = '<?xml version="1.0" encoding="UTF-8"?><nfeProc><NFe>' + "<det><prod>x</prod></det>" * 50 + "</NFe></nfeProc>"
+
+
+class TestBytea:
+    """Tests for BYTEA hex encoding"""
+
+    def test_roundtrip(self):
+        """Test that encoded bytes decode back unchanged"""
+        data = b"\x00\x01zstd\xff"
+        encoded = encode_bytea(data)
+
+        assert encoded.startswith("\\x")
+        assert decode_bytea(encoded) == data
+
+
+class TestReadStoredXml:
+    """Tests for reading XML back from a notas_fiscais row"""
+
+    def test_plain_text_row(self):
+        """Test that uncompressed rows return xml_completo"""
+        assert read_stored_xml({"xml_completo": XML, "xml_compactado": None}) == XML
+
+    def test_row_without_xml(self):
+        """Test that rows without XML return None"""
+        assert read_stored_xml({"xml_completo": None, "xml_compactado": None}) is None
+
+    def test_default_compressor_uses_configured_dictionary(self, monkeypatch):
+        """Test that dictionary notes decode with compression disabled (no importer compressor)"""
+        created = []
+
+        class Compressor:
+            def __init__(self, level=10, dict_path=None):
+                created.append(dict_path)
+
+            def decompress(self, data, codec):
+                return XML.encode("utf-8")
+
+        monkeypatch.setattr(settings, "xml_compression", "none")
+        monkeypatch.setattr(settings, "xml_zstd_dict_path", "/dados/nfe.dict")
+        monkeypatch.setattr(xml_storage, "XMLCompressor", Compressor)
+        row = {"xml_completo": None, "xml_compactado": "\\x00", "xml_compressao": "zstd-dict"}
+
+        assert read_stored_xml(row) == XML
+        assert created == ["/dados/nfe.dict"]
+
+
+class TestXMLCompressor:
+    """Tests for zstd compression (requires zstandard)"""
+
+    @pytest.fixture(autouse=True)
+    def _require_zstd(self):
+        pytest.importorskip("zstandard")
+
+    def test_compressed_row_roundtrip(self):
+        """Test that a compressed row decompresses to the original XML"""
+        from database.xml_storage import XMLCompressor
+
+        compressor = XMLCompressor()
+        compressed = compressor.compress(XML.encode("utf-8"))
+        row = {
+            "xml_completo": None,
+            "xml_compactado": encode_bytea(compressed),
+            "xml_compressao": CODEC_ZSTD
+        }
+
+        assert len(compressed) < len(XML) / 5
+        assert read_stored_xml(row) == XML
+
+    def test_dictionary_codec_requires_dictionary(self):
+        """Test that dictionary-compressed rows fail clearly without the dictionary"""
+        from database.xml_storage import XMLCompressor, CODEC_ZSTD_DICT
+
+        row = {"xml_completo": None, "xml_compactado": "\\x00", "xml_compressao": CODEC_ZSTD_DICT}
+        with pytest.raises(ValueError):
+            read_stored_xml(row, XMLCompressor())
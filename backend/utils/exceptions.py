@@ -137,6 +137,18 @@ class DatabaseException(AppException):
         )
 
 
+class DatabaseConnectionException(AppException):
+    """Exception for database connection errors (connect failures, pool exhaustion)"""
+    
+    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
+        super().__init__(
+            code=ErrorCode.DATABASE_CONNECTION_ERROR,
+            message=message,
+            details=details,
+            status_code=503
+        )
+
+
 class ValidationException(AppException):
     """Exception for validation errors"""
     
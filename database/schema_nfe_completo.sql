@@ -174,6 +174,8 @@ CREATE TABLE notas_fiscais (
     -- ===== XML e Assinatura =====
     xml_completo TEXT,
     xml_assinado TEXT,
+    xml_compactado BYTEA,  -- XML original compactado (zstd), quando xml_completo é NULL
+    xml_compressao VARCHAR(20),  -- zstd | zstd-dict
     
     -- ===== Responsável Técnico =====
     resp_tecnico_cnpj VARCHAR(14),
@@ -776,6 +778,38 @@ CREATE TRIGGER update_notas_fiscais_updated_at
     BEFORE UPDATE ON notas_fiscais
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- ============================================================================
+-- RESERVA DE IDS (IMPORTAÇÃO EM LOTE)
+-- ============================================================================
+
+-- Reserva IDs das sequences SERIAL em uma única chamada (POST /rpc/reservar_ids).
+-- O importador grava itens/transporte com os IDs reservados e envia impostos
+-- e volumes em lote, sem esperar o RETURNING de cada linha.
+-- Retorna: {"nf_itens": [101, 102, ...], "nf_transporte": [55]}
+CREATE OR REPLACE FUNCTION reservar_ids(p_tabelas TEXT[], p_quantidades INTEGER[])
+RETURNS JSONB AS $$
+DECLARE
+    resultado JSONB := '{}'::jsonb;
+    i INTEGER;
+BEGIN
+    FOR i IN 1 .. COALESCE(array_length(p_tabelas, 1), 0) LOOP
+        IF p_tabelas[i] NOT IN ('notas_fiscais', 'nf_itens', 'nf_transporte') THEN
+            RAISE EXCEPTION 'Tabela não permitida para reserva de IDs: %', p_tabelas[i];
+        END IF;
+
+        IF p_quantidades[i] > 0 THEN
+            resultado := resultado || jsonb_build_object(
+                p_tabelas[i],
+                (SELECT jsonb_agg(nextval(pg_get_serial_sequence(p_tabelas[i], 'id')))
+                   FROM generate_series(1, p_quantidades[i]))
+            );
+        END IF;
+    END LOOP;
+
+    RETURN resultado;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ============================================================================
 -- VIEWS ÚTEIS
 -- ============================================================================
@@ -868,6 +902,10 @@ ALTER TABLE nf_itens_issqn ALTER COLUMN valor_bc DROP NOT NULL;
 ALTER TABLE nf_itens_issqn ALTER COLUMN aliquota DROP NOT NULL;
 ALTER TABLE nf_itens_issqn ALTER COLUMN valor_issqn DROP NOT NULL;
 
+-- XML compactado - bancos criados antes das colunas xml_compactado/xml_compressao
+ALTER TABLE notas_fiscais ADD COLUMN IF NOT EXISTS xml_compactado BYTEA;
+ALTER TABLE notas_fiscais ADD COLUMN IF NOT EXISTS xml_compressao VARCHAR(20);
+
 -- ============================================================================
 -- FIM DO SCHEMA
 -- ============================================================================